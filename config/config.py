@@ -8,6 +8,60 @@ SENDER_ID = "SENDERID"
 RECEIVER_ID = "RECEIVERID"
 ANONYMIZE_DATA = True
 BATCH_SIZE = 100  # Process in batches to manage memory
+SEGMENT_CACHE_MAX_ENTRIES = 100000  # Max pre-rendered provider/member segment blocks kept in memory
+
+# X12 interchange delimiters
+X12_SEGMENT_TERMINATOR = "~"
+X12_ELEMENT_SEPARATOR = "*"
+X12_COMPONENT_SEPARATOR = ":"  # Also written as ISA16
+X12_LINE_SEPARATOR = "\n"  # Written between segments for readability
+X12_BUFFER_SIZE = 1 << 20  # Bytes buffered before each write
+
+# X12 envelope limits (None = no limit: one ST/SE set, one GS/GE group, one file)
+X12_MAX_RECORDS_PER_SET = None  # Members, claims or payments per ST/SE transaction set
+X12_MAX_SETS_PER_GROUP = None  # Transaction sets per GS/GE functional group
+X12_MAX_BYTES_PER_FILE = None  # Approximate uncompressed bytes per file; each file is a complete interchange
+X12_SUBSET_RECORDS_PER_SET = 10000  # 835 set size in shards/partitions, where each BPR total is summed per set
+X12_SUBSET_CONTROL_NUMBERS = 1000  # ISA13 numbers reserved per shard/partition file, for its byte-capped parts
+
+# Partitioned output
+OUTPUT_SHARDS = None  # Member-hash shards per transaction type (None = one file)
+PARTITION_MAX_OPEN_FILES = 64  # Date-partition writers kept open at once (least recently used are closed)
+PARTITION_BUFFER_RECORDS = 1000  # Records buffered per date partition before they are written
+PARTITION_MAX_BUFFERED_RECORDS = 100000  # Records buffered across all date partitions
+
+# External merge sort (sorting existing X12 files by member and service date)
+EXTERNAL_SORT_RUN_RECORDS = 100000  # Members, claims or payments sorted in memory per run before spilling to disk
+EXTERNAL_SORT_MAX_FAN_IN = 64  # Runs merged at once (spilled runs open at the same time)
+
+# Manifest sidecars (counts, SHA-256, date ranges, totals) computed while each file is written
+WRITE_MANIFEST = True
+MANIFEST_FILENAME = "_manifest.json"  # One per output directory, with an entry per file
+WRITE_INVALID_INDEX = True  # Ground truth of injected invalid records in _<file>.invalid.csv next to each file
+
+# Output cache (src/edi/output_cache.py) of seeded and record-space generator calls
+OUTPUT_CACHE_DIR = None  # Cache directory used when a call passes no cache (None = no caching)
+OUTPUT_CACHE_MAX_BYTES = 10 * 1024 ** 3  # Least recently used entries are evicted beyond this size
+OUTPUT_CACHE_LINK = True  # Hardlink cached files into place (False = copy; copies are made across file systems)
+
+# Data-quality validator (src/edi/validator.py)
+VALIDATOR_BATCH_RECORDS = 100000  # Records whose rules are evaluated together as NumPy arrays
+VALIDATOR_CLAIM_ID_PATTERN = r"^CLM[0-9]{10}$"  # 835 claim IDs that can belong to a submitted claim
+
+# Cross-file referential integrity checks (src/edi/integrity.py)
+INTEGRITY_BLOOM_MIN_KEYS = 100000000  # Key populations this large use a Bloom filter instead of 8-byte hashes
+INTEGRITY_BLOOM_FALSE_POSITIVE_RATE = 0.001  # Fraction of orphans a Bloom filter may miss
+
+# Output compression (codec is inferred from the file extension unless given explicitly)
+OUTPUT_COMPRESSION_LEVEL = None  # None = codec default (gzip 6, bz2 9, lzma 6, zstd 3, lz4 0)
+OUTPUT_COMPRESSION_BLOCK_SIZE = 1 << 20  # Bytes buffered before each call into the compressor
+
+# Columnar (Parquet / Arrow IPC) output, requires pyarrow
+COLUMNAR_ROW_GROUP_SIZE = 64 * 1024  # Rows buffered per row group / record batch
+PARQUET_COMPRESSION = "snappy"  # Parquet's internal codec: snappy, zstd, gzip, lz4 or none
+
+# Parser input (compressed inputs are detected from the extension or magic bytes)
+PARSER_READ_CHUNK_SIZE = 1 << 20  # Characters decoded per read while splitting segments
 
 # Database Configuration
 # Production database (commented out)
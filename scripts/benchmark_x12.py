@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: compiled X12 segment templates vs str.format
+
+Renders the 837 claim-level segments (CLM, DTP, HI, LX, SV1, REF) the way
+the writers used to (keyword str.format / f-strings, strftime per value)
+and the way X12ClaimSink does with the shared serializer in src/edi/x12.py
+(bound %-format templates, format_amount / format_date).
+"""
+
+import sys
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.edi.x12 import default_serializer, format_amount, format_date
+
+
+def _make_rows(n, rng):
+    start = date(2024, 1, 1)
+    offsets = rng.integers(0, 700, size=n).tolist()
+    amounts = np.round(rng.uniform(50, 5000, size=n), 2).tolist()
+    return [
+        (f"CLM{i:010d}", amounts[i], start + timedelta(days=offsets[i]), "E11.9", "99213", "25", "11")
+        for i in range(n)
+    ]
+
+
+def render_str_format(rows):
+    """Segments rendered the way the writers did before the shared serializer"""
+    out = []
+    for claim_id, amount, service_date, diag, procedure, modifier, pos in rows:
+        out.append("CLM*{claim_id}*{billed_amount}***{service_type}:{modifier}*Y*A*Y*Y~".format(
+            claim_id=claim_id, billed_amount=amount, service_type="B", modifier=modifier
+        ))
+        out.append("DTP*472*D8*{service_date}~".format(service_date=service_date.strftime("%Y%m%d")))
+        out.append(f"HI*ABK:{diag}~")
+        out.append(f"LX*{1}~")
+        out.append(f"SV1*HC:{procedure}{':' + modifier if modifier else ''}*{amount}*UN*1***1~")
+        out.append(f"REF*6R*{pos}~")
+    return out
+
+
+def render_compiled(rows):
+    """Segments rendered with bound templates, as X12ClaimSink renders them"""
+    x12 = default_serializer
+    clm_segment = x12.renderer('CLM')
+    dtp_segment = x12.renderer('DTP')
+    hi_segment = x12.renderer('HI')
+    lx_segment = x12.renderer('LX')
+    sv1_segment = x12.renderer('SV1')
+    ref_segment = x12.renderer('REF')
+    composite = x12.composite
+
+    out = []
+    for claim_id, amount, service_date, diag, procedure, modifier, pos in rows:
+        amount = format_amount(amount)
+        out.extend((
+            clm_segment(claim_id, amount, "B", modifier),
+            dtp_segment("472", format_date(service_date)),
+            hi_segment(diag),
+            lx_segment(1),
+            sv1_segment(composite("HC", procedure, modifier), amount),
+            ref_segment("6R", pos),
+        ))
+    return out
+
+
+def _time(func, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(num_claims=100000, repeat=3):
+    """
+    Time both renderers and print segments/second
+
+    Args:
+        num_claims: Number of claims to render
+        repeat: Runs per renderer (best is reported)
+    """
+    rows = _make_rows(num_claims, np.random.default_rng(0))
+    segments = len(render_compiled(rows[:1])) * num_claims
+
+    baseline = _time(render_str_format, rows, repeat)
+    compiled = _time(render_compiled, rows, repeat)
+
+    print(f"X12 segment rendering, {num_claims} claims ({segments} segments), best of {repeat}")
+    print(f"  str.format / f-strings : {baseline:8.3f}s  {segments / baseline:12,.0f} segments/s")
+    print(f"  compiled templates     : {compiled:8.3f}s  {segments / compiled:12,.0f} segments/s")
+    print(f"  speedup                : {baseline / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark X12 segment rendering')
+    parser.add_argument('--claims', type=int, default=100000,
+                        help='Number of claims to render (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per renderer (default: 3)')
+    args = parser.parse_args()
+
+    run_benchmark(args.claims, args.repeat)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Check that 837 claims refer to 834 members and 835 payments to 837 claims
+
+Examples:
+    # Members, enrollments and claims across one generated feed
+    python scripts/check_integrity.py --enrollments data/edi_834.csv --claims data/edi_837.csv \\
+        --payments data/edi_835.csv --report out/orphans.csv
+
+    # Gate a partner's remittances: exit with status 1 if any pays an unknown claim
+    python scripts/check_integrity.py --claims 'incoming/claims_*.txt.gz' \\
+        --payments 'incoming/remits_*.txt.gz' --max-orphans 0
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.edi.integrity import check_integrity
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Find 837/835 records referring to keys missing from the other files')
+    parser.add_argument('--enrollments', default=None, help='834 file or glob')
+    parser.add_argument('--claims', required=True, help='837 file or glob')
+    parser.add_argument('--payments', default=None, help='835 file or glob')
+    parser.add_argument('--report', default=None,
+                        help='Write one CSV row per orphan (transaction_type, record, key, issue_type, reference)')
+    parser.add_argument('--bloom-min-keys', type=int, default=None,
+                        help='Use Bloom filters for key populations at least this large (per _manifest.json)')
+    parser.add_argument('--max-orphans', type=int, default=None,
+                        help='Exit with status 1 if more orphans than this are found')
+
+    args = parser.parse_args(argv)
+    if args.enrollments is None and args.payments is None:
+        parser.error('give --enrollments, --payments or both')
+
+    result = check_integrity(args.enrollments, args.claims, args.payments, args.report,
+                             bloom_min_keys=args.bloom_min_keys)
+    counts = ', '.join(f"{count} EDI {transaction_type}" for transaction_type, count in result['records'].items())
+    print(f"Checked {counts} records")
+    for name, key_set in result['key_sets'].items():
+        print(f"  {name}: {key_set['keys']} keys in a {key_set['kind']} set of {key_set['bytes']} bytes")
+    for issue_type, count in result['orphans'].items():
+        print(f"  {issue_type}: {count}")
+    for issue_type in result['unchecked']:
+        print(f"  {issue_type}: not checked (no enrollment IDs in the input)")
+    if result['report_file']:
+        print(f"Orphans written to {result['report_file']}")
+
+    total = sum(result['orphans'].values())
+    if args.max_orphans is not None and total > args.max_orphans:
+        print(f"FAILED: {total} orphans, more than {args.max_orphans}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
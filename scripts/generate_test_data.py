@@ -13,6 +13,7 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from src.edi.compression import get_codec
 from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835
 
 
@@ -22,7 +23,10 @@ def generate_test_data(
     num_members: int = 50,
     num_claims: int = 100,
     num_payments: int = 80,
-    formats: list = None
+    formats: list = None,
+    compression: str = None,
+    partition_by_date: bool = False,
+    seed: int = None
 ):
     """
     Generate test data files organized by source system and date
@@ -34,6 +38,11 @@ def generate_test_data(
         num_claims: Number of claim records
         num_payments: Number of payment records
         formats: List of formats to generate ['csv', 'x12'] (default: both)
+        compression: Codec for compressed output, e.g. 'gzip' (default: uncompressed)
+        partition_by_date: Partition by each record's own date instead of date_str:
+                           claims and payments by service date, enrollments by
+                           coverage effective date
+        seed: Integer seed for a reproducible run (default: unseeded)
     """
     # Default values
     if output_dir is None:
@@ -52,7 +61,10 @@ def generate_test_data(
     print(f"Generating test data for claim-management-system")
     print(f"=" * 60)
     print(f"Output directory: {output_dir}")
-    print(f"Date partition: dt={date_str}")
+    if partition_by_date:
+        print(f"Date partitions: dt=<service date> (claims, payments), dt=<effective date> (enrollment)")
+    else:
+        print(f"Date partition: dt={date_str}")
     print(f"Formats: {formats}")
     print(f"Records: {num_members} members, {num_claims} claims, {num_payments} payments")
     print(f"=" * 60)
@@ -63,60 +75,77 @@ def generate_test_data(
     # payments/dt=YYYY-MM-DD/
     
     source_systems = ['enrollment', 'claims', 'payments']
+    # Partitioned output creates its dt= directories as records arrive
+    partition = '' if partition_by_date else f'dt={date_str}'
     for source_system in source_systems:
-        dir_path = os.path.join(output_dir, source_system, f'dt={date_str}')
+        dir_path = os.path.join(output_dir, source_system, partition)
         os.makedirs(dir_path, exist_ok=True)
         print(f"Created directory: {dir_path}")
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
-    # Generate files for each format
-    for fmt in formats:
-        ext = 'csv' if fmt == 'csv' else 'txt'
-        
-        print(f"\n--- Generating {fmt.upper()} format files ---")
-        
-        # 1. Generate 834 (Enrollment)
-        enrollment_file = os.path.join(
-            output_dir, 'enrollment', f'dt={date_str}',
-            f'enrollment_834_{timestamp}.{ext}'
-        )
-        print(f"\nGenerating 834 (Enrollment): {enrollment_file}")
-        generate_edi_834(
-            num_members=num_members,
-            output_file=enrollment_file,
-            format=fmt,
-            business_size="small"
-        )
-        print(f"✓ Created: {enrollment_file}")
-        
-        # 2. Generate 837 (Claims)
-        claims_file = os.path.join(
-            output_dir, 'claims', f'dt={date_str}',
-            f'claims_837_{timestamp}.{ext}'
-        )
-        print(f"\nGenerating 837 (Claims): {claims_file}")
-        generate_edi_837(
-            num_claims=num_claims,
-            output_file=claims_file,
-            format=fmt,
-            business_size="small"
-        )
-        print(f"✓ Created: {claims_file}")
-        
-        # 3. Generate 835 (Payments)
-        payments_file = os.path.join(
-            output_dir, 'payments', f'dt={date_str}',
-            f'payments_835_{timestamp}.{ext}'
-        )
-        print(f"\nGenerating 835 (Payments): {payments_file}")
-        generate_edi_835(
-            num_payments=num_payments,
-            output_file=payments_file,
-            format=fmt,
-            business_size="small"
-        )
-        print(f"✓ Created: {payments_file}")
+    # Each transaction is drawn once and written in every format, so the
+    # CSV and X12 files describe the same members, claims and payments
+    suffix = get_codec(compression).extension if compression else ''
+
+    def output_files(source_system, prefix):
+        return {
+            fmt: os.path.join(
+                output_dir, source_system, partition,
+                f'{prefix}_{timestamp}.{"csv" if fmt == "csv" else "txt"}{suffix}'
+            )
+            for fmt in formats
+        }
+
+    def report_created(files, results):
+        for fmt, path in files.items():
+            if partition_by_date:
+                result = results[fmt]
+                print(f"✓ Created: {len(result['output_files'])} files in {result['partitions']} partitions "
+                      f"under {os.path.dirname(path)}")
+            else:
+                print(f"✓ Created: {path}")
+
+    print(f"\n--- Generating {'/'.join(fmt.upper() for fmt in formats)} format files ---")
+
+    # 1. Generate 834 (Enrollment)
+    enrollment_files = output_files('enrollment', 'enrollment_834')
+    print(f"\nGenerating 834 (Enrollment): {', '.join(enrollment_files.values())}")
+    results = generate_edi_834(
+        num_members=num_members,
+        output_file=enrollment_files,
+        format=formats,
+        business_size="small",
+        partition_by_date=partition_by_date,
+        seed=seed
+    )
+    report_created(enrollment_files, results)
+
+    # 2. Generate 837 (Claims)
+    claims_files = output_files('claims', 'claims_837')
+    print(f"\nGenerating 837 (Claims): {', '.join(claims_files.values())}")
+    results = generate_edi_837(
+        num_claims=num_claims,
+        output_file=claims_files,
+        format=formats,
+        business_size="small",
+        partition_by_date=partition_by_date,
+        seed=seed
+    )
+    report_created(claims_files, results)
+
+    # 3. Generate 835 (Payments)
+    payments_files = output_files('payments', 'payments_835')
+    print(f"\nGenerating 835 (Payments): {', '.join(payments_files.values())}")
+    results = generate_edi_835(
+        num_payments=num_payments,
+        output_file=payments_files,
+        format=formats,
+        business_size="small",
+        partition_by_date=partition_by_date,
+        seed=seed
+    )
+    report_created(payments_files, results)
     
     print(f"\n" + "=" * 60)
     print(f"✓ All test data generated successfully!")
@@ -155,6 +184,14 @@ if __name__ == "__main__":
                         help='Output format (default: both)')
     parser.add_argument('--output', type=str, default=None,
                         help='Output directory (default: data/pipeline_test)')
+    parser.add_argument('--compression', type=str, default=None,
+                        choices=['gzip', 'bz2', 'lzma', 'zstd', 'lz4', 'fast'],
+                        help='Write compressed files with this codec (default: uncompressed)')
+    parser.add_argument('--partition-by-date', action='store_true',
+                        help='Partition by service date (claims, payments) and effective date '
+                             '(enrollment) instead of one --date partition')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for reproducible data (default: unseeded)')
     
     args = parser.parse_args()
     
@@ -171,6 +208,9 @@ if __name__ == "__main__":
         num_members=args.members,
         num_claims=args.claims,
         num_payments=args.payments,
-        formats=formats
+        formats=formats,
+        compression=args.compression,
+        partition_by_date=args.partition_by_date,
+        seed=args.seed
     )
 
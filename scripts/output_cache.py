@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Inspect and prune the generator's output cache
+
+Examples:
+    # Entries, least recently used first
+    python scripts/output_cache.py data/cache list
+
+    # Evict down to 2 GiB and drop entries unused for a week
+    python scripts/output_cache.py data/cache prune --max-bytes 2147483648 --max-age-days 7
+
+    # Remove every entry
+    python scripts/output_cache.py data/cache clear
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config.config import OUTPUT_CACHE_DIR
+from src.edi.output_cache import OutputCache
+
+
+def _describe(entry):
+    description = entry.get('description') or {}
+    formats = ', '.join(f"{layout[0]}:{layout[2]}" for layout in description.get('layout', []))
+    last_used = datetime.fromtimestamp(entry['last_used']).strftime('%Y-%m-%d %H:%M:%S')
+    return (f"{entry['key'][:12]}  {description.get('transaction_type', '?')}  {entry['bytes']:>12,} bytes  "
+            f"{len(entry['files']):>4} files  {entry['hits']:>4} hits  last used {last_used}  {formats}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect and prune the generator output cache')
+    parser.add_argument('directory', nargs='?', default=OUTPUT_CACHE_DIR,
+                        help='Cache directory (default: OUTPUT_CACHE_DIR)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='List entries, least recently used first')
+    prune = commands.add_parser('prune', help='Evict least recently used entries')
+    prune.add_argument('--max-bytes', type=int, default=None, help='Evict until the cache holds at most this many bytes')
+    prune.add_argument('--max-age-days', type=float, default=None, help='Evict entries unused for this many days')
+    commands.add_parser('clear', help='Remove every entry')
+
+    args = parser.parse_args(argv)
+    if not args.directory:
+        parser.error('no cache directory given and OUTPUT_CACHE_DIR is not set')
+    cache = OutputCache(args.directory, max_bytes=None)
+
+    if args.command == 'list':
+        entries = cache.entries()
+        for entry in entries:
+            print(_describe(entry))
+        print(f"{len(entries)} entries, {sum(entry['bytes'] for entry in entries):,} bytes in {cache.directory}")
+        return 0
+
+    if args.command == 'clear':
+        evicted = cache.clear()
+    else:
+        max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+        evicted = cache.prune(args.max_bytes, max_age)
+    print(f"Evicted {len(evicted)} entries ({sum(entry['bytes'] for entry in evicted):,} bytes); "
+          f"{cache.size():,} bytes remain in {cache.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Reconcile an 835 remittance with the 837 claims it pays
+
+Examples:
+    # Discrepancy report plus per-provider and per-day totals
+    python scripts/reconcile_edi.py data/edi_837.txt data/edi_835.txt --report out/discrepancies.csv \\
+        --by-provider out/by_provider.csv --by-day out/by_day.csv
+
+    # Gate a payment run: exit with status 1 on any discrepancy
+    python scripts/reconcile_edi.py 'incoming/claims_*.csv.gz' 'incoming/remits_*.csv.gz' --max-discrepancies 0
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.edi.reconciliation import reconcile
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reconcile an 835 with the 837 it pays')
+    parser.add_argument('claims', help='837 file or glob (X12 or CSV; .gz/.bz2/.xz are decompressed)')
+    parser.add_argument('payments', help='835 file or glob')
+    parser.add_argument('--report', default=None,
+                        help='Write one CSV row per discrepancy (transaction_type, record, claim_id, issue_type, '
+                             'expected, actual)')
+    parser.add_argument('--by-provider', default=None, help='Write per-provider totals as CSV')
+    parser.add_argument('--by-day', default=None, help='Write per-day-of-service totals as CSV')
+    parser.add_argument('--max-discrepancies', type=int, default=None,
+                        help='Exit with status 1 if more discrepancies than this are found')
+
+    args = parser.parse_args(argv)
+    result = reconcile(args.claims, args.payments, args.report, args.by_provider, args.by_day)
+    print(f"Reconciled {result['payments']} payments with {result['claims']} claims: "
+          f"{result['matched_payments']} matched, {result['unpaid_claims']} claims unpaid")
+    for name, amount in result['totals'].items():
+        print(f"  {name}: {amount}")
+    print(f"  {len(result['by_provider'])} providers, {len(result['by_day'])} days of service")
+    for issue_type, count in result['discrepancies'].items():
+        print(f"  {issue_type}: {count}")
+    for issue_type in result['unchecked']:
+        print(f"  {issue_type}: not checked (no BPR in CSV)")
+    for label, path in (('Discrepancies', result['report_file']), ('Provider totals', result['provider_file']),
+                        ('Daily totals', result['daily_file'])):
+        if path:
+            print(f"{label} written to {path}")
+
+    total = sum(result['discrepancies'].values())
+    if args.max_discrepancies is not None and total > args.max_discrepancies:
+        print(f"FAILED: {total} discrepancies, more than {args.max_discrepancies}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Split, sample or sort an existing X12 834/837/835 file without loading it
+
+Examples:
+    # 10,000 claims per file: edi_837-0001.txt, edi_837-0002.txt, ...
+    python scripts/split_x12.py split data/samples/edi_837_large_sample.txt out/edi_837.txt --units 10000
+
+    # 500 payments, stratified by claim status (CLP02), reproducible
+    python scripts/split_x12.py sample data/samples/edi_835_large_sample.txt out/sample_835.txt -k 500 \\
+        --stratify CLP02 --seed 42
+
+    # Claims ordered by member and service date (external merge sort)
+    python scripts/split_x12.py sort data/samples/edi_837_large_sample.txt out/sorted_837.txt
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.edi.splitter import sample_x12, sort_x12, split_x12
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Split, sample or sort X12 834/837/835 files without loading them')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    split = commands.add_parser('split', help='Split into valid interchanges of N members/claims/payments')
+    split.add_argument('input', nargs='+', help='Input file(s) or glob (.gz/.bz2/.xz are decompressed)')
+    split.add_argument('output', help='Base output path; parts are numbered -0001, -0002, ...')
+    split.add_argument('--units', type=int, required=True, help='Members, claims or payments per file')
+
+    sample = commands.add_parser('sample', help='Draw a random or stratified sample into one interchange')
+    sample.add_argument('input', nargs='+', help='Input file(s) or glob (.gz/.bz2/.xz are decompressed)')
+    sample.add_argument('output', help='Output path')
+    sample.add_argument('-k', type=int, required=True, help='Sample size')
+    sample.add_argument('--stratify', default=None,
+                        help="Element to stratify by, e.g. CLP02 or CLM05-1 ('default' = per transaction)")
+    sample.add_argument('--per-stratum', action='store_true', help='Take k from every stratum')
+    sample.add_argument('--seed', type=int, default=None, help='Random seed')
+
+    sort = commands.add_parser('sort', help='Sort members/claims/payments by member and date into one interchange')
+    sort.add_argument('input', nargs='+', help='Input file(s) or glob (.gz/.bz2/.xz are decompressed)')
+    sort.add_argument('output', help='Output path')
+    sort.add_argument('--run-size', type=int, default=None,
+                      help='Units sorted in memory before spilling a run to disk (default: from config)')
+    sort.add_argument('--temp-dir', default=None, help='Directory for spilled runs (default: system temp)')
+
+    for command in (split, sample, sort):
+        command.add_argument('--compression', default=None, choices=['gzip', 'bz2', 'lzma', 'zstd', 'lz4', 'fast'],
+                             help='Compress output with this codec (default: from the output extension)')
+
+    args = parser.parse_args(argv)
+    inputs = args.input[0] if len(args.input) == 1 else args.input
+
+    if args.command == 'split':
+        outputs = split_x12(inputs, args.output, args.units, compression=args.compression)
+        print(f"Wrote {len(outputs)} files:")
+        for path in outputs:
+            print(f"  {path}")
+    elif args.command == 'sort':
+        result = sort_x12(
+            inputs, args.output, compression=args.compression, run_size=args.run_size, temp_dir=args.temp_dir
+        )
+        print(f"Sorted {result['units']} units into {result['output_file']} "
+              f"({result['spilled_runs']} runs spilled to disk)")
+    else:
+        allocation = 'per_stratum' if args.per_stratum else 'proportional'
+        result = sample_x12(
+            inputs, args.output, args.k, stratify_by=args.stratify, allocation=allocation,
+            seed=args.seed, compression=args.compression
+        )
+        print(f"Sampled {result['sampled_units']} of {result['total_units']} units into {result['output_file']}")
+        if args.stratify:
+            for stratum, counts in sorted(result['strata'].items()):
+                print(f"  {stratum or '(empty)'}: {counts['sampled']} of {counts['units']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Check 834/837/835 files (X12 or CSV) for the data problems in INVALID_DATA.md
+
+Examples:
+    # Per-rule counts, and one report row per violation
+    python scripts/validate_edi.py data/samples/edi_837_large_sample.csv --report out/edi_837_violations.csv
+
+    # Gate a partner file: exit with status 1 if more than 1% of its claims are invalid
+    python scripts/validate_edi.py incoming/claims_*.txt.gz --max-invalid-rate 0.01
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.edi.validator import validate_file
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check 834/837/835 files for data-quality rule violations')
+    parser.add_argument('input', nargs='+', help='Input file(s) or glob (.gz/.bz2/.xz are decompressed)')
+    parser.add_argument('--report', default=None, help='Write one CSV row per violation (record, key, issue_type)')
+    parser.add_argument('--format', default=None, choices=['x12', 'csv'],
+                        help='Input format (default: from the file extension)')
+    parser.add_argument('--as-of', default=None,
+                        help='Date (YYYY-MM-DD) effective and service dates may not be after (default: today)')
+    parser.add_argument('--max-invalid-rate', type=float, default=None,
+                        help='Exit with status 1 if the rate of invalid records is above this')
+
+    args = parser.parse_args(argv)
+    inputs = args.input[0] if len(args.input) == 1 else args.input
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else None
+
+    result = validate_file(inputs, args.report, format=args.format, as_of=as_of)
+    print(f"Checked {result['records']} EDI {result['transaction_type']} {result['format'].upper()} records: "
+          f"{result['invalid_records']} invalid ({result['invalid_rate']:.2%})")
+    for rule, count in result['violations'].items():
+        print(f"  {rule}: {count}")
+    for rule in result['unchecked']:
+        print(f"  {rule}: not checked (no such field in {result['format'].upper()})")
+    if result['report_file']:
+        print(f"Violations written to {result['report_file']}")
+
+    if args.max_invalid_rate is not None and result['invalid_rate'] > args.max_invalid_rate:
+        print(f"FAILED: invalid rate {result['invalid_rate']:.2%} is above {args.max_invalid_rate:.2%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,21 +9,18 @@ Supports two output formats:
 
 from .generator import generate_edi_834, generate_edi_837, generate_edi_835, generate_edi_files
 
-# Lazy import for parser to avoid mysql.connector dependency if not needed
-try:
-    from .parser import EDIParser
-    __all__ = [
-        'generate_edi_834',
-        'generate_edi_837',
-        'generate_edi_835',
-        'generate_edi_files',
-        'EDIParser'
-    ]
-except ImportError:
-    __all__ = [
-        'generate_edi_834',
-        'generate_edi_837',
-        'generate_edi_835',
-        'generate_edi_files'
-    ]
+__all__ = [
+    'generate_edi_834',
+    'generate_edi_837',
+    'generate_edi_835',
+    'generate_edi_files',
+    'EDIParser'
+]
 
+
+def __getattr__(name):
+    # Lazy import for parser so importing the generators does not load it
+    if name == 'EDIParser':
+        from .parser import EDIParser
+        return EDIParser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,247 @@
+"""
+Columnar Parquet and Arrow IPC output
+
+The columnar sinks write the CSV schemas documented in CSV_FORMAT.md as
+typed columns: dates are date32, amounts are decimal(12, 2), and
+low-cardinality codes (state, plan, claim status, place of service, ...)
+are dictionary encoded. Rows are built by the CSV sinks' row() methods, so
+every format carries the same fields, and are buffered until a row group
+is full; each row group is converted column by column and written as one
+batch.
+
+pyarrow is optional. It is imported when the first columnar sink is
+created, and a clear ImportError is raised if it is not installed.
+"""
+
+from config.config import COLUMNAR_ROW_GROUP_SIZE, PARQUET_COMPRESSION
+from src.edi.lazy import lazy_import
+from src.edi.sinks import (
+    CSV_HEADERS, CSVClaimSink, CSVEnrollmentSink, CSVRemittanceSink, RecordSink, register_sink
+)
+
+pa = lazy_import('pyarrow')
+pc = lazy_import('pyarrow.compute')
+pq = lazy_import('pyarrow.parquet')
+ipc = lazy_import('pyarrow.ipc')
+
+# Typed columns by transaction; every other column is a string
+DATE_COLUMNS = {
+    '834': ['date_of_birth', 'effective_date', 'termination_date'],
+    '837': ['member_dob', 'service_date', 'submission_date'],
+    '835': ['service_date', 'adjudication_date', 'payment_date'],
+}
+
+AMOUNT_COLUMNS = {
+    '834': [],
+    '837': ['billed_amount'],
+    '835': ['billed_amount', 'paid_amount', 'allowed_amount', 'patient_responsibility', 'adjustment_amount'],
+}
+
+DICTIONARY_COLUMNS = {
+    '834': ['gender', 'state', 'coverage_status', 'plan_id', 'plan_type'],
+    '837': ['member_gender', 'provider_state', 'provider_specialty', 'claim_status',
+            'facility_type_code', 'location_type', 'procedure_code'],
+    '835': ['claim_status', 'claim_code', 'adjustment_code', 'procedure_code', 'payment_method'],
+}
+
+AMOUNT_PRECISION = 12
+AMOUNT_SCALE = 2
+
+# Generator codec names accepted by each columnar format's internal compression
+PARQUET_CODECS = {'none': 'none', 'gzip': 'gzip', 'zstd': 'zstd', 'lz4': 'lz4', 'fast': 'zstd', 'snappy': 'snappy'}
+ARROW_CODECS = {'none': None, 'zstd': 'zstd', 'lz4': 'lz4', 'fast': 'lz4'}
+
+
+def _require_pyarrow(format):
+    try:
+        pa._load()
+    except ImportError:
+        raise ImportError(f"{format} output requires the 'pyarrow' package") from None
+
+
+def _text(values):
+    """CSV values as strings, as csv.writer would write them"""
+    return [value if isinstance(value, str) else ('' if value is None else str(value)) for value in values]
+
+
+def column_schema(transaction_type):
+    """Return the Arrow schema for a transaction's CSV columns"""
+    dates = set(DATE_COLUMNS[transaction_type])
+    amounts = set(AMOUNT_COLUMNS[transaction_type])
+    dictionaries = set(DICTIONARY_COLUMNS[transaction_type])
+    fields = []
+    for name in CSV_HEADERS[transaction_type]:
+        if name in dates:
+            field_type = pa.date32()
+        elif name in amounts:
+            field_type = pa.decimal128(AMOUNT_PRECISION, AMOUNT_SCALE)
+        elif name in dictionaries:
+            field_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+
+class ColumnarSink(RecordSink):
+    """
+    Buffers CSV-schema rows and writes them as typed row groups
+
+    Subclasses combine a format (ParquetSink, ArrowSink) with a CSV sink
+    that supplies row(record). `compression` is the file format's internal
+    codec rather than a stream around the file, so no extension is added.
+
+    Args:
+        output_file: Path to write to
+        compression: Codec name (None = format default)
+        row_group_size: Rows per row group / record batch
+                        (default: COLUMNAR_ROW_GROUP_SIZE)
+        subset, manifest, invalid_index: See RecordSink
+    """
+
+    codecs = {}
+    default_codec = None
+
+    def __init__(self, output_file, compression=None, row_group_size=None, subset=False, manifest=None,
+                 invalid_index=None):
+        super().__init__(output_file, compression, subset, manifest, invalid_index)
+        _require_pyarrow(self.format)
+        if compression is None:
+            compression = self.default_codec
+        elif compression not in self.codecs:
+            raise ValueError(
+                f"{self.format} output does not support {compression!r} compression "
+                f"(choose from {', '.join(self.codecs)})"
+            )
+        else:
+            compression = self.codecs[compression]
+        self.compression = compression
+        self.retain = False
+        self.row_group_size = row_group_size or COLUMNAR_ROW_GROUP_SIZE
+
+    @classmethod
+    def compressed_path(cls, output_file, compression):
+        return output_file
+
+    def open(self, header):
+        self.header = header
+        self._make_dirs()
+        self.schema = column_schema(self.transaction_type)
+        self.columns = {name: [] for name in self.schema.names}
+        # Growing dictionaries keep each column's codes stable across row groups
+        self._dictionaries = {name: {} for name in DICTIONARY_COLUMNS[self.transaction_type]}
+        self.row_groups = 0
+        # The codec is internal to the format, so the file is hashed as written
+        digest = self._start_file(self.output_file)
+        self._writer = self.open_writer(digest if digest is not None else self.output_file)
+
+    def open_writer(self, where):
+        """Create the format's writer for self.schema, writing to a path or file object"""
+        raise NotImplementedError
+
+    def write_many(self, records):
+        columns = self.columns
+        for record in records:
+            row = self.row(record)
+            for name, values in columns.items():
+                values.append(row[name])
+        self._observe(records)
+        self._count(records)
+        if len(columns[self.schema.names[0]]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        """Write the buffered rows as one row group"""
+        if not self.columns[self.schema.names[0]]:
+            return
+        arrays = [self._column(field, self.columns[field.name]) for field in self.schema]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.row_groups += 1
+        for values in self.columns.values():
+            values.clear()
+
+    def _column(self, field, values):
+        """Convert one buffered column of CSV values to its Arrow type"""
+        if pa.types.is_dictionary(field.type):
+            dictionary = self._dictionaries[field.name]
+            indices = [dictionary.setdefault(value, len(dictionary)) for value in _text(values)]
+            return pa.DictionaryArray.from_arrays(
+                pa.array(indices, pa.int32()), pa.array(list(dictionary), pa.string())
+            )
+        if field.type == pa.string():
+            return pa.array(_text(values), pa.string())
+        strings = pa.array([value if value != '' else None for value in _text(values)], pa.string())
+        if pa.types.is_date32(field.type):
+            return pc.strptime(strings, format='%Y-%m-%d', unit='s').cast(pa.date32())
+        return strings.cast(field.type)
+
+    def close(self):
+        self._flush()
+        self._close_file(self._writer, self.output_file)
+        return {
+            "output_file": self.output_file,
+            "total_records": self.total_records,
+            "invalid_records": self.invalid_records,
+            "invalid_rate": self.invalid_records / self.total_records if self.total_records else 0.0,
+            "row_groups": self.row_groups,
+            "data": None
+        }
+
+
+class ParquetSink(ColumnarSink):
+    """Parquet output, one row group per buffered batch"""
+
+    format = 'parquet'
+    codecs = PARQUET_CODECS
+    default_codec = PARQUET_COMPRESSION
+
+    def open_writer(self, where):
+        return pq.ParquetWriter(
+            where, self.schema, compression=self.compression,
+            use_dictionary=DICTIONARY_COLUMNS[self.transaction_type]
+        )
+
+
+class ArrowSink(ColumnarSink):
+    """Arrow IPC file output, one record batch per buffered batch"""
+
+    format = 'arrow'
+    codecs = ARROW_CODECS
+    default_codec = None
+
+    def open_writer(self, where):
+        # Dictionaries only grow, so later batches are written as deltas
+        options = ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+        return ipc.new_file(where, self.schema, options=options)
+
+
+class ParquetEnrollmentSink(ParquetSink, CSVEnrollmentSink):
+    """EDI 834 Parquet output"""
+
+
+class ParquetClaimSink(ParquetSink, CSVClaimSink):
+    """EDI 837 Parquet output"""
+
+
+class ParquetRemittanceSink(ParquetSink, CSVRemittanceSink):
+    """EDI 835 Parquet output"""
+
+
+class ArrowEnrollmentSink(ArrowSink, CSVEnrollmentSink):
+    """EDI 834 Arrow IPC output"""
+
+
+class ArrowClaimSink(ArrowSink, CSVClaimSink):
+    """EDI 837 Arrow IPC output"""
+
+
+class ArrowRemittanceSink(ArrowSink, CSVRemittanceSink):
+    """EDI 835 Arrow IPC output"""
+
+
+register_sink('834', 'parquet', ParquetEnrollmentSink, extension='parquet')
+register_sink('837', 'parquet', ParquetClaimSink)
+register_sink('835', 'parquet', ParquetRemittanceSink)
+register_sink('834', 'arrow', ArrowEnrollmentSink, extension='arrow')
+register_sink('837', 'arrow', ArrowClaimSink)
+register_sink('835', 'arrow', ArrowRemittanceSink)
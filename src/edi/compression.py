@@ -0,0 +1,236 @@
+"""
+Streaming compressed output and input
+
+Generated X12 and CSV are written straight through a compressor, so a
+compressed file never exists uncompressed on disk. gzip, bz2 and lzma come
+from the standard library; zstd (zstandard) and lz4 are used when those
+packages are installed. The codec is chosen explicitly or inferred from the
+file extension (.gz, .bz2, .xz, .zst, .lz4).
+
+Inputs are read the same way in reverse: open_input decompresses
+incrementally as the caller reads, detecting the codec from the extension or,
+failing that, from the file's magic bytes.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import OUTPUT_COMPRESSION_LEVEL, OUTPUT_COMPRESSION_BLOCK_SIZE
+
+
+def _open_gzip(path, level):
+    return gzip.open(path, 'wb', compresslevel=level)
+
+
+def _open_bz2(path, level):
+    return bz2.open(path, 'wb', compresslevel=level)
+
+
+def _open_lzma(path, level):
+    return lzma.open(path, 'wb', preset=level)
+
+
+def _open_zstd(path, level):
+    import zstandard
+    fileobj = path if hasattr(path, 'write') else open(path, 'wb')
+    return zstandard.ZstdCompressor(level=level).stream_writer(fileobj, closefd=True)
+
+
+def _open_lz4(path, level):
+    import lz4.frame
+    return lz4.frame.open(path, 'wb', compression_level=level)
+
+
+def _read_gzip(path):
+    return gzip.open(path, 'rb')
+
+
+def _read_bz2(path):
+    return bz2.open(path, 'rb')
+
+
+def _read_lzma(path):
+    return lzma.open(path, 'rb')
+
+
+def _read_zstd(path):
+    import zstandard
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _read_lz4(path):
+    import lz4.frame
+    return lz4.frame.open(path, 'rb')
+
+
+class Codec:
+    """
+    A compression codec
+
+    Args:
+        name: Codec name used in settings and arguments
+        extension: File suffix, including the dot
+        opener: Callable (path, level) returning a binary writable file
+        reader: Callable (path) returning a binary readable file
+        magic: Leading bytes that identify the codec's stream format
+        default_level: Level used when none is configured
+        module: Import name of an optional third-party package (None for stdlib)
+    """
+
+    def __init__(self, name, extension, opener, reader, magic, default_level, module=None):
+        self.name = name
+        self.extension = extension
+        self.opener = opener
+        self.reader = reader
+        self.magic = magic
+        self.default_level = default_level
+        self.module = module
+
+    @property
+    def available(self):
+        """Whether the codec's package is installed"""
+        if self.module is None:
+            return True
+        try:
+            __import__(self.module)
+        except ImportError:
+            return False
+        return True
+
+
+CODECS = {
+    'gzip': Codec('gzip', '.gz', _open_gzip, _read_gzip, b'\x1f\x8b', 6),
+    'bz2': Codec('bz2', '.bz2', _open_bz2, _read_bz2, b'BZh', 9),
+    'lzma': Codec('lzma', '.xz', _open_lzma, _read_lzma, b'\xfd7zXZ\x00', 6),
+    'zstd': Codec('zstd', '.zst', _open_zstd, _read_zstd, b'\x28\xb5\x2f\xfd', 3, module='zstandard'),
+    'lz4': Codec('lz4', '.lz4', _open_lz4, _read_lz4, b'\x04\x22\x4d\x18', 0, module='lz4.frame'),
+}
+
+# Longest magic prefix, read when sniffing an input file
+MAGIC_LENGTH = max(len(codec.magic) for codec in CODECS.values())
+
+# Fast codecs in order of preference, for compression="fast"
+FAST_CODECS = ['zstd', 'lz4']
+
+
+def get_codec(name):
+    """
+    Look up a codec by name
+
+    "fast" resolves to the first installed fast codec, falling back to gzip.
+
+    Raises:
+        ValueError: unknown codec
+        ImportError: codec's optional package is not installed
+    """
+    if name == 'fast':
+        name = next((n for n in FAST_CODECS if CODECS[n].available), 'gzip')
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name!r} (choose from {', '.join(CODECS)})")
+    if not codec.available:
+        raise ImportError(f"{codec.name} compression requires the '{codec.module.split('.')[0]}' package")
+    return codec
+
+
+def codec_for_path(path):
+    """Return the codec name implied by a file's extension, or None"""
+    for codec in CODECS.values():
+        if path.endswith(codec.extension):
+            return codec.name
+    return None
+
+
+def sniff_codec(path):
+    """Return the codec name identified by a file's leading bytes, or None"""
+    with open(path, 'rb') as f:
+        head = f.read(MAGIC_LENGTH)
+    for codec in CODECS.values():
+        if head.startswith(codec.magic):
+            return codec.name
+    return None
+
+
+def split_compression_suffix(path):
+    """Split 'claims.txt.gz' into ('claims.txt', '.gz'); the suffix is '' if uncompressed"""
+    name = codec_for_path(path)
+    if name is None:
+        return path, ''
+    extension = CODECS[name].extension
+    return path[:-len(extension)], extension
+
+
+def open_output(path, compression=None, level=None, block_size=None, fileobj=None):
+    """
+    Open a binary output file, compressing if requested
+
+    Args:
+        path: File path
+        compression: Codec name, "fast", or None to infer from the extension
+        level: Compression level (default: OUTPUT_COMPRESSION_LEVEL, else the codec default)
+        block_size: Bytes buffered before each call into the compressor
+                    (default: OUTPUT_COMPRESSION_BLOCK_SIZE)
+        fileobj: Raw binary file object that receives the (compressed) bytes
+                 instead of a file opened at `path` (some codecs leave it open,
+                 so close it after closing the output)
+
+    Returns:
+        Binary writable file object; closing it finishes the compressed stream
+    """
+    if compression is None:
+        compression = codec_for_path(path)
+    if compression is None or compression == 'none':
+        return open(path, 'wb') if fileobj is None else io.BufferedWriter(fileobj)
+
+    codec = get_codec(compression)
+    if level is None:
+        level = OUTPUT_COMPRESSION_LEVEL if OUTPUT_COMPRESSION_LEVEL is not None else codec.default_level
+    if block_size is None:
+        block_size = OUTPUT_COMPRESSION_BLOCK_SIZE
+    return io.BufferedWriter(codec.opener(path if fileobj is None else fileobj, level), buffer_size=block_size)
+
+
+def open_text_output(path, compression=None, level=None, block_size=None, encoding='utf-8', newline='',
+                     fileobj=None):
+    """Text-mode wrapper around open_output (for CSV)"""
+    return io.TextIOWrapper(
+        open_output(path, compression, level, block_size, fileobj), encoding=encoding, newline=newline
+    )
+
+
+def open_input(path, compression=None, buffer_size=None):
+    """
+    Open a binary input file, decompressing incrementally if it is compressed
+
+    Args:
+        path: File path
+        compression: Codec name, "none", or None to detect from the extension
+                     and then the file's magic bytes
+        buffer_size: Bytes requested from the decompressor per read
+                     (default: OUTPUT_COMPRESSION_BLOCK_SIZE)
+
+    Returns:
+        Binary readable file object
+    """
+    if compression is None:
+        compression = codec_for_path(path) or sniff_codec(path)
+    if compression is None or compression == 'none':
+        return open(path, 'rb')
+
+    codec = get_codec(compression)
+    if buffer_size is None:
+        buffer_size = OUTPUT_COMPRESSION_BLOCK_SIZE
+    return io.BufferedReader(codec.reader(path), buffer_size=buffer_size)
+
+
+def open_text_input(path, compression=None, buffer_size=None, encoding='utf-8', newline=''):
+    """Text-mode wrapper around open_input"""
+    return io.TextIOWrapper(open_input(path, compression, buffer_size), encoding=encoding, newline=newline)
@@ -0,0 +1,147 @@
+"""
+Vectorized enrollment attribute engine for EDI 834 generation
+
+Draws coverage status, termination details, health plan, transaction codes,
+medicare plan and effective dates for a whole block of members at once with
+NumPy, instead of one record at a time. The distributions match the
+per-record draws in Member._generate_status and Enrollment.__init__.
+"""
+
+from datetime import date
+
+import numpy as np
+
+# Coverage status codes and their relative weights (INS04)
+COVERAGE_STATUS_CODES = ['A', 'P', 'T', 'S', 'C', 'G', 'V', 'D']
+COVERAGE_STATUS_WEIGHTS = [85, 5, 5, 1, 1, 1, 1, 1]
+
+# Termination reason codes (only drawn for status 'T')
+TERMINATION_REASONS = ["07", "28", "43", "33", "25"]
+TERMINATION_REASON_MAP = {
+    "07": "Voluntary termination",
+    "28": "Initial enrollment",
+    "43": "Change of location",
+    "33": "Change of medical information",
+    "25": "Change of personal data"
+}
+
+TRANSACTION_TYPES = ['021', '001', '024', '030']
+ACTION_CODES = ['2', '4']
+MEDICARE_PLANS = ['A', 'B', 'C', 'E']
+MEDICARE_PLAN_RATE = 0.3
+
+# Date windows in days, matching fake.date_between('-2y'/'-1y', 'today')
+EFFECTIVE_DATE_WINDOW_DAYS = 730
+TERMINATION_DATE_WINDOW_DAYS = 365
+
+
+def weighted_choice(rng, values, weights, size):
+    """
+    Draw `size` values from a weighted categorical distribution
+
+    Args:
+        rng: numpy.random.Generator
+        values: Sequence of category values
+        weights: Relative weights (need not sum to 1)
+        size: Number of draws
+
+    Returns:
+        NumPy array of drawn values
+    """
+    p = np.asarray(weights, dtype=np.float64)
+    p = p / p.sum()
+    return np.asarray(values)[rng.choice(len(values), size=size, p=p)]
+
+
+def _days_before(today, window_days, rng, size):
+    """Uniform dates in [today - window_days, today] as datetime64[D]"""
+    offsets = rng.integers(0, window_days + 1, size=size)
+    return today - offsets.astype('timedelta64[D]')
+
+
+def draw_enrollment_batch(size, plans, today=None, rng=None):
+    """
+    Draw enrollment attributes for a block of members
+
+    Args:
+        size: Number of members in the block
+        plans: List of health plan dicts to assign uniformly
+        today: Reference date (date or datetime64[D], default: today)
+        rng: numpy.random.Generator (default: a fresh unseeded generator)
+
+    Returns:
+        Dict of NumPy arrays, one element per member:
+            status, termination_reason, end_date (NaT unless terminated),
+            plan_index, start_date, transaction_type, action_code,
+            medicare_plan ('' when not applicable)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if today is None:
+        today = date.today()
+    today = np.datetime64(today, 'D')
+
+    status = weighted_choice(rng, COVERAGE_STATUS_CODES, COVERAGE_STATUS_WEIGHTS, size)
+    terminated = status == 'T'
+
+    termination_reason = np.full(size, '', dtype='<U2')
+    termination_reason[terminated] = rng.choice(TERMINATION_REASONS, size=int(terminated.sum()))
+
+    end_date = np.full(size, np.datetime64('NaT'), dtype='datetime64[D]')
+    end_date[terminated] = _days_before(today, TERMINATION_DATE_WINDOW_DAYS, rng, int(terminated.sum()))
+
+    has_medicare = rng.random(size) < MEDICARE_PLAN_RATE
+    medicare_plan = np.where(has_medicare, rng.choice(MEDICARE_PLANS, size=size), '')
+
+    plan_index = rng.integers(0, len(plans), size=size)
+    start_date = _days_before(today, EFFECTIVE_DATE_WINDOW_DAYS, rng, size)
+    # Coverage cannot end before it starts
+    end_date[terminated] = np.maximum(end_date[terminated], start_date[terminated])
+
+    return {
+        'status': status,
+        'termination_reason': termination_reason,
+        'end_date': end_date,
+        'plan_index': plan_index,
+        'start_date': start_date,
+        'transaction_type': rng.choice(TRANSACTION_TYPES, size=size),
+        'action_code': rng.choice(ACTION_CODES, size=size),
+        'medicare_plan': medicare_plan,
+    }
+
+
+def iter_enrollment_records(batch, plans):
+    """
+    Convert a drawn batch into per-member dicts of plain Python values
+
+    Args:
+        batch: Dict returned by draw_enrollment_batch
+        plans: The same plan list passed to draw_enrollment_batch
+
+    Yields:
+        Dict with plan, status_info (status, reason, end_date), start_date,
+        transaction_type, action_code and medicare_plan (None if not set)
+    """
+    columns = zip(
+        batch['status'].tolist(),
+        batch['termination_reason'].tolist(),
+        batch['end_date'].astype(object).tolist(),
+        batch['plan_index'].tolist(),
+        batch['start_date'].astype(object).tolist(),
+        batch['transaction_type'].tolist(),
+        batch['action_code'].tolist(),
+        batch['medicare_plan'].tolist(),
+    )
+    for status, reason, end_date, plan_index, start_date, transaction_type, action_code, medicare_plan in columns:
+        if status == 'T':
+            status_info = (status, reason, end_date)
+        else:
+            status_info = (status, None, None)
+        yield {
+            'plan': plans[plan_index],
+            'status_info': status_info,
+            'start_date': start_date,
+            'transaction_type': transaction_type,
+            'action_code': action_code,
+            'medicare_plan': medicare_plan or None,
+        }
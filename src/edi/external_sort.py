@@ -0,0 +1,138 @@
+"""
+External merge sort for streams larger than memory
+
+ExternalSorter collects items and sorts them in runs of at most run_size
+items. Each full run is spilled to a temporary file with pickle, and
+iterating the sorter k-way merges the runs (heapq.merge). Whenever
+max_fan_in runs of the same length have been spilled they are merged into
+one longer run, so the number of open run files grows only with the
+logarithm of the input size. Input that fits in one run is sorted in
+memory and never touches the disk.
+
+The sort is stable: items with equal keys come out in the order they
+were added.
+"""
+
+import heapq
+import pickle
+import tempfile
+
+from config.config import EXTERNAL_SORT_MAX_FAN_IN, EXTERNAL_SORT_RUN_RECORDS
+
+# Items pickled per dump; keeps pickle overhead per item low when spilling
+_PICKLE_CHUNK = 1024
+
+
+def _write_run(items, temp_dir):
+    """Spill sorted items (any iterable) to a temporary file and return it, rewound"""
+    run = tempfile.TemporaryFile(dir=temp_dir)
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= _PICKLE_CHUNK:
+            pickle.dump(chunk, run, pickle.HIGHEST_PROTOCOL)
+            chunk = []
+    if chunk:
+        pickle.dump(chunk, run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """Yield a spilled run's items, closing (and so deleting) the file at the end"""
+    try:
+        while True:
+            try:
+                chunk = pickle.load(run)
+            except EOFError:
+                return
+            yield from chunk
+    finally:
+        run.close()
+
+
+class ExternalSorter:
+    """
+    Sort items by key in bounded memory
+
+    Add items with add() or add_many(), then iterate the sorter once to
+    get them in key order. Spilled runs are temporary files that are
+    deleted as they are consumed, or by close().
+
+    Args:
+        key: Function (item) -> sort key
+        run_size: Items sorted in memory per run (default: EXTERNAL_SORT_RUN_RECORDS)
+        max_fan_in: Runs merged at once (default: EXTERNAL_SORT_MAX_FAN_IN)
+        temp_dir: Directory for spilled runs (default: the system temp directory)
+    """
+
+    def __init__(self, key, run_size=None, max_fan_in=None, temp_dir=None):
+        self.key = key
+        self.run_size = run_size or EXTERNAL_SORT_RUN_RECORDS
+        self.max_fan_in = max_fan_in or EXTERNAL_SORT_MAX_FAN_IN
+        if self.max_fan_in < 2:
+            raise ValueError("max_fan_in must be at least 2")
+        self.temp_dir = temp_dir
+        self.count = 0
+        self.spilled_runs = 0
+        self._items = []
+        self._runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, item):
+        """Add one item"""
+        self._items.append(item)
+        self.count += 1
+        if len(self._items) >= self.run_size:
+            self._spill()
+
+    def add_many(self, items):
+        """Add several items"""
+        for item in items:
+            self.add(item)
+
+    def __iter__(self):
+        self._items.sort(key=self.key)
+        if not self._runs:
+            items, self._items = self._items, []
+            return iter(items)
+        if self._items:
+            self._spill()
+        # Merge consecutive groups of runs until one merge can take them all;
+        # keeping the groups in order keeps the sort stable
+        while len(self._runs) > self.max_fan_in:
+            runs, self._runs = self._runs, []
+            for start in range(0, len(runs), self.max_fan_in):
+                group = runs[start:start + self.max_fan_in]
+                self._runs.append((group[-1][0] + 1, _write_run(self._merge(group), self.temp_dir)))
+        runs, self._runs = self._runs, []
+        return self._merge(runs)
+
+    def close(self):
+        """Delete any runs that have not been consumed"""
+        for _, run in self._runs:
+            run.close()
+        self._runs = []
+        self._items = []
+
+    def _merge(self, runs):
+        return heapq.merge(*[_read_run(run) for _, run in runs], key=self.key)
+
+    def _spill(self):
+        self._items.sort(key=self.key)
+        runs = self._runs
+        runs.append((0, _write_run(self._items, self.temp_dir)))
+        self._items = []
+        self.spilled_runs += 1
+        # Runs are (level, file); the last max_fan_in runs of one level are
+        # consecutive, so merging them in place keeps the order of the input
+        fan_in = self.max_fan_in
+        while len(runs) >= fan_in and runs[-fan_in][0] == runs[-1][0]:
+            group = runs[-fan_in:]
+            del runs[-fan_in:]
+            runs.append((group[0][0] + 1, _write_run(self._merge(group), self.temp_dir)))
@@ -3,25 +3,56 @@ import string
 import os
 import sys
 import csv
-import numpy as np
-from datetime import datetime, timedelta
-from faker import Faker
-from mimesis import Person, Address, Datetime
-from mimesis.builtins import USASpecProvider
+from datetime import date, datetime
 import json
 from collections import defaultdict
+from itertools import islice
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from config.config import COMPANY_ID, SENDER_ID, RECEIVER_ID, ANONYMIZE_DATA, BATCH_SIZE, SAMPLES_DIR
+from config.config import (
+    COMPANY_ID, ANONYMIZE_DATA, BATCH_SIZE, SAMPLES_DIR, SEGMENT_CACHE_MAX_ENTRIES,
+    OUTPUT_SHARDS, OUTPUT_CACHE_DIR
+)
+from src.edi import columnar  # noqa: F401 (registers the parquet and arrow sinks)
+from src.edi.compression import open_text_output, split_compression_suffix
+from src.edi.lazy import LazyObject, lazy_import
+from src.edi.partitioning import DatePartitionedSink, ShardedSink
+from src.edi.segment_cache import SegmentBlockCache
+from src.edi.sinks import FORMAT_EXTENSIONS, make_sink
+from src.edi.x12 import default_serializer, envelope_segments, format_amount
 
-# Initialize data generation tools
-fake = Faker('en_US')
-person = Person('en')
-address = Address('en')
-usa = USASpecProvider()
+# NumPy and the NumPy engines (enrollment, remittance, samplers) are imported on first use
+np = lazy_import('numpy')
+
+
+def _make_faker():
+    from faker import Faker
+    return Faker('en_US')
+
+
+def _make_person():
+    from mimesis import Person
+    return Person('en')
+
+
+def _make_address():
+    from mimesis import Address
+    return Address('en')
+
+
+def _make_usa_provider():
+    from mimesis.builtins import USASpecProvider
+    return USASpecProvider()
+
+
+# Data generation tools, initialized on first use
+fake = LazyObject(_make_faker)
+person = LazyObject(_make_person)
+address = LazyObject(_make_address)
+usa = LazyObject(_make_usa_provider)
 
 # Health plan data
 PLAN_FEATURES = {
@@ -40,8 +71,29 @@ PLAN_DESCRIPTIONS = [
     "Flexible Health Savings Account (HSA)-compatible plan"
 ]
 
+
+class HealthPlan(dict):
+    """
+    Health plan record
+
+    The randomly assigned 'features' and 'description' are drawn on first
+    access rather than at import time; 'feature_count' sets how many
+    features are drawn.
+    """
+
+    def __missing__(self, key):
+        if key == 'features':
+            value = random.sample(list(PLAN_FEATURES.keys()), self['feature_count'])
+        elif key == 'description':
+            value = random.choice(PLAN_DESCRIPTIONS)
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+
 HEALTH_PLANS = [
-    {
+    HealthPlan({
         "id": "DH-P3678B",
         "name": "Gold Plan",
         "type": "PPO",
@@ -49,10 +101,9 @@ HEALTH_PLANS = [
         "deductible": 2000.00,
         "coinsurance": 20,
         "oop_max": 6000.00,
-        "features": random.sample(list(PLAN_FEATURES.keys()), 3),
-        "description": random.choice(PLAN_DESCRIPTIONS)
-    },
-    {
+        "feature_count": 3
+    }),
+    HealthPlan({
         "id": "DH-P3156C",
         "name": "Silver Plan",
         "type": "HMO",
@@ -60,10 +111,9 @@ HEALTH_PLANS = [
         "deductible": 4000.00,
         "coinsurance": 30,
         "oop_max": 8000.00,
-        "features": random.sample(list(PLAN_FEATURES.keys()), 3),
-        "description": random.choice(PLAN_DESCRIPTIONS)
-    },
-    {
+        "feature_count": 3
+    }),
+    HealthPlan({
         "id": "DH-P8768B",
         "name": "Bronze Plan",
         "type": "HDHP",
@@ -71,10 +121,9 @@ HEALTH_PLANS = [
         "deductible": 6000.00,
         "coinsurance": 40,
         "oop_max": 10000.00,
-        "features": random.sample(list(PLAN_FEATURES.keys()), 2),
-        "description": random.choice(PLAN_DESCRIPTIONS)
-    },
-    {
+        "feature_count": 2
+    }),
+    HealthPlan({
         "id": "DH-P3091B",
         "name": "Platinum Plan",
         "type": "EPO",
@@ -82,10 +131,9 @@ HEALTH_PLANS = [
         "deductible": 1000.00,
         "coinsurance": 10,
         "oop_max": 4000.00,
-        "features": random.sample(list(PLAN_FEATURES.keys()), 4),
-        "description": random.choice(PLAN_DESCRIPTIONS)
-    },
-    {
+        "feature_count": 4
+    }),
+    HealthPlan({
         "id": "DH-P3109C",
         "name": "Catastrophic Plan",
         "type": "HDHP",
@@ -93,9 +141,8 @@ HEALTH_PLANS = [
         "deductible": 8000.00,
         "coinsurance": 50,
         "oop_max": 12000.00,
-        "features": random.sample(list(PLAN_FEATURES.keys()), 2),
-        "description": random.choice(PLAN_DESCRIPTIONS)
-    }
+        "feature_count": 2
+    })
 ]
 
 # Global data storage
@@ -106,6 +153,9 @@ global_data = {
     'claims': {}
 }
 
+# Pre-rendered provider/member segment blocks shared by the 837 and 835 writers
+segment_cache = SegmentBlockCache(SEGMENT_CACHE_MAX_ENTRIES)
+
 
 def generate_id(prefix, length=8):
     """Generate unique ID with checks for existing IDs"""
@@ -120,12 +170,17 @@ def generate_id(prefix, length=8):
             return id
         elif prefix == "PROV" and id not in global_data['providers']:
             return id
-        elif prefix not in ["SUB", "PROV"]:
+        elif prefix == "ENR" and id not in global_data['enrollments']:
+            return id
+        elif prefix.startswith("CLM"):
+            if id not in global_data['claims']:
+                return id
+        elif prefix not in ["SUB", "PROV", "ENR"]:
             return id
 
 
 class Member:
-    def __init__(self):
+    def __init__(self, plan=None, status_info=None):
         self.id = generate_id("SUB")
         self.last_name = person.last_name()
         self.first_name = person.first_name()
@@ -139,12 +194,20 @@ class Member:
         self.zip_code = address.zip_code()
         self.ssn = fake.ssn()
         self.policy_num = generate_id("POL", 8)
-        self.plan = random.choice(HEALTH_PLANS)
-        self.status_info = self._generate_status()
+        # plan and status_info may be pre-drawn by the batch enrollment engine
+        self.plan = plan if plan is not None else random.choice(HEALTH_PLANS)
+        self.status_info = status_info if status_info is not None else self._generate_status()
 
         # Store to global data
         global_data['members'][self.id] = self
 
+    @classmethod
+    def from_fields(cls, **fields):
+        """Build a member from already drawn attributes, without drawing or registering it"""
+        member = cls.__new__(cls)
+        member.__dict__.update(fields)
+        return member
+
     def _generate_status(self):
         status = random.choices(
             ['A', 'P', 'T', 'S', 'C', 'G', 'V', 'D'],
@@ -183,14 +246,23 @@ class Provider:
         # Store to global data
         global_data['providers'][self.id] = self
 
+    @classmethod
+    def from_fields(cls, **fields):
+        """Build a provider from already drawn attributes, without drawing or registering it"""
+        provider = cls.__new__(cls)
+        provider.__dict__.update(fields)
+        return provider
+
 
 class Enrollment:
-    def __init__(self, member):
+    def __init__(self, member, start_date=None, transaction_type=None, action_code=None):
         self.id = generate_id("ENR")
         self.member_id = member.id
         self.plan_id = member.plan["id"]
         self.sponsor_id = generate_id("SPON", 6)
-        self.start_date = fake.date_between(start_date='-2y', end_date='today')
+        if start_date is None:
+            start_date = fake.date_between(start_date='-2y', end_date='today')
+        self.start_date = start_date
 
         # Set end date based on member status
         status, reason, end_date = member.status_info
@@ -212,48 +284,52 @@ class Enrollment:
             self.termination_reason = None
 
         self.relationship_code = '18'  # Self
-        self.transaction_type = random.choice(['021', '001', '024', '030'])
-        self.action_code = random.choice(['2', '4'])
+        self.transaction_type = transaction_type or random.choice(['021', '001', '024', '030'])
+        self.action_code = action_code or random.choice(['2', '4'])
         self.insurance_line = 'HLT'
 
         # Store to global data
         global_data['enrollments'][self.id] = self
 
+    @classmethod
+    def from_fields(cls, **fields):
+        """Build an enrollment from already drawn attributes, without drawing or registering it"""
+        enrollment = cls.__new__(cls)
+        enrollment.__dict__.update(fields)
+        return enrollment
+
+
+def _generate_member_batch(size, rng):
+    """
+    Create a block of members and enrollments from one vectorized draw
+
+    Args:
+        size: Number of members to create
+        rng: numpy.random.Generator used by the enrollment engine
+
+    Returns:
+        List of (member, enrollment, medicare_plan) tuples
+    """
+    from src.edi.enrollment import draw_enrollment_batch, iter_enrollment_records
+
+    batch = draw_enrollment_batch(size, HEALTH_PLANS, rng=rng)
+    records = []
+    for attrs in iter_enrollment_records(batch, HEALTH_PLANS):
+        member = Member(plan=attrs['plan'], status_info=attrs['status_info'])
+        enrollment = Enrollment(
+            member,
+            start_date=attrs['start_date'],
+            transaction_type=attrs['transaction_type'],
+            action_code=attrs['action_code']
+        )
+        records.append((member, enrollment, attrs['medicare_plan']))
+    return records
+
 
-def generate_isa_gs_segments(transaction_type, current_date):
-    segments = []
+def generate_isa_gs_segments(transaction_type, current_date, x12=default_serializer):
     # Generate ISA control number
     isa_control_num = generate_id("", 9)
-    
-    # ISA segment
-    segments.append(
-        "ISA*00*          *00*          *ZZ*{sender}*ZZ*{receiver}*{date}*{time}*U*00401*{control_num}*0*P*:~".format(
-            sender=SENDER_ID.ljust(15),
-            receiver=RECEIVER_ID.ljust(15),
-            date=current_date.strftime("%y%m%d"),
-            time=current_date.strftime("%H%M"),
-            control_num=isa_control_num
-        ))
-
-    # GS segment
-    if transaction_type == "834":
-        gs_code = "BE"
-        version = "004010X095A1"  # Use same version as ST segment
-    elif transaction_type == "837":
-        gs_code = "HC"
-        version = "004010X098A1"
-    else:  # 835
-        gs_code = "HP"
-        version = "004010X091A1"
-
-    segments.append("GS*{gs_code}*{sender}*{receiver}*{date}*{time}*1*X*{version}~".format(
-        gs_code=gs_code,
-        sender=SENDER_ID,
-        receiver=RECEIVER_ID,
-        date=current_date.strftime("%Y%m%d"),
-        time=current_date.strftime("%H%M%S"),
-        version=version
-    ))
+    segments = envelope_segments(x12, transaction_type, current_date, isa_control_num)[:2]
     return segments, isa_control_num
 
 
@@ -286,6 +362,8 @@ RISK_PROFILES = {
         'denial_rate': 0.25,  # 25% denied
         'service_line_complexity': 'high',  # More service lines
         'charge_range': (500, 15000),  # Higher charge range
+        # Claims per member: chronic members claim steadily, so fewer members go without claims
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 1.5},
         'diagnosis_weights': {
             'chronic': 0.7,  # Chronic diseases (diabetes, heart disease, etc.)
             'acute': 0.2,
@@ -305,6 +383,8 @@ RISK_PROFILES = {
         'denial_rate': 0.05,  # 5% denied
         'service_line_complexity': 'low',  # Fewer service lines
         'charge_range': (50, 500),  # Lower charge range
+        # Claims per member: most members rarely claim and a few claim often
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 0.5},
         'diagnosis_weights': {
             'chronic': 0.1,
             'acute': 0.3,
@@ -324,6 +404,7 @@ RISK_PROFILES = {
         'denial_rate': 0.15,
         'service_line_complexity': 'medium',
         'charge_range': (100, 5000),
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 1.0},
         'diagnosis_weights': {
             'chronic': 0.3,
             'acute': 0.4,
@@ -395,13 +476,14 @@ PROCEDURE_POOLS = {
 }
 
 
-def _generate_volume(profile, override=None):
+def _generate_volume(profile, override=None, rng=None):
     """
     Generate volume based on business size profile
     
     Args:
         profile: Profile dict with min, max, and distribution parameters
         override: Manual override value (if provided, use this instead)
+        rng: numpy.random.Generator (default: a fresh unseeded generator)
     
     Returns:
         Integer volume
@@ -409,24 +491,26 @@ def _generate_volume(profile, override=None):
     if override is not None:
         return int(override)
     
+    if rng is None:
+        rng = np.random.default_rng()
     dist_type = profile.get('distribution', 'uniform')
     min_val = profile['min']
     max_val = profile['max']
     
     if dist_type == 'uniform':
-        volume = random.randint(min_val, max_val)
+        volume = rng.integers(min_val, max_val + 1)
     elif dist_type == 'poisson':
         lambda_param = profile.get('lambda', (min_val + max_val) / 2)
-        volume = int(np.random.poisson(lambda_param))
+        volume = int(rng.poisson(lambda_param))
         volume = max(min_val, min(volume, max_val))  # Clamp to range
     elif dist_type == 'lognormal':
         mean = profile.get('mean', np.log((min_val + max_val) / 2))
         sigma = profile.get('sigma', 0.5)
-        volume = int(np.random.lognormal(mean, sigma))
+        volume = int(rng.lognormal(mean, sigma))
         volume = max(min_val, min(volume, max_val))  # Clamp to range
     else:
         # Default to uniform
-        volume = random.randint(min_val, max_val)
+        volume = rng.integers(min_val, max_val + 1)
     
     return int(volume)
 
@@ -441,6 +525,8 @@ RISK_PROFILES = {
         'denial_rate': 0.25,  # 25% denied
         'service_line_complexity': 'high',  # More service lines
         'charge_range': (500, 15000),  # Higher charge range
+        # Claims per member: chronic members claim steadily, so fewer members go without claims
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 1.5},
         'diagnosis_weights': {
             'chronic': 0.7,  # Chronic diseases (diabetes, heart disease, etc.)
             'acute': 0.2,
@@ -460,6 +546,8 @@ RISK_PROFILES = {
         'denial_rate': 0.05,  # 5% denied
         'service_line_complexity': 'low',  # Fewer service lines
         'charge_range': (50, 500),  # Lower charge range
+        # Claims per member: most members rarely claim and a few claim often
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 0.5},
         'diagnosis_weights': {
             'chronic': 0.1,
             'acute': 0.3,
@@ -479,6 +567,7 @@ RISK_PROFILES = {
         'denial_rate': 0.15,
         'service_line_complexity': 'medium',
         'charge_range': (100, 5000),
+        'utilization': {'distribution': 'negative_binomial', 'dispersion': 1.0},
         'diagnosis_weights': {
             'chronic': 0.3,
             'acute': 0.4,
@@ -537,48 +626,88 @@ PLACE_OF_SERVICE = {
 }
 
 
-def _select_diagnosis_codes(risk_config):
+def _resolve_risk_config(risk_profile="balanced", custom_distribution=None):
+    """
+    Merge a risk profile with custom distribution overrides and compile its samplers
+
+    Returns:
+        New risk config dict, with '_profile_name' and '_samplers' entries
+    """
+    risk_config = RISK_PROFILES.get(risk_profile, RISK_PROFILES['balanced']).copy()
+    if custom_distribution:
+        risk_config.update(custom_distribution)
+
+    # Add profile name for logging
+    risk_config['_profile_name'] = risk_profile
+
+    # Compile samplers once per run
+    return _compile_risk_config(risk_config)
+
+
+def _compile_risk_config(risk_config):
+    """
+    Attach alias-table samplers to a risk config, compiling them only once
+    
+    Returns:
+        The same risk config dict, with a '_samplers' entry
+    """
+    if '_samplers' not in risk_config:
+        from src.edi.samplers import compile_risk_profile
+        risk_config['_samplers'] = compile_risk_profile(risk_config, PROCEDURE_POOLS, PLACE_OF_SERVICE)
+    return risk_config
+
+
+def _get_samplers(risk_config):
+    """Return the compiled samplers for a risk config (compiling ad hoc if needed)"""
+    samplers = risk_config.get('_samplers')
+    if samplers is None:
+        from src.edi.samplers import compile_risk_profile
+        samplers = compile_risk_profile(risk_config, PROCEDURE_POOLS, PLACE_OF_SERVICE)
+    return samplers
+
+
+def _select_diagnosis_codes(risk_config, rand=random):
     """
     Select diagnosis codes based on risk profile
+
+    Args:
+        risk_config: Risk configuration dict
+        rand: Source of randomness (the random module or a random.Random)
     
     Returns:
         List of diagnosis code dicts
     """
-    weights = risk_config['diagnosis_weights']
     multiple_rate = risk_config['multiple_diagnosis_rate']
     
     # Select category based on weights
-    category = random.choices(
-        ['chronic', 'acute', 'preventive'],
-        weights=[weights['chronic'], weights['acute'], weights['preventive']]
-    )[0]
+    category = _get_samplers(risk_config).diagnosis_category.sample(rand)
     
     # Determine number of diagnoses
-    if random.random() < multiple_rate:
-        num_diag = random.randint(2, 4)
+    if rand.random() < multiple_rate:
+        num_diag = rand.randint(2, 4)
     else:
         num_diag = 1
     
     # Select from appropriate pool
     pool = DIAGNOSIS_POOLS[category]
-    selected = random.sample(pool, min(num_diag, len(pool)))
+    selected = rand.sample(pool, min(num_diag, len(pool)))
     
     # For multiple diagnoses, mix categories
-    if num_diag > 1 and random.random() < 0.3:
+    if num_diag > 1 and rand.random() < 0.3:
         other_categories = [c for c in ['chronic', 'acute', 'preventive'] if c != category]
         if other_categories:
-            other_category = random.choice(other_categories)
+            other_category = rand.choice(other_categories)
             other_pool = DIAGNOSIS_POOLS[other_category]
             if other_pool:
-                additional = random.sample(other_pool, min(1, len(other_pool)))
+                additional = rand.sample(other_pool, min(1, len(other_pool)))
                 selected.extend(additional)
     
     return selected[:num_diag]
 
 
-def _calculate_billed_amount(risk_config):
+def _calculate_billed_amount(risk_config, rand=random):
     """
-    Calculate billed amount based on risk profile
+    Calculate billed amount based on risk profile (rand: see _select_diagnosis_codes)
     
     Returns:
         Float billed amount
@@ -586,19 +715,19 @@ def _calculate_billed_amount(risk_config):
     charge_range = risk_config['charge_range']
     high_cost_ratio = risk_config.get('high_cost_ratio', 0.25)
     
-    if random.random() < high_cost_ratio:
+    if rand.random() < high_cost_ratio:
         # High-cost claim
-        amount = random.uniform(charge_range[1] * 0.6, charge_range[1])
+        amount = rand.uniform(charge_range[1] * 0.6, charge_range[1])
     else:
         # Normal cost claim
-        amount = random.uniform(charge_range[0], charge_range[1] * 0.6)
+        amount = rand.uniform(charge_range[0], charge_range[1] * 0.6)
     
     return round(amount, 2)
 
 
-def _get_service_line_count(risk_config):
+def _get_service_line_count(risk_config, rand=random):
     """
-    Get number of service lines based on complexity
+    Get number of service lines based on complexity (rand: see _select_diagnosis_codes)
     
     Returns:
         Integer number of service lines
@@ -606,38 +735,31 @@ def _get_service_line_count(risk_config):
     complexity = risk_config.get('service_line_complexity', 'medium')
     
     if complexity == 'high':
-        return random.randint(3, 8)
+        return rand.randint(3, 8)
     elif complexity == 'low':
-        return random.randint(1, 2)
+        return rand.randint(1, 2)
     else:  # medium
-        return random.randint(2, 5)
+        return rand.randint(2, 5)
 
 
-def _select_procedure_code(risk_config, is_er=False):
+def _select_procedure_code(risk_config, is_er=False, rand=random):
     """
-    Select procedure code based on risk profile
+    Select procedure code based on risk profile (rand: see _select_diagnosis_codes)
     
     Returns:
         String procedure code
     """
-    complexity = risk_config.get('service_line_complexity', 'medium')
+    samplers = _get_samplers(risk_config)
     
     if is_er:
-        return random.choice(["99281", "99282", "99283", "99284", "99285"])
+        return samplers.er_procedure.sample(rand)
     
-    if complexity == 'high':
-        pool = PROCEDURE_POOLS['high_complexity'] + PROCEDURE_POOLS['medium_complexity']
-    elif complexity == 'low':
-        pool = PROCEDURE_POOLS['low_complexity'] + PROCEDURE_POOLS['medium_complexity']
-    else:  # medium
-        pool = PROCEDURE_POOLS['medium_complexity']
-    
-    return random.choice(pool)
+    return samplers.procedure.sample(rand)
 
 
-def _select_place_of_service(risk_config, is_er=False):
+def _select_place_of_service(risk_config, is_er=False, rand=random):
     """
-    Select place of service based on risk profile
+    Select place of service based on risk profile (rand: see _select_diagnosis_codes)
     
     Returns:
         String place of service code
@@ -645,175 +767,224 @@ def _select_place_of_service(risk_config, is_er=False):
     if is_er:
         return "23"  # ER
     
-    provider_types = risk_config['provider_types']
-    provider_type = random.choices(
-        ['emergency', 'specialist', 'primary'],
-        weights=[provider_types['emergency'], provider_types['specialist'], provider_types['primary']]
-    )[0]
-    
-    return random.choice(PLACE_OF_SERVICE[provider_type])
+    return _get_samplers(risk_config).place_of_service.sample(rand)
 
 
-def _get_claim_status(risk_config):
+def _get_claim_status(risk_config, rand=random):
     """
-    Get claim status based on denial rate
+    Get claim status based on denial rate (rand: see _select_diagnosis_codes)
     
     Returns:
         String claim status code
     """
     denial_rate = risk_config.get('denial_rate', 0.15)
     
-    if random.random() < denial_rate:
+    if rand.random() < denial_rate:
         # Denied claims
-        return random.choice(["19", "20", "21", "22"])
+        return rand.choice(["19", "20", "21", "22"])
     else:
         # Paid/pending claims
-        return random.choice(["1", "2", "3", "4"])
+        return rand.choice(["1", "2", "3", "4"])
 
 
-def _introduce_invalid_data_834(member, enrollment, invalid_rate):
-    """
-    Introduce invalid data issues for EDI 834 records
-    
-    Returns:
-        tuple: (member, enrollment, is_invalid, issue_type)
-    """
-    if random.random() > invalid_rate:
-        return member, enrollment, False, None
-    
-    issue_type = random.choice([
-        'missing_dob',
-        'invalid_effective_date',
-        'start_after_end',
-        'invalid_gender',
-        'wrong_plan_id'
-    ])
-    
-    is_invalid = True
-    
-    if issue_type == 'missing_dob':
-        member.dob = None
-    elif issue_type == 'invalid_effective_date':
-        # Set effective date in the future
-        enrollment.start_date = fake.date_between(start_date='today', end_date='+1y')
-    elif issue_type == 'start_after_end':
-        # Set start date after end date
-        enrollment.start_date = fake.date_between(start_date='-1y', end_date='today')
-        enrollment.end_date = enrollment.start_date - timedelta(days=random.randint(1, 365))
-    elif issue_type == 'invalid_gender':
-        # Invalid gender code
-        member.gender = random.choice(['X', 'U', 'O', ''])
-    elif issue_type == 'wrong_plan_id':
-        # Non-existent plan ID
-        member.plan = {"id": "INVALID-PLAN", "name": "Invalid Plan", "type": "INVALID"}
-    
-    return member, enrollment, is_invalid, issue_type
+def _write_csv(data_rows, headers, output_file, compression=None):
+    """Write data to CSV file (compressed if the extension or `compression` asks for it)"""
+    # Create directory if output_file has a directory path
+    dir_path = os.path.dirname(output_file)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open_text_output(output_file, compression) as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(data_rows)
 
 
-def _introduce_invalid_data_837(claim_data, service_lines, invalid_rate):
+def _resolve_sinks(transaction_type, format, output_file, compression=None, x12_limits=None, shards=None,
+                   partition_by_date=False):
     """
-    Introduce invalid data issues for EDI 837 records
-    
+    Create the output sinks for a generator call
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        format: One format name or a list of them
+        output_file: Path (single format), dict of paths by format, or None
+                     for the sample files. With several formats and one path,
+                     each format gets that path with its own extension.
+        compression: Codec name, or None to infer from each path's extension.
+                     A path without the codec's extension gets it appended
+                     (Parquet and Arrow use it as their internal codec instead).
+        x12_limits: X12Sink envelope limits, passed to X12 sinks only
+        shards: Number of member-hash shards per format (None = OUTPUT_SHARDS)
+        partition_by_date: Write dt=YYYY-MM-DD partitions next to each path instead of one file
+
     Returns:
-        tuple: (claim_data, service_lines, is_invalid, issue_type)
+        tuple: (sinks, multi) where multi says whether several formats were requested
     """
-    if random.random() > invalid_rate:
-        return claim_data, service_lines, False, None
-    
-    issue_type = random.choice([
-        'charge_mismatch',
-        'invalid_diagnosis',
-        'future_service_date',
-        'invalid_npi_length',
-        'negative_amount'
-    ])
-    
-    is_invalid = True
-    
-    if issue_type == 'charge_mismatch':
-        # Make total charge less than sum of service lines
-        if service_lines:
-            total_lines = sum(float(line.get('billed_amount', 0)) for line in service_lines)
-            claim_data['billed_amount'] = max(0, total_lines * random.uniform(0.5, 0.8))
-    elif issue_type == 'invalid_diagnosis':
-        # Add invalid diagnosis code
-        claim_data['invalid_diagnosis'] = 'INVALID.999'
-    elif issue_type == 'future_service_date':
-        # Service date in the future
-        if claim_data.get('service_date'):
-            claim_data['service_date'] = fake.date_between(start_date='today', end_date='+1y')
-    elif issue_type == 'invalid_npi_length':
-        # NPI with wrong length (should be 10 digits)
-        claim_data['invalid_npi'] = ''.join(random.choices(string.digits, k=random.choice([8, 9, 11, 12])))
-    elif issue_type == 'negative_amount':
-        # Negative billed amount
-        claim_data['billed_amount'] = -abs(claim_data.get('billed_amount', 100))
-    
-    return claim_data, service_lines, is_invalid, issue_type
+    multi = not isinstance(format, str)
+    if shards is None:
+        shards = OUTPUT_SHARDS
+    if shards and partition_by_date:
+        raise ValueError("shards and partition_by_date cannot be combined")
+    sinks = []
+    for fmt, path in _output_paths(transaction_type, format, output_file):
+        options = x12_limits if fmt == 'x12' and x12_limits else {}
+        if partition_by_date:
+            sinks.append(DatePartitionedSink(transaction_type, fmt, path, compression, **options))
+        elif shards:
+            sinks.append(ShardedSink(transaction_type, fmt, path, shards, compression, **options))
+        else:
+            sinks.append(make_sink(transaction_type, fmt, path, compression, **options))
+    return sinks, multi
+
+
+def _output_paths(transaction_type, format, output_file):
+    """(format, path) of each format of a generator call (see _resolve_sinks)"""
+    multi = not isinstance(format, str)
+    paths = []
+    for fmt in (list(format) if multi else [format]):
+        fmt = fmt.lower()
+        extension = FORMAT_EXTENSIONS.get(fmt, fmt)
+        if isinstance(output_file, dict):
+            path = output_file.get(fmt)
+        elif output_file is not None and multi:
+            base, suffix = split_compression_suffix(output_file)
+            path = os.path.splitext(base)[0] + "." + extension + suffix
+        else:
+            path = output_file
+        if path is None:
+            path = os.path.join(SAMPLES_DIR, f"edi_{transaction_type}_large_sample.{extension}")
+        paths.append((fmt, path))
+    return paths
 
 
-def _introduce_invalid_data_835(payment_data, invalid_rate):
+def _resolve_cache(cache, seed, record_space):
     """
-    Introduce invalid data issues for EDI 835 records
-    
-    Returns:
-        tuple: (payment_data, is_invalid, issue_type)
+    The OutputCache serving a generator call, or None
+
+    Only calls whose output is reproducible (with a seed or a record
+    space) are cached.
     """
-    if random.random() > invalid_rate:
-        return payment_data, False, None
-    
-    issue_type = random.choice([
-        'negative_payment',
-        'mismatched_ids',
-        'invalid_adjustment_code',
-        'payment_exceeds_billed'
-    ])
-    
-    is_invalid = True
-    
-    if issue_type == 'negative_payment':
-        # Negative payment amount
-        payment_data['paid_amount'] = -abs(payment_data.get('paid_amount', 100))
-    elif issue_type == 'mismatched_ids':
-        # Mismatched claim ID
-        payment_data['claim_id'] = 'MISMATCHED-' + generate_id("", 10)
-    elif issue_type == 'invalid_adjustment_code':
-        # Invalid adjustment code
-        payment_data['adjustment_code'] = 'INVALID'
-    elif issue_type == 'payment_exceeds_billed':
-        # Payment exceeds billed amount
-        billed = payment_data.get('billed_amount', 100)
-        payment_data['paid_amount'] = billed * random.uniform(1.1, 1.5)
-    
-    return payment_data, is_invalid, issue_type
+    if cache is None:
+        cache = OUTPUT_CACHE_DIR
+    if not cache or (seed is None and record_space is None):
+        return None
+    from src.edi.output_cache import OutputCache
 
+    return cache if isinstance(cache, OutputCache) else OutputCache(cache)
 
-def _write_csv(data_rows, headers, output_file):
-    """Write data to CSV file"""
-    # Create directory if output_file has a directory path
-    dir_path = os.path.dirname(output_file)
-    if dir_path:
-        os.makedirs(dir_path, exist_ok=True)
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerows(data_rows)
 
+def _cached_call(cache, transaction_type, generate, args):
+    """
+    Serve a generate_edi_* call from the output cache, generating it on a miss
+
+    Args:
+        cache: OutputCache
+        transaction_type: "834", "837" or "835"
+        generate: The generate_edi_* function
+        args: The call's arguments, by name
 
-def generate_edi_834(num_members=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0):
+    Returns:
+        The call's result, with paths in its output directories
+    """
+    from src.edi.output_cache import tables_fingerprint
+
+    args = {name: value for name, value in args.items() if name != 'cache'}
+    output_file = args.pop('output_file')
+    record_space = args.pop('record_space')
+    paths = _output_paths(transaction_type, args['format'], output_file)
+    directories = list(dict.fromkeys(os.path.dirname(os.path.abspath(path)) for _, path in paths))
+    layout = [
+        (fmt, directories.index(os.path.dirname(os.path.abspath(path))), os.path.basename(path)) for fmt, path in paths
+    ]
+    params = dict(args, transaction_type=transaction_type, layout=layout)
+    if record_space is not None:
+        params['record_space'] = record_space.params
+    else:
+        # Seeded calls draw from global_data and date from today
+        params['global_data'] = tables_fingerprint(global_data)
+        params['today'] = date.today().isoformat()
+    key = cache.key(params)
+
+    entry = cache.get(key)
+    if entry is None:
+        staging = cache.stage()
+        staged = {fmt: os.path.join(staging, str(index), name) for fmt, index, name in layout}
+        before = {name: len(table) for name, table in global_data.items()}
+        results = generate(output_file=staged, record_space=record_space, cache=False, **args)
+        added = {name: dict(islice(table.items(), before[name], None)) for name, table in global_data.items()}
+        entry = cache.put(key, staging, results, added, {'transaction_type': transaction_type, 'layout': layout})
+        results, _ = cache.restore(entry, directories)
+        print(f"Output cached as {key[:12]} in {cache.directory}")
+        if cache.max_bytes:
+            cache.prune(max_bytes=cache.max_bytes)
+        return results
+
+    results, added = cache.restore(entry, directories)
+    for name, records in added.items():
+        global_data[name].update(records)
+    print(f"EDI {transaction_type} output restored from cache entry {key[:12]} "
+          f"({len(entry['files'])} files) to {', '.join(directories)}")
+    return results
+
+
+def _sink_results(sinks, results, multi):
+    """Return one sink's result, or a dict of results by format"""
+    if multi:
+        return {sink.format: result for sink, result in zip(sinks, results)}
+    return results[0]
+
+
+def _report_csv_result(result):
+    print(f"  Total records: {result['total_records']}, Invalid records: {result['invalid_records']}, "
+          f"Invalid rate: {result['invalid_rate']:.3f}")
+
+
+def generate_edi_834(num_members=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0, compression=None, x12_limits=None, shards=None, partition_by_date=False, invalid_weights=None, record_space=None, record_range=None, seed=None, cache=None):
     """
     Generate EDI 834 file (Enrollment) in X12 or CSV format
     
     Args:
         num_members: Number of members to generate (None = auto from business_size)
-        output_file: Output file path
-        format: Output format - "x12" or "csv"
+        output_file: Output file path, or a dict of paths by format
+        format: Output format - "x12", "csv", "parquet" or "arrow", or a list such as ["x12", "csv"]
+                to write every format from the same members in one pass
         business_size: Business size profile - "small", "medium", or "large"
                        Determines volume range if num_members is None
-        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records
+        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records,
+                      exactly round(records * invalid_rate) of them
+        invalid_weights: Dict of relative weights by issue type, e.g. {"missing_dob": 3, "invalid_gender": 1};
+                         types left out are not injected (None = all types equally)
+        compression: "gzip", "bz2", "lzma", "zstd", "lz4" or "fast" to stream compressed
+                     output (None = infer from the output file extension)
+        x12_limits: Dict splitting X12 output while it is written, with any of
+                    max_records_per_set, max_sets_per_group and max_bytes_per_file
+                    (None = the X12_MAX_* settings in config)
+        shards: Write this many files per format, partitioned by a stable hash of
+                member_id so 834/837/835 shards with the same number join without
+                a shuffle (None = OUTPUT_SHARDS; result is a list, one per shard)
+        partition_by_date: Write Hive-style dt=YYYY-MM-DD partitions in the output
+                           file's directory, by coverage effective date; the result is a
+                           dict with 'partitions' and 'output_files'
+        record_space: RecordSpace (src/edi/record_space.py) to derive the members from
+                      instead of drawing them; the member count, invalid_rate and invalid_weights come from the space,
+                      and nothing is added to global_data
+        record_range: (start, stop) indices of the space's members to write
+                      (None = all of them), so workers can write ranges in parallel
+        seed: Integer making the output reproducible: Python's random module,
+              NumPy, Faker and mimesis draw from independent child streams of
+              it, and the envelope is stamped with the start of the day
+              (None = unseeded)
+        cache: OutputCache (src/edi/output_cache.py) or cache directory serving
+               calls with a seed or record space: a repeated call links the
+               cached files into place instead of generating them
+               (None = OUTPUT_CACHE_DIR, False = no cache)
     
     Returns:
-        Generated content as string (X12) or dict with metadata (CSV)
+        Generated content as string (X12) or dict with metadata (CSV);
+        with a list of formats, a dict of those results keyed by format.
+        Compressed X12 output returns the output path and compressed CSV
+        output has 'data' = None, since neither is kept in memory. X12
+        output capped by max_bytes_per_file returns a list, one per file.
         CSV format returns: {
             "output_file": "...",
             "total_records": 1000,
@@ -822,267 +993,226 @@ def generate_edi_834(num_members=None, output_file=None, format="x12", business_
             "data": [...]
         }
     """
+    cache = _resolve_cache(cache, seed, record_space)
+    if cache is not None:
+        return _cached_call(cache, "834", generate_edi_834, locals())
+
+    if record_space is not None:
+        sinks, multi = _resolve_sinks(
+            "834", format, output_file, compression, x12_limits, shards, partition_by_date
+        )
+        return _sink_results(sinks, _write_record_space("834", record_space, record_range, sinks), multi)
+
+    from src.edi.seeding import child_generator
+
     # Generate volume based on business size if not specified
     if num_members is None:
         profile = BUSINESS_SIZE_PROFILES.get(business_size, BUSINESS_SIZE_PROFILES['medium'])
-        num_members = _generate_volume(profile['834'])
+        num_members = _generate_volume(profile['834'], rng=child_generator(seed, "834", 'volume'))
         print(f"Auto-generated volume for {business_size} business: {num_members} members")
-    
-    if output_file is None:
-        if format == "csv":
-            output_file = os.path.join(SAMPLES_DIR, "edi_834_large_sample.csv")
-        else:
-            output_file = os.path.join(SAMPLES_DIR, "edi_834_large_sample.txt")
-    
-    if format == "csv":
-        return _generate_edi_834_csv(num_members, output_file, invalid_rate)
-    else:
-        return _generate_edi_834_x12(num_members, output_file, invalid_rate)
 
+    sinks, multi = _resolve_sinks(
+        "834", format, output_file, compression, x12_limits, shards, partition_by_date
+    )
+    return _sink_results(sinks, _generate_edi_834(num_members, sinks, invalid_rate, invalid_weights, seed), multi)
 
-def _generate_edi_834_x12(num_members=1000, output_file=None, invalid_rate=0.0):
-    """Generate EDI 834 file in X12 format"""
-    print(f"Generating EDI 834 data for {num_members} members...")
-    if invalid_rate > 0:
-        print(f"  Invalid data rate: {invalid_rate*100:.1f}%")
 
-    segments = []
-    current_date = datetime.now()
+def _seed_run(seed, transaction_type):
+    """
+    Seed every source of randomness for one generator call
 
-    # Generate ISA and GS segments, get ISA control number
-    isa_gs_segments, isa_control_num = generate_isa_gs_segments("834", current_date)
-    segments.extend(isa_gs_segments)
+    Python's random module, Faker and the mimesis providers each get an
+    independent child stream of seed for this transaction type (see
+    src/edi/seeding.py), and the returned NumPy Generator another one.
 
-    # ST segment - use same version as GS segment (004010X095A1)
-    st_index = len(segments)  # Track ST segment position for SE count
-    segments.append("ST*834*0001*004010X095A1~")
+    Returns:
+        numpy.random.Generator for the call's vectorized draws
+        (a fresh unseeded one if seed is None)
+    """
+    from src.edi.seeding import child_generator, child_seed
 
-    # BGN segment
-    action_code = random.choice(["2", "4"])
-    segments.append("BGN*00*{ref}*{date}*{time}**{action_code}~".format(
-        ref="REF" + generate_id("", 9),
-        date=current_date.strftime("%Y%m%d"),
-        time=current_date.strftime("%H%M%S"),
-        action_code=action_code
-    ))
+    if seed is not None:
+        random.seed(child_seed(seed, transaction_type, 'python'))
+        fake.seed_instance(child_seed(seed, transaction_type, 'faker'))
+        person.reseed(child_seed(seed, transaction_type, 'mimesis', 'person'))
+        address.reseed(child_seed(seed, transaction_type, 'mimesis', 'address'))
+    return child_generator(seed, transaction_type, 'numpy')
 
-    # Add N1 segments (Sponsor and Payer information)
-    segments.append("N1*P5*{}*FI*{}~".format("SPONSOR_NAME", generate_id("TAX", 9)))
-    segments.append("N1*IN*{}*FI*{}~".format("PAYER_NAME", generate_id("TAX", 9)))
 
-    # Generate members in batches
-    for batch_start in range(0, num_members, BATCH_SIZE):
-        batch_end = min(batch_start + BATCH_SIZE, num_members)
-        print(f"Processing members {batch_start + 1} to {batch_end}...")
+def _run_date(seed=None):
+    """Envelope timestamp: now, or the start of today for a seeded run so that reruns that day match"""
+    if seed is None:
+        return datetime.now()
+    return datetime.combine(datetime.now().date(), datetime.min.time())
 
-        batch_members = []
-        for _ in range(batch_start, batch_end):
-            member = Member()
-            enrollment = Enrollment(member)
-            batch_members.append(member)
-            global_data['enrollments'][enrollment.id] = enrollment
-
-        # Generate EDI segments for this batch
-        for member in batch_members:
-            coverage_status, termination_reason, end_date = member.status_info
-            enrollment = next(e for e in global_data['enrollments'].values() if e.member_id == member.id)
-            
-            # Introduce invalid data if requested
-            member, enrollment, is_invalid, issue_type = _introduce_invalid_data_834(
-                member, enrollment, invalid_rate
-            )
-
-            # INS segment - Member insurance information
-            medicare_plan = random.choice(['A', 'B', 'C', 'E']) if random.random() < 0.3 else None
-            segments.append("INS*Y*18*030*{coverage_status}*{medicare_plan}***FT*Y~".format(
-                coverage_status=coverage_status,
-                medicare_plan=medicare_plan if medicare_plan else ''
-            ))
-
-            # REF segments - Member IDs
-            segments.append("REF*0F*{member_id}~".format(member_id=member.id))
-            segments.append("REF*38*{policy_num}~".format(policy_num=member.policy_num))
-            segments.append("REF*SY*{ssn}~".format(ssn=member.ssn))
-
-            # NM1 segment - Member name
-            segments.append("NM1*IL*1*{last_name}*{first_name}***MI*{member_id}~".format(
-                last_name=member.last_name,
-                first_name=member.first_name,
-                member_id=member.id
-            ))
-
-            # PER segment - Member contact
-            segments.append("PER*IP**HP*{phone}*EM*{email}~".format(
-                phone=member.phone,
-                email=member.email
-            ))
-
-            # N3 and N4 segments - Member address
-            segments.append("N3*{street}~".format(street=member.street))
-            segments.append("N4*{city}*{state}*{zip}*{country}~".format(
-                city=member.city,
-                state=member.state,
-                zip=member.zip_code,
-                country="US"
-            ))
-
-            # DMG segment - Member demographics
-            segments.append("DMG*D8*{dob}*{gender}~".format(
-                dob=member.dob.strftime("%Y%m%d"),
-                gender=member.gender
-            ))
-
-            # HD segment - Health plan
-            segments.append("HD*030*HLT*{plan_type}*{plan_id}*{plan_name}~".format(
-                plan_type=member.plan["type"],
-                plan_id=member.plan["id"],
-                plan_name=member.plan["name"]
-            ))
-
-            # DTP segment - Plan dates
-            segments.append("DTP*356*D8*{start_date}~".format(
-                start_date=enrollment.start_date.strftime("%Y%m%d")
-            ))
-
-            # For terminated members
-            if coverage_status == 'T' and end_date:
-                segments.append("DTP*357*D8*{end_date}~".format(
-                    end_date=end_date.strftime("%Y%m%d")
-                ))
-                segments.append("INS***{termination_reason}~".format(termination_reason=termination_reason))
-
-    # End segments
-    # SE count: number of segments from ST (inclusive) to SE (inclusive)
-    se_count = len(segments) - st_index + 1  # +1 to include SE itself
-    segments.append("SE*{count}*0001~".format(count=se_count))
-    segments.append("GE*1*1~")  # 1 transaction set in this functional group
-    segments.append("IEA*1*{control_num}~".format(control_num=isa_control_num))
-
-    # Write to file
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding='utf8') as f:
-        f.write("\n".join(segments))
-
-    print(f"Successfully generated EDI 834 data for {num_members} members in {output_file}")
-    return "\n".join(segments)
 
+def _write_record_space(transaction_type, record_space, record_range, sinks):
+    """
+    Write a range of a RecordSpace's records of one transaction type to every sink
 
-def _generate_edi_834_csv(num_members=1000, output_file=None, invalid_rate=0.0):
-    """Generate EDI 834 data in CSV format"""
-    print(f"Generating EDI 834 CSV data for {num_members} members...")
+    Returns:
+        List of sink results, in sink order
+    """
+    start, stop = record_range if record_range is not None else (0, record_space.count(transaction_type))
+    if not 0 <= start <= stop <= record_space.count(transaction_type):
+        raise ValueError(f"record_range {record_range} is outside the {record_space.count(transaction_type)} "
+                         f"EDI {transaction_type} records of the space")
+
+    formats = ", ".join(sink.format.upper() for sink in sinks)
+    print(f"Deriving EDI {transaction_type} {formats} records {start} to {stop} from seed {record_space.seed}...")
+    header = record_space.header(transaction_type, start, stop)
+    for sink in sinks:
+        sink.open(header)
+
+    for batch_start in range(start, stop, BATCH_SIZE):
+        records = list(record_space.records(transaction_type, batch_start, min(batch_start + BATCH_SIZE, stop)))
+        for sink in sinks:
+            sink.write_many(records)
+
+    results = []
+    for sink in sinks:
+        results.append(sink.close())
+        print(f"Successfully generated EDI {transaction_type} {sink.format.upper()} data with {stop - start} "
+              f"records in {sink.output_file}")
+        if isinstance(results[-1], dict):
+            _report_csv_result(results[-1])
+    return results
+
+
+def _generate_edi_834(num_members, sinks, invalid_rate=0.0, invalid_weights=None, seed=None):
+    """
+    Draw EDI 834 member records once and write them to every sink
+
+    Returns:
+        List of sink results, in sink order
+    """
+    from src.edi.invalid_data import InvalidDataPlanner, corrupt_834
+
+    rng = _seed_run(seed, "834")
+    formats = ", ".join(sink.format.upper() for sink in sinks)
+    print(f"Generating EDI 834 {formats} data for {num_members} members...")
     if invalid_rate > 0:
         print(f"  Invalid data rate: {invalid_rate*100:.1f}%")
-    
-    # CSV Schema for 834
-    headers = [
-        'member_id', 'subscriber_id', 'policy_number', 'ssn',
-        'last_name', 'first_name', 'middle_initial',
-        'date_of_birth', 'gender',
-        'street_address', 'city', 'state', 'zip_code', 'country',
-        'phone', 'email',
-        'coverage_status', 'medicare_plan',
-        'plan_id', 'plan_name', 'plan_type',
-        'effective_date', 'termination_date', 'termination_reason',
-        'relationship_code', 'transaction_type', 'action_code',
-        'sponsor_id', 'insurance_line'
-    ]
-    
-    csv_rows = []
-    invalid_count = 0
-    current_date = datetime.now()
-    
+
+    current_date = _run_date(seed)
+    header = {
+        'current_date': current_date,
+        'isa_control_num': generate_id("", 9),
+        'reference': "REF" + generate_id("", 9),
+        'action_code': random.choice(["2", "4"]),
+        'sponsor_tax_id': generate_id("TAX", 9),
+        'payer_tax_id': generate_id("TAX", 9),
+    }
+    for sink in sinks:
+        sink.open(header)
+
+    planner = InvalidDataPlanner("834", invalid_rate, invalid_weights, rng)
+
     # Generate members in batches
     for batch_start in range(0, num_members, BATCH_SIZE):
         batch_end = min(batch_start + BATCH_SIZE, num_members)
         print(f"Processing members {batch_start + 1} to {batch_end}...")
-        
-        batch_members = []
-        for _ in range(batch_start, batch_end):
-            member = Member()
-            enrollment = Enrollment(member)
-            batch_members.append((member, enrollment))
-            global_data['enrollments'][enrollment.id] = enrollment
-        
-        # Generate CSV rows for this batch
-        for member, enrollment in batch_members:
-            # Introduce invalid data if requested
-            member, enrollment, is_invalid, issue_type = _introduce_invalid_data_834(
-                member, enrollment, invalid_rate
-            )
-            if is_invalid:
-                invalid_count += 1
-            
-            coverage_status, termination_reason, end_date = member.status_info
-            medicare_plan = random.choice(['A', 'B', 'C', 'E']) if random.random() < 0.3 else None
-            
-            row = {
-                'member_id': member.id,
-                'subscriber_id': member.id,  # Self subscriber
-                'policy_number': member.policy_num,
-                'ssn': member.ssn,
-                'last_name': member.last_name,
-                'first_name': member.first_name,
-                'middle_initial': '',
-                'date_of_birth': member.dob.strftime("%Y-%m-%d") if member.dob else '',
-                'gender': member.gender,
-                'street_address': member.street,
-                'city': member.city,
-                'state': member.state,
-                'zip_code': member.zip_code,
-                'country': 'US',
-                'phone': member.phone,
-                'email': member.email,
-                'coverage_status': coverage_status,
-                'medicare_plan': medicare_plan if medicare_plan else '',
-                'plan_id': member.plan["id"],
-                'plan_name': member.plan["name"],
-                'plan_type': member.plan["type"],
-                'effective_date': enrollment.start_date.strftime("%Y-%m-%d") if enrollment.start_date else '',
-                'termination_date': end_date.strftime("%Y-%m-%d") if end_date else '',
-                'termination_reason': termination_reason if termination_reason else '',
-                'relationship_code': enrollment.relationship_code,
-                'transaction_type': enrollment.transaction_type,
-                'action_code': enrollment.action_code,
-                'sponsor_id': enrollment.sponsor_id,
-                'insurance_line': enrollment.insurance_line
-            }
-            csv_rows.append(row)
-    
-    # Write CSV file
-    _write_csv(csv_rows, headers, output_file)
-    # Calculate actual invalid rate
-    actual_invalid_rate = invalid_count / len(csv_rows) if csv_rows else 0.0
-    
-    print(f"Successfully generated EDI 834 CSV data for {num_members} members in {output_file}")
-    print(f"  Total records: {len(csv_rows)}, Invalid records: {invalid_count}, Invalid rate: {actual_invalid_rate:.3f}")
-    
-    return {
-        "output_file": output_file,
-        "total_records": len(csv_rows),
-        "invalid_records": invalid_count,
-        "invalid_rate": actual_invalid_rate,
-        "data": csv_rows
-    }
+
+        batch = _generate_member_batch(batch_end - batch_start, rng)
+        # Introduce invalid data if requested
+        issues = planner.plan(len(batch))
+        corrupt_834(batch, issues, rng)
+
+        records = []
+        for (member, enrollment, medicare_plan), issue_type in zip(batch, issues):
+            if issue_type is not None:
+                segment_cache.invalidate(member)
+
+            records.append({
+                'member': member,
+                'enrollment': enrollment,
+                'medicare_plan': medicare_plan,
+                'status_info': member.status_info,
+                'member_block': segment_cache.member_block(member),
+                'is_invalid': issue_type is not None,
+                'issue_type': issue_type,
+            })
+
+        for sink in sinks:
+            sink.write_many(records)
+
+    results = []
+    for sink in sinks:
+        results.append(sink.close())
+        print(f"Successfully generated EDI 834 {sink.format.upper()} data for {num_members} members in {sink.output_file}")
+        if isinstance(results[-1], dict):
+            _report_csv_result(results[-1])
+    return results
+
+
+def _generate_edi_834_x12(num_members=1000, output_file=None, invalid_rate=0.0, seed=None):
+    """Generate EDI 834 file in X12 format"""
+    return _generate_edi_834(num_members, [make_sink("834", "x12", output_file)], invalid_rate, seed=seed)[0]
 
 
-def generate_edi_837(num_claims=None, claims_per_member=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0, risk_profile="balanced", custom_distribution=None):
+def _generate_edi_834_csv(num_members=1000, output_file=None, invalid_rate=0.0):
+    """Generate EDI 834 data in CSV format"""
+    return _generate_edi_834(num_members, [make_sink("834", "csv", output_file)], invalid_rate)[0]
+
+
+def generate_edi_837(num_claims=None, claims_per_member=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0, risk_profile="balanced", custom_distribution=None, compression=None, x12_limits=None, shards=None, partition_by_date=False, sort_by_member=False, invalid_weights=None, record_space=None, record_range=None, seed=None, cache=None):
     """
     Generate EDI 837 file (Claims) in X12 or CSV format
     
     Args:
         num_claims: Number of claims to generate (None = auto from business_size)
-        claims_per_member: Claims per member if num_claims is None (None = auto-calculate)
-        output_file: Output file path
-        format: Output format - "x12" or "csv"
+        claims_per_member: Mean claims of the members who file any: the claims are spread
+                           over num_claims / claims_per_member members (None = any member).
+                           Each member's claim count is drawn from the risk profile's
+                           skewed 'utilization' distribution, and claims are generated
+                           member by member
+        output_file: Output file path, or a dict of paths by format
+        format: Output format - "x12", "csv", "parquet" or "arrow", or a list such as ["x12", "csv"]
+                to write every format from the same claims in one pass
         business_size: Business size profile - "small", "medium", or "large"
                        Determines volume range if num_claims is None
-        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records
+        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records,
+                      exactly round(records * invalid_rate) of them
+        invalid_weights: Dict of relative weights by issue type, e.g. {"charge_mismatch": 3, "future_service_date": 1};
+                         types left out are not injected (None = all types equally)
         risk_profile: Risk profile - "high_risk", "low_risk", or "balanced"
         custom_distribution: Dict with custom distribution parameters to override risk_profile
-                           e.g., {"high_cost_ratio": 0.3, "denial_rate": 0.15, "er_visit_rate": 0.1}
+                           e.g., {"high_cost_ratio": 0.3, "denial_rate": 0.15, "er_visit_rate": 0.1,
+                           "utilization": {"distribution": "zipf", "exponent": 1.1}}
+        compression: "gzip", "bz2", "lzma", "zstd", "lz4" or "fast" to stream compressed
+                     output (None = infer from the output file extension)
+        x12_limits: Dict splitting X12 output while it is written, with any of
+                    max_records_per_set, max_sets_per_group and max_bytes_per_file
+                    (None = the X12_MAX_* settings in config)
+        shards: Write this many files per format, partitioned by a stable hash of
+                member_id so 834/837/835 shards with the same number join without
+                a shuffle (None = OUTPUT_SHARDS; result is a list, one per shard)
+        partition_by_date: Write Hive-style dt=YYYY-MM-DD partitions in the output
+                           file's directory, by service date; the result is a
+                           dict with 'partitions' and 'output_files'
+        sort_by_member: Write records sorted by (member_id, service_date), which
+                        compresses better and feeds merge joins; records are
+                        generated in that order rather than sorted afterwards
+        record_space: RecordSpace (src/edi/record_space.py) to derive the claims from
+                      instead of drawing them; the claim count, risk profile, invalid_rate and invalid_weights come from the space,
+                      and nothing is added to global_data
+        record_range: (start, stop) indices of the space's claims to write
+                      (None = all of them), so workers can write ranges in parallel
+        seed: Integer making the output reproducible: Python's random module,
+              NumPy, Faker and mimesis draw from independent child streams of
+              it, and the envelope is stamped with the start of the day
+              (None = unseeded)
+        cache: OutputCache (src/edi/output_cache.py) or cache directory serving
+               calls with a seed or record space: a repeated call links the
+               cached files into place instead of generating them
+               (None = OUTPUT_CACHE_DIR, False = no cache)
     
     Returns:
-        Generated content as string (X12) or dict with metadata (CSV)
+        Generated content as string (X12) or dict with metadata (CSV);
+        with a list of formats, a dict of those results keyed by format.
+        Compressed X12 output returns the output path and compressed CSV
+        output has 'data' = None, since neither is kept in memory. X12
+        output capped by max_bytes_per_file returns a list, one per file.
         CSV format returns: {
             "output_file": "...",
             "total_records": 1000,
@@ -1091,49 +1221,59 @@ def generate_edi_837(num_claims=None, claims_per_member=None, output_file=None,
             "data": [...]
         }
     """
+    cache = _resolve_cache(cache, seed, record_space)
+    if cache is not None:
+        return _cached_call(cache, "837", generate_edi_837, locals())
+
+    if record_space is not None:
+        sinks, multi = _resolve_sinks(
+            "837", format, output_file, compression, x12_limits, shards, partition_by_date
+        )
+        return _sink_results(sinks, _write_record_space("837", record_space, record_range, sinks), multi)
+
+    from src.edi.seeding import child_generator
+
     # Generate volume based on business size if not specified
     if num_claims is None:
         profile = BUSINESS_SIZE_PROFILES.get(business_size, BUSINESS_SIZE_PROFILES['medium'])
-        num_claims = _generate_volume(profile['837'])
+        num_claims = _generate_volume(profile['837'], rng=child_generator(seed, "837", 'volume'))
         print(f"Auto-generated volume for {business_size} business: {num_claims} claims")
-    elif claims_per_member is None:
-        # If num_claims is specified but claims_per_member is not, use default
-        claims_per_member = 3
     
-    if output_file is None:
-        if format == "csv":
-            output_file = os.path.join(SAMPLES_DIR, "edi_837_large_sample.csv")
-        else:
-            output_file = os.path.join(SAMPLES_DIR, "edi_837_large_sample.txt")
+    risk_config = _resolve_risk_config(risk_profile, custom_distribution)
     
-    # Merge risk profile with custom distribution
-    if custom_distribution:
-        base_profile = RISK_PROFILES.get(risk_profile, RISK_PROFILES['balanced']).copy()
-        base_profile.update(custom_distribution)
-        risk_config = base_profile
-    else:
-        risk_config = RISK_PROFILES.get(risk_profile, RISK_PROFILES['balanced']).copy()
-    
-    # Add profile name for logging
-    risk_config['_profile_name'] = risk_profile
-    
-    if format == "csv":
-        return _generate_edi_837_csv(num_claims, claims_per_member, output_file, invalid_rate, risk_config)
-    else:
-        return _generate_edi_837_x12(num_claims, claims_per_member, output_file, invalid_rate, risk_config)
+    sinks, multi = _resolve_sinks(
+        "837", format, output_file, compression, x12_limits, shards, partition_by_date
+    )
+    results = _generate_edi_837(
+        num_claims, claims_per_member, sinks, invalid_rate, risk_config, sort_by_member, invalid_weights, seed
+    )
+    return _sink_results(sinks, results, multi)
 
 
-def _generate_edi_837_x12(num_claims=None, claims_per_member=3, output_file=None, invalid_rate=0.0, risk_config=None):
-    """Generate EDI 837 file in X12 format"""
+def _generate_edi_837(num_claims, claims_per_member, sinks, invalid_rate=0.0, risk_config=None, sort_by_member=False,
+                      invalid_weights=None, seed=None):
+    """
+    Draw EDI 837 claim records once and write them to every sink
+
+    With sort_by_member, claims are drawn member by member in member_id
+    order and each member's claims are written by service date.
+
+    Returns:
+        List of sink results, in sink order
+    """
+    from src.edi.invalid_data import InvalidDataPlanner
+
+    rng = _seed_run(seed, "837")
     if risk_config is None:
-        risk_config = RISK_PROFILES['balanced']
-    
+        risk_config = RISK_PROFILES['balanced'].copy()
+    _compile_risk_config(risk_config)
+
     if invalid_rate > 0:
         print(f"  Invalid data rate: {invalid_rate*100:.1f}%")
     print(f"  Risk profile: {risk_config.get('_profile_name', 'custom')}")
     if not global_data['members']:
         print("No members found. Generating sample members first...")
-        _generate_edi_834_x12(1000, os.path.join(SAMPLES_DIR, "temp_834.txt"), 0.0)
+        _generate_edi_834_x12(1000, os.path.join(SAMPLES_DIR, "temp_834.txt"), 0.0, seed)
 
     if not global_data['providers']:
         print("Generating providers...")
@@ -1146,366 +1286,290 @@ def _generate_edi_837_x12(num_claims=None, claims_per_member=3, output_file=None
     # Calculate number of claims if not specified
     if num_claims is None:
         num_claims = len(members) * claims_per_member
+        claims_per_member = None  # Every member may file
+
+    current_date = _run_date(seed)
+    header = {
+        'current_date': current_date,
+        'isa_control_num': generate_id("", 9),
+        'reference': "REF" + generate_id("", 9),
+        'submitter_id': providers[0].id,
+        'payer_id': "PAYER123",
+    }
+    for sink in sinks:
+        sink.open(header)
+
+    print(f"Generating {num_claims} claims...")
+
+    member_claims = _claims_by_member(members, num_claims, claims_per_member, risk_config, rng, sort_by_member)
+    planner = InvalidDataPlanner("837", invalid_rate, invalid_weights, rng)
 
-    segments = []
-    current_date = datetime.now()
+    records = []
+    member_records = []
+    for record in _draw_claims(member_claims, providers, current_date, risk_config, planner, rng):
+        if not sort_by_member:
+            records.append(record)
+        else:
+            # A member's claims are drawn together; emit them by service date
+            if member_records and member_records[-1]['member'] is not record['member']:
+                records.extend(sorted(member_records, key=_claim_service_date))
+                member_records = []
+            member_records.append(record)
+
+        if len(records) >= BATCH_SIZE:
+            for sink in sinks:
+                sink.write_many(records)
+            records = []
+
+    records.extend(sorted(member_records, key=_claim_service_date))
+    if records:
+        for sink in sinks:
+            sink.write_many(records)
+
+    results = []
+    for sink in sinks:
+        results.append(sink.close())
+        print(f"Successfully generated EDI 837 {sink.format.upper()} data with {num_claims} claims in {sink.output_file}")
+        if isinstance(results[-1], dict):
+            _report_csv_result(results[-1])
+    return results
+
+
+def _draw_claims(member_claims, providers, current_date, risk_config, planner, rng):
+    """
+    Yield the claim records of each (member, count) pair, member by member
 
-    # Generate ISA and GS segments, get ISA control number
-    isa_gs_segments, isa_control_num = generate_isa_gs_segments("837", current_date)
-    segments.extend(isa_gs_segments)
+    Each member's enrollment is looked up once for all of their claims.
+    Records are given their planned issues BATCH_SIZE at a time.
+    """
+    from src.edi.invalid_data import corrupt_837
+
+    enrollments = {}
+    for enrollment in global_data['enrollments'].values():
+        enrollments.setdefault(enrollment.member_id, enrollment)
+
+    batch = []
+    drawn = 0
+    for member, count in member_claims:
+        enrollment = enrollments.get(member.id)
+        if enrollment is None:
+            enrollment = enrollments[member.id] = Enrollment(member)
+        for _ in range(count):
+            if drawn > 0 and drawn % 100 == 0:
+                print(f"Generated {drawn} claims so far...")
+            batch.append(_draw_claim(member, random.choice(providers), current_date, risk_config, enrollment))
+            drawn += 1
+            if len(batch) >= BATCH_SIZE:
+                corrupt_837(batch, planner.plan(len(batch)), rng)
+                yield from batch
+                batch = []
+    if batch:
+        corrupt_837(batch, planner.plan(len(batch)), rng)
+        yield from batch
+
+
+def _claims_by_member(members, num_claims, claims_per_member, risk_config, rng, sort_by_member=False):
+    """
+    Yield (member, claim count) for each member with claims
 
-    # ST segment
-    st_index = len(segments)  # Track ST segment position for SE count
-    segments.append("ST*837*0001*004010X098A1~")
+    The counts of all members are drawn at once from the risk profile's
+    utilization distribution (see src/edi/utilization.py) and add up to
+    num_claims. Members come in population order, or in member_id order
+    with sort_by_member, so sorted output needs no buffering beyond one
+    member's claims.
+    """
+    from src.edi.utilization import claim_counts
 
-    # BHT segment
-    segments.append("BHT*0019*00*{ref}*{date}*{time}*CH~".format(
-        ref="REF" + generate_id("", 9),
-        date=current_date.strftime("%Y%m%d"),
-        time=current_date.strftime("%H%M%S")
-    ))
+    counts = claim_counts(len(members), num_claims, rng, risk_config.get('utilization'), claims_per_member)
+    pairs = zip(members, counts.tolist())
+    if sort_by_member:
+        pairs = sorted(pairs, key=lambda pair: pair[0].id)
+    for member, count in pairs:
+        if count:
+            yield member, count
 
-    # Submitter and receiver info
-    segments.append("NM1*41*2*PROVIDER BILLING*****46*{provider_id}~".format(
-        provider_id=providers[0].id
-    ))
-    segments.append("NM1*40*2*INSURANCE COMPANY*****46*PAYER123~")
 
-    print(f"Generating {num_claims} claims...")
+def _claim_service_date(record):
+    return record['claim_data']['service_date']
 
-    # Generate claims in batches
-    for i in range(num_claims):
-        if i > 0 and i % 100 == 0:
-            print(f"Generated {i} claims so far...")
 
-        claim_id = generate_id("CLM" + current_date.strftime("%Y"), 6)
-        provider = random.choice(providers)
-        member = random.choice(members)
+def _draw_claim(member, provider, current_date, risk_config, enrollment=None):
+    """Draw one valid EDI 837 claim record for a member (under enrollment, looked up if not given)"""
+    # Claim IDs are checked against global_data; widen them before the 6-digit space fills up
+    digits = 6 if len(global_data['claims']) < 500000 else 9
+    claim_id = generate_id("CLM" + current_date.strftime("%Y"), digits)
 
-        # Get or create enrollment
+    # Get or create enrollment
+    if enrollment is None:
         enrollment = next((e for e in global_data['enrollments'].values() if e.member_id == member.id), None)
-        if not enrollment:
-            enrollment = Enrollment(member)
-
-        # Store claim data
-        claim_data = {
-            'id': claim_id,
-            'member_id': member.id,
-            'provider_id': provider.id,
-            'enrollment_id': enrollment.id,
-            'service_date': None,
-            'billed_amount': 0,
-            'paid_amount': 0
-        }
-        global_data['claims'][claim_id] = claim_data
-
-        # HL segment - Claim hierarchy
-        segments.append("HL*{level}*{parent}*22*1~".format(
-            level=i + 1,
-            parent=i if i > 0 else ""
-        ))
-
-        # PRV segment - Provider type
-        segments.append("PRV*BI*PXC*{taxonomy}~".format(
-            taxonomy=provider.taxonomy
-        ))
-
-        # NM1 segment - Provider info
-        segments.append("NM1*85*2*{last_name}*{first_name}***XX*{npi}~".format(
-            last_name=provider.last_name,
-            first_name=provider.first_name,
-            npi=provider.npi
-        ))
-
-        # REF segment - Provider secondary ID
-        segments.append("REF*EI*{tax_id}~".format(tax_id=provider.tax_id))
-
-        # N3 and N4 segments - Provider address
-        segments.append("N3*{street}~".format(street=provider.street))
-        segments.append("N4*{city}*{state}*{zip}~".format(
-            city=provider.city,
-            state=provider.state,
-            zip=provider.zip
-        ))
-
-        # NM1 segment - Member info
-        segments.append("NM1*IL*1*{last_name}*{first_name}***MI*{member_id}~".format(
-            last_name=member.last_name,
-            first_name=member.first_name,
-            member_id=member.id
-        ))
-
-        # DMG segment - Member demographics
-        segments.append("DMG*D8*{dob}*{gender}~".format(
-            dob=member.dob.strftime("%Y%m%d"),
-            gender=member.gender
-        ))
-
-        # Determine if ER visit based on risk profile
-        is_er = random.random() < risk_config.get('er_visit_rate', 0.1)
-
-        # CLM segment - Claim info
-        billed_amount = _calculate_billed_amount(risk_config)
-        claim_status = _get_claim_status(risk_config)
-        segments.append("CLM*{claim_id}*{billed_amount}***{service_type}:{modifier}*Y*A*Y*Y~".format(
-            claim_id=claim_id,
-            billed_amount=billed_amount,
-            service_type=random.choice(["A", "B", "C"]),
-            modifier=random.choice(["", "25", "59", "76"])
-        ))
-        claim_data['billed_amount'] = billed_amount
-
-        # DTP segment - Service date
-        if enrollment.end_date:
-            # Ensure end_date is after start_date
-            if enrollment.end_date > enrollment.start_date:
-                max_date = min(datetime.now().date(), enrollment.end_date)
-            else:
-                max_date = datetime.now().date()
+    if not enrollment:
+        enrollment = Enrollment(member)
+
+    # Service date within the enrollment period
+    if enrollment.end_date:
+        # Ensure end_date is after start_date
+        if enrollment.end_date > enrollment.start_date:
+            max_date = min(datetime.now().date(), enrollment.end_date)
         else:
             max_date = datetime.now().date()
+    else:
+        max_date = datetime.now().date()
 
-        # Ensure start_date is before max_date
-        if enrollment.start_date < max_date:
-            service_date = fake.date_between(
-                start_date=enrollment.start_date,
-                end_date=max_date
-            )
-        else:
-            # If dates are invalid, use current date
-            service_date = datetime.now().date()
-
-        segments.append("DTP*472*D8*{service_date}~".format(
-            service_date=service_date.strftime("%Y%m%d")
-        ))
-        claim_data['service_date'] = service_date
-
-        # Diagnosis codes based on risk profile
-        diag_codes = _select_diagnosis_codes(risk_config)
-        
-        for diag in diag_codes:
-            segments.append(f"HI*ABK:{diag['code']}~")
-
-        # Service line items based on risk profile
-        line_amounts = []
-        remaining_amount = billed_amount
-        num_lines = _get_service_line_count(risk_config)
-        
-        for line_num in range(1, num_lines + 1):
-            if line_num == num_lines:
-                line_amount = round(remaining_amount, 2)
-            else:
-                line_amount = round(remaining_amount * random.uniform(0.2, 0.4), 2)
-            remaining_amount -= line_amount
-            line_amounts.append(line_amount)
-
-            procedure_code = _select_procedure_code(risk_config, is_er)
-            modifier = random.choice(["", "25", "59", "76"])
-            place_of_service = _select_place_of_service(risk_config, is_er)
-
-            segments.append(f"LX*{line_num}~")
-            segments.append(f"SV1*HC:{procedure_code}{':' + modifier if modifier else ''}*{line_amount}*UN*1***1~")
-            segments.append(f"REF*6R*{place_of_service}~")
-            segments.append(f"DTP*472*D8*{service_date.strftime('%Y%m%d')}~")
-
-    # End segments
-    # SE count: number of segments from ST (inclusive) to SE (inclusive)
-    se_count = len(segments) - st_index + 1  # +1 to include SE itself
-    segments.append("SE*{count}*0001~".format(count=se_count))
-    segments.append("GE*1*1~")  # 1 transaction set in this functional group
-    segments.append("IEA*1*{control_num}~".format(control_num=isa_control_num))
-
-    # Write to file
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding='utf8') as f:
-        f.write("\n".join(segments))
-
-    print(f"Successfully generated EDI 837 data with {num_claims} claims in {output_file}")
-    return "\n".join(segments)
+    # Ensure start_date is before max_date
+    if enrollment.start_date < max_date:
+        service_date = fake.date_between(start_date=enrollment.start_date, end_date=max_date)
+    else:
+        # If dates are invalid, use current date
+        service_date = datetime.now().date()
 
+    details = _draw_claim_details(risk_config)
+    record = _claim_record(claim_id, member, provider, enrollment, service_date, details)
+    global_data['claims'][claim_id] = record['claim_data']
+    return record
 
-def _generate_edi_837_csv(num_claims=None, claims_per_member=3, output_file=None, invalid_rate=0.0, risk_config=None):
-    """Generate EDI 837 data in CSV format"""
-    if risk_config is None:
-        risk_config = RISK_PROFILES['balanced']
-    
-    if not global_data['members']:
-        print("No members found. Generating sample members first...")
-        _generate_edi_834_x12(1000, os.path.join(SAMPLES_DIR, "temp_834.txt"), 0.0)
-    
-    if not global_data['providers']:
-        print("Generating providers...")
-        for _ in range(100):
-            Provider()
-    
-    members = list(global_data['members'].values())
-    providers = list(global_data['providers'].values())
-    
-    if num_claims is None:
-        num_claims = len(members) * claims_per_member
-    
-    if invalid_rate > 0:
-        print(f"  Invalid data rate: {invalid_rate*100:.1f}%")
-    print(f"  Risk profile: {risk_config.get('_profile_name', 'custom')}")
-    
-    # CSV Schema for 837
-    headers = [
-        'claim_id', 'member_id', 'provider_id', 'provider_npi', 'provider_tax_id',
-        'provider_last_name', 'provider_first_name', 'provider_specialty',
-        'provider_street', 'provider_city', 'provider_state', 'provider_zip',
-        'member_last_name', 'member_first_name',
-        'member_dob', 'member_gender',
-        'service_date', 'billed_amount', 'claim_status', 'claim_frequency_code',
-        'claim_source_code', 'facility_type_code', 'location_type',
-        'procedure_code', 'procedure_description', 'diagnosis_codes',
-        'submission_date', 'enrollment_id'
-    ]
-    
-    csv_rows = []
-    invalid_count = 0
-    current_date = datetime.now()
-    
-    print(f"Generating {num_claims} claims...")
-    
-    for i in range(num_claims):
-        if i > 0 and i % 100 == 0:
-            print(f"Generated {i} claims so far...")
-        
-        claim_id = generate_id("CLM" + current_date.strftime("%Y"), 6)
-        provider = random.choice(providers)
-        member = random.choice(members)
-        
-        enrollment = next((e for e in global_data['enrollments'].values() if e.member_id == member.id), None)
-        if not enrollment:
-            enrollment = Enrollment(member)
-        
-        # Calculate service date
-        if enrollment.end_date:
-            max_date = min(datetime.now().date(), enrollment.end_date) if enrollment.end_date > enrollment.start_date else datetime.now().date()
-        else:
-            max_date = datetime.now().date()
-        
-        if enrollment.start_date < max_date:
-            service_date = fake.date_between(start_date=enrollment.start_date, end_date=max_date)
+
+def _draw_claim_details(risk_config, rand=random):
+    """
+    Draw the parts of a claim that depend only on the risk profile
+
+    Args:
+        risk_config: Risk configuration dict
+        rand: Source of randomness (the random module or a random.Random)
+
+    Returns:
+        Dict with is_er, billed_amount, claim_status, diagnosis_codes,
+        service_lines, service_type and claim_modifier
+    """
+    # Determine if ER visit based on risk profile
+    is_er = rand.random() < risk_config.get('er_visit_rate', 0.1)
+
+    billed_amount = _calculate_billed_amount(risk_config, rand)
+    claim_status = _get_claim_status(risk_config, rand)
+
+    # Diagnosis codes based on risk profile
+    diagnosis_codes = [d['code'] for d in _select_diagnosis_codes(risk_config, rand)]
+
+    # Service line items based on risk profile
+    service_lines = []
+    remaining_amount = billed_amount
+    num_lines = _get_service_line_count(risk_config, rand)
+
+    for line_num in range(1, num_lines + 1):
+        if line_num == num_lines:
+            line_amount = round(remaining_amount, 2)
         else:
-            service_date = datetime.now().date()
-        
-        # Determine if ER visit based on risk profile
-        is_er = random.random() < risk_config.get('er_visit_rate', 0.1)
-        
-        billed_amount = _calculate_billed_amount(risk_config)
-        claim_status = _get_claim_status(risk_config)
-        
-        # Get diagnosis codes based on risk profile
-        diag_code_objects = _select_diagnosis_codes(risk_config)
-        diag_codes = [d['code'] for d in diag_code_objects]
-        
-        # Get procedure code and place of service based on risk profile
-        procedure_code = _select_procedure_code(risk_config, is_er)
-        place_of_service = _select_place_of_service(risk_config, is_er)
-        procedure_map = {
-            '99213': 'Office/outpatient visit est',
-            '99214': 'Office/outpatient visit est',
-            '99203': 'Office/outpatient visit new',
-            '99204': 'Office/outpatient visit new',
-            '99215': 'Office/outpatient visit est',
-            '99244': 'Office consult'
-        }
-        
-        # Service lines for charge mismatch check
-        service_lines = [{'billed_amount': billed_amount * 0.6}, {'billed_amount': billed_amount * 0.4}]
-        
-        claim_data = {
-            'id': claim_id,
-            'member_id': member.id,
-            'provider_id': provider.id,
-            'enrollment_id': enrollment.id,
-            'service_date': service_date,
-            'billed_amount': billed_amount,
-            'paid_amount': 0
-        }
-        
-        # Introduce invalid data if requested
-        claim_data, service_lines, is_invalid, issue_type = _introduce_invalid_data_837(
-            claim_data, service_lines, invalid_rate
-        )
-        if is_invalid:
-            invalid_count += 1
-        
-        global_data['claims'][claim_id] = claim_data
-        
-        # Handle invalid diagnosis codes
-        if 'invalid_diagnosis' in claim_data:
-            diag_codes.append(claim_data['invalid_diagnosis'])
-        
-        # Handle invalid NPI
-        provider_npi = provider.npi
-        if 'invalid_npi' in claim_data:
-            provider_npi = claim_data['invalid_npi']
-        
-        row = {
-            'claim_id': claim_id,
-            'member_id': member.id,
-            'provider_id': provider.id,
-            'provider_npi': provider_npi,
-            'provider_tax_id': provider.tax_id,
-            'provider_last_name': provider.last_name,
-            'provider_first_name': provider.first_name,
-            'provider_specialty': provider.specialty,
-            'provider_street': provider.street,
-            'provider_city': provider.city,
-            'provider_state': provider.state,
-            'provider_zip': provider.zip,
-            'member_last_name': member.last_name,
-            'member_first_name': member.first_name,
-            'member_dob': member.dob.strftime("%Y-%m-%d"),
-            'member_gender': member.gender,
-            'service_date': claim_data['service_date'].strftime("%Y-%m-%d") if isinstance(claim_data['service_date'], datetime) or hasattr(claim_data['service_date'], 'strftime') else str(claim_data.get('service_date', service_date)),
-            'billed_amount': f"{claim_data['billed_amount']:.2f}",
-            'claim_status': claim_status,
-            'claim_frequency_code': '1',
-            'claim_source_code': '01',
-            'facility_type_code': place_of_service,
-            'location_type': 'ER' if is_er or place_of_service == '23' else ('OFFICE' if place_of_service == '11' else 'OUTPATIENT'),
-            'procedure_code': procedure_code,
-            'procedure_description': procedure_map.get(procedure_code, 'Medical service'),
-            'diagnosis_codes': '|'.join(diag_codes),
-            'submission_date': current_date.strftime("%Y-%m-%d"),
-            'enrollment_id': enrollment.id
-        }
-        csv_rows.append(row)
-    
-    _write_csv(csv_rows, headers, output_file)
-    
-    # Calculate actual invalid rate
-    actual_invalid_rate = invalid_count / len(csv_rows) if csv_rows else 0.0
-    
-    print(f"Successfully generated EDI 837 CSV data with {num_claims} claims in {output_file}")
-    print(f"  Total records: {len(csv_rows)}, Invalid records: {invalid_count}, Invalid rate: {actual_invalid_rate:.3f}")
-    
+            line_amount = round(remaining_amount * rand.uniform(0.2, 0.4), 2)
+        remaining_amount -= line_amount
+        service_lines.append({
+            'billed_amount': line_amount,
+            'procedure_code': _select_procedure_code(risk_config, is_er, rand),
+            'modifier': rand.choice(["", "25", "59", "76"]),
+            'place_of_service': _select_place_of_service(risk_config, is_er, rand),
+        })
+
+    return {
+        'is_er': is_er,
+        'billed_amount': billed_amount,
+        'claim_status': claim_status,
+        'diagnosis_codes': diagnosis_codes,
+        'service_lines': service_lines,
+        'service_type': rand.choice(["A", "B", "C"]),
+        'claim_modifier': rand.choice(["", "25", "59", "76"]),
+    }
+
+
+def _claim_record(claim_id, member, provider, enrollment, service_date, details):
+    """Assemble an EDI 837 claim record (see src/edi/sinks.py) from drawn claim details"""
+    claim_data = {
+        'id': claim_id,
+        'member_id': member.id,
+        'provider_id': provider.id,
+        'enrollment_id': enrollment.id,
+        'service_date': service_date,
+        'billed_amount': details['billed_amount'],
+        'paid_amount': 0
+    }
     return {
-        "output_file": output_file,
-        "total_records": len(csv_rows),
-        "invalid_records": invalid_count,
-        "invalid_rate": actual_invalid_rate,
-        "data": csv_rows
+        'claim_data': claim_data,
+        'provider': provider,
+        'member': member,
+        'enrollment': enrollment,
+        'provider_block': segment_cache.provider_block(provider),
+        'member_block': segment_cache.member_block(member),
+        'provider_npi': provider.npi,
+        'is_er': details['is_er'],
+        'claim_status': details['claim_status'],
+        'diagnosis_codes': details['diagnosis_codes'],
+        'service_type': details['service_type'],
+        'claim_modifier': details['claim_modifier'],
+        'service_lines': details['service_lines'],
+        'is_invalid': False,
+        'issue_type': None,
     }
 
 
-def generate_edi_835(num_payments=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0):
+def _generate_edi_837_x12(num_claims=None, claims_per_member=3, output_file=None, invalid_rate=0.0, risk_config=None,
+                          seed=None):
+    """Generate EDI 837 file in X12 format"""
+    sinks = [make_sink("837", "x12", output_file)]
+    return _generate_edi_837(num_claims, claims_per_member, sinks, invalid_rate, risk_config, seed=seed)[0]
+
+
+def _generate_edi_837_csv(num_claims=None, claims_per_member=3, output_file=None, invalid_rate=0.0, risk_config=None):
+    """Generate EDI 837 data in CSV format"""
+    sinks = [make_sink("837", "csv", output_file)]
+    return _generate_edi_837(num_claims, claims_per_member, sinks, invalid_rate, risk_config)[0]
+
+
+def generate_edi_835(num_payments=None, output_file=None, format="x12", business_size="medium", invalid_rate=0.0, compression=None, x12_limits=None, shards=None, partition_by_date=False, sort_by_member=False, invalid_weights=None, record_space=None, record_range=None, seed=None, cache=None):
     """
     Generate EDI 835 file (Payment/Remittance) in X12 or CSV format
     
     Args:
         num_payments: Number of payments to generate (None = auto from business_size and claims)
-        output_file: Output file path
-        format: Output format - "x12" or "csv"
+        output_file: Output file path, or a dict of paths by format
+        format: Output format - "x12", "csv", "parquet" or "arrow", or a list such as ["x12", "csv"]
+                to write every format from the same payments in one pass
         business_size: Business size profile - "small", "medium", or "large"
                        Used if num_payments is None and no claims exist
-        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records
+        invalid_rate: Rate of invalid data (0.0-1.0). 0.05 = 5% invalid records,
+                      exactly round(records * invalid_rate) of them
+        invalid_weights: Dict of relative weights by issue type, e.g. {"negative_payment": 3, "mismatched_ids": 1};
+                         types left out are not injected (None = all types equally)
+        compression: "gzip", "bz2", "lzma", "zstd", "lz4" or "fast" to stream compressed
+                     output (None = infer from the output file extension)
+        x12_limits: Dict splitting X12 output while it is written, with any of
+                    max_records_per_set, max_sets_per_group and max_bytes_per_file
+                    (None = the X12_MAX_* settings in config)
+        shards: Write this many files per format, partitioned by a stable hash of
+                member_id so 834/837/835 shards with the same number join without
+                a shuffle (None = OUTPUT_SHARDS; result is a list, one per shard)
+        partition_by_date: Write Hive-style dt=YYYY-MM-DD partitions in the output
+                           file's directory, by service date; the result is a
+                           dict with 'partitions' and 'output_files'
+        sort_by_member: Write records sorted by (member_id, service_date), which
+                        compresses better and feeds merge joins; records are
+                        generated in that order rather than sorted afterwards
+        record_space: RecordSpace (src/edi/record_space.py) to derive the payments from
+                      instead of drawing them; the payment count, invalid_rate and invalid_weights come from the space,
+                      and nothing is added to global_data
+        record_range: (start, stop) indices of the space's payments to write
+                      (None = all of them), so workers can write ranges in parallel
+        seed: Integer making the output reproducible: Python's random module,
+              NumPy, Faker and mimesis draw from independent child streams of
+              it, and the envelope is stamped with the start of the day
+              (None = unseeded)
+        cache: OutputCache (src/edi/output_cache.py) or cache directory serving
+               calls with a seed or record space: a repeated call links the
+               cached files into place instead of generating them
+               (None = OUTPUT_CACHE_DIR, False = no cache)
     
     Returns:
-        Generated content as string (X12) or dict with metadata (CSV)
+        Generated content as string (X12) or dict with metadata (CSV);
+        with a list of formats, a dict of those results keyed by format.
+        Compressed X12 output returns the output path and compressed CSV
+        output has 'data' = None, since neither is kept in memory. X12
+        output capped by max_bytes_per_file returns a list, one per file.
         CSV format returns: {
             "output_file": "...",
             "total_records": 1000,
@@ -1514,6 +1578,18 @@ def generate_edi_835(num_payments=None, output_file=None, format="x12", business
             "data": [...]
         }
     """
+    cache = _resolve_cache(cache, seed, record_space)
+    if cache is not None:
+        return _cached_call(cache, "835", generate_edi_835, locals())
+
+    if record_space is not None:
+        sinks, multi = _resolve_sinks(
+            "835", format, output_file, compression, x12_limits, shards, partition_by_date
+        )
+        return _sink_results(sinks, _write_record_space("835", record_space, record_range, sinks), multi)
+
+    from src.edi.seeding import child_generator
+
     # Generate volume based on business size if not specified
     if num_payments is None:
         # If claims exist, use 60% of claims as payments
@@ -1527,280 +1603,174 @@ def generate_edi_835(num_payments=None, output_file=None, format="x12", business
             # No claims exist, generate based on business size
             profile = BUSINESS_SIZE_PROFILES.get(business_size, BUSINESS_SIZE_PROFILES['medium'])
             # Use 60% of typical claim volume
-            claim_volume = _generate_volume(profile['837'])
+            claim_volume = _generate_volume(profile['837'], rng=child_generator(seed, "835", 'volume'))
             num_payments = int(claim_volume * profile['835_ratio']['paid'])
             print(f"Auto-generated volume for {business_size} business: {num_payments} payments")
     
-    if output_file is None:
-        if format == "csv":
-            output_file = os.path.join(SAMPLES_DIR, "edi_835_large_sample.csv")
-        else:
-            output_file = os.path.join(SAMPLES_DIR, "edi_835_large_sample.txt")
-    
-    if format == "csv":
-        return _generate_edi_835_csv(num_payments, output_file, invalid_rate)
-    else:
-        return _generate_edi_835_x12(num_payments, output_file, invalid_rate)
+    sinks, multi = _resolve_sinks(
+        "835", format, output_file, compression, x12_limits, shards, partition_by_date
+    )
+    results = _generate_edi_835(num_payments, sinks, invalid_rate, sort_by_member, invalid_weights, seed)
+    return _sink_results(sinks, results, multi)
 
 
-def _generate_edi_835_x12(num_payments=500, output_file=None, invalid_rate=0.0):
-    """Generate EDI 835 file in X12 format"""
+def _generate_edi_835(num_payments, sinks, invalid_rate=0.0, sort_by_member=False, invalid_weights=None, seed=None):
+    """
+    Draw EDI 835 payment records once and write them to every sink
+
+    With sort_by_member, payments are written by (member_id, service_date).
+
+    Returns:
+        List of sink results, in sink order
+    """
+    from src.edi.invalid_data import InvalidDataPlanner, corrupt_835
+    from src.edi.remittance import compute_remittance, format_cents_array, format_cents
+
+    rng = _seed_run(seed, "835")
     if invalid_rate > 0:
         print(f"  Invalid data rate: {invalid_rate*100:.1f}%")
-    segments = []
-    current_date = datetime.now()
 
     # If no claims exist, generate some first
     if not global_data['claims']:
         print("No claims found. Generating sample claims first...")
-        _generate_edi_837_x12()
+        _generate_edi_837_x12(None, 3, os.path.join(SAMPLES_DIR, "temp_837.txt"), seed=seed)
 
-    claims = list(global_data['claims'].values())
+    # A claim billed a negative amount is rejected, not paid
+    claims = [claim for claim in global_data['claims'].values() if claim['billed_amount'] >= 0]
     if len(claims) < num_payments:
         num_payments = len(claims)
 
     # Select random claims for payment
     paid_claims = random.sample(claims, num_payments)
-
-    # Generate ISA and GS segments, get ISA control number
-    isa_gs_segments, isa_control_num = generate_isa_gs_segments("835", current_date)
-    segments.extend(isa_gs_segments)
-
-    # ST segment
-    st_index = len(segments)  # Track ST segment position for SE count
-    segments.append("ST*835*0001*004010X091A1~")
-
-    # Calculate total payment amount
-    total_amount = round(sum(c['billed_amount'] * random.uniform(0.5, 0.9) for c in paid_claims), 2)
-
-    # BPR segment - Financial information
-    segments.append("BPR*I*{total_amount}*C*ACH*CC*01*{check_num}**DA*{account_num}*{routing_num}*{date}~".format(
-        total_amount=total_amount,
-        check_num=generate_id("CHK", 6),
-        account_num=''.join(random.choices(string.digits, k=10)),
-        routing_num=''.join(random.choices(string.digits, k=9)),
-        date=current_date.strftime("%Y%m%d")
-    ))
-
-    # TRN segment - Transaction reference
-    segments.append("TRN*1*{ref}*{payer_id}~".format(
-        ref=generate_id("REF", 9),
-        payer_id=generate_id("PAYER", 6)
-    ))
-
-    # Payer information
-    segments.append("N1*PR*{}*FI*{}~".format(
-        "PAYER_NAME",
-        generate_id("TAX", 9)
-    ))
-
-    # Generate payment data
-    for i, claim_data in enumerate(paid_claims):
-        claim_id = claim_data['id']
-        member = global_data['members'][claim_data['member_id']]
-        provider = global_data['providers'][claim_data['provider_id']]
-
-        # Calculate payment amounts
-        paid_amount = round(claim_data['billed_amount'] * random.uniform(0.5, 0.9), 2)
-        patient_responsibility = round(claim_data['billed_amount'] * random.uniform(0.1, 0.3), 2)
-        allowed_amount = round(paid_amount + patient_responsibility, 2)
-
-        # Update claim data
-        claim_data['paid_amount'] = paid_amount
-        claim_data['allowed_amount'] = allowed_amount
-
-        # LX segment - Payment hierarchy
-        segments.append("LX*{level}~".format(level=i + 1))
-
-        # CLP segment - Claim payment info
-        claim_status = random.choice(["1", "2", "3", "4", "19", "20", "21", "22"])
-        claim_code = random.choice(["1", "2", "3", "A", "B", "C"])
-        segments.append(
-            "CLP*{claim_id}*{claim_status}*{billed_amount}*{paid_amount}*{patient_responsibility}*{claim_code}~".format(
-                claim_id=claim_id,
-                claim_status=claim_status,
-                billed_amount=claim_data['billed_amount'],
-                paid_amount=paid_amount,
-                patient_responsibility=patient_responsibility,
-                claim_code=claim_code
-            ))
-
-        # CAS segment - Adjustments (50% chance)
-        if random.random() < 0.5:
-            adjust_amount = round(paid_amount * random.uniform(0.05, 0.15), 2)
-            adjust_code = random.choice(["CO", "OA", "PI", "PR"])
-            segments.append("CAS*{adjust_code}*45*{adjust_amount}~".format(
-                adjust_code=adjust_code,
-                adjust_amount=adjust_amount
-            ))
-
-        # NM1 segment - Provider info
-        segments.append("NM1*82*1*{last_name}*{first_name}***XX*{npi}~".format(
-            last_name=provider.last_name,
-            first_name=provider.first_name,
-            npi=provider.npi
-        ))
-
-        # NM1 segment - Member info
-        segments.append("NM1*IL*1*{last_name}*{first_name}***MI*{member_id}~".format(
-            last_name=member.last_name,
-            first_name=member.first_name,
-            member_id=member.id
-        ))
-
-        # SVC segment - Service payment details
-        procedure_code = random.choice(["99213", "99214", "99203", "99204"])
-        segments.append("SVC*HC:{procedure_code}*{billed_amount}*{paid_amount}*{allowed_amount}~".format(
-            procedure_code=procedure_code,
-            billed_amount=claim_data['billed_amount'],
-            paid_amount=paid_amount,
-            allowed_amount=allowed_amount
-        ))
-
-        # DTM segments - Service and adjudication dates
-        segments.append("DTM*150*D8*{service_date}~".format(
-            service_date=claim_data['service_date'].strftime("%Y%m%d")
-        ))
-        segments.append("DTM*405*D8*{date}~".format(
-            date=current_date.strftime("%Y%m%d")
-        ))
-
-    # PLB segment - Provider balance info (30% chance)
+    if sort_by_member:
+        # The claims are already in memory, so sorting the selection is the direct way
+        paid_claims.sort(key=lambda claim: (claim['member_id'], claim['service_date']))
+    current_date = _run_date(seed)
+
+    # Compute all payment amounts at once; the BPR total is the exact sum of CLP payments
+    remit = compute_remittance([c['billed_amount'] for c in paid_claims], rng)
+    # Inject invalid payments before formatting, so the BPR total matches the CLPs as written
+    claim_ids = [claim['id'] for claim in paid_claims]
+    issues = InvalidDataPlanner("835", invalid_rate, invalid_weights, rng).plan(num_payments)
+    corrupt_835(remit, claim_ids, issues, rng)
+    billed_amounts = format_cents_array(remit['billed_cents'])
+    paid_amounts = format_cents_array(remit['paid_cents'])
+    patient_amounts = format_cents_array(remit['patient_responsibility_cents'])
+    allowed_amounts = format_cents_array(remit['allowed_cents'])
+    adjust_amounts = format_cents_array(remit['adjustment_cents'])
+    claim_statuses = remit['claim_status'].tolist()
+    claim_codes = remit['claim_code'].tolist()
+    adjust_codes = remit['adjustment_code'].tolist()
+    procedure_codes = remit['procedure_code'].tolist()
+
+    header = {
+        'current_date': current_date,
+        'isa_control_num': generate_id("", 9),
+        'total_paid': format_cents(remit['total_paid_cents']),
+        'check_number': generate_id("CHK", 6),
+        'account_number': ''.join(random.choices(string.digits, k=10)),
+        'routing_number': ''.join(random.choices(string.digits, k=9)),
+        'reference': generate_id("REF", 9),
+        'payer_id': generate_id("PAYER", 6),
+        'payer_tax_id': generate_id("TAX", 9),
+        'provider_adjustment': None,
+    }
+    # Provider balance adjustment (30% chance)
     if random.random() < 0.3:
         provider = random.choice(list(global_data['providers'].values()))
-        segments.append("PLB*{provider_id}*{date}*CV:45*{amount}~".format(
-            provider_id=provider.id,
-            date=current_date.strftime("%Y%m%d"),
-            amount=round(random.uniform(100, 500), 2)
-        ))
-
-    # End segments
-    # SE count: number of segments from ST (inclusive) to SE (inclusive)
-    se_count = len(segments) - st_index + 1  # +1 to include SE itself
-    segments.append("SE*{count}*0001~".format(count=se_count))
-    segments.append("GE*1*1~")  # 1 transaction set in this functional group
-    segments.append("IEA*1*{control_num}~".format(control_num=isa_control_num))
+        header['provider_adjustment'] = (provider.id, format_amount(round(random.uniform(100, 500), 2)))
+
+    for sink in sinks:
+        sink.open(header)
+
+    payment_prefix = "PAY" + current_date.strftime('%Y%m%d%H%M%S%f')[:-3]
+    for batch_start in range(0, num_payments, BATCH_SIZE):
+        records = []
+        for i in range(batch_start, min(batch_start + BATCH_SIZE, num_payments)):
+            claim_data = paid_claims[i]
+            member = global_data['members'][claim_data['member_id']]
+            provider = global_data['providers'][claim_data['provider_id']]
+
+            # Update claim data
+            claim_data['paid_amount'] = float(paid_amounts[i])
+            claim_data['allowed_amount'] = float(allowed_amounts[i])
+
+            records.append({
+                'claim_data': claim_data,
+                'member': member,
+                'payment_id': f"{payment_prefix}{i}",
+                'claim_id': claim_ids[i],
+                'provider_block': segment_cache.provider_block(provider),
+                'member_block': segment_cache.member_block(member),
+                'claim_status': claim_statuses[i],
+                'claim_code': claim_codes[i],
+                'billed_amount': billed_amounts[i],
+                'paid_amount': paid_amounts[i],
+                'patient_responsibility': patient_amounts[i],
+                'allowed_amount': allowed_amounts[i],
+                'adjustment_code': adjust_codes[i],
+                'adjustment_amount': adjust_amounts[i],
+                'procedure_code': procedure_codes[i],
+                'is_invalid': issues[i] is not None,
+                'issue_type': issues[i],
+            })
+
+        for sink in sinks:
+            sink.write_many(records)
+
+    results = []
+    for sink in sinks:
+        results.append(sink.close())
+        print(f"Successfully generated EDI 835 {sink.format.upper()} data with {num_payments} payments in {sink.output_file}")
+        if isinstance(results[-1], dict):
+            _report_csv_result(results[-1])
+    return results
 
-    # Write to file
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding='utf8') as f:
-        f.write("\n".join(segments))
 
-    print(f"Successfully generated EDI 835 data with {num_payments} payments in {output_file}")
-    return "\n".join(segments)
+def _generate_edi_835_x12(num_payments=500, output_file=None, invalid_rate=0.0):
+    """Generate EDI 835 file in X12 format"""
+    return _generate_edi_835(num_payments, [make_sink("835", "x12", output_file)], invalid_rate)[0]
 
 
 def _generate_edi_835_csv(num_payments=500, output_file=None, invalid_rate=0.0):
     """Generate EDI 835 data in CSV format"""
-    if not global_data['claims']:
-        print("No claims found. Generating sample claims first...")
-        _generate_edi_837_x12(None, 3, os.path.join(SAMPLES_DIR, "temp_837.txt"))
-    
-    claims = list(global_data['claims'].values())
-    if len(claims) < num_payments:
-        num_payments = len(claims)
-    
-    paid_claims = random.sample(claims, num_payments)
-    current_date = datetime.now()
-    
-    # CSV Schema for 835
-    headers = [
-        'payment_id', 'claim_id', 'member_id', 'provider_id', 'provider_npi',
-        'member_last_name', 'member_first_name',
-        'billed_amount', 'paid_amount', 'allowed_amount', 'patient_responsibility',
-        'claim_status', 'claim_code', 'adjustment_code', 'adjustment_amount',
-        'procedure_code', 'service_date', 'adjudication_date',
-        'check_number', 'payment_date', 'payment_method',
-        'payer_id', 'transaction_reference'
-    ]
-    
-    csv_rows = []
-    invalid_count = 0
-    
-    for i, claim_data in enumerate(paid_claims):
-        claim_id = claim_data['id']
-        member = global_data['members'][claim_data['member_id']]
-        provider = global_data['providers'][claim_data['provider_id']]
-        
-        paid_amount = round(claim_data['billed_amount'] * random.uniform(0.5, 0.9), 2)
-        patient_responsibility = round(claim_data['billed_amount'] * random.uniform(0.1, 0.3), 2)
-        allowed_amount = round(paid_amount + patient_responsibility, 2)
-        
-        claim_status = random.choice(["1", "2", "3", "4", "19", "20", "21", "22"])
-        claim_code = random.choice(["1", "2", "3", "A", "B", "C"])
-        
-        # Adjustment (50% chance)
-        adjustment_code = ''
-        adjustment_amount = ''
-        if random.random() < 0.5:
-            adjustment_code = random.choice(["CO", "OA", "PI", "PR"])
-            adjustment_amount = f"{round(paid_amount * random.uniform(0.05, 0.15), 2):.2f}"
-        
-        procedure_code = random.choice(["99213", "99214", "99203", "99204"])
-        payment_id = f"PAY{current_date.strftime('%Y%m%d%H%M%S%f')[:-3]}{i}"
-        
-        row = {
-            'payment_id': payment_id,
-            'claim_id': claim_id,
-            'member_id': member.id,
-            'provider_id': provider.id,
-            'provider_npi': provider.npi,
-            'member_last_name': member.last_name,
-            'member_first_name': member.first_name,
-            'billed_amount': f"{claim_data['billed_amount']:.2f}",
-            'paid_amount': f"{paid_amount:.2f}",
-            'allowed_amount': f"{allowed_amount:.2f}",
-            'patient_responsibility': f"{patient_responsibility:.2f}",
-            'claim_status': claim_status,
-            'claim_code': claim_code,
-            'adjustment_code': adjustment_code,
-            'adjustment_amount': adjustment_amount,
-            'procedure_code': procedure_code,
-            'service_date': claim_data['service_date'].strftime("%Y-%m-%d") if claim_data.get('service_date') else '',
-            'adjudication_date': current_date.strftime("%Y-%m-%d"),
-            'check_number': generate_id("CHK", 6),
-            'payment_date': current_date.strftime("%Y-%m-%d"),
-            'payment_method': 'ACH',
-            'payer_id': generate_id("PAYER", 6),
-            'transaction_reference': generate_id("REF", 9)
-        }
-        csv_rows.append(row)
-    
-    _write_csv(csv_rows, headers, output_file)
-    
-    # Calculate actual invalid rate
-    actual_invalid_rate = invalid_count / len(csv_rows) if csv_rows else 0.0
-    
-    print(f"Successfully generated EDI 835 CSV data with {num_payments} payments in {output_file}")
-    print(f"  Total records: {len(csv_rows)}, Invalid records: {invalid_count}, Invalid rate: {actual_invalid_rate:.3f}")
-    
-    return {
-        "output_file": output_file,
-        "total_records": len(csv_rows),
-        "invalid_records": invalid_count,
-        "invalid_rate": actual_invalid_rate,
-        "data": csv_rows
-    }
+    return _generate_edi_835(num_payments, [make_sink("835", "csv", output_file)], invalid_rate)[0]
 
 
-def generate_edi_files(format="x12", business_size="medium"):
+def generate_edi_files(format="x12", business_size="medium", compression=None, x12_limits=None, shards=None, partition_by_date=False, seed=None, cache=None):
     """
     Generate all EDI files with datasets based on business size
     
     Args:
-        format: Output format - "x12" or "csv"
+        format: Output format - "x12", "csv", "parquet" or "arrow", or a list of formats written in one pass
         business_size: Business size profile - "small", "medium", or "large"
+        compression: Codec name to write compressed sample files (None = uncompressed)
+        x12_limits: X12 envelope limits (see generate_edi_834)
+        shards: Member-hash shards per file (see generate_edi_834)
+        partition_by_date: Write date partitions instead of one file (see generate_edi_834)
+        seed: Integer making all three files reproducible (see generate_edi_834)
+        cache: Output cache for seeded runs (see generate_edi_834)
     """
     # Generate EDI 834
-    generate_edi_834(business_size=business_size, format=format)
+    generate_edi_834(
+        business_size=business_size, format=format, compression=compression, x12_limits=x12_limits, shards=shards,
+        partition_by_date=partition_by_date, seed=seed, cache=cache
+    )
 
     # Generate EDI 837 (will auto-calculate based on business size)
-    generate_edi_837(business_size=business_size, format=format)
+    generate_edi_837(
+        business_size=business_size, format=format, compression=compression, x12_limits=x12_limits, shards=shards,
+        partition_by_date=partition_by_date, seed=seed, cache=cache
+    )
 
     # Generate EDI 835 payments (will auto-calculate based on claims)
-    generate_edi_835(business_size=business_size, format=format)
+    generate_edi_835(
+        business_size=business_size, format=format, compression=compression, x12_limits=x12_limits, shards=shards,
+        partition_by_date=partition_by_date, seed=seed, cache=cache
+    )
 
-    print(f"Generated EDI 834, 837 and 835 sample files in {format.upper()} format for {business_size} business.")
+    formats = format if isinstance(format, str) else "/".join(format)
+    print(f"Generated EDI 834, 837 and 835 sample files in {formats.upper()} format for {business_size} business.")
 
 
 if __name__ == "__main__":
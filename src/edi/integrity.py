@@ -0,0 +1,355 @@
+"""
+Cross-file referential integrity checks for 834/837/835 files
+
+The validator checks each file on its own; this module checks that the
+files of one feed refer to each other:
+
+    unknown_member      an 837 claim's member_id is not in the 834
+    unknown_enrollment  an 837 claim's enrollment_id is not its member's
+                        enrollment in the 834 (CSV only: the X12 layouts
+                        carry no enrollment ID)
+    unknown_claim       an 835 payment's claim_id is not in the 837
+                        (the generator's mismatched_ids issue)
+
+Each file is streamed once, in the order 834, 837, 835. The keys of the
+834 (member IDs, member/enrollment pairs) and 837 (claim IDs) are folded
+into key sets as they are read, and each 837 and 835 batch is probed
+against them as NumPy arrays, so memory grows with the number of keys
+and not with file size:
+
+- HashKeySet keeps each key's 64-bit hash in a sorted array (8 bytes per
+  key). Two different keys share a hash with probability about n / 2**64,
+  so for practical populations the check is exact.
+- BloomFilter is used for populations of INTEGRITY_BLOOM_MIN_KEYS keys or
+  more, as counted in the inputs' _manifest.json entries. It takes about
+  1.8 bytes per key at the default false-positive rate of 0.1%, at the
+  price of missing that fraction of orphans; orphans are never invented.
+
+Key hashes come from Python's hash(), so a key set is only meaningful in
+the process that built it.
+"""
+
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+from config.config import INTEGRITY_BLOOM_FALSE_POSITIVE_RATE, INTEGRITY_BLOOM_MIN_KEYS, VALIDATOR_BATCH_RECORDS
+from src.edi.compression import open_text_input
+from src.edi.manifest import manifest_path
+from src.edi.parser import expand_input_paths
+from src.edi.validator import CSV_KEYS, csv_transaction_type, detect_format, x12_units
+
+ORPHAN_TYPES = ['unknown_member', 'unknown_enrollment', 'unknown_claim']
+
+# X12 segments holding the keys, by transaction set
+KEY_SEGMENTS = {
+    '834': {'NM1'},
+    '837': {'CLM', 'NM1'},
+    '835': {'CLP'},
+}
+
+# Reference columns read from CSV input, after the record's own key
+REFERENCE_COLUMNS = ['member_id', 'enrollment_id', 'claim_id']
+
+REPORT_COLUMNS = ['transaction_type', 'record', 'key', 'issue_type', 'reference']
+
+
+def key_hashes(keys):
+    """64-bit hashes of a list of keys (strings or tuples of strings)"""
+    return np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys))
+
+
+class HashKeySet:
+    """
+    Set of key hashes in a sorted NumPy array
+
+    Added hashes are buffered and merged into the sorted array once they
+    outnumber it, so building the set costs O(n log n) in total.
+    """
+
+    # Hashes buffered before the first merge
+    MIN_MERGE = 65536
+
+    kind = 'hash'
+
+    def __init__(self):
+        self.count = 0
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, hashes):
+        """Add an array of key hashes"""
+        self.count += len(hashes)
+        self._pending.append(hashes)
+        self._pending_size += len(hashes)
+        if self._pending_size >= max(len(self._hashes), self.MIN_MERGE):
+            self._merge()
+
+    def contains(self, hashes):
+        """Boolean array: True where the hash is in the set"""
+        self._merge()
+        if not len(self._hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._hashes, hashes), len(self._hashes) - 1)
+        return self._hashes[positions] == hashes
+
+    @property
+    def nbytes(self):
+        self._merge()
+        return self._hashes.nbytes
+
+    def _merge(self):
+        if self._pending:
+            self._hashes = np.unique(np.concatenate([self._hashes, *self._pending]))
+            self._pending = []
+            self._pending_size = 0
+
+
+class BloomFilter:
+    """
+    Bloom filter over key hashes
+
+    The bit positions of a hash are h1 + i * h2 (mod size) for
+    i < hash_count, with h1 and h2 its low and high 32 bits.
+
+    Args:
+        capacity: Number of keys the filter is sized for
+        false_positive_rate: Probability that a key never added is
+                             reported present, at capacity
+                             (default: INTEGRITY_BLOOM_FALSE_POSITIVE_RATE)
+    """
+
+    kind = 'bloom'
+
+    def __init__(self, capacity, false_positive_rate=None):
+        false_positive_rate = false_positive_rate or INTEGRITY_BLOOM_FALSE_POSITIVE_RATE
+        if not 0.0 < false_positive_rate < 1.0:
+            raise ValueError(f"false_positive_rate must be between 0 and 1, got {false_positive_rate}")
+        capacity = max(int(capacity), 1)
+        self.size = max(64, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hash_count, dtype=np.uint64)
+
+    def add(self, hashes):
+        """Add an array of key hashes"""
+        self.count += len(hashes)
+        positions = self._positions(hashes)
+        np.bitwise_or.at(self._bits, positions >> np.uint64(3), self._masks(positions))
+
+    def contains(self, hashes):
+        """Boolean array: True where the hash may be in the filter"""
+        positions = self._positions(hashes)
+        return ((self._bits[positions >> np.uint64(3)] & self._masks(positions)) != 0).all(axis=1)
+
+    @property
+    def nbytes(self):
+        return self._bits.nbytes
+
+    def _positions(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.int64).view(np.uint64)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        return (low[:, None] + self._steps[None, :] * high[:, None]) % np.uint64(self.size)
+
+    @staticmethod
+    def _masks(positions):
+        return np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+
+
+def manifest_records(input_file):
+    """Records in input_file (path, glob or list) per its _manifest.json entries, or None if any is missing"""
+    total = 0
+    for path in expand_input_paths(input_file):
+        try:
+            with open(manifest_path(path)) as f:
+                entry = json.load(f)['files'][os.path.basename(path)]
+        except (OSError, ValueError, KeyError):
+            return None
+        total += entry['records']
+    return total
+
+
+def _key_set(input_file, bloom_min_keys, false_positive_rate):
+    """An empty key set for the keys of input_file, a Bloom filter if it is large enough"""
+    expected = manifest_records(input_file)
+    if expected is not None and expected >= bloom_min_keys:
+        return BloomFilter(expected, false_positive_rate)
+    return HashKeySet()
+
+
+def _x12_keys(input_file, parser=None):
+    """Yield (transaction_type, key, member_id, enrollment_id, claim_id) for each X12 unit"""
+    for transaction_type, unit, _ in x12_units(input_file, KEY_SEGMENTS, parser):
+        member_id = claim_id = ''
+        for segment_id, elements in unit:
+            if segment_id == 'CLP' or segment_id == 'CLM':
+                claim_id = elements[0]
+            elif elements[0] == 'IL':  # NM1
+                member_id = elements[-1]
+        key = member_id if transaction_type == '834' else claim_id
+        yield transaction_type, key, member_id, '', claim_id
+
+
+def _csv_keys(input_file):
+    """Yield (transaction_type, key, member_id, enrollment_id, claim_id) for each CSV row"""
+    for path in expand_input_paths(input_file):
+        with open_text_input(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            transaction_type = csv_transaction_type(header)
+            index = {column: position for position, column in enumerate(header)}
+            positions = [index[CSV_KEYS[transaction_type]]] + [index.get(column) for column in REFERENCE_COLUMNS]
+            for row in reader:
+                yield (transaction_type, *(row[position] if position is not None else '' for position in positions))
+
+
+def _batches(input_file, transaction_type, batch_records, parser):
+    """Yield the key columns (key, member_id, enrollment_id, claim_id) of input_file in batches"""
+    if detect_format(expand_input_paths(input_file)[0]) == 'x12':
+        records = _x12_keys(input_file, parser)
+    else:
+        records = _csv_keys(input_file)
+    batch = []
+    for record in records:
+        if record[0] != transaction_type:
+            raise ValueError(f"Expected EDI {transaction_type} in {input_file}, found {record[0]}")
+        batch.append(record[1:])
+        if len(batch) >= batch_records:
+            yield list(zip(*batch))
+            batch = []
+    if batch:
+        yield list(zip(*batch))
+
+
+def check_integrity(enrollment_file=None, claim_file=None, payment_file=None, report_file=None,
+                    bloom_min_keys=None, false_positive_rate=None, batch_records=None, parser=None):
+    """
+    Find 837 and 835 records that refer to keys missing from the other files
+
+    Args:
+        enrollment_file: 834 file (path, glob or list; X12 or CSV, optionally compressed)
+        claim_file: 837 file (required)
+        payment_file: 835 file
+        report_file: Orphan report to write, one CSV row per orphan
+                     (transaction_type, record, key, issue_type, reference);
+                     None = counts only
+        bloom_min_keys: Key populations at least this large, per the inputs'
+                        _manifest.json, use a Bloom filter (default: INTEGRITY_BLOOM_MIN_KEYS)
+        false_positive_rate: Bloom filter false-positive rate
+                             (default: INTEGRITY_BLOOM_FALSE_POSITIVE_RATE)
+        batch_records: Records probed per batch (default: VALIDATOR_BATCH_RECORDS)
+        parser: EDIParser supplying the X12 delimiters
+
+    Returns:
+        Dict with records (count per transaction set), key_sets (kind,
+        keys and bytes of each key set), orphans (count per checked
+        orphan type), unchecked (orphan types the inputs cannot express)
+        and report_file
+    """
+    if claim_file is None:
+        raise ValueError("check_integrity needs the 837 claim file")
+    if enrollment_file is None and payment_file is None:
+        raise ValueError("check_integrity needs an 834 enrollment file, an 835 payment file or both")
+    bloom_min_keys = INTEGRITY_BLOOM_MIN_KEYS if bloom_min_keys is None else bloom_min_keys
+    batch_records = batch_records or VALIDATOR_BATCH_RECORDS
+
+    records = {}
+    key_sets = {}
+    orphans = {}
+    unchecked = []
+    report = writer = None
+    if report_file:
+        report_dir = os.path.dirname(report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        report = open(report_file, 'w', newline='')
+        writer = csv.writer(report)
+        writer.writerow(REPORT_COLUMNS)
+
+    def report_orphans(transaction_type, offset, keys, mask, issue_type, references):
+        positions = np.flatnonzero(mask).tolist()
+        orphans[issue_type] += len(positions)
+        if writer is not None:
+            writer.writerows(
+                (transaction_type, offset + position, keys[position], issue_type, references[position])
+                for position in positions
+            )
+
+    try:
+        members = enrollments = None
+        if enrollment_file is not None:
+            members = _key_set(enrollment_file, bloom_min_keys, false_positive_rate)
+            enrollments = _key_set(enrollment_file, bloom_min_keys, false_positive_rate)
+            records['834'] = 0
+            for member_ids, _, enrollment_ids, _ in _batches(enrollment_file, '834', batch_records, parser):
+                records['834'] += len(member_ids)
+                members.add(key_hashes(member_ids))
+                pairs = [pair for pair in zip(member_ids, enrollment_ids) if pair[1]]
+                if pairs:
+                    enrollments.add(key_hashes(pairs))
+            key_sets['members'] = members
+            orphans['unknown_member'] = 0
+            if enrollments.count:
+                key_sets['enrollments'] = enrollments
+                orphans['unknown_enrollment'] = 0
+            else:
+                unchecked.append('unknown_enrollment')
+                enrollments = None
+
+        claims = None
+        if payment_file is not None:
+            claims = key_sets['claims'] = _key_set(claim_file, bloom_min_keys, false_positive_rate)
+        records['837'] = 0
+        claims_with_enrollment = 0
+        for keys, member_ids, enrollment_ids, claim_ids in _batches(claim_file, '837', batch_records, parser):
+            offset = records['837']
+            records['837'] += len(keys)
+            if members is not None:
+                known = members.contains(key_hashes(member_ids))
+                report_orphans('837', offset, keys, ~known, 'unknown_member', member_ids)
+                if enrollments is not None:
+                    # Only claims of known members that name an enrollment
+                    carried = np.fromiter((bool(value) for value in enrollment_ids), dtype=bool, count=len(keys))
+                    claims_with_enrollment += int(carried.sum())
+                    probe = np.flatnonzero(known & carried)
+                    mismatched = np.zeros(len(keys), dtype=bool)
+                    if len(probe):
+                        pairs = [(member_ids[i], enrollment_ids[i]) for i in probe.tolist()]
+                        mismatched[probe] = ~enrollments.contains(key_hashes(pairs))
+                    report_orphans('837', offset, keys, mismatched, 'unknown_enrollment', enrollment_ids)
+            if claims is not None:
+                claims.add(key_hashes(claim_ids))
+        if enrollments is not None and not claims_with_enrollment:
+            del orphans['unknown_enrollment']
+            unchecked.append('unknown_enrollment')
+
+        if payment_file is not None:
+            records['835'] = 0
+            orphans['unknown_claim'] = 0
+            for keys, _, _, claim_ids in _batches(payment_file, '835', batch_records, parser):
+                offset = records['835']
+                records['835'] += len(keys)
+                known = claims.contains(key_hashes(claim_ids))
+                report_orphans('835', offset, keys, ~known, 'unknown_claim', claim_ids)
+    finally:
+        if report is not None:
+            report.close()
+
+    return {
+        'records': records,
+        'key_sets': {
+            name: {'kind': key_set.kind, 'keys': key_set.count, 'bytes': key_set.nbytes}
+            for name, key_set in key_sets.items()
+        },
+        'orphans': {issue_type: orphans[issue_type] for issue_type in ORPHAN_TYPES if issue_type in orphans},
+        'unchecked': unchecked,
+        'report_file': report_file if report is not None else None,
+    }
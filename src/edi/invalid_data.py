@@ -0,0 +1,226 @@
+"""
+Exact-rate invalid data injection for the EDI generators
+
+InvalidDataPlanner decides up front which records of a batch are invalid
+and which issue each one gets. Rolling a die per record lets the
+realized rate drift far from invalid_rate on small outputs; the planner
+instead keeps the running count of invalid records at exactly
+round(records * invalid_rate) after every batch, and divides them among
+the issue types in proportion to their weights (each new invalid record
+goes to the type furthest below its share). Positions within a batch are
+drawn with NumPy, so the ratios are exact and the placement random.
+
+The corrupt_* functions then apply a batch's planned issues, drawing the
+replacement values (future dates, bad NPIs, inflated payments, ...) for
+all records of an issue type at once instead of calling Faker per record.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.edi.enrollment import TERMINATION_REASONS
+
+ISSUE_TYPES = {
+    '834': ['missing_dob', 'invalid_effective_date', 'start_after_end', 'invalid_gender', 'wrong_plan_id'],
+    '837': ['charge_mismatch', 'invalid_diagnosis', 'future_service_date', 'invalid_npi_length', 'negative_amount'],
+    '835': ['negative_payment', 'mismatched_ids', 'invalid_adjustment_code', 'payment_exceeds_billed'],
+}
+
+INVALID_GENDERS = ['X', 'U', 'O', '']
+INVALID_PLAN = {"id": "INVALID-PLAN", "name": "Invalid Plan", "type": "INVALID"}
+INVALID_DIAGNOSIS = 'INVALID.999'
+INVALID_NPI_LENGTHS = [8, 9, 11, 12]
+INVALID_ADJUSTMENT_CODE = 'INVALID'
+MISMATCHED_ID_PREFIX = 'MISMATCHED-'
+
+# Fractions of the original amount, as (low, high) uniform ranges
+CHARGE_MISMATCH_RATIO = (0.5, 0.8)
+EXCESS_PAYMENT_RATIO = (1.1, 1.5)
+
+
+class InvalidDataPlanner:
+    """
+    Plans the invalid records of one generated stream
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        invalid_rate: Fraction of records to make invalid (0.0-1.0)
+        weights: Dict of relative weights by issue type; types left out
+                 are never injected (default: all of the transaction's
+                 issue types, equally)
+        rng: numpy.random.Generator (default: a fresh unseeded generator)
+    """
+
+    def __init__(self, transaction_type, invalid_rate, weights=None, rng=None):
+        if not 0.0 <= invalid_rate <= 1.0:
+            raise ValueError(f"invalid_rate must be between 0 and 1, got {invalid_rate}")
+        self.issue_types = ISSUE_TYPES[transaction_type]
+        self.invalid_rate = invalid_rate
+        self.rng = rng if rng is not None else np.random.default_rng()
+        if weights is None:
+            weights = dict.fromkeys(self.issue_types, 1.0)
+        unknown = set(weights) - set(self.issue_types)
+        if unknown:
+            raise ValueError(
+                f"Unknown {transaction_type} issue types: {', '.join(sorted(unknown))} "
+                f"(expected some of: {', '.join(self.issue_types)})"
+            )
+        shares = np.array([weights.get(issue_type, 0.0) for issue_type in self.issue_types], dtype=np.float64)
+        if (shares < 0).any() or shares.sum() <= 0:
+            raise ValueError("Issue type weights must be non-negative and not all zero")
+        self._shares = shares / shares.sum()
+        self._issue_counts = np.zeros(len(self.issue_types), dtype=np.int64)
+        self.records = 0
+        self.invalid_records = 0
+
+    def plan(self, size):
+        """
+        Issue type of each of the next size records, None for valid ones
+
+        The records planned so far, including these, hold exactly
+        round(records * invalid_rate) invalid ones.
+        """
+        issues = [None] * size
+        self.records += size
+        count = round(self.records * self.invalid_rate) - self.invalid_records
+        if not count:
+            return issues
+        positions = self.rng.choice(size, size=count, replace=False)
+        for position in positions.tolist():
+            issues[position] = self._next_issue()
+        return issues
+
+    def quota(self, records):
+        """
+        Invalid records of each issue type among `records` planned at once
+
+        round(records * invalid_rate) in total, divided among the types by
+        largest remainder on their weights.
+
+        Returns:
+            Dict of counts by issue type, in ISSUE_TYPES order
+        """
+        total = round(records * self.invalid_rate)
+        exact = self._shares * total
+        counts = np.floor(exact).astype(np.int64)
+        remainder = total - int(counts.sum())
+        if remainder:
+            counts[np.argsort(counts - exact, kind='stable')[:remainder]] += 1
+        return dict(zip(self.issue_types, counts.tolist()))
+
+    @property
+    def issue_counts(self):
+        """Invalid records planned so far, by issue type"""
+        return dict(zip(self.issue_types, self._issue_counts.tolist()))
+
+    def _next_issue(self):
+        # The type furthest below its share of the invalid records, counting this one
+        self.invalid_records += 1
+        index = int(np.argmax(self._shares * self.invalid_records - self._issue_counts))
+        self._issue_counts[index] += 1
+        return self.issue_types[index]
+
+
+def _positions(issues):
+    """Record positions of each planned issue type"""
+    positions = {}
+    for position, issue_type in enumerate(issues):
+        if issue_type is not None:
+            positions.setdefault(issue_type, []).append(position)
+    return positions
+
+
+def _days(rng, low, high, size):
+    return [timedelta(days=days) for days in rng.integers(low, high, size=size).tolist()]
+
+
+def _digits(rng, lengths):
+    """One random digit string per requested length"""
+    digits = rng.integers(0, 10, size=(len(lengths), max(lengths))).astype(str)
+    return [''.join(row[:length]) for row, length in zip(digits.tolist(), lengths)]
+
+
+def corrupt_834(batch, issues, rng, today=None):
+    """Apply planned issues to a batch of (member, enrollment, medicare_plan) records (today: default date.today())"""
+    today = today or date.today()
+    for issue_type, indices in _positions(issues).items():
+        size = len(indices)
+        if issue_type == 'missing_dob':
+            for i in indices:
+                batch[i][0].dob = None
+        elif issue_type == 'invalid_effective_date':
+            # Coverage starting in the future
+            for i, delta in zip(indices, _days(rng, 1, 366, size)):
+                batch[i][1].start_date = today + delta
+        elif issue_type == 'start_after_end':
+            # A termination before the effective date (only terminations carry an end date)
+            starts = _days(rng, 0, 366, size)
+            reasons = rng.choice(TERMINATION_REASONS, size=size).tolist()
+            for i, start, delta, reason in zip(indices, starts, _days(rng, 1, 366, size), reasons):
+                member, enrollment = batch[i][0], batch[i][1]
+                enrollment.start_date = today - start
+                enrollment.end_date = enrollment.start_date - delta
+                member.status_info = ('T', member.status_info[1] or reason, enrollment.end_date)
+        elif issue_type == 'invalid_gender':
+            for i, gender in zip(indices, rng.choice(INVALID_GENDERS, size=size).tolist()):
+                batch[i][0].gender = gender
+        elif issue_type == 'wrong_plan_id':
+            for i in indices:
+                batch[i][0].plan = dict(INVALID_PLAN)
+
+
+def corrupt_837(records, issues, rng, today=None):
+    """Apply planned issues to a batch of 837 claim records (see src/edi/sinks.py; today: default date.today())"""
+    today = today or date.today()
+    for issue_type, indices in _positions(issues).items():
+        size = len(indices)
+        if issue_type == 'charge_mismatch':
+            # Total charge below the sum of the service lines
+            ratios = rng.uniform(*CHARGE_MISMATCH_RATIO, size=size).tolist()
+            for i, ratio in zip(indices, ratios):
+                claim_data = records[i]['claim_data']
+                total_lines = sum(float(line['billed_amount']) for line in records[i]['service_lines'])
+                claim_data['billed_amount'] = max(0, round(total_lines * ratio, 2))
+        elif issue_type == 'invalid_diagnosis':
+            for i in indices:
+                records[i]['diagnosis_codes'].append(INVALID_DIAGNOSIS)
+        elif issue_type == 'future_service_date':
+            for i, delta in zip(indices, _days(rng, 1, 366, size)):
+                records[i]['claim_data']['service_date'] = today + delta
+        elif issue_type == 'invalid_npi_length':
+            lengths = rng.choice(INVALID_NPI_LENGTHS, size=size).tolist()
+            for i, npi in zip(indices, _digits(rng, lengths)):
+                records[i]['provider_npi'] = npi
+        elif issue_type == 'negative_amount':
+            for i in indices:
+                claim_data = records[i]['claim_data']
+                claim_data['billed_amount'] = -abs(claim_data['billed_amount'])
+        for i in indices:
+            records[i]['is_invalid'] = True
+            records[i]['issue_type'] = issue_type
+
+
+def corrupt_835(remit, claim_ids, issues, rng):
+    """
+    Apply planned issues to a block of payments computed by compute_remittance()
+
+    Corrupts remit's cent and code arrays and the claim_ids list in place,
+    and recomputes remit['total_paid_cents'] so the BPR total still
+    matches the CLP payments as written.
+    """
+    paid_cents = remit['paid_cents']
+    for issue_type, indices in _positions(issues).items():
+        indices = np.asarray(indices)
+        if issue_type == 'negative_payment':
+            paid_cents[indices] = -np.abs(paid_cents[indices])
+        elif issue_type == 'mismatched_ids':
+            for i, digits in zip(indices.tolist(), _digits(rng, [10] * len(indices))):
+                claim_ids[i] = MISMATCHED_ID_PREFIX + digits
+        elif issue_type == 'invalid_adjustment_code':
+            remit['adjustment_code'] = remit['adjustment_code'].astype(object)
+            remit['adjustment_code'][indices] = INVALID_ADJUSTMENT_CODE
+        elif issue_type == 'payment_exceeds_billed':
+            ratios = rng.uniform(*EXCESS_PAYMENT_RATIO, size=len(indices))
+            paid_cents[indices] = np.rint(remit['billed_cents'][indices] * ratios).astype(np.int64)
+    remit['total_paid_cents'] = int(paid_cents.sum())
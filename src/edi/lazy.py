@@ -0,0 +1,51 @@
+"""
+Deferred imports and library objects
+
+Faker, mimesis, NumPy and the MySQL driver take a noticeable share of
+startup time. Modules that only need them once data is actually generated
+or loaded hold a LazyObject instead, which imports and builds the real
+object on first attribute access.
+"""
+
+import importlib
+
+
+class LazyObject:
+    """
+    Proxy that builds its target on first attribute access
+
+    Args:
+        factory: Zero-argument callable returning the real object
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_target', None)
+
+    def _load(self):
+        target = self._target
+        if target is None:
+            target = self._factory()
+            object.__setattr__(self, '_target', target)
+        return target
+
+    @property
+    def is_loaded(self):
+        """Whether the target has been built"""
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __repr__(self):
+        if self._target is None:
+            return f"<LazyObject (not loaded) {self._factory!r}>"
+        return repr(self._target)
+
+
+def lazy_import(module_name):
+    """Return a proxy for a module that is imported on first attribute access"""
+    return LazyObject(lambda: importlib.import_module(module_name))
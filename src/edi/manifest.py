@@ -0,0 +1,304 @@
+"""
+Manifest and ground-truth sidecars for generator output
+
+Each output file gets an entry in the `_manifest.json` of its directory,
+so a loader can decide what to load without rescanning the data. The
+entry is computed while the file is written, with no second pass:
+
+- DigestWriter sits below the compressor and hashes (SHA-256) and counts
+  the bytes that reach the disk.
+- ManifestStats folds each record into record counts, min/max dates,
+  amount totals and per-plan / per-status counts.
+
+Entries are keyed by file name. Shard and date-partition directories each
+get their own manifest describing the files in them. Updates take a lock
+on `_manifest.json.lock`, so processes writing into one directory at once
+keep each other's entries.
+
+InvalidRecordIndex writes the ground truth of the invalid records that
+were injected into a file to `_<file name>.invalid.csv`, so data-quality
+checks can be scored by joining their findings to it. Like
+`_manifest.json`, the leading underscore keeps Spark and Hive from
+reading it as data.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config.config import MANIFEST_FILENAME
+
+# Key column of each transaction's invalid-record index
+INDEX_KEYS = {
+    '834': ('member_id', lambda record: record['member'].id),
+    '837': ('claim_id', lambda record: record['claim_data']['id']),
+    '835': ('payment_id', lambda record: record['payment_id']),
+}
+
+
+class DigestWriter(io.RawIOBase):
+    """
+    Raw binary output file that hashes and counts the bytes written to it
+
+    Args:
+        path: File to create
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.name = path  # gzip records the file name in its header, as when it opens the path itself
+        self._file = open(path, 'wb', buffering=0)
+        self._sha256 = hashlib.sha256()
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        written = self._file.write(data)
+        self._sha256.update(memoryview(data).cast('B')[:written])
+        self.bytes_written += written
+        return written
+
+    def tell(self):
+        return self.bytes_written
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+    @property
+    def sha256(self):
+        """Hex SHA-256 of the bytes written so far"""
+        return self._sha256.hexdigest()
+
+
+def _cents(amount):
+    """Integer cents of an amount string ("403.30") or float"""
+    if isinstance(amount, str):
+        return int(amount.replace('.', ''))
+    return round(amount * 100)
+
+
+def _format_cents(cents):
+    sign = '-' if cents < 0 else ''
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
+
+class ManifestStats:
+    """
+    Column statistics of one output file, accumulated record by record
+
+    Args:
+        transaction_type: "834", "837" or "835"
+    """
+
+    def __init__(self, transaction_type):
+        self.transaction_type = transaction_type
+        self.records = 0
+        self.invalid_records = 0
+        self.dates = {}  # name -> [min, max]
+        self.amounts = Counter()  # name -> total cents
+        self.plans = Counter()
+        self.statuses = Counter()
+        self._add = getattr(self, f'_add_{transaction_type}')
+
+    def add(self, record):
+        """Fold one record into the statistics"""
+        self.records += 1
+        if record['is_invalid']:
+            self.invalid_records += 1
+        self._add(record)
+
+    def update(self, records):
+        """Fold a batch of records into the statistics"""
+        for record in records:
+            self.add(record)
+
+    def _date(self, name, value):
+        if not value:
+            return
+        if isinstance(value, datetime):
+            value = value.date()
+        bounds = self.dates.get(name)
+        if bounds is None:
+            self.dates[name] = [value, value]
+        elif value < bounds[0]:
+            bounds[0] = value
+        elif value > bounds[1]:
+            bounds[1] = value
+
+    def _add_834(self, record):
+        self._date('effective_date', record['enrollment'].start_date)
+        self.plans[record['member'].plan['id']] += 1
+        self.statuses[record['status_info'][0]] += 1
+
+    def _add_837(self, record):
+        claim_data = record['claim_data']
+        self._date('service_date', claim_data['service_date'])
+        self.amounts['billed_amount'] += _cents(claim_data['billed_amount'])
+        self.plans[record['member'].plan['id']] += 1
+        self.statuses[record['claim_status']] += 1
+
+    def _add_835(self, record):
+        amounts = self.amounts
+        self._date('service_date', record['claim_data'].get('service_date'))
+        for name in ('billed_amount', 'paid_amount', 'allowed_amount', 'patient_responsibility'):
+            amounts[name] += _cents(record[name])
+        if record['adjustment_code']:
+            amounts['adjustment_amount'] += _cents(record['adjustment_amount'])
+        self.plans[record['member'].plan['id']] += 1
+        self.statuses[record['claim_status']] += 1
+
+    def to_dict(self):
+        """JSON-ready statistics"""
+        return {
+            'records': self.records,
+            'invalid_records': self.invalid_records,
+            'dates': {
+                name: {'min': low.isoformat(), 'max': high.isoformat()}
+                for name, (low, high) in sorted(self.dates.items())
+            },
+            'amount_totals': {name: _format_cents(cents) for name, cents in sorted(self.amounts.items())},
+            'distinct_plans': len(self.plans),
+            'plan_counts': dict(sorted(self.plans.items())),
+            'distinct_statuses': len(self.statuses),
+            'status_counts': dict(sorted(self.statuses.items())),
+        }
+
+
+def manifest_path(output_file):
+    """The manifest describing output_file: _manifest.json in its directory"""
+    return os.path.join(os.path.dirname(output_file), MANIFEST_FILENAME)
+
+
+def manifest_lock_path(output_file):
+    """Lock file serializing updates to output_file's manifest: _manifest.json.lock"""
+    return manifest_path(output_file) + '.lock'
+
+
+@contextmanager
+def _exclusive_lock(path):
+    """Hold an exclusive lock on the file at path (created if missing) across processes"""
+    with open(path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def update_manifest(output_file, entry):
+    """
+    Add or replace output_file's entry in its directory's manifest
+
+    Writers into one directory (such as parallel workers writing ranges of
+    a record space) take an exclusive lock on _manifest.json.lock around
+    the read-merge-replace, so no entry is lost. The manifest is rewritten
+    through a temporary file of its own and renamed into place, so readers
+    never see a partial manifest.
+    """
+    path = manifest_path(output_file)
+    with _exclusive_lock(manifest_lock_path(output_file)):
+        manifest = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    manifest = json.load(f)
+            except ValueError:
+                manifest = {}  # Rewritten below from this file's entry
+        manifest.setdefault('files', {})[os.path.basename(output_file)] = entry
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                         dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.chmod(temp_path, 0o644)  # mkstemp creates the file owner-only
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return path
+
+
+def manifest_entry(transaction_type, format, compression, digest, stats, segments=None):
+    """Manifest entry of one finished output file"""
+    entry = {
+        'transaction_type': transaction_type,
+        'format': format,
+        'compression': compression if compression not in (None, 'none') else None,
+        'bytes': digest.bytes_written,
+        'sha256': digest.sha256,
+    }
+    if segments is not None:
+        entry['segments'] = segments
+    entry.update(stats.to_dict())
+    return entry
+
+
+def invalid_index_path(output_file):
+    """Ground-truth index of output_file: edi_837.txt.gz -> _edi_837.txt.gz.invalid.csv"""
+    directory, name = os.path.split(output_file)
+    return os.path.join(directory, f"_{name}.invalid.csv")
+
+
+class InvalidRecordIndex:
+    """
+    Ground truth of the invalid records in one output file
+
+    One CSV row per invalid record: its 0-based position in the file
+    (record), its key (member_id, claim_id or payment_id) and issue_type.
+    Rows are written as records pass through; the file is created with
+    the first invalid record, and a stale index from an earlier run is
+    removed when the output is opened.
+
+    Args:
+        output_file: Output file the index describes
+        transaction_type: "834", "837" or "835"
+    """
+
+    def __init__(self, output_file, transaction_type):
+        self.path = invalid_index_path(output_file)
+        self.key_name, self._key = INDEX_KEYS[transaction_type]
+        self.records = 0
+        self.invalid_records = 0
+        self._file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def update(self, records):
+        """Index a batch of records written to the file, in file order"""
+        for record in records:
+            if record['is_invalid']:
+                if self._file is None:
+                    self._file = open(self.path, 'w', newline='')
+                    self._writer = csv.writer(self._file)
+                    self._writer.writerow(['record', self.key_name, 'issue_type'])
+                self._writer.writerow([self.records, self._key(record), record['issue_type']])
+                self.invalid_records += 1
+            self.records += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
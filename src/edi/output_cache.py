@@ -0,0 +1,309 @@
+"""
+Content-addressed on-disk cache of generator output
+
+A generate_edi_* call with a seed or a record space writes the same bytes
+every time it is made with the same arguments, so its output can be
+reused. The cache key is the SHA-256 of
+
+- every argument of the call except the output paths (which only decide
+  where the files go), the file names and which formats share a
+  directory,
+- the members, providers, enrollments and claims already in global_data
+  that the call draws from (by ID), and the day, for seeded calls,
+- the generator version: the package version, the versions of the
+  libraries that draw the data, and the source of src/edi and config.
+
+An entry holds the files the call wrote (data files, shard and partition
+files, manifests and invalid-record indexes), the call's return value and
+the records it added to global_data. A repeated call hardlinks the files
+into place (copies them across file systems), merges the manifest entries
+and restores global_data, so later calls see the same state as after a
+real run. Entries are evicted least recently used first once the cache
+outgrows OUTPUT_CACHE_MAX_BYTES.
+
+Layout of the cache directory:
+
+    entries/<key>/entry.json       key, files and sizes, created, last_used, hits
+    entries/<key>/files/<n>/...    files written to the call's n-th output directory
+    entries/<key>/results.pickle   return value and added global_data records
+    tmp/                           calls being generated
+
+Entries are unpickled, so only point the cache at a trusted directory.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from importlib import metadata
+
+from config.config import MANIFEST_FILENAME, OUTPUT_CACHE_LINK, OUTPUT_CACHE_MAX_BYTES
+from src.edi.manifest import invalid_index_path, manifest_lock_path, update_manifest
+
+# Libraries whose draws or encodings end up in the output
+VERSIONED_LIBRARIES = ('faker', 'mimesis', 'numpy', 'pyarrow')
+
+# Staging directories left behind by interrupted calls are removed after this many seconds
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+@lru_cache(maxsize=None)
+def generator_version():
+    """Hex digest of the package version, library versions and generator source"""
+    import src
+
+    digest = hashlib.sha256(src.__version__.encode())
+    for library in VERSIONED_LIBRARIES:
+        try:
+            digest.update(f"{library}={metadata.version(library)}".encode())
+        except metadata.PackageNotFoundError:
+            digest.update(f"{library}=none".encode())
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    config_file = os.path.join(os.path.dirname(os.path.dirname(package_dir)), 'config', 'config.py')
+    sources = sorted(os.path.join(package_dir, name) for name in os.listdir(package_dir) if name.endswith('.py'))
+    for path in sources + [config_file]:
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode() + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+def tables_fingerprint(tables):
+    """Hex digest of the keys of each table in a dict of dicts, such as global_data"""
+    digest = hashlib.sha256()
+    for name in sorted(tables):
+        digest.update(f"{name}:{len(tables[name])}\n".encode())
+        digest.update('\n'.join(map(str, tables[name])).encode())
+    return digest.hexdigest()
+
+
+def _rewrite_paths(value, prefixes):
+    """Copy of a return value with paths under each old prefix moved to its new one"""
+    if isinstance(value, str):
+        for old, new in prefixes:
+            if value == old or value.startswith(old + os.sep):
+                return new + value[len(old):]
+        return value
+    if isinstance(value, dict):
+        return {key: _rewrite_paths(item, prefixes) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_rewrite_paths(item, prefixes) for item in value)
+    return value
+
+
+class OutputCache:
+    """
+    Cache directory of generator output
+
+    Args:
+        directory: Cache directory, created if missing
+        max_bytes: Size the cache is pruned to after each new entry is placed
+                   (default: OUTPUT_CACHE_MAX_BYTES; None or 0 = unbounded)
+        link: Hardlink cached files into place instead of copying them
+              (default: OUTPUT_CACHE_LINK)
+    """
+
+    def __init__(self, directory, max_bytes=OUTPUT_CACHE_MAX_BYTES, link=None):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.link = OUTPUT_CACHE_LINK if link is None else link
+        self.entries_dir = os.path.join(self.directory, 'entries')
+        self.tmp_dir = os.path.join(self.directory, 'tmp')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def key(self, params):
+        """Cache key of a call's parameters (a JSON-serializable dict) under the current generator version"""
+        payload = json.dumps({'params': params, 'version': generator_version()}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        The entry of key, or None on a miss
+
+        An entry whose files are missing or changed size (for example a
+        hardlinked copy that was written to in place) is dropped as a miss.
+        A hit counts as a use for eviction.
+        """
+        path = os.path.join(self.entries_dir, key)
+        try:
+            entry = self._read_entry(path)
+        except (OSError, ValueError):
+            return None
+        files_dir = os.path.join(path, 'files')
+        for name, size in entry['files'].items():
+            file_path = os.path.join(files_dir, name)
+            if not os.path.isfile(file_path) or os.path.getsize(file_path) != size:
+                self.remove(key)
+                return None
+        entry['last_used'] = time.time()
+        entry['hits'] += 1
+        self._write_entry(path, entry)
+        return entry
+
+    def stage(self):
+        """Directory for a call to write its output to, before put() moves it into an entry"""
+        return os.path.join(tempfile.mkdtemp(dir=self.tmp_dir), 'files')
+
+    def put(self, key, staging, results, added, description=None):
+        """
+        Move a call's staged output into the entry of key
+
+        Args:
+            key: Cache key from key()
+            staging: Directory from stage() holding the call's output
+            results: The call's return value, with paths under staging
+            added: Dict of the records the call added to each global_data table
+            description: JSON-serializable summary shown by entries()
+
+        Returns:
+            The new entry (or the existing one if another process stored key first)
+        """
+        os.makedirs(staging, exist_ok=True)
+        work_dir = os.path.dirname(staging)
+        with open(os.path.join(work_dir, 'results.pickle'), 'wb') as f:
+            pickle.dump({'results': results, 'added': added}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        files = {}
+        lock_name = os.path.basename(manifest_lock_path(staging))
+        for dir_path, _, names in os.walk(staging):
+            for name in names:
+                if name == lock_name:
+                    continue  # Only serializes manifest updates
+                file_path = os.path.join(dir_path, name)
+                files[os.path.relpath(file_path, staging)] = os.path.getsize(file_path)
+        now = time.time()
+        entry = {
+            'key': key,
+            'description': description,
+            'staging': staging,
+            'files': files,
+            'bytes': sum(files.values()) + os.path.getsize(os.path.join(work_dir, 'results.pickle')),
+            'created': now,
+            'last_used': now,
+            'hits': 0,
+        }
+        self._write_entry(work_dir, entry)
+
+        path = os.path.join(self.entries_dir, key)
+        try:
+            os.rename(work_dir, path)
+        except OSError:
+            # Stored by a concurrent call
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return self.get(key)
+        return entry
+
+    def restore(self, entry, directories):
+        """
+        Place an entry's files in the call's output directories
+
+        Args:
+            entry: Entry from get() or put()
+            directories: Output directories, in the order the call's files were staged
+
+        Returns:
+            tuple: (results, added) - the call's return value with its paths in
+            directories, and the records it added to each global_data table
+        """
+        path = os.path.join(self.entries_dir, entry['key'])
+        files_dir = os.path.join(path, 'files')
+        manifests = []
+        for name in entry['files']:
+            index, relative = name.split(os.sep, 1)
+            destination = os.path.join(directories[int(index)], relative)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            if os.path.basename(name) == MANIFEST_FILENAME:
+                manifests.append((os.path.join(files_dir, name), os.path.dirname(destination)))
+                continue
+            self._place(os.path.join(files_dir, name), destination)
+            # A generator run removes the stale index of a file it writes without invalid records
+            index_path = invalid_index_path(destination)
+            if invalid_index_path(name) not in entry['files'] and os.path.exists(index_path):
+                os.remove(index_path)
+        for manifest_file, directory in manifests:
+            with open(manifest_file) as f:
+                for file_name, file_entry in json.load(f).get('files', {}).items():
+                    update_manifest(os.path.join(directory, file_name), file_entry)
+
+        with open(os.path.join(path, 'results.pickle'), 'rb') as f:
+            stored = pickle.load(f)
+        prefixes = [(os.path.join(entry['staging'], str(i)), directory) for i, directory in enumerate(directories)]
+        return _rewrite_paths(stored['results'], prefixes), stored['added']
+
+    def entries(self):
+        """All entries, least recently used first"""
+        entries = []
+        for key in os.listdir(self.entries_dir):
+            try:
+                entries.append(self._read_entry(os.path.join(self.entries_dir, key)))
+            except (OSError, ValueError):
+                continue  # Being removed
+        return sorted(entries, key=lambda entry: entry['last_used'])
+
+    def size(self):
+        """Total bytes of all entries"""
+        return sum(entry['bytes'] for entry in self.entries())
+
+    def remove(self, key):
+        """Remove the entry of key, if present"""
+        shutil.rmtree(os.path.join(self.entries_dir, key), ignore_errors=True)
+
+    def prune(self, max_bytes=None, max_age=None):
+        """
+        Evict entries, least recently used first
+
+        Args:
+            max_bytes: Evict until the cache holds at most this many bytes (None = no limit)
+            max_age: Evict entries unused for more than this many seconds (None = no limit)
+
+        Returns:
+            List of the evicted entries
+        """
+        now = time.time()
+        for name in os.listdir(self.tmp_dir):
+            work_dir = os.path.join(self.tmp_dir, name)
+            if now - os.path.getmtime(work_dir) > STALE_STAGING_SECONDS:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        entries = self.entries()
+        total = sum(entry['bytes'] for entry in entries)
+        evicted = []
+        for entry in entries:
+            expired = max_age is not None and now - entry['last_used'] > max_age
+            if not expired and (max_bytes is None or total <= max_bytes):
+                continue
+            self.remove(entry['key'])
+            total -= entry['bytes']
+            evicted.append(entry)
+        return evicted
+
+    def clear(self):
+        """Remove every entry"""
+        return self.prune(max_bytes=0)
+
+    def _place(self, source, destination):
+        """Hardlink (or copy) a cached file to destination, replacing what is there"""
+        if os.path.lexists(destination):
+            os.remove(destination)
+        if self.link:
+            try:
+                os.link(source, destination)
+                return
+            except OSError:
+                pass  # Another file system, or links unsupported
+        shutil.copyfile(source, destination)
+
+    @staticmethod
+    def _read_entry(path):
+        with open(os.path.join(path, 'entry.json')) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_entry(path, entry):
+        temp_path = os.path.join(path, 'entry.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(entry, f, indent=2, sort_keys=True)
+        os.replace(temp_path, os.path.join(path, 'entry.json'))
@@ -1,22 +1,57 @@
+import glob
 import random
 import re
 import os
 import sys
 from datetime import datetime, timedelta
 import json
-import mysql.connector
-from mysql.connector import Error
 from typing import Dict, List, Optional, Tuple
 
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from config.config import DB_CONFIG
-from src.edi.generator import HEALTH_PLANS, generate_id
-from mimesis import Person
+from config.config import DB_CONFIG, PARSER_READ_CHUNK_SIZE
+from src.edi.compression import open_text_input
+from src.edi.generator import HEALTH_PLANS, generate_id, person
+from src.edi.lazy import lazy_import
 
-person = Person('en')
+# The MySQL driver is imported when the first connection is made
+mysql_connector = lazy_import('mysql.connector')
+
+
+class Error(Exception):
+    """Placeholder for mysql.connector.Error until the driver is loaded"""
+
+
+def _load_db_driver():
+    """Import the MySQL driver and bind its Error class for the handlers below"""
+    global Error
+    Error = mysql_connector.Error
+    return mysql_connector
+
+
+def expand_input_paths(file_path) -> List[str]:
+    """
+    展开输入路径: 单个路径、glob模式或路径列表
+
+    glob按文件名排序, 使多文件输入的顺序可重复
+    """
+    if isinstance(file_path, (list, tuple)):
+        return [path for item in file_path for path in expand_input_paths(item)]
+    if glob.has_magic(file_path):
+        paths = sorted(glob.glob(file_path))
+        if not paths:
+            raise FileNotFoundError(f"没有匹配的EDI文件: {file_path}")
+        return paths
+    return [file_path]
+
+
+def describe_input(file_path) -> str:
+    """输入的描述, 记录到edi_transactions.original_filename"""
+    if isinstance(file_path, (list, tuple)):
+        return ', '.join(expand_input_paths(file_path))
+    return file_path
 
 
 class EDIParser:
@@ -29,7 +64,7 @@ class EDIParser:
     def connect_db(self):
         """建立数据库连接"""
         try:
-            self.conn = mysql.connector.connect(**DB_CONFIG)
+            self.conn = _load_db_driver().connect(**DB_CONFIG)
             self.cursor = self.conn.cursor(dictionary=True)
             print("数据库连接成功")
         except Error as e:
@@ -43,30 +78,59 @@ class EDIParser:
             self.conn.close()
             print("数据库连接已关闭")
 
-    def parse_edi_file(self, file_path: str) -> List[Dict]:
+    def parse_edi_file(self, file_path) -> List[Dict]:
         """解析EDI文件为段列表"""
-        segments = []
-        with open(file_path, 'r') as f:
-            content = f.read()
-            for segment in content.split(self.segment_delimiter):
-                segment = segment.strip()
-                if segment:
-                    elements = segment.split(self.element_delimiter)
-                    segment_id = elements[0]
-                    segments.append({
-                        'segment_id': segment_id,
-                        'elements': elements[1:],
-                        'raw': segment
-                    })
-        return segments
+        return list(self.iter_edi_segments(file_path))
+
+    def iter_edi_segments(self, file_path, chunk_size: int = PARSER_READ_CHUNK_SIZE):
+        """
+        逐段读取EDI输入
+
+        file_path可以是单个路径、glob模式或路径列表, 多个文件按顺序作为一个
+        连续的段流读取. .gz/.bz2/.xz (以及已安装时的.zst/.lz4) 文件边读边解压,
+        不会在磁盘上生成解压副本, 内存中只保留当前数据块.
+        """
+        # 先展开路径, 使不存在的glob在开始解析前就报错
+        return self._iter_segments(expand_input_paths(file_path), chunk_size)
+
+    def _iter_segments(self, paths: List[str], chunk_size: int):
+        for path in paths:
+            with open_text_input(path) as f:
+                remainder = ''
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    pieces = (remainder + chunk).split(self.segment_delimiter)
+                    remainder = pieces.pop()
+                    for segment in pieces:
+                        parsed = self._parse_segment(segment)
+                        if parsed:
+                            yield parsed
+                # 文件结束也结束最后一个段, 段不会跨文件拼接
+                parsed = self._parse_segment(remainder)
+                if parsed:
+                    yield parsed
+
+    def _parse_segment(self, segment: str) -> Optional[Dict]:
+        """把一个段拆分为段ID和元素"""
+        segment = segment.strip()
+        if not segment:
+            return None
+        elements = segment.split(self.element_delimiter)
+        return {
+            'segment_id': elements[0],
+            'elements': elements[1:],
+            'raw': segment
+        }
 
-    def parse_edi_834(self, file_path: str):
+    def parse_edi_834(self, file_path):
         """解析EDI 834文件并插入数据库"""
-        print(f"开始解析EDI 834文件: {file_path}")
-        segments = self.parse_edi_file(file_path)
+        print(f"开始解析EDI 834文件: {describe_input(file_path)}")
+        segments = self.iter_edi_segments(file_path)
 
         # 先记录EDI交易
-        transaction_id = self.record_edi_transaction('834', file_path)
+        transaction_id = self.record_edi_transaction('834', describe_input(file_path))
 
         # 解析会员和注册信息
         members = []
@@ -291,13 +355,13 @@ class EDIParser:
         self.update_edi_transaction_status(transaction_id, 'PROCESSED', processed_count)
         print(f"EDI 834文件解析完成，处理了 {processed_count} 条会员记录")
 
-    def parse_edi_837(self, file_path: str):
+    def parse_edi_837(self, file_path):
         """解析EDI 837文件并插入数据库 - 增强版本"""
-        print(f"开始解析EDI 837文件: {file_path}")
-        segments = self.parse_edi_file(file_path)
+        print(f"开始解析EDI 837文件: {describe_input(file_path)}")
+        segments = self.iter_edi_segments(file_path)
 
         # 先记录EDI交易
-        transaction_id = self.record_edi_transaction('837', file_path)
+        transaction_id = self.record_edi_transaction('837', describe_input(file_path))
 
         # 解析索赔信息
         claims = []
@@ -771,13 +835,13 @@ class EDIParser:
         }
         return procedure_map.get(code, 'Medical service')
 
-    def parse_edi_835(self, file_path: str):
+    def parse_edi_835(self, file_path):
         """解析EDI 835文件并插入数据库"""
-        print(f"开始解析EDI 835文件: {file_path}")
-        segments = self.parse_edi_file(file_path)
+        print(f"开始解析EDI 835文件: {describe_input(file_path)}")
+        segments = self.iter_edi_segments(file_path)
 
         # 先记录EDI交易
-        transaction_id = self.record_edi_transaction('835', file_path)
+        transaction_id = self.record_edi_transaction('835', describe_input(file_path))
 
         # 解析支付信息
         payments = []
@@ -0,0 +1,271 @@
+"""
+Partitioned output for the EDI generators
+
+ShardedSink splits a transaction's records into K shards by a stable hash
+of member_id. Every transaction type uses the same hash, so the 834
+enrollment, 837 claims and 835 payments of a member land in the same
+shard number across all three outputs: shard i of each file can be joined
+on member_id without a shuffle, and each shard can be loaded by its own
+worker.
+
+Shard files are named like Hadoop part files:
+edi_837.txt -> edi_837-00000-of-00008.txt, edi_837-00001-of-00008.txt, ...
+
+DatePartitionedSink writes Hive-style date partitions instead: claims and
+payments by service date, enrollments by coverage effective date,
+edi_837.txt -> dt=2025-03-14/edi_837.txt. Records are buffered per
+partition and written through a bounded LRU pool of open writers, so one
+pass can fill thousands of partitions without running out of file
+descriptors.
+"""
+
+import os
+import zlib
+from collections import OrderedDict
+
+from config.config import (
+    PARTITION_BUFFER_RECORDS, PARTITION_MAX_BUFFERED_RECORDS, PARTITION_MAX_OPEN_FILES, X12_SUBSET_CONTROL_NUMBERS
+)
+from src.edi.compression import split_compression_suffix
+from src.edi.sinks import RecordSink, make_sink
+
+# Partition name for records without a date (Hive's default partition)
+DEFAULT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def record_member_id(record):
+    """member_id of an 834, 837 or 835 record"""
+    claim_data = record.get('claim_data')
+    if claim_data is not None:
+        return claim_data['member_id']
+    return record['member'].id
+
+
+def record_partition_date(record):
+    """Partition date of a record: 837/835 service date, 834 coverage effective date"""
+    claim_data = record.get('claim_data')
+    if claim_data is not None:
+        value = claim_data.get('service_date')
+    else:
+        value = record['enrollment'].start_date
+    return value.strftime('%Y-%m-%d') if value else DEFAULT_PARTITION
+
+
+def subset_header(header):
+    """
+    Header for every subset file but the first
+
+    Transaction-level adjustments (the 835 PLB) belong to no record, so
+    they are written to the first shard or partition file only.
+    """
+    if header.get('provider_adjustment'):
+        return {**header, 'provider_adjustment': None}
+    return header
+
+
+def subset_control_header(header, index):
+    """
+    Header for the index-th subset file, with its own ISA13 control numbers
+
+    Each shard or partition file is a separate interchange, so it starts
+    X12_SUBSET_CONTROL_NUMBERS after the previous one; a byte-capped sink
+    numbers its parts consecutively within that block.
+    """
+    base_control_num = int(header['isa_control_num'])
+    control_num = (base_control_num + index * X12_SUBSET_CONTROL_NUMBERS) % 1000000000
+    return {**header, 'isa_control_num': '%09d' % control_num}
+
+
+def shard_for(member_id, shards):
+    """
+    Shard number for a member
+
+    CRC-32 of the UTF-8 member_id modulo the shard count: stable across
+    processes and runs (unlike hash()), and cheap to reproduce in Spark
+    (crc32(member_id) % K) or SQL.
+    """
+    return zlib.crc32(member_id.encode('utf-8')) % shards
+
+
+def shard_path(output_file, shard, shards):
+    """Path of one shard: edi_837.txt.gz -> edi_837-00003-of-00008.txt.gz"""
+    base, suffix = split_compression_suffix(output_file)
+    stem, extension = os.path.splitext(base)
+    return f"{stem}-{shard:05d}-of-{shards:05d}{extension}{suffix}"
+
+
+class ShardedSink(RecordSink):
+    """
+    Routes records to K sinks of one format by member hash
+
+    close() returns a list with each shard's result, in shard order.
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        format: Output format of every shard
+        output_file: Base path; shards are named by shard_path()
+        shards: Number of shards (K)
+        compression: Codec name, or None to infer from the file extension
+        options: Further sink options (e.g. X12 envelope limits)
+    """
+
+    def __init__(self, transaction_type, format, output_file, shards, compression=None, **options):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        super().__init__(output_file, compression)
+        self.transaction_type = transaction_type
+        self.format = format
+        self.shards = shards
+        self.sinks = [
+            make_sink(transaction_type, format, shard_path(output_file, shard, shards), compression,
+                      subset=True, **options)
+            for shard in range(shards)
+        ]
+        self.output_files = [sink.output_file for sink in self.sinks]
+
+    def open(self, header):
+        rest = subset_header(header)
+        for shard, sink in enumerate(self.sinks):
+            sink.open(subset_control_header(header if shard == 0 else rest, shard))
+
+    def write_many(self, records):
+        batches = [[] for _ in self.sinks]
+        shards = self.shards
+        for record in records:
+            batches[shard_for(record_member_id(record), shards)].append(record)
+        for sink, batch in zip(self.sinks, batches):
+            if batch:
+                sink.write_many(batch)
+        self._count(records)
+
+    def close(self):
+        return [sink.close() for sink in self.sinks]
+
+
+def partition_path(output_file, partition, part=1):
+    """
+    Path of a date partition's file
+
+    edi_837.txt -> dt=2025-03-14/edi_837.txt; a partition reopened after
+    its writer was evicted continues in dt=2025-03-14/edi_837_0002.txt
+    (distinct from the -0001, -0002 files of a byte-capped X12 sink).
+    """
+    directory, name = os.path.split(output_file)
+    if part > 1:
+        base, suffix = split_compression_suffix(name)
+        stem, extension = os.path.splitext(base)
+        name = f"{stem}_{part:04d}{extension}{suffix}"
+    return os.path.join(directory, f"dt={partition}", name)
+
+
+class DatePartitionedSink(RecordSink):
+    """
+    Routes records to one sink per date partition
+
+    Records are buffered per partition and written buffer_records at a
+    time; when more than max_buffered_records are held in total, the
+    largest buffers are written first. At most max_open_files partition
+    sinks are open at once: writing to another closes the least recently
+    used one, and if that partition receives records again it continues
+    in a new part file. Every file is complete on its own (CSV header, or
+    ISA/IEA interchange).
+
+    close() returns a dict like the CSV result, with 'partitions' and
+    'output_files' in place of the data. Partition files are not kept in
+    memory.
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        format: Output format of every partition
+        output_file: Path whose directory holds the dt=YYYY-MM-DD directories
+        compression: Codec name, or None to infer from the file extension
+        max_open_files: Open partition sinks (default: PARTITION_MAX_OPEN_FILES)
+        buffer_records: Records buffered per partition (default: PARTITION_BUFFER_RECORDS)
+        max_buffered_records: Records buffered in total (default: PARTITION_MAX_BUFFERED_RECORDS)
+        options: Further sink options (e.g. X12 envelope limits)
+    """
+
+    def __init__(self, transaction_type, format, output_file, compression=None, max_open_files=None,
+                 buffer_records=None, max_buffered_records=None, **options):
+        super().__init__(output_file, compression)
+        self.transaction_type = transaction_type
+        self.format = format
+        self.options = options
+        self.max_open_files = max_open_files or PARTITION_MAX_OPEN_FILES
+        self.buffer_records = buffer_records or PARTITION_BUFFER_RECORDS
+        self.max_buffered_records = max_buffered_records or PARTITION_MAX_BUFFERED_RECORDS
+        if self.max_open_files < 1:
+            raise ValueError("max_open_files must be at least 1")
+
+    def open(self, header):
+        self.header = header
+        self._rest_header = subset_header(header)
+        self._sinks = OrderedDict()  # partition -> open sink, least recently used first
+        self._buffers = {}
+        self._buffered = 0
+        self._parts = {}  # partition -> part files opened so far
+        self.output_files = []
+
+    @property
+    def partitions(self):
+        """Partitions written so far"""
+        return sorted(self._parts)
+
+    def write_many(self, records):
+        buffers = self._buffers
+        for record in records:
+            partition = record_partition_date(record)
+            buffer = buffers.get(partition)
+            if buffer is None:
+                buffer = buffers[partition] = []
+            buffer.append(record)
+            self._buffered += 1
+            if len(buffer) >= self.buffer_records:
+                self._flush(partition)
+        if self._buffered > self.max_buffered_records:
+            for partition in sorted(buffers, key=lambda partition: len(buffers[partition]), reverse=True):
+                if self._buffered <= self.max_buffered_records // 2:
+                    break
+                self._flush(partition)
+        self._count(records)
+
+    def close(self):
+        for partition in list(self._buffers):
+            self._flush(partition)
+        while self._sinks:
+            self._sinks.popitem(last=False)[1].close()
+        return {
+            "output_file": self.output_file,
+            "partitions": len(self._parts),
+            "output_files": self.output_files,
+            "total_records": self.total_records,
+            "invalid_records": self.invalid_records,
+            "invalid_rate": self.invalid_records / self.total_records if self.total_records else 0.0,
+            "data": None
+        }
+
+    def _flush(self, partition):
+        """Write a partition's buffered records"""
+        records = self._buffers.pop(partition)
+        self._buffered -= len(records)
+        self._sink(partition).write_many(records)
+
+    def _sink(self, partition):
+        """The partition's open sink, opening it (and evicting the least recently used) if needed"""
+        sink = self._sinks.get(partition)
+        if sink is not None:
+            self._sinks.move_to_end(partition)
+            return sink
+        if len(self._sinks) >= self.max_open_files:
+            self._sinks.popitem(last=False)[1].close()
+        part = self._parts.get(partition, 0) + 1
+        self._parts[partition] = part
+        sink = make_sink(self.transaction_type, self.format, partition_path(self.output_file, partition, part),
+                         self.compression, subset=True, **self.options)
+        sink.retain = False
+        # Every partition file (and every part reopened after eviction) is its own interchange
+        index = len(self.output_files)
+        sink.open(subset_control_header(self._rest_header if index else self.header, index))
+        self.output_files.append(sink.output_file)
+        self._sinks[partition] = sink
+        return sink
@@ -0,0 +1,493 @@
+"""
+Claim-to-payment reconciliation of a matched 837/835 pair
+
+Streams an 837 and the 835 that pays it (X12 or CSV, compressed, globbed
+or listed) and checks that the remittance reconciles with the claims:
+
+    duplicate_claim      an 837 claim ID submitted again later in the
+                         file; the later submission replaces it
+    orphan_payment       an 835 payment of a claim not in the 837
+    duplicate_payment    a second or later payment of the same claim
+    billed_mismatch      the 835 billed amount (CLP03) differs from the
+                         837 charge (CLM02)
+    paid_exceeds_billed  the payment (CLP04) is above the 837 charge
+    allowed_mismatch     the allowed amount is not the payment plus the
+                         patient responsibility (CLP05)
+    provider_mismatch    the 835 payee NPI is not the 837 billing NPI
+    bpr_mismatch         an 835 transaction set's BPR total is not the sum
+                         of its CLP payments (X12 only: the CSV layout has
+                         no BPR)
+
+and aggregates billed, paid and allowed amounts per provider (NPI) and
+per day of service. Payments are grouped with the claims they pay, and
+orphan payments by their own NPI and service date.
+
+The 837 is read first into a claim index of NumPy arrays: 64-bit ID
+hashes sorted once (O(n log n)), with the claim IDs, charges and
+provider and day group codes beside them, about 40 bytes per claim. The
+835 is then read in batches; each batch is matched to the index with a
+binary search, checked with array comparisons and folded into the
+per-group totals with bincount. Memory grows with the number of claims
+and groups, never with the number of payments or file size.
+"""
+
+import csv
+import os
+
+import numpy as np
+
+from config.config import VALIDATOR_BATCH_RECORDS
+from src.edi.compression import open_text_input
+from src.edi.integrity import key_hashes
+from src.edi.parser import expand_input_paths
+from src.edi.remittance import format_cents
+from src.edi.validator import amount_cents, csv_transaction_type, d8_date, detect_format, x12_units
+
+DISCREPANCY_TYPES = [
+    'duplicate_claim', 'orphan_payment', 'duplicate_payment', 'billed_mismatch',
+    'paid_exceeds_billed', 'allowed_mismatch', 'provider_mismatch', 'bpr_mismatch',
+]
+
+# Discrepancies found per payment, in report order
+PAYMENT_DISCREPANCIES = DISCREPANCY_TYPES[1:-1]
+
+# X12 segments read, by transaction set
+RECONCILIATION_SEGMENTS = {
+    '837': {'CLM', 'NM1', 'DTP'},
+    '835': {'CLP', 'SVC', 'NM1', 'DTM', 'BPR'},
+}
+
+# CSV columns read, in the order of the X12 fields
+CSV_COLUMNS = {
+    '837': ['claim_id', 'billed_amount', 'provider_npi', 'service_date'],
+    '835': ['claim_id', 'billed_amount', 'paid_amount', 'patient_responsibility', 'allowed_amount',
+            'provider_npi', 'service_date'],
+}
+
+GROUP_COLUMNS = [
+    'claims', 'unpaid_claims', 'billed_amount', 'payments', 'payment_billed_amount',
+    'paid_amount', 'allowed_amount', 'patient_responsibility', 'discrepancies',
+]
+AMOUNT_COLUMNS = {'billed_amount', 'payment_billed_amount', 'paid_amount', 'allowed_amount', 'patient_responsibility'}
+
+REPORT_COLUMNS = ['transaction_type', 'record', 'claim_id', 'issue_type', 'expected', 'actual']
+
+
+def _cents(values):
+    """Amount strings as an int64 array of cents (0 where empty)"""
+    return np.nan_to_num(amount_cents(values)).astype(np.int64)
+
+
+def _iso_date(d8):
+    return f"{d8[:4]}-{d8[4:6]}-{d8[6:]}" if len(d8) == 8 else d8
+
+
+def _x12_claims(input_file, parser=None):
+    """Yield (claim_id, billed_amount, provider_npi, service_date) for each X12 claim"""
+    for transaction_type, unit, _ in x12_units(input_file, RECONCILIATION_SEGMENTS, parser):
+        if transaction_type != '837':
+            raise ValueError(f"Expected EDI 837 in {input_file}, found {transaction_type}")
+        claim_id = billed = npi = service_date = ''
+        for segment_id, elements in unit:
+            if segment_id == 'CLM':
+                claim_id, billed = elements[0], elements[1]
+            elif segment_id == 'NM1':
+                if elements[0] == '85':
+                    npi = elements[-1]
+            elif not service_date and elements[0] == '472':  # DTP; the claim's comes before its lines'
+                service_date = elements[2]
+        yield claim_id, billed, npi, service_date
+
+
+def _x12_payments(input_file, sets, parser=None):
+    """
+    Yield (claim_id, billed, paid, patient_responsibility, allowed, payee_npi, service_date, set)
+    for each X12 payment
+
+    Appends (set control number, BPR total) to sets as each transaction
+    set ends; set is the position in sets its payment's set will have.
+    """
+    for transaction_type, unit, header in x12_units(input_file, RECONCILIATION_SEGMENTS, parser,
+                                                    set_headers=True):
+        if transaction_type != '835':
+            raise ValueError(f"Expected EDI 835 in {input_file}, found {transaction_type}")
+        if unit is None:
+            control_number = header[0][1][1] if len(header[0][1]) > 1 else ''
+            total = next((elements[1] for segment_id, elements in header if segment_id == 'BPR'), '')
+            sets.append((control_number, total))
+            continue
+        claim_id = billed = paid = patient = allowed = npi = service_date = ''
+        for segment_id, elements in unit:
+            if segment_id == 'CLP':
+                claim_id, billed, paid = elements[0], elements[2], elements[3]
+                patient = elements[4] if len(elements) > 4 else ''
+            elif segment_id == 'SVC':
+                allowed = elements[3] if len(elements) > 3 else ''
+            elif segment_id == 'NM1':
+                if elements[0] == '82':
+                    npi = elements[-1]
+            elif segment_id == 'DTM':
+                if elements[0] == '150':
+                    service_date = elements[2]
+        yield claim_id, billed, paid, patient, allowed, npi, service_date, len(sets)
+
+
+def _csv_rows(input_file, transaction_type):
+    """Yield the CSV_COLUMNS of each row, with D8 service dates"""
+    columns = CSV_COLUMNS[transaction_type]
+    for path in expand_input_paths(input_file):
+        with open_text_input(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            found = csv_transaction_type(header)
+            if found != transaction_type:
+                raise ValueError(f"Expected EDI {transaction_type} in {path}, found {found}")
+            positions = [header.index(column) for column in columns]
+            for row in reader:
+                fields = [row[position] for position in positions]
+                fields[-1] = d8_date(fields[-1])
+                yield fields
+
+
+def _batches(records, size):
+    """Columns (lists) of consecutive batches of size records"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield [list(column) for column in zip(*batch)]
+            batch = []
+    if batch:
+        yield [list(column) for column in zip(*batch)]
+
+
+def _encode(claim_ids):
+    return np.array([claim_id.encode() for claim_id in claim_ids], dtype=np.bytes_)
+
+
+class GroupCodes:
+    """Dense integer codes of group keys (NPIs, dates), assigned in order of appearance"""
+
+    def __init__(self):
+        self.codes = {}
+        self.keys = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def encode(self, keys):
+        """Codes of keys, adding new keys"""
+        codes = self.codes
+        array = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            code = codes.get(key)
+            if code is None:
+                code = codes[key] = len(self.keys)
+                self.keys.append(key)
+            array[i] = code
+        return array
+
+    def lookup(self, keys):
+        """Codes of keys, -1 for keys never added"""
+        return np.fromiter((self.codes.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+
+
+class GroupTotals:
+    """
+    GROUP_COLUMNS sums per group, accumulated batch by batch with bincount
+
+    Args:
+        codes: GroupCodes of the group keys
+    """
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.sums = {column: np.zeros(0, dtype=np.int64) for column in GROUP_COLUMNS}
+
+    def add(self, group_codes, **values):
+        """Add values (int arrays aligned with group_codes, or None to count) to their groups"""
+        size = len(self.codes)
+        for column, column_values in values.items():
+            sums = self.sums[column]
+            if len(sums) < size:
+                sums = self.sums[column] = np.concatenate([sums, np.zeros(size - len(sums), dtype=np.int64)])
+            if column_values is None:
+                sums += np.bincount(group_codes, minlength=size)
+            else:
+                # Float64 weights are exact for totals below 2**53 cents
+                sums += np.rint(np.bincount(group_codes, weights=column_values, minlength=size)).astype(np.int64)
+
+    def rows(self, key_name, format_key=str):
+        """One dict per group, amounts formatted as decimal strings"""
+        size = len(self.codes)
+        columns = {}
+        for column, sums in self.sums.items():
+            sums = np.concatenate([sums, np.zeros(size - len(sums), dtype=np.int64)]).tolist()
+            columns[column] = [format_cents(value) for value in sums] if column in AMOUNT_COLUMNS else sums
+        return [
+            {key_name: format_key(key), **{column: values[code] for column, values in columns.items()}}
+            for code, key in enumerate(self.codes.keys)
+        ]
+
+
+class ClaimIndex:
+    """
+    837 claims as sorted NumPy arrays, for matching payments to claims
+
+    A claim ID that appears more than once keeps its last submission;
+    replaced holds the 837 record positions of the earlier ones.
+    """
+
+    def __init__(self, hashes, claim_ids, billed, providers, days):
+        order = np.argsort(hashes, kind='stable')
+        sorted_hashes = hashes[order]
+        # The last of each run of equal hashes is the latest submission
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = sorted_hashes[1:] != sorted_hashes[:-1]
+        self.replaced = np.sort(order[~last])
+        self.replaced_ids = claim_ids[self.replaced]
+        keep = order[last]
+        self.hashes = sorted_hashes[last]
+        self.positions = keep
+        self.claim_ids = claim_ids[keep]
+        self.billed = billed[keep]
+        self.providers = providers[keep]
+        self.days = days[keep]
+        self.payments = np.zeros(len(keep), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def find(self, hashes, claim_ids):
+        """Index of each claim ID in the index, -1 where it is not there"""
+        if not len(self.hashes):
+            return np.full(len(hashes), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        matched = (self.hashes[found] == hashes) & (self.claim_ids[found] == claim_ids)
+        return np.where(matched, found, -1)
+
+    def count_payments(self, found):
+        """
+        Record payments of the claims at found (>= 0); returns a mask of the
+        ones that are a second or later payment of their claim
+        """
+        matched = np.flatnonzero(found >= 0)
+        claims = found[matched]
+        # Rank of each payment among this batch's payments of the same claim
+        order = np.argsort(claims, kind='stable')
+        ordered = claims[order]
+        starts = np.ones(len(ordered), dtype=bool)
+        starts[1:] = ordered[1:] != ordered[:-1]
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(ordered)), 0))
+        rank = np.empty(len(ordered), dtype=np.int64)
+        rank[order] = np.arange(len(ordered)) - first
+        duplicate = np.zeros(len(found), dtype=bool)
+        duplicate[matched] = self.payments[claims] + rank > 0
+        np.add.at(self.payments, claims, 1)
+        return duplicate
+
+
+def _expected_actual(issue_type, i, claim_billed, billed, paid, patient, allowed, claim_providers, npis, providers):
+    """Report values of one payment discrepancy"""
+    if issue_type == 'billed_mismatch':
+        return format_cents(claim_billed[i]), format_cents(billed[i])
+    if issue_type == 'paid_exceeds_billed':
+        return format_cents(claim_billed[i]), format_cents(paid[i])
+    if issue_type == 'allowed_mismatch':
+        return format_cents(paid[i] + patient[i]), format_cents(allowed[i])
+    if issue_type == 'provider_mismatch':
+        return providers.keys[claim_providers[i]], npis[i]
+    return '', ''
+
+
+def _write_groups(path, key_name, rows):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, [key_name] + GROUP_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _index_claims(claim_file, providers, days, batch_records, parser):
+    """Read the 837 into a ClaimIndex; returns (index, records read)"""
+    if detect_format(expand_input_paths(claim_file)[0]) == 'x12':
+        records = _x12_claims(claim_file, parser)
+    else:
+        records = _csv_rows(claim_file, '837')
+    columns = {name: [] for name in ('hashes', 'claim_ids', 'billed', 'providers', 'days')}
+    total = 0
+    for claim_ids, billed, npis, service_dates in _batches(records, batch_records):
+        total += len(claim_ids)
+        columns['hashes'].append(key_hashes(claim_ids))
+        columns['claim_ids'].append(_encode(claim_ids))
+        columns['billed'].append(_cents(billed))
+        columns['providers'].append(providers.encode(npis))
+        columns['days'].append(days.encode(service_dates))
+    if not total:
+        empty = {'claim_ids': np.bytes_}
+        arrays = {name: np.zeros(0, dtype=empty.get(name, np.int64)) for name in columns}
+    else:
+        arrays = {name: np.concatenate(chunks) for name, chunks in columns.items()}
+    return ClaimIndex(**arrays), total
+
+
+def reconcile(claim_file, payment_file, report_file=None, provider_file=None, daily_file=None,
+              batch_records=None, parser=None):
+    """
+    Reconcile an 835 with the 837 it pays
+
+    Args:
+        claim_file: 837 file (path, glob or list; X12 or CSV, optionally compressed)
+        payment_file: 835 file
+        report_file: Discrepancy report to write, one CSV row per discrepancy
+                     (transaction_type, record, claim_id, issue_type, expected, actual);
+                     for bpr_mismatch, record is the set's first payment and
+                     claim_id its ST control number
+        provider_file: Per-provider totals to write as CSV (provider_npi, GROUP_COLUMNS)
+        daily_file: Per-day totals to write as CSV (service_date, GROUP_COLUMNS)
+        batch_records: Payments matched per batch (default: VALIDATOR_BATCH_RECORDS)
+        parser: EDIParser supplying the X12 delimiters
+
+    Returns:
+        Dict with claims, payments, matched_payments and unpaid_claims
+        counts, totals (amounts over the whole pair), discrepancies (count
+        per type), unchecked (types the format cannot express), by_provider
+        and by_day (the group rows) and the files written
+    """
+    batch_records = batch_records or VALIDATOR_BATCH_RECORDS
+    providers, days = GroupCodes(), GroupCodes()
+    by_provider, by_day = GroupTotals(providers), GroupTotals(days)
+    index, claims = _index_claims(claim_file, providers, days, batch_records, parser)
+
+    discrepancies = dict.fromkeys(DISCREPANCY_TYPES, 0)
+    totals = dict.fromkeys(sorted(AMOUNT_COLUMNS - {'billed_amount'}), 0)
+    report = writer = None
+    if report_file:
+        report_dir = os.path.dirname(report_file)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        report = open(report_file, 'w', newline='')
+        writer = csv.writer(report)
+        writer.writerow(REPORT_COLUMNS)
+
+    x12 = detect_format(expand_input_paths(payment_file)[0]) == 'x12'
+    sets = []
+    set_paid = np.zeros(0, dtype=np.int64)
+    set_first = {}
+    payments = matched_payments = 0
+    try:
+        discrepancies['duplicate_claim'] = len(index.replaced)
+        if writer is not None:
+            writer.writerows(
+                ('837', position, claim_id.decode(), 'duplicate_claim', '', '')
+                for position, claim_id in zip(index.replaced.tolist(), index.replaced_ids.tolist())
+            )
+
+        records = _x12_payments(payment_file, sets, parser) if x12 else _csv_rows(payment_file, '835')
+        for columns in _batches(records, batch_records):
+            claim_ids, billed, paid, patient, allowed, npis, service_dates = columns[:7]
+            size = len(claim_ids)
+            offset = payments
+            payments += size
+            billed, paid, patient, allowed = _cents(billed), _cents(paid), _cents(patient), _cents(allowed)
+            found = index.find(key_hashes(claim_ids), _encode(claim_ids))
+            matched = found >= 0
+            claim = np.where(matched, found, 0)
+            matched_payments += int(matched.sum())
+
+            claim_billed = index.billed[claim] if len(index) else np.zeros(size, dtype=np.int64)
+            claim_providers = index.providers[claim] if len(index) else np.zeros(size, dtype=np.int64)
+            payee_providers = providers.lookup(npis)
+            masks = {
+                'orphan_payment': ~matched,
+                'duplicate_payment': index.count_payments(found),
+                'billed_mismatch': matched & (billed != claim_billed),
+                'paid_exceeds_billed': matched & (paid > claim_billed),
+                'allowed_mismatch': allowed != paid + patient,
+                'provider_mismatch': matched & (payee_providers != claim_providers),
+            }
+
+            # Payments count in their claim's groups; orphans in their own
+            provider_codes = claim_providers.copy()
+            day_codes = index.days[claim] if len(index) else np.zeros(size, dtype=np.int64)
+            orphans = np.flatnonzero(~matched)
+            if len(orphans):
+                provider_codes[orphans] = providers.encode([npis[i] for i in orphans.tolist()])
+                day_codes[orphans] = days.encode([service_dates[i] for i in orphans.tolist()])
+            stacked = np.vstack([masks[name] for name in PAYMENT_DISCREPANCIES])
+            values = {
+                'payments': None, 'payment_billed_amount': billed, 'paid_amount': paid,
+                'allowed_amount': allowed, 'patient_responsibility': patient,
+                'discrepancies': stacked.sum(axis=0),
+            }
+            by_provider.add(provider_codes, **values)
+            by_day.add(day_codes, **values)
+            for name, count in zip(PAYMENT_DISCREPANCIES, stacked.sum(axis=1).tolist()):
+                discrepancies[name] += count
+            totals['payment_billed_amount'] += int(billed.sum())
+            totals['paid_amount'] += int(paid.sum())
+            totals['allowed_amount'] += int(allowed.sum())
+            totals['patient_responsibility'] += int(patient.sum())
+
+            if x12:
+                set_numbers = np.asarray(columns[7], dtype=np.int64)
+                if len(set_paid) <= set_numbers[-1]:
+                    set_paid = np.concatenate([set_paid, np.zeros(set_numbers[-1] + 1 - len(set_paid), np.int64)])
+                np.add.at(set_paid, set_numbers, paid)
+                for set_number, position in zip(*np.unique(set_numbers, return_index=True)):
+                    set_first.setdefault(int(set_number), offset + int(position))
+
+            if writer is not None:
+                positions, kinds = np.nonzero(stacked.T)
+                writer.writerows(
+                    ('835', offset + i, claim_ids[i], PAYMENT_DISCREPANCIES[kind],
+                     *_expected_actual(PAYMENT_DISCREPANCIES[kind], i, claim_billed, billed, paid, patient,
+                                       allowed, claim_providers, npis, providers))
+                    for i, kind in zip(positions.tolist(), kinds.tolist())
+                )
+
+        for set_number, (control_number, total) in enumerate(sets):
+            paid_total = int(set_paid[set_number]) if set_number < len(set_paid) else 0
+            bpr_total = int(_cents([total])[0])
+            if bpr_total != paid_total:
+                discrepancies['bpr_mismatch'] += 1
+                if writer is not None:
+                    writer.writerow(('835', set_first.get(set_number, ''), control_number, 'bpr_mismatch',
+                                     format_cents(paid_total), format_cents(bpr_total)))
+    finally:
+        if report is not None:
+            report.close()
+
+    # Claim-side columns, over the whole index at once
+    unpaid = index.payments == 0
+    for group_totals, codes in ((by_provider, index.providers), (by_day, index.days)):
+        group_totals.add(codes, claims=None, unpaid_claims=unpaid.astype(np.int64), billed_amount=index.billed)
+
+    unchecked = [] if x12 else ['bpr_mismatch']
+    provider_rows = by_provider.rows('provider_npi')
+    day_rows = sorted(by_day.rows('service_date', _iso_date), key=lambda row: row['service_date'])
+    for path, key_name, rows in ((provider_file, 'provider_npi', provider_rows),
+                                 (daily_file, 'service_date', day_rows)):
+        if path:
+            _write_groups(path, key_name, rows)
+    return {
+        'claims': claims,
+        'payments': payments,
+        'matched_payments': matched_payments,
+        'unpaid_claims': int(unpaid.sum()),
+        'totals': {
+            'billed_amount': format_cents(int(index.billed.sum())),
+            **{name: format_cents(cents) for name, cents in totals.items()},
+        },
+        'discrepancies': {name: count for name, count in discrepancies.items() if name not in unchecked},
+        'unchecked': unchecked,
+        'by_provider': provider_rows,
+        'by_day': day_rows,
+        'report_file': report_file if report is not None else None,
+        'provider_file': provider_file,
+        'daily_file': daily_file,
+    }
@@ -0,0 +1,530 @@
+"""
+Counter-based random-access record generation
+
+The sequential generators draw every record from shared random state, so
+reproducing claim #7,345,112 means regenerating every claim before it. A
+RecordSpace instead derives each member, provider, claim and payment from
+(seed, entity type, index) alone. The index selects the counter of a
+Philox bit generator keyed by the seed and entity type, and the record's
+Python, Faker and mimesis draws are all seeded from that stream. Any record
+or range can then be regenerated in O(1) on any worker, ranges written in
+parallel hold exactly the records of a serial run, and the population is
+never materialized: only recently derived members and providers are kept.
+
+IDs are keyed permutations of the index, so they are unique without a
+registry of issued IDs. Payments pick distinct claims through another
+permutation, and invalid records are placed by a third, at exactly
+round(records * invalid_rate) per transaction type.
+"""
+
+import json
+import random
+import string
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from src.edi.enrollment import (
+    ACTION_CODES, COVERAGE_STATUS_CODES, COVERAGE_STATUS_WEIGHTS, EFFECTIVE_DATE_WINDOW_DAYS, MEDICARE_PLAN_RATE,
+    MEDICARE_PLANS, TERMINATION_DATE_WINDOW_DAYS, TERMINATION_REASON_MAP, TERMINATION_REASONS, TRANSACTION_TYPES
+)
+from src.edi.generator import (
+    HEALTH_PLANS, Enrollment, Member, Provider, _claim_record, _draw_claim_details, _resolve_risk_config,
+    segment_cache
+)
+from src.edi.invalid_data import InvalidDataPlanner, corrupt_834, corrupt_835, corrupt_837
+from src.edi.remittance import compute_remittance, format_cents
+from src.edi.seeding import child_sequence
+from src.edi.x12 import format_amount
+
+# Digits after the ID prefix; a space holds at most 10**digits of each entity
+ID_DIGITS = {'SUB': 8, 'ENR': 8, 'PROV': 8, 'CLM': 10}
+
+# Record counts by transaction type are those of this entity
+TRANSACTION_ENTITIES = {'834': 'member', '837': 'claim', '835': 'payment'}
+
+# Member ages in years, like fake.date_of_birth(minimum_age=18, maximum_age=90)
+MEMBER_AGE_RANGE = (18, 90)
+PROVIDER_CONTRACT_WINDOW_DAYS = 730
+DEFAULT_CACHE_SIZE = 4096
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value):
+    """SplitMix64 finalizer: a fast bijective scramble of a 64-bit integer"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _digits(rand, length):
+    return ''.join(rand.choices(string.digits, k=length))
+
+
+class IndexPermutation:
+    """
+    Keyed pseudo-random bijection of range(size)
+
+    A four-round Feistel network over the smallest even number of bits that
+    covers size, cycle-walked back into range. Both directions take O(1)
+    expected time (under four walks on average).
+
+    Args:
+        size: Number of indices permuted
+        seed_sequence: numpy.random.SeedSequence the round keys are drawn from
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size, seed_sequence):
+        self.size = size
+        self._half_bits = max(1, (max(size - 1, 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half_bits) - 1
+        self._keys = [int(k) for k in seed_sequence.generate_state(self.ROUNDS, np.uint64)]
+
+    def _forward(self, value):
+        left, right = value >> self._half_bits, value & self._mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix64(right ^ key) & self._mask)
+        return (left << self._half_bits) | right
+
+    def _backward(self, value):
+        left, right = value >> self._half_bits, value & self._mask
+        for key in reversed(self._keys):
+            left, right = right ^ (_mix64(left ^ key) & self._mask), left
+        return (left << self._half_bits) | right
+
+    def __call__(self, index):
+        value = self._forward(index)
+        while value >= self.size:
+            value = self._forward(value)
+        return value
+
+    def inverse(self, value):
+        """The index mapped to value"""
+        index = self._backward(value)
+        while index >= self.size:
+            index = self._backward(index)
+        return index
+
+
+class IssuePlan:
+    """
+    Which records of a transaction type are invalid, and with which issue
+
+    The InvalidDataPlanner quota of each issue type is a contiguous block of
+    ranks; a record's rank is its keyed permutation, so issues are spread
+    over the records at random and looked up in O(1).
+    """
+
+    def __init__(self, transaction_type, size, invalid_rate, weights, seed_sequence):
+        quota = InvalidDataPlanner(transaction_type, invalid_rate, weights).quota(size)
+        self.issue_types = list(quota)
+        self.quota = quota
+        self._bounds = np.cumsum(list(quota.values())).tolist()
+        self.invalid_records = self._bounds[-1]
+        self.permutation = IndexPermutation(size, seed_sequence)
+
+    def issue(self, index):
+        """Issue type of record index, None if it is valid"""
+        rank = self.permutation(index)
+        if rank >= self.invalid_records:
+            return None
+        return self.issue_types[bisect_right(self._bounds, rank)]
+
+    def ranks(self, issue_type):
+        """(first, stop) ranks of the records given issue_type"""
+        stop = self._bounds[self.issue_types.index(issue_type)]
+        return stop - self.quota[issue_type], stop
+
+
+class RecordSpace:
+    """
+    A virtual population of members, providers, claims and payments
+
+    Every record is a pure function of the constructor arguments and its
+    index, so equal spaces built on different workers derive equal records.
+
+    Args:
+        seed: Non-negative integer keying every stream
+        num_members: Members, each with one enrollment (at most 10**8)
+        num_claims: Claims, each of a uniformly drawn member and provider
+                    (default: 3 per member; at most 10**10)
+        num_payments: Payments, each of a distinct claim not billed a
+                      negative amount (default: none)
+        num_providers: Providers the claims are drawn from
+        as_of: Reference date for drawn dates and the envelope timestamps
+               (default: today; pass it to reproduce output on another day)
+        risk_profile: Claim risk profile, as for generate_edi_837
+        custom_distribution: Risk profile overrides, as for generate_edi_837
+        invalid_rates: Dict of invalid_rate by transaction type, e.g. {"837": 0.05}
+        invalid_weights: Dict of issue type weights by transaction type
+        cache_size: Derived members and providers kept for reuse by claims
+    """
+
+    def __init__(self, seed, num_members, num_claims=None, num_payments=0, num_providers=100, as_of=None,
+                 risk_profile="balanced", custom_distribution=None, invalid_rates=None, invalid_weights=None,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        if num_claims is None:
+            num_claims = num_members * 3
+        if not 0 < num_members <= 10 ** ID_DIGITS['SUB']:
+            raise ValueError(f"num_members must be between 1 and {10 ** ID_DIGITS['SUB']}, got {num_members}")
+        if not 0 < num_providers <= 10 ** ID_DIGITS['PROV']:
+            raise ValueError(f"num_providers must be between 1 and {10 ** ID_DIGITS['PROV']}, got {num_providers}")
+        if not 0 <= num_claims <= 10 ** ID_DIGITS['CLM']:
+            raise ValueError(f"num_claims must be between 0 and {10 ** ID_DIGITS['CLM']}, got {num_claims}")
+
+        self.seed = seed
+        self.num_members = num_members
+        self.num_providers = num_providers
+        self.num_claims = num_claims
+        self.as_of = as_of or date.today()
+        self.current_date = datetime.combine(self.as_of, time())
+        # Everything the records depend on, e.g. to key cached output
+        self.params = {
+            'seed': seed, 'num_members': num_members, 'num_claims': num_claims, 'num_payments': num_payments,
+            'num_providers': num_providers, 'as_of': self.as_of.isoformat(), 'risk_profile': risk_profile,
+            'custom_distribution': custom_distribution, 'invalid_rates': invalid_rates,
+            'invalid_weights': invalid_weights,
+        }
+        self.risk_config = _resolve_risk_config(risk_profile, custom_distribution)
+        self._keys = {}
+
+        invalid_rates = invalid_rates or {}
+        invalid_weights = invalid_weights or {}
+        sizes = {'834': num_members, '837': num_claims}
+        self.issue_plans = {
+            transaction_type: IssuePlan(
+                transaction_type, size, invalid_rates.get(transaction_type, 0.0),
+                invalid_weights.get(transaction_type), child_sequence(seed, 'invalid', transaction_type)
+            )
+            for transaction_type, size in sizes.items()
+        }
+
+        # A rejected claim (billed a negative amount) is not paid
+        self._rejected_ranks = self.issue_plans['837'].ranks('negative_amount')
+        payable = num_claims - (self._rejected_ranks[1] - self._rejected_ranks[0])
+        if not 0 <= num_payments <= payable:
+            raise ValueError(f"num_payments must be between 0 and the {payable} payable claims, got {num_payments}")
+        self.num_payments = num_payments
+        self.issue_plans['835'] = IssuePlan(
+            '835', num_payments, invalid_rates.get('835', 0.0), invalid_weights.get('835'),
+            child_sequence(seed, 'invalid', '835')
+        )
+
+        self._ids = {
+            prefix: IndexPermutation(10 ** digits, child_sequence(seed, 'id', prefix))
+            for prefix, digits in ID_DIGITS.items()
+        }
+        self._paid_claims = IndexPermutation(payable, child_sequence(seed, 'paid_claims'))
+
+        # Faker and mimesis draw from one Random, reseeded for each member or provider
+        from faker import Faker
+        from mimesis import Address, Person
+        from mimesis.random import Random
+        self._text_random = Random()
+        self._fake = Faker('en_US')
+        self._person = Person('en')
+        self._address = Address('en')
+        for engine in (self._fake, self._person, self._address):
+            engine.random = self._text_random
+
+        self.member = lru_cache(maxsize=cache_size)(self._derive_member)
+        self.provider = lru_cache(maxsize=cache_size)(self._derive_provider)
+
+    def count(self, transaction_type):
+        """Number of records of a transaction type"""
+        return getattr(self, f"num_{TRANSACTION_ENTITIES[transaction_type]}s")
+
+    def issue(self, transaction_type, index):
+        """Planned issue type of a record, None if it is valid"""
+        return self.issue_plans[transaction_type].issue(index)
+
+    def _stream(self, name, index):
+        """
+        Philox bit generator for record index of a named stream
+
+        The index is the high word of the 256-bit counter, so each record
+        owns 2**64 blocks that no other record's stream reaches.
+        """
+        key = self._keys.get(name)
+        if key is None:
+            key = self._keys[name] = child_sequence(self.seed, 'stream', name).generate_state(2, np.uint64)
+        return np.random.Philox(counter=index << 64, key=key)
+
+    def _random(self, name, index, rand=None):
+        """Seed rand (default: a new random.Random) from a record's stream; returns (rand, bit generator)"""
+        bitgen = self._stream(name, index)
+        seed = int(bitgen.random_raw())
+        if rand is None:
+            rand = random.Random(seed)
+        else:
+            rand.seed(seed)
+        return rand, bitgen
+
+    def _id(self, prefix, index):
+        return f"{prefix}{self._ids[prefix](index):0{ID_DIGITS[prefix]}d}"
+
+    def _check_index(self, transaction_type, index):
+        if not 0 <= index < self.count(transaction_type):
+            raise IndexError(f"EDI {transaction_type} record {index} is outside the space "
+                             f"of {self.count(transaction_type)}")
+
+    def _days_before(self, rand, window_days):
+        return self.as_of - timedelta(days=rand.randint(0, window_days))
+
+    def _derive_member(self, index):
+        """Member, enrollment and medicare plan number index, with its planned issue applied"""
+        self._check_index('834', index)
+        rand, bitgen = self._random('member', index, self._text_random)
+        person, address = self._person, self._address
+
+        status = rand.choices(COVERAGE_STATUS_CODES, weights=COVERAGE_STATUS_WEIGHTS)[0]
+        reason = end_date = None
+        if status == 'T':
+            reason = rand.choice(TERMINATION_REASONS)
+            end_date = self._days_before(rand, TERMINATION_DATE_WINDOW_DAYS)
+        medicare_plan = rand.choice(MEDICARE_PLANS) if rand.random() < MEDICARE_PLAN_RATE else None
+        plan = rand.choice(HEALTH_PLANS)
+        start_date = self._days_before(rand, EFFECTIVE_DATE_WINDOW_DAYS)
+        if end_date is not None:
+            # Coverage cannot end before it starts
+            end_date = max(end_date, start_date)
+
+        min_age, max_age = MEMBER_AGE_RANGE
+        member = Member.from_fields(
+            id=self._id("SUB", index),
+            last_name=person.last_name(),
+            first_name=person.first_name(),
+            gender=rand.choice(['M', 'F']),
+            dob=self.as_of - timedelta(days=rand.randint(min_age * 365, (max_age + 1) * 365 - 1)),
+            phone=person.telephone(),
+            email=person.email(),
+            street=address.address(),
+            city=address.city(),
+            state=address.state(abbr=True),
+            zip_code=address.zip_code(),
+            ssn=self._fake.ssn(),
+            policy_num="POL" + _digits(rand, 8),
+            plan=plan,
+            status_info=(status, reason, end_date),
+        )
+        enrollment = Enrollment.from_fields(
+            id=self._id("ENR", index),
+            member_id=member.id,
+            plan_id=plan["id"],
+            sponsor_id="SPON" + _digits(rand, 6),
+            start_date=start_date,
+            end_date=end_date,
+            status='TERMINATED' if status == 'T' else 'ACTIVE',
+            termination_reason=TERMINATION_REASON_MAP.get(reason, reason),
+            relationship_code='18',  # Self
+            transaction_type=rand.choice(TRANSACTION_TYPES),
+            action_code=rand.choice(ACTION_CODES),
+            insurance_line='HLT',
+        )
+
+        record = (member, enrollment, medicare_plan)
+        issue_type = self.issue('834', index)
+        if issue_type is not None:
+            corrupt_834([record], [issue_type], np.random.Generator(bitgen), today=self.as_of)
+        return record
+
+    def _derive_provider(self, index):
+        """Provider number index"""
+        if not 0 <= index < self.num_providers:
+            raise IndexError(f"Provider {index} is outside the space of {self.num_providers}")
+        rand, _ = self._random('provider', index, self._text_random)
+        person, fake = self._person, self._fake
+        last_name = person.last_name()
+        return Provider.from_fields(
+            id=self._id("PROV", index),
+            last_name=last_name,
+            first_name=person.first_name(),
+            npi=_digits(rand, 10),
+            tax_id="TAX" + _digits(rand, 9),
+            street=fake.street_address(),
+            city=fake.city(),
+            state=fake.state_abbr(),
+            zip=fake.zipcode(),
+            taxonomy=rand.choice(["207Q00000X", "207R00000X", "208D00000X"]),
+            specialty=rand.choice(["Cardiology", "Pediatrics", "Internal Medicine", "Family Practice"]),
+            phone=person.telephone(),
+            email=person.email(),
+            is_in_network=rand.choice([True, False]),
+            doing_business_as=f"{last_name} {rand.choice(['Medical Group', 'Clinic', 'Specialists'])}",
+            contracts=json.dumps({
+                "contract_type": rand.choice(["STANDARD", "PREFERRED", "CAPITATED"]),
+                "effective_date": self._days_before(rand, PROVIDER_CONTRACT_WINDOW_DAYS).strftime('%Y-%m-%d')
+            }),
+        )
+
+    def enrollment_record(self, index):
+        """EDI 834 record number index (see src/edi/sinks.py)"""
+        member, enrollment, medicare_plan = self.member(index)
+        issue_type = self.issue('834', index)
+        return {
+            'member': member,
+            'enrollment': enrollment,
+            'medicare_plan': medicare_plan,
+            'status_info': member.status_info,
+            'member_block': segment_cache.member_block(member),
+            'is_invalid': issue_type is not None,
+            'issue_type': issue_type,
+        }
+
+    def _claim_draws(self, index):
+        """The draws of claim index: member and provider index, claim details and its bit generator"""
+        self._check_index('837', index)
+        rand, bitgen = self._random('claim', index)
+        member_index = rand.randrange(self.num_members)
+        provider_index = rand.randrange(self.num_providers)
+        details = _draw_claim_details(self.risk_config, rand)
+        # Where the service date falls in the enrollment period, drawn before the member is known
+        service_position = rand.random()
+        return member_index, provider_index, details, service_position, bitgen
+
+    def _corrupt_claim(self, record, index, bitgen):
+        issue_type = self.issue('837', index)
+        if issue_type is not None:
+            corrupt_837([record], [issue_type], np.random.Generator(bitgen), today=self.as_of)
+
+    def claim_record(self, index):
+        """EDI 837 record number index (see src/edi/sinks.py)"""
+        member_index, provider_index, details, service_position, bitgen = self._claim_draws(index)
+        member, enrollment, _ = self.member(member_index)
+        provider = self.provider(provider_index)
+
+        # Service date within the enrollment period
+        last_date = self.as_of
+        if enrollment.end_date and enrollment.start_date < enrollment.end_date < last_date:
+            last_date = enrollment.end_date
+        service_date = self.as_of
+        if enrollment.start_date < last_date:
+            days = (last_date - enrollment.start_date).days
+            service_date = enrollment.start_date + timedelta(days=int(service_position * (days + 1)))
+
+        record = _claim_record(self._id("CLM", index), member, provider, enrollment, service_date, details)
+        self._corrupt_claim(record, index, bitgen)
+        return record
+
+    def _billed_amount(self, index):
+        """Billed amount of claim index as written, without deriving its member and provider"""
+        _, _, details, _, bitgen = self._claim_draws(index)
+        record = {
+            'claim_data': {'billed_amount': details['billed_amount'], 'service_date': None},
+            'service_lines': details['service_lines'],
+            'diagnosis_codes': details['diagnosis_codes'],
+            'provider_npi': None,
+        }
+        self._corrupt_claim(record, index, bitgen)
+        return record['claim_data']['billed_amount']
+
+    def paid_claim(self, index):
+        """Index of the claim paid by payment index"""
+        self._check_index('835', index)
+        rank = self._paid_claims(index)
+        first, stop = self._rejected_ranks
+        if rank >= first:
+            rank += stop - first
+        return self.issue_plans['837'].permutation.inverse(rank)
+
+    def _remittance(self, index, billed_amount, claim_id):
+        """Remittance amounts of payment index, with its planned issue applied"""
+        rng = np.random.Generator(self._stream('payment', index))
+        remit = compute_remittance([billed_amount], rng)
+        claim_ids = [claim_id]
+        issue_type = self.issue('835', index)
+        if issue_type is not None:
+            corrupt_835(remit, claim_ids, [issue_type], rng)
+        return remit, claim_ids[0], issue_type
+
+    def payment_record(self, index):
+        """EDI 835 record number index (see src/edi/sinks.py)"""
+        claim = self.claim_record(self.paid_claim(index))
+        claim_data = claim['claim_data']
+        remit, claim_id, issue_type = self._remittance(index, claim_data['billed_amount'], claim_data['id'])
+        amounts = {
+            name: format_cents(remit[f"{name}_cents"][0])
+            for name in ('billed', 'paid', 'patient_responsibility', 'allowed', 'adjustment')
+        }
+        claim_data['paid_amount'] = float(amounts['paid'])
+        claim_data['allowed_amount'] = float(amounts['allowed'])
+        return {
+            'claim_data': claim_data,
+            'member': claim['member'],
+            'payment_id': f"PAY{self.as_of:%Y%m%d}{index:010d}",
+            'claim_id': claim_id,
+            'provider_block': claim['provider_block'],
+            'member_block': claim['member_block'],
+            'claim_status': str(remit['claim_status'][0]),
+            'claim_code': str(remit['claim_code'][0]),
+            'billed_amount': amounts['billed'],
+            'paid_amount': amounts['paid'],
+            'patient_responsibility': amounts['patient_responsibility'],
+            'allowed_amount': amounts['allowed'],
+            'adjustment_code': str(remit['adjustment_code'][0]),
+            'adjustment_amount': amounts['adjustment'],
+            'procedure_code': str(remit['procedure_code'][0]),
+            'is_invalid': issue_type is not None,
+            'issue_type': issue_type,
+        }
+
+    def records(self, transaction_type, start=0, stop=None):
+        """Yield the sink records of a transaction type with indices in [start, stop)"""
+        derive = {'834': self.enrollment_record, '837': self.claim_record, '835': self.payment_record}
+        derive = derive[transaction_type]
+        for index in range(start, self.count(transaction_type) if stop is None else stop):
+            yield derive(index)
+
+    def header(self, transaction_type, start=0, stop=None):
+        """
+        Sink header for the records of a transaction type in [start, stop)
+
+        Everything but the ISA control number (which differs between
+        ranges) and the 835 BPR total is the same for every range. The 835
+        provider balance adjustment goes with the range holding payment 0.
+        """
+        if stop is None:
+            stop = self.count(transaction_type)
+        rand, _ = self._random(f"header_{transaction_type}", 0)
+        interchange, _ = self._random(f"interchange_{transaction_type}", start)
+        header = {
+            'current_date': self.current_date,
+            'isa_control_num': _digits(interchange, 9),
+            'reference': "REF" + _digits(rand, 9),
+        }
+        if transaction_type == '834':
+            header.update({
+                'action_code': rand.choice(["2", "4"]),
+                'sponsor_tax_id': "TAX" + _digits(rand, 9),
+                'payer_tax_id': "TAX" + _digits(rand, 9),
+            })
+        elif transaction_type == '837':
+            header.update({'submitter_id': self.provider(0).id, 'payer_id': "PAYER123"})
+        else:
+            total_paid_cents = 0
+            for index in range(start, stop):
+                claim_index = self.paid_claim(index)
+                claim_id = self._id("CLM", claim_index)
+                remit, _, _ = self._remittance(index, self._billed_amount(claim_index), claim_id)
+                total_paid_cents += remit['total_paid_cents']
+            header.update({
+                'total_paid': format_cents(total_paid_cents),
+                'check_number': "CHK" + _digits(rand, 6),
+                'account_number': _digits(rand, 10),
+                'routing_number': _digits(rand, 9),
+                'payer_id': "PAYER" + _digits(rand, 6),
+                'payer_tax_id': "TAX" + _digits(rand, 9),
+                'provider_adjustment': None,
+            })
+            # Provider balance adjustment (30% chance)
+            has_adjustment = rand.random() < 0.3
+            provider_index = rand.randrange(self.num_providers)
+            amount = format_amount(round(rand.uniform(100, 500), 2))
+            if has_adjustment and start == 0:
+                header['provider_adjustment'] = (self.provider(provider_index).id, amount)
+        return header
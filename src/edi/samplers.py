@@ -0,0 +1,177 @@
+"""
+Alias-table samplers compiled from risk profiles
+
+A risk profile (a RISK_PROFILES entry merged with custom_distribution) is
+compiled once per run into alias tables over diagnosis categories,
+procedure pools and places of service. Each table draws in O(1), either one
+value at a time from Python's random module or as a NumPy batch.
+"""
+
+import random
+
+import numpy as np
+
+DIAGNOSIS_CATEGORIES = ['chronic', 'acute', 'preventive']
+PROVIDER_TYPES = ['emergency', 'specialist', 'primary']
+ER_PROCEDURE_CODES = ["99281", "99282", "99283", "99284", "99285"]
+
+# Procedure pools drawn from, by service line complexity
+COMPLEXITY_POOLS = {
+    'high': ['high_complexity', 'medium_complexity'],
+    'low': ['low_complexity', 'medium_complexity'],
+    'medium': ['medium_complexity'],
+}
+
+
+class AliasSampler:
+    """
+    Walker/Vose alias table over a discrete distribution
+
+    Args:
+        values: Sequence of values to draw from
+        weights: Relative weights (default: uniform)
+    """
+
+    def __init__(self, values, weights=None):
+        values = list(values)
+        if not values:
+            raise ValueError("AliasSampler needs at least one value")
+        n = len(values)
+        if weights is None:
+            weights = [1.0] * n
+        if len(weights) != n:
+            raise ValueError("values and weights must have the same length")
+        total = float(sum(weights))
+        if total <= 0 or any(w < 0 for w in weights):
+            raise ValueError("weights must be non-negative and sum to a positive value")
+
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo = small.pop()
+            hi = large.pop()
+            prob[lo] = scaled[lo]
+            alias[lo] = hi
+            scaled[hi] = scaled[hi] + scaled[lo] - 1.0
+            if scaled[hi] < 1.0:
+                small.append(hi)
+            else:
+                large.append(hi)
+        # Leftovers are 1.0 up to rounding error
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.values = values
+        self._n = n
+        self._prob = prob
+        self._alias = alias
+        self._prob_array = np.asarray(prob, dtype=np.float64)
+        self._alias_array = np.asarray(alias, dtype=np.int64)
+        self._values_array = np.empty(n, dtype=object)
+        self._values_array[:] = values
+
+    def __len__(self):
+        return self._n
+
+    def sample_index(self, rand=random):
+        """Draw one index using Python's random module (or a random.Random instance)"""
+        u = rand.random() * self._n
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def sample(self, rand=random):
+        """Draw one value using Python's random module (or a random.Random instance)"""
+        return self.values[self.sample_index(rand)]
+
+    def sample_indices(self, size, rng):
+        """Draw `size` indices as an int64 array with a numpy.random.Generator"""
+        i = rng.integers(0, self._n, size=size)
+        return np.where(rng.random(size) < self._prob_array[i], i, self._alias_array[i])
+
+    def sample_n(self, size, rng):
+        """Draw `size` values as a NumPy object array with a numpy.random.Generator"""
+        return self._values_array[self.sample_indices(size, rng)]
+
+    def probabilities(self):
+        """Return the normalized probability of each value (for inspection and tests)"""
+        p = self._prob_array / self._n
+        out = p.copy()
+        np.add.at(out, self._alias_array, (1.0 - self._prob_array) / self._n)
+        return dict(zip(self.values, out.tolist()))
+
+
+class CompiledRiskProfile:
+    """
+    Reusable samplers for one risk configuration
+
+    Attributes:
+        diagnosis_category: Sampler over DIAGNOSIS_CATEGORIES
+        procedure: Sampler over the procedure pool for the profile's complexity
+        er_procedure: Uniform sampler over ER evaluation codes
+        place_of_service: Sampler over place of service codes, with the
+                          provider type weights folded in
+    """
+
+    def __init__(self, diagnosis_category, procedure, er_procedure, place_of_service):
+        self.diagnosis_category = diagnosis_category
+        self.procedure = procedure
+        self.er_procedure = er_procedure
+        self.place_of_service = place_of_service
+
+    def sample_procedure_codes(self, size, rng, is_er=None):
+        """Draw procedure codes for a batch; ER rows (bool array) use ER codes"""
+        codes = self.procedure.sample_n(size, rng)
+        if is_er is not None and np.any(is_er):
+            codes[is_er] = self.er_procedure.sample_n(int(np.sum(is_er)), rng)
+        return codes
+
+    def sample_places_of_service(self, size, rng, is_er=None):
+        """Draw place of service codes for a batch; ER rows (bool array) get '23'"""
+        codes = self.place_of_service.sample_n(size, rng)
+        if is_er is not None:
+            codes[np.asarray(is_er, dtype=bool)] = "23"
+        return codes
+
+
+def compile_risk_profile(risk_config, procedure_pools, place_of_service):
+    """
+    Compile a risk configuration into alias-table samplers
+
+    Args:
+        risk_config: RISK_PROFILES entry, optionally merged with custom_distribution
+        procedure_pools: PROCEDURE_POOLS mapping of pool name to codes
+        place_of_service: PLACE_OF_SERVICE mapping of provider type to codes
+
+    Returns:
+        CompiledRiskProfile
+    """
+    diagnosis_weights = risk_config['diagnosis_weights']
+    diagnosis_category = AliasSampler(
+        DIAGNOSIS_CATEGORIES,
+        [diagnosis_weights[c] for c in DIAGNOSIS_CATEGORIES]
+    )
+
+    # Uniform over the concatenated pools, like random.choice(pool_a + pool_b)
+    complexity = risk_config.get('service_line_complexity', 'medium')
+    pool = []
+    for pool_name in COMPLEXITY_POOLS.get(complexity, COMPLEXITY_POOLS['medium']):
+        pool.extend(procedure_pools[pool_name])
+    procedure = AliasSampler(pool)
+
+    # Provider type weight split evenly across that type's codes, merged by code
+    provider_types = risk_config['provider_types']
+    pos_weights = {}
+    for provider_type in PROVIDER_TYPES:
+        codes = place_of_service[provider_type]
+        for code in codes:
+            pos_weights[code] = pos_weights.get(code, 0.0) + provider_types[provider_type] / len(codes)
+
+    return CompiledRiskProfile(
+        diagnosis_category=diagnosis_category,
+        procedure=procedure,
+        er_procedure=AliasSampler(ER_PROCEDURE_CODES),
+        place_of_service=AliasSampler(list(pos_weights), list(pos_weights.values())),
+    )
@@ -0,0 +1,53 @@
+"""
+Child random streams of a run seed
+
+A seeded run draws from several sources: Python's random module, NumPy
+Generators, Faker and mimesis. Seeding them all with the same integer
+would correlate them. Instead, each source gets its own child of the run
+seed, named by a path such as ("837", "faker") or ("worker", 3). The
+children come from NumPy's SeedSequence with the path as the spawn key,
+so every path's stream is statistically independent of every other's
+and of the parent's. A worker given its own path (for example
+child_seed(seed, "worker", i)) can therefore draw in parallel without
+overlapping any other worker.
+"""
+
+import zlib
+
+import numpy as np
+
+
+def _spawn_key(path):
+    """Spawn key words for a path of strings and non-negative integers"""
+    return tuple(part if isinstance(part, int) else zlib.crc32(str(part).encode()) for part in path)
+
+
+def child_sequence(seed, *path):
+    """
+    SeedSequence of the child stream at path under seed
+
+    Args:
+        seed: Non-negative integer run seed
+        path: Strings or non-negative integers naming the stream
+
+    Returns:
+        numpy.random.SeedSequence
+    """
+    return np.random.SeedSequence(seed, spawn_key=_spawn_key(path))
+
+
+def child_seed(seed, *path):
+    """64-bit integer seed of the child stream at path, for random.Random, Faker or mimesis"""
+    return int(child_sequence(seed, *path).generate_state(1, np.uint64)[0])
+
+
+def child_generator(seed, *path):
+    """
+    NumPy Generator over the child stream at path
+
+    Returns:
+        numpy.random.Generator (a fresh unseeded one if seed is None)
+    """
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng(child_sequence(seed, *path))
@@ -0,0 +1,144 @@
+"""
+Pre-rendered segment blocks for providers and members
+
+A provider is written as the same PRV, NM1*85, REF*EI, N3 and N4 segments
+every time it is drawn for an 837 claim, and a member as the same NM1*IL
+and DMG segments for every claim and payment. SegmentBlockCache renders
+each entity's block once, in both X12 segment and CSV field form, and
+reuses it. The cache is a bounded LRU so very large provider or member
+populations do not grow it without limit.
+"""
+
+from collections import OrderedDict
+
+from src.edi.x12 import default_serializer, format_date
+
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def render_provider_block(provider, x12=default_serializer):
+    """
+    Render the segment block for a provider
+
+    Args:
+        provider: Provider instance
+        x12: X12Serializer supplying the segment templates
+
+    Returns:
+        Dict with:
+            'x12': 837 billing provider segments (PRV, NM1*85, REF*EI, N3, N4)
+            'x12_payee': 835 NM1*82 segment
+            'csv': provider_* CSV fields
+    """
+    return {
+        'x12': [
+            x12.render('PRV', provider.taxonomy),
+            x12.render('NM1_85', provider.last_name, provider.first_name, provider.npi),
+            x12.render('REF', 'EI', provider.tax_id),
+            x12.render('N3', provider.street),
+            x12.render('N4', provider.city, provider.state, provider.zip),
+        ],
+        'x12_payee': x12.render('NM1_82', provider.last_name, provider.first_name, provider.npi),
+        'csv': {
+            'provider_id': provider.id,
+            'provider_npi': provider.npi,
+            'provider_tax_id': provider.tax_id,
+            'provider_last_name': provider.last_name,
+            'provider_first_name': provider.first_name,
+            'provider_specialty': provider.specialty,
+            'provider_street': provider.street,
+            'provider_city': provider.city,
+            'provider_state': provider.state,
+            'provider_zip': provider.zip,
+        },
+    }
+
+
+def render_member_block(member, x12=default_serializer):
+    """
+    Render the segment block for a member
+
+    Args:
+        member: Member instance
+        x12: X12Serializer supplying the segment templates
+
+    Returns:
+        Dict with:
+            'x12': NM1*IL and DMG segments
+            'csv': member_* CSV fields
+    """
+    dob_csv = member.dob.strftime("%Y-%m-%d") if member.dob else ''
+    return {
+        'x12': [
+            x12.render('NM1_IL', member.last_name, member.first_name, member.id),
+            x12.render('DMG', format_date(member.dob), member.gender),
+        ],
+        'csv': {
+            'member_id': member.id,
+            'member_last_name': member.last_name,
+            'member_first_name': member.first_name,
+            'member_dob': dob_csv,
+            'member_gender': member.gender,
+        },
+    }
+
+
+class SegmentBlockCache:
+    """
+    Bounded LRU cache of rendered provider and member segment blocks
+
+    Entries are keyed by entity ID and remember the entity object, so a new
+    entity that happens to reuse an ID is rendered afresh.
+
+    Args:
+        max_entries: Maximum number of cached blocks (providers and members combined)
+        x12: X12Serializer used to render segments (default: configured delimiters)
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, x12=default_serializer):
+        self.max_entries = max_entries
+        self.x12 = x12
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, kind, entity, render):
+        key = (kind, entity.id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is entity:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        block = render(entity, self.x12)
+        self._entries[key] = (entity, block)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return block
+
+    def provider_block(self, provider):
+        """Return the rendered block for a provider"""
+        return self._get('provider', provider, render_provider_block)
+
+    def member_block(self, member):
+        """Return the rendered block for a member"""
+        return self._get('member', member, render_member_block)
+
+    def invalidate(self, entity):
+        """Drop any cached block for an entity (call after mutating it)"""
+        self._entries.pop(('provider', entity.id), None)
+        self._entries.pop(('member', entity.id), None)
+
+    def clear(self):
+        """Drop all cached blocks and reset statistics"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
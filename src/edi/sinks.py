@@ -0,0 +1,852 @@
+"""
+Output sinks for the EDI generators
+
+The generators draw each record once and hand it to every sink requested,
+so one pass can write X12 and CSV (or any registered format) describing
+the same members, claims and payments. A sink is opened with the
+transaction's header values, receives records in batches, and returns
+its result from close().
+
+Output is streamed through src/edi/compression.py, so a .gz/.bz2/.xz/.zst
+path (or an explicit codec) is compressed as it is written. Compressed
+sinks do not keep an in-memory copy of their output.
+
+Records are plain dicts built by src/edi/generator.py:
+    834: member, enrollment, medicare_plan, status_info, member_block,
+         is_invalid, issue_type
+    837: claim_data, provider, member, enrollment, provider_block,
+         member_block, provider_npi, is_er, claim_status, diagnosis_codes,
+         service_type, claim_modifier, service_lines, is_invalid, issue_type
+    835: claim_data, member, payment_id, claim_id, provider_block,
+         member_block, claim_status, claim_code, billed_amount, paid_amount,
+         patient_responsibility, allowed_amount, adjustment_code,
+         adjustment_amount, procedure_code, is_invalid, issue_type
+"""
+
+import csv
+import os
+
+from config.config import (
+    WRITE_INVALID_INDEX, WRITE_MANIFEST, X12_MAX_BYTES_PER_FILE, X12_MAX_RECORDS_PER_SET, X12_MAX_SETS_PER_GROUP,
+    X12_SUBSET_RECORDS_PER_SET
+)
+from src.edi.compression import (
+    codec_for_path, get_codec, open_output, open_text_output, split_compression_suffix
+)
+from src.edi.manifest import DigestWriter, InvalidRecordIndex, ManifestStats, manifest_entry, update_manifest
+from src.edi.x12 import (
+    X12Writer, default_serializer, format_amount, format_date, group_header, interchange_header,
+    set_control_number, transaction_set_header
+)
+
+CSV_HEADERS = {
+    '834': [
+        'member_id', 'subscriber_id', 'policy_number', 'ssn',
+        'last_name', 'first_name', 'middle_initial',
+        'date_of_birth', 'gender',
+        'street_address', 'city', 'state', 'zip_code', 'country',
+        'phone', 'email',
+        'coverage_status', 'medicare_plan',
+        'plan_id', 'plan_name', 'plan_type',
+        'effective_date', 'termination_date', 'termination_reason',
+        'relationship_code', 'transaction_type', 'action_code',
+        'sponsor_id', 'insurance_line', 'enrollment_id'
+    ],
+    '837': [
+        'claim_id', 'member_id', 'provider_id', 'provider_npi', 'provider_tax_id',
+        'provider_last_name', 'provider_first_name', 'provider_specialty',
+        'provider_street', 'provider_city', 'provider_state', 'provider_zip',
+        'member_last_name', 'member_first_name',
+        'member_dob', 'member_gender',
+        'service_date', 'billed_amount', 'claim_status', 'claim_frequency_code',
+        'claim_source_code', 'facility_type_code', 'location_type',
+        'procedure_code', 'procedure_description', 'diagnosis_codes',
+        'submission_date', 'enrollment_id'
+    ],
+    '835': [
+        'payment_id', 'claim_id', 'member_id', 'provider_id', 'provider_npi',
+        'member_last_name', 'member_first_name',
+        'billed_amount', 'paid_amount', 'allowed_amount', 'patient_responsibility',
+        'claim_status', 'claim_code', 'adjustment_code', 'adjustment_amount',
+        'procedure_code', 'service_date', 'adjudication_date',
+        'check_number', 'payment_date', 'payment_method',
+        'payer_id', 'transaction_reference'
+    ],
+}
+
+PROCEDURE_DESCRIPTIONS = {
+    '99213': 'Office/outpatient visit est',
+    '99214': 'Office/outpatient visit est',
+    '99203': 'Office/outpatient visit new',
+    '99204': 'Office/outpatient visit new',
+    '99215': 'Office/outpatient visit est',
+    '99244': 'Office consult'
+}
+
+
+def _cents(amount):
+    """Integer cents of a two-decimal amount string"""
+    return int(amount.replace('.', ''))
+
+
+def part_path(output_file, part):
+    """Numbered path of one part of a split output: edi_837.txt.gz -> edi_837-0001.txt.gz"""
+    base, suffix = split_compression_suffix(output_file)
+    stem, extension = os.path.splitext(base)
+    return f"{stem}-{part:04d}{extension}{suffix}"
+
+
+def _csv_date(value):
+    """Format a date as YYYY-MM-DD (empty string for None)"""
+    return value.strftime("%Y-%m-%d") if value else ''
+
+
+class RecordSink:
+    """
+    Base class for output sinks
+
+    Args:
+        output_file: Path to write to
+        compression: Codec name, or None to infer from the file extension
+        subset: The sink receives only part of the generated records (one
+                shard or partition), so transaction-level totals in the
+                header do not apply to it
+        manifest: Describe each output file in its directory's _manifest.json
+                  (default: WRITE_MANIFEST)
+        invalid_index: Write each output file's invalid records to a
+                       _<file>.invalid.csv ground-truth index (default: WRITE_INVALID_INDEX)
+    """
+
+    format = None
+    transaction_type = None
+
+    def __init__(self, output_file, compression=None, subset=False, manifest=None, invalid_index=None):
+        self.output_file = output_file
+        self.subset = subset
+        self.compression = compression or codec_for_path(output_file)
+        self.manifest = WRITE_MANIFEST if manifest is None else manifest
+        self.invalid_index = WRITE_INVALID_INDEX if invalid_index is None else invalid_index
+        # Uncompressed output is also kept in memory for the generator's return value
+        self.retain = self.compression in (None, 'none')
+        self.total_records = 0
+        self.invalid_records = 0
+        self.stats = None
+        self.index = None
+
+    @classmethod
+    def compressed_path(cls, output_file, compression):
+        """Output path for a compression codec, appending its extension if missing"""
+        if compression and compression != 'none' and codec_for_path(output_file) is None:
+            return output_file + get_codec(compression).extension
+        return output_file
+
+    def open(self, header):
+        """Start the output; header holds the transaction-level values"""
+        raise NotImplementedError
+
+    def write_many(self, records):
+        """Write a batch of records"""
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the output and return the sink's result"""
+        raise NotImplementedError
+
+    def _count(self, records):
+        self.total_records += len(records)
+        self.invalid_records += sum(1 for record in records if record['is_invalid'])
+
+    def _make_dirs(self):
+        dir_path = os.path.dirname(self.output_file)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+    def _start_file(self, path):
+        """
+        Begin a new output file's sidecars
+
+        With a manifest, self.stats collects the file's statistics and the
+        returned DigestWriter (None without a manifest) hashes its bytes on
+        their way to disk; with an invalid index, self.index records its
+        invalid records. Both last until _close_file().
+
+        An existing file at path is removed rather than overwritten in
+        place, so a hardlink to it (an output cache entry) is left intact.
+        """
+        if os.path.lexists(path):
+            os.remove(path)
+        self._digest = DigestWriter(path) if self.manifest else None
+        self.stats = ManifestStats(self.transaction_type) if self.manifest else None
+        self.index = InvalidRecordIndex(path, self.transaction_type) if self.invalid_index else None
+        return self._digest
+
+    def _open_file(self, path, text=False):
+        """Open one output file (see _start_file)"""
+        opener = open_text_output if text else open_output
+        return opener(path, self.compression, fileobj=self._start_file(path))
+
+    def _observe(self, records):
+        """Feed records written to the current file to its sidecars"""
+        if self.stats is not None:
+            self.stats.update(records)
+        if self.index is not None:
+            self.index.update(records)
+
+    def _close_file(self, fileobj, path, segments=None):
+        """Close an output file opened by _open_file() and finish its sidecars"""
+        fileobj.close()
+        if self.index is not None:
+            self.index.close()
+        if self.manifest:
+            self._digest.close()
+            entry = manifest_entry(
+                self.transaction_type, self.format, self.compression, self._digest, self.stats, segments
+            )
+            if self.index is not None and self.index.invalid_records:
+                entry['invalid_index'] = os.path.basename(self.index.path)
+            update_manifest(path, entry)
+
+
+class CSVSink(RecordSink):
+    """
+    Streams rows to a CSV file
+
+    Subclasses set `transaction_type` and implement row(record). close()
+    returns the same metadata dict the CSV generators always have; 'data'
+    is None when the output is compressed.
+    """
+
+    format = 'csv'
+    transaction_type = None
+
+    def open(self, header):
+        self.header = header
+        self.rows = []
+        self._make_dirs()
+        self._file = self._open_file(self.output_file, text=True)
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_HEADERS[self.transaction_type])
+        self._writer.writeheader()
+
+    def row(self, record):
+        """Build the CSV row for a record"""
+        raise NotImplementedError
+
+    def write_many(self, records):
+        rows = [self.row(record) for record in records]
+        self._writer.writerows(rows)
+        if self.retain:
+            self.rows.extend(rows)
+        self._observe(records)
+        self._count(records)
+
+    def close(self):
+        self._close_file(self._file, self.output_file)
+        return {
+            "output_file": self.output_file,
+            "total_records": self.total_records,
+            "invalid_records": self.invalid_records,
+            "invalid_rate": self.invalid_records / self.total_records if self.total_records else 0.0,
+            "data": self.rows if self.retain else None
+        }
+
+
+class X12Sink(RecordSink):
+    """
+    Writes X12 interchanges through a buffered X12Writer
+
+    Subclasses set `transaction_type` and implement header_segments(),
+    segments(record) and, optionally, trailer_segments() and start_set().
+    close() returns the file content as a string, as the X12 generators
+    always have, or the output path when the output is compressed.
+
+    By default the output is one interchange with one functional group and
+    one transaction set. The limits split it while it is written: a new
+    ST/SE set after max_records_per_set records, a new GS/GE group after
+    max_sets_per_group sets, and a new file (a complete ISA/IEA
+    interchange, named <name>-0001.txt, <name>-0002.txt, ...) before a
+    file would exceed max_bytes_per_file. Set and group control numbers
+    run on across the output, ISA control numbers increase per file, and
+    every SE, GE and IEA count covers only its own envelope. With a byte
+    limit close() returns a list with one result per file.
+
+    While splitting, each transaction set is held in memory until it is
+    complete (at most max_records_per_set records or one file's worth), so
+    headers that summarise the set, such as the 835 BPR total, cover
+    exactly the records in it. Such sinks always split when they receive
+    a subset of the records (sets of X12_SUBSET_RECORDS_PER_SET by default).
+
+    Args:
+        output_file: Path to write to
+        compression: Codec name, or None to infer from the file extension
+        x12: X12Serializer (default: configured delimiters)
+        max_records_per_set: Records per ST/SE set (default: X12_MAX_RECORDS_PER_SET)
+        max_sets_per_group: Sets per GS/GE group (default: X12_MAX_SETS_PER_GROUP)
+        max_bytes_per_file: Approximate uncompressed bytes per file (default: X12_MAX_BYTES_PER_FILE)
+        subset, manifest, invalid_index: See RecordSink
+    """
+
+    format = 'x12'
+    transaction_type = None
+
+    # Whether header_segments() summarise the set's records (835 BPR total)
+    summarises_records = False
+
+    # Bytes kept free in each file for the SE, GE and IEA trailers
+    TRAILER_RESERVE = 128
+
+    def __init__(self, output_file, compression=None, x12=default_serializer,
+                 max_records_per_set=None, max_sets_per_group=None, max_bytes_per_file=None, subset=False,
+                 manifest=None, invalid_index=None):
+        super().__init__(output_file, compression, subset, manifest, invalid_index)
+        self.x12 = x12
+        self.max_records_per_set = max_records_per_set or X12_MAX_RECORDS_PER_SET
+        if subset and self.summarises_records and not self.max_records_per_set:
+            # The header's totals cover every record, so total each set as it is buffered
+            self.max_records_per_set = X12_SUBSET_RECORDS_PER_SET
+        self.max_sets_per_group = max_sets_per_group or X12_MAX_SETS_PER_GROUP
+        self.max_bytes_per_file = max_bytes_per_file or X12_MAX_BYTES_PER_FILE
+        # Sets are buffered only when they can end before the output does
+        self.split = bool(self.max_records_per_set or self.max_bytes_per_file)
+
+    def open(self, header):
+        self.header = header
+        self._make_dirs()
+        self.output_files = []
+        self._results = []
+        self._group_control_num = 0
+        self._set_control_num = 0
+        self._in_set = False
+        self.set_records = []
+        self._open_interchange()
+        if not self.split:
+            self._open_set()
+
+    def header_segments(self):
+        """Segments between ST and the set's first record"""
+        return []
+
+    def segments(self, record):
+        """Segments for one record"""
+        raise NotImplementedError
+
+    def trailer_segments(self):
+        """Segments between the last record and SE (written in the final set only)"""
+        return []
+
+    def start_set(self):
+        """Reset per-set state (e.g. hierarchy numbering) when a transaction set begins"""
+
+    def write_many(self, records):
+        if not self.split:
+            segments = []
+            for record in records:
+                segments.extend(self.segments(record))
+            self.writer.write_many(segments)
+            self._observe(records)
+            self._count(records)
+            return
+
+        for record in records:
+            if self.max_records_per_set and len(self.set_records) >= self.max_records_per_set:
+                self._close_set()
+            if not self._in_set:
+                self._open_set()
+            segments = self.segments(record)
+            if self._exceeds_file_limit(segments):
+                if self.set_records:
+                    self._close_set()
+                self._close_interchange()
+                self._open_interchange()
+                self._open_set()
+                segments = self.segments(record)
+            self._set_segments.extend(segments)
+            self._set_size += sum(len(segment) for segment in segments) + len(segments)
+            self.set_records.append(record)
+            self._interchange_records += 1
+            self._observe((record,))
+        self._count(records)
+
+    def close(self):
+        if not self._in_set:
+            self._open_set()
+        self._close_set(final=True)
+        self._close_interchange()
+        if self.max_bytes_per_file:
+            return self._results
+        return self._results[0]
+
+    def _exceeds_file_limit(self, segments):
+        """Whether adding segments would push a file holding earlier records past max_bytes_per_file"""
+        if not self.max_bytes_per_file or not self._interchange_records:
+            return False
+        size = self.writer.size + self._set_size + sum(len(segment) + 1 for segment in segments)
+        return size + self.TRAILER_RESERVE > self.max_bytes_per_file
+
+    def _open_interchange(self):
+        path = self.output_file
+        if self.max_bytes_per_file:
+            path = part_path(self.output_file, len(self.output_files) + 1)
+        self.output_files.append(path)
+        self._file = self._open_file(path)
+        self.writer = X12Writer(self._file, self.x12.delimiters, capture=self.retain)
+        # Each file's ISA13 follows the previous one
+        base_control_num = int(self.header['isa_control_num'])
+        self.isa_control_num = '%09d' % ((base_control_num + len(self.output_files) - 1) % 1000000000)
+        self.writer.write(interchange_header(self.x12, self.header['current_date'], self.isa_control_num))
+        self._group_count = 0
+        self._group_open = False
+        self._interchange_records = 0
+
+    def _close_interchange(self):
+        if self._group_open:
+            self._close_group()
+        self.writer.write(self.x12.render('IEA', self._group_count, self.isa_control_num))
+        self.writer.flush()
+        self._close_file(self._file, self.output_files[-1], self.writer.segment_count)
+        self._results.append(self.writer.getvalue() if self.retain else self.output_files[-1])
+
+    def _ensure_group(self):
+        """Open a functional group for the next set, starting a new one when the current is full"""
+        if self._group_open and self.max_sets_per_group and self._group_sets >= self.max_sets_per_group:
+            self._close_group()
+        if not self._group_open:
+            self._group_control_num += 1
+            self._group_count += 1
+            self._group_sets = 0
+            self._group_open = True
+            self.writer.write(group_header(
+                self.x12, self.transaction_type, self.header['current_date'], self._group_control_num
+            ))
+
+    def _close_group(self):
+        self.writer.write(self.x12.render('GE', self._group_sets, self._group_control_num))
+        self._group_open = False
+
+    def _open_set(self):
+        """Begin a transaction set; when streaming, ST and the header are written at once"""
+        self._in_set = True
+        self.set_records = []
+        self._set_segments = []
+        self._set_size = 0
+        self.start_set()
+        if self.split:
+            # ST, the set's header and possibly a GS are written when the set closes
+            self._set_size = sum(len(segment) + 1 for segment in self.header_segments()) + self.TRAILER_RESERVE
+        else:
+            self._ensure_group()
+            self._set_control_num += 1
+            self._group_sets += 1
+            self.writer.write(transaction_set_header(self.x12, self.transaction_type, self._set_control_num))
+            self.st_position = self.writer.segment_count  # ST is the segment just written
+            self.writer.write_many(self.header_segments())
+
+    def _close_set(self, final=False):
+        """Finish the current transaction set with SE (the trailer goes in the final set only)"""
+        x12 = self.x12
+        writer = self.writer
+        trailer = self.trailer_segments() if final else []
+        if self.split:
+            self._ensure_group()
+            self._set_control_num += 1
+            self._group_sets += 1
+            writer.write(transaction_set_header(x12, self.transaction_type, self._set_control_num))
+            self.st_position = writer.segment_count
+            writer.write_many(self.header_segments())
+            writer.write_many(self._set_segments)
+        writer.write_many(trailer)
+        # SE count: number of segments from ST (inclusive) to SE (inclusive)
+        se_count = writer.segment_count - self.st_position + 2  # +1 for ST itself, +1 for SE
+        writer.write(x12.render('SE', se_count, set_control_number(self._set_control_num)))
+        self._in_set = False
+        self._set_segments = []
+
+
+class X12EnrollmentSink(X12Sink):
+    """EDI 834 X12 output"""
+
+    transaction_type = '834'
+
+    def __init__(self, output_file, compression=None, x12=default_serializer, **limits):
+        super().__init__(output_file, compression, x12, **limits)
+        # Bind the hot-loop templates once
+        self._ins = x12.renderer('INS')
+        self._ref = x12.renderer('REF')
+        self._per = x12.renderer('PER')
+        self._n3 = x12.renderer('N3')
+        self._n4 = x12.renderer('N4_COUNTRY')
+        self._hd = x12.renderer('HD')
+        self._dtp = x12.renderer('DTP')
+        self._ins_term = x12.renderer('INS_TERM')
+
+    def header_segments(self):
+        header = self.header
+        current_date = header['current_date']
+        return [
+            self.x12.render(
+                'BGN', header['reference'], current_date.strftime("%Y%m%d"),
+                current_date.strftime("%H%M%S"), header['action_code']
+            ),
+            # Sponsor and Payer information
+            self.x12.render('N1', "P5", "SPONSOR_NAME", header['sponsor_tax_id']),
+            self.x12.render('N1', "IN", "PAYER_NAME", header['payer_tax_id']),
+        ]
+
+    def segments(self, record):
+        member = record['member']
+        enrollment = record['enrollment']
+        coverage_status, termination_reason, end_date = record['status_info']
+        medicare_plan = record['medicare_plan']
+        name_segment, dmg_segment = record['member_block']['x12']
+        segments = [
+            # INS segment - Member insurance information
+            self._ins(coverage_status, medicare_plan if medicare_plan else ''),
+            # REF segments - Member IDs
+            self._ref("0F", member.id),
+            self._ref("38", member.policy_num),
+            self._ref("SY", member.ssn),
+            # NM1 segment - Member name
+            name_segment,
+            # PER segment - Member contact
+            self._per(member.phone, member.email),
+            # N3 and N4 segments - Member address
+            self._n3(member.street),
+            self._n4(member.city, member.state, member.zip_code, "US"),
+            # DMG segment - Member demographics
+            dmg_segment,
+            # HD segment - Health plan
+            self._hd(member.plan["type"], member.plan["id"], member.plan["name"]),
+            # DTP segment - Plan dates
+            self._dtp("356", format_date(enrollment.start_date)),
+        ]
+        # For terminated members
+        if coverage_status == 'T' and end_date:
+            segments.append(self._dtp("357", format_date(end_date)))
+            segments.append(self._ins_term(termination_reason))
+        return segments
+
+
+class CSVEnrollmentSink(CSVSink):
+    """EDI 834 CSV output"""
+
+    transaction_type = '834'
+
+    def row(self, record):
+        member = record['member']
+        enrollment = record['enrollment']
+        coverage_status, termination_reason, end_date = record['status_info']
+        medicare_plan = record['medicare_plan']
+        member_fields = record['member_block']['csv']
+        return {
+            'member_id': member.id,
+            'subscriber_id': member.id,  # Self subscriber
+            'policy_number': member.policy_num,
+            'ssn': member.ssn,
+            'last_name': member.last_name,
+            'first_name': member.first_name,
+            'middle_initial': '',
+            'date_of_birth': member_fields['member_dob'],
+            'gender': member.gender,
+            'street_address': member.street,
+            'city': member.city,
+            'state': member.state,
+            'zip_code': member.zip_code,
+            'country': 'US',
+            'phone': member.phone,
+            'email': member.email,
+            'coverage_status': coverage_status,
+            'medicare_plan': medicare_plan if medicare_plan else '',
+            'plan_id': member.plan["id"],
+            'plan_name': member.plan["name"],
+            'plan_type': member.plan["type"],
+            'effective_date': _csv_date(enrollment.start_date),
+            'termination_date': _csv_date(end_date),
+            'termination_reason': termination_reason if termination_reason else '',
+            'relationship_code': enrollment.relationship_code,
+            'transaction_type': enrollment.transaction_type,
+            'action_code': enrollment.action_code,
+            'sponsor_id': enrollment.sponsor_id,
+            'insurance_line': enrollment.insurance_line,
+            'enrollment_id': enrollment.id
+        }
+
+
+class X12ClaimSink(X12Sink):
+    """EDI 837 X12 output"""
+
+    transaction_type = '837'
+
+    def __init__(self, output_file, compression=None, x12=default_serializer, **limits):
+        super().__init__(output_file, compression, x12, **limits)
+        # Bind the hot-loop templates once
+        self._hl = x12.renderer('HL')
+        self._clm = x12.renderer('CLM')
+        self._dtp = x12.renderer('DTP')
+        self._hi = x12.renderer('HI')
+        self._lx = x12.renderer('LX')
+        self._sv1 = x12.renderer('SV1')
+        self._ref = x12.renderer('REF')
+
+    def start_set(self):
+        # HL IDs restart in each transaction set
+        self._level = 0
+
+    def header_segments(self):
+        header = self.header
+        current_date = header['current_date']
+        return [
+            self.x12.render(
+                'BHT', header['reference'], current_date.strftime("%Y%m%d"), current_date.strftime("%H%M%S")
+            ),
+            # Submitter and receiver info
+            self.x12.render('NM1_41', header['submitter_id']),
+            self.x12.render('NM1_40', header['payer_id']),
+        ]
+
+    def segments(self, record):
+        claim_data = record['claim_data']
+        provider = record['provider']
+        self._level += 1
+        level = self._level
+
+        # HL segment - Claim hierarchy
+        segments = [self._hl(level, level - 1 if level > 1 else "")]
+
+        # PRV, NM1*85, REF*EI, N3, N4 segments - Provider info (pre-rendered)
+        provider_segments = record['provider_block']['x12']
+        if record['provider_npi'] != provider.npi:
+            provider_segments = list(provider_segments)
+            provider_segments[1] = self.x12.render(
+                'NM1_85', provider.last_name, provider.first_name, record['provider_npi']
+            )
+        segments.extend(provider_segments)
+
+        # NM1*IL and DMG segments - Member info (pre-rendered)
+        segments.extend(record['member_block']['x12'])
+
+        # CLM segment - Claim info
+        segments.append(self._clm(
+            claim_data['id'], format_amount(claim_data['billed_amount']),
+            record['service_type'], record['claim_modifier']
+        ))
+
+        # DTP segment - Service date
+        service_date = format_date(claim_data['service_date'])
+        segments.append(self._dtp("472", service_date))
+
+        # Diagnosis codes
+        for code in record['diagnosis_codes']:
+            segments.append(self._hi(code))
+
+        # Service line items
+        composite = self.x12.composite
+        for line_num, line in enumerate(record['service_lines'], 1):
+            segments.append(self._lx(line_num))
+            segments.append(self._sv1(
+                composite("HC", line['procedure_code'], line['modifier']), format_amount(line['billed_amount'])
+            ))
+            segments.append(self._ref("6R", line['place_of_service']))
+            segments.append(self._dtp("472", service_date))
+        return segments
+
+
+class CSVClaimSink(CSVSink):
+    """EDI 837 CSV output (one row per claim, first service line's procedure)"""
+
+    transaction_type = '837'
+
+    def row(self, record):
+        claim_data = record['claim_data']
+        first_line = record['service_lines'][0]
+        procedure_code = first_line['procedure_code']
+        place_of_service = first_line['place_of_service']
+        if record['is_er'] or place_of_service == '23':
+            location_type = 'ER'
+        elif place_of_service == '11':
+            location_type = 'OFFICE'
+        else:
+            location_type = 'OUTPATIENT'
+        return {
+            'claim_id': claim_data['id'],
+            **record['provider_block']['csv'],
+            **record['member_block']['csv'],
+            'provider_npi': record['provider_npi'],
+            'service_date': _csv_date(claim_data['service_date']),
+            'billed_amount': format_amount(claim_data['billed_amount']),
+            'claim_status': record['claim_status'],
+            'claim_frequency_code': '1',
+            'claim_source_code': '01',
+            'facility_type_code': place_of_service,
+            'location_type': location_type,
+            'procedure_code': procedure_code,
+            'procedure_description': PROCEDURE_DESCRIPTIONS.get(procedure_code, 'Medical service'),
+            'diagnosis_codes': '|'.join(record['diagnosis_codes']),
+            'submission_date': self.header['current_date'].strftime("%Y-%m-%d"),
+            'enrollment_id': claim_data['enrollment_id']
+        }
+
+
+class X12RemittanceSink(X12Sink):
+    """EDI 835 X12 output"""
+
+    transaction_type = '835'
+    summarises_records = True
+
+    def __init__(self, output_file, compression=None, x12=default_serializer, **limits):
+        super().__init__(output_file, compression, x12, **limits)
+        # Bind the hot-loop templates once
+        self._lx = x12.renderer('LX')
+        self._clp = x12.renderer('CLP')
+        self._cas = x12.renderer('CAS')
+        self._svc = x12.renderer('SVC')
+        self._dtm = x12.renderer('DTM')
+        self._adjudication_dtm = None
+
+    def start_set(self):
+        self._level = 0
+        if self._adjudication_dtm is None:
+            self._adjudication_dtm = self._dtm("405", format_date(self.header['current_date']))
+
+    def header_segments(self):
+        header = self.header
+        current_date = format_date(header['current_date'])
+        # A split set's BPR total covers only its own CLP payments
+        total_paid = header['total_paid']
+        if self.split:
+            from src.edi.remittance import format_cents
+            total_paid = format_cents(sum(_cents(record['paid_amount']) for record in self.set_records))
+        return [
+            # BPR segment - Financial information
+            self.x12.render(
+                'BPR', total_paid, header['check_number'], header['account_number'],
+                header['routing_number'], current_date
+            ),
+            # TRN segment - Transaction reference
+            self.x12.render('TRN', header['reference'], header['payer_id']),
+            # Payer information
+            self.x12.render('N1', "PR", "PAYER_NAME", header['payer_tax_id']),
+        ]
+
+    def segments(self, record):
+        claim_data = record['claim_data']
+        self._level += 1
+
+        # LX segment - Payment hierarchy
+        segments = [self._lx(self._level)]
+
+        # CLP segment - Claim payment info
+        segments.append(self._clp(
+            record['claim_id'], record['claim_status'], record['billed_amount'], record['paid_amount'],
+            record['patient_responsibility'], record['claim_code']
+        ))
+
+        # CAS segment - Adjustments
+        if record['adjustment_code']:
+            segments.append(self._cas(record['adjustment_code'], record['adjustment_amount']))
+
+        # NM1 segments - Provider and member info (pre-rendered)
+        segments.append(record['provider_block']['x12_payee'])
+        segments.append(record['member_block']['x12'][0])
+
+        # SVC segment - Service payment details
+        segments.append(self._svc(
+            record['procedure_code'], record['billed_amount'], record['paid_amount'], record['allowed_amount']
+        ))
+
+        # DTM segments - Service and adjudication dates
+        segments.append(self._dtm("150", format_date(claim_data['service_date'])))
+        segments.append(self._adjudication_dtm)
+        return segments
+
+    def trailer_segments(self):
+        # PLB segment - Provider balance info
+        adjustment = self.header.get('provider_adjustment')
+        if not adjustment:
+            return []
+        provider_id, amount = adjustment
+        return [self.x12.render('PLB', provider_id, format_date(self.header['current_date']), amount)]
+
+
+class CSVRemittanceSink(CSVSink):
+    """EDI 835 CSV output"""
+
+    transaction_type = '835'
+
+    def row(self, record):
+        claim_data = record['claim_data']
+        header = self.header
+        provider_fields = record['provider_block']['csv']
+        member_fields = record['member_block']['csv']
+        current_date = header['current_date'].strftime("%Y-%m-%d")
+        return {
+            'payment_id': record['payment_id'],
+            'claim_id': record['claim_id'],
+            'member_id': member_fields['member_id'],
+            'provider_id': provider_fields['provider_id'],
+            'provider_npi': provider_fields['provider_npi'],
+            'member_last_name': member_fields['member_last_name'],
+            'member_first_name': member_fields['member_first_name'],
+            'billed_amount': record['billed_amount'],
+            'paid_amount': record['paid_amount'],
+            'allowed_amount': record['allowed_amount'],
+            'patient_responsibility': record['patient_responsibility'],
+            'claim_status': record['claim_status'],
+            'claim_code': record['claim_code'],
+            'adjustment_code': record['adjustment_code'],
+            'adjustment_amount': record['adjustment_amount'] if record['adjustment_code'] else '',
+            'procedure_code': record['procedure_code'],
+            'service_date': _csv_date(claim_data.get('service_date')),
+            'adjudication_date': current_date,
+            'check_number': header['check_number'],
+            'payment_date': current_date,
+            'payment_method': 'ACH',
+            'payer_id': header['payer_id'],
+            'transaction_reference': header['reference']
+        }
+
+
+# Sink classes by (transaction type, format); register_sink adds new formats
+SINK_CLASSES = {
+    ('834', 'x12'): X12EnrollmentSink,
+    ('834', 'csv'): CSVEnrollmentSink,
+    ('837', 'x12'): X12ClaimSink,
+    ('837', 'csv'): CSVClaimSink,
+    ('835', 'x12'): X12RemittanceSink,
+    ('835', 'csv'): CSVRemittanceSink,
+}
+
+# File extension by format
+FORMAT_EXTENSIONS = {
+    'x12': 'txt',
+    'csv': 'csv',
+}
+
+
+def register_sink(transaction_type, format, sink_class, extension=None):
+    """
+    Register a sink class for a transaction type and output format
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        format: Format name passed as `format` to the generators
+        sink_class: RecordSink subclass taking the output path and compression
+        extension: Default file extension for the format
+    """
+    SINK_CLASSES[(transaction_type, format)] = sink_class
+    if extension:
+        FORMAT_EXTENSIONS[format] = extension
+
+
+def make_sink(transaction_type, format, output_file, compression=None, **options):
+    """
+    Create the sink for a transaction type and format
+
+    With an explicit compression codec, a path without the codec's
+    extension gets it appended (formats that compress internally, such as
+    Parquet, keep the path as given). Other options are passed to the sink
+    class, e.g. the X12Sink envelope limits.
+    """
+    try:
+        sink_class = SINK_CLASSES[(transaction_type, format)]
+    except KeyError:
+        raise ValueError(f"Unsupported output format for EDI {transaction_type}: {format!r}")
+    return sink_class(sink_class.compressed_path(output_file, compression), compression, **options)
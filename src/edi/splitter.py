@@ -0,0 +1,451 @@
+"""
+Streaming splitter and sampler for existing X12 files
+
+Reads an 834, 837 or 835 file (or a compressed file, glob or list, see
+EDIParser.iter_edi_segments) segment by segment and groups the segments
+into units: one member (INS), claim (HL) or payment (LX) each. Units can
+then be
+
+- split into files of N units, each a complete ISA/GS/ST interchange, or
+- sampled in one pass with reservoir sampling, optionally stratified by a
+  segment element such as CLP02 (claim status), or
+- sorted by member and service date with an external merge sort.
+
+Only the current output file, the reservoirs or one sort run are held in
+memory, never the whole input. Output envelopes are rebuilt rather than copied: HL and
+LX numbers restart in each file, the 835 BPR total is the sum of the
+file's CLP payments, and SE/GE/IEA counts and control numbers match.
+"""
+
+import os
+import random
+import re
+from decimal import Decimal
+
+from src.edi.compression import open_output
+from src.edi.external_sort import ExternalSorter
+from src.edi.parser import EDIParser
+from src.edi.sinks import part_path
+from src.edi.x12 import Delimiters, X12Writer, set_control_number
+
+# Segment that starts each unit, by transaction set
+UNIT_START = {
+    '834': 'INS',
+    '837': 'HL',
+    '835': 'LX',
+}
+
+# Default stratification element, by transaction set
+DEFAULT_STRATA = {
+    '834': 'INS04',    # Coverage status
+    '837': 'CLM05-1',  # Claim service type
+    '835': 'CLP02',    # Claim status
+}
+
+# Date each unit is sorted by after its member: (segment, qualifier, element position)
+SORT_DATES = {
+    '834': ('DTP', '356', 3),  # Eligibility begin
+    '837': ('DTP', '472', 3),  # Service date
+    '835': ('DTM', '150', 2),  # Service date
+}
+
+ENVELOPE_SEGMENTS = {'ISA', 'GS', 'ST', 'SE', 'GE', 'IEA'}
+
+# Set-level segments that follow the last unit
+TRAILER_SEGMENTS = {'PLB'}
+
+ELEMENT_REFERENCE = re.compile(r'^([A-Z][A-Z0-9]{1,2})(\d{2})(?:-(\d+))?$')
+
+
+class X12Source:
+    """
+    An X12 input read as a stream of units
+
+    The envelope and set header are taken from the first interchange and
+    transaction set; later sets' headers are skipped. After units() has
+    been consumed, `trailer` holds any set trailer segments (835 PLB).
+
+    Args:
+        file_path: Path, glob or list of paths (compressed inputs are decompressed while reading)
+        parser: EDIParser supplying the delimiters (default: a new EDIParser)
+    """
+
+    def __init__(self, file_path, parser=None):
+        self.file_path = file_path
+        self.parser = parser or EDIParser()
+        self.isa = None
+        self.gs = None
+        self.st = None
+        self.transaction_type = None
+        self.set_header = None
+        self.trailer = []
+
+    @property
+    def component_separator(self):
+        """ISA16, or ':' before the ISA has been read"""
+        if self.isa and len(self.isa['elements']) > 15:
+            return self.isa['elements'][15]
+        return ':'
+
+    def _is_unit_start(self, segment):
+        if segment['segment_id'] != UNIT_START.get(self.transaction_type):
+            return False
+        # A terminated 834 member's second INS (INS***reason) continues the member
+        return self.transaction_type != '834' or bool(segment['elements'] and segment['elements'][0])
+
+    def units(self):
+        """Yield each unit as a list of parsed segments"""
+        unit = None
+        in_header = False
+        for segment in self.parser.iter_edi_segments(self.file_path):
+            segment_id = segment['segment_id']
+            if segment_id in ENVELOPE_SEGMENTS:
+                if unit:
+                    yield unit
+                    unit = None
+                if segment_id == 'ISA' and self.isa is None:
+                    self.isa = segment
+                elif segment_id == 'GS' and self.gs is None:
+                    self.gs = segment
+                elif segment_id == 'ST':
+                    if self.st is None:
+                        self.st = segment
+                        self.transaction_type = segment['elements'][0]
+                        if self.transaction_type not in UNIT_START:
+                            raise ValueError(f"Unsupported transaction set: {self.transaction_type}")
+                        self.set_header = []
+                        in_header = True
+                    else:
+                        in_header = False
+            elif self._is_unit_start(segment):
+                if unit:
+                    yield unit
+                unit = [segment]
+                in_header = False
+            elif segment_id in TRAILER_SEGMENTS:
+                if unit:
+                    yield unit
+                    unit = None
+                self.trailer.append(segment)
+            elif in_header:
+                self.set_header.append(segment)
+            elif unit is not None:
+                unit.append(segment)
+        if unit:
+            yield unit
+
+
+def element_key(reference, component_separator=':'):
+    """
+    Build a unit key function from an element reference
+
+    Args:
+        reference: Segment ID, element position and optional component,
+                   e.g. "CLP02" or "CLM05-1"
+        component_separator: Separator for composite elements
+
+    Returns:
+        Function (unit) -> value of the first matching element ('' if absent)
+    """
+    match = ELEMENT_REFERENCE.match(reference)
+    if not match:
+        raise ValueError(f"Invalid element reference: {reference!r} (expected e.g. 'CLP02' or 'CLM05-1')")
+    segment_id, position, component = match.group(1), int(match.group(2)), match.group(3)
+
+    def key(unit):
+        for segment in unit:
+            if segment['segment_id'] == segment_id:
+                elements = segment['elements']
+                value = elements[position - 1] if len(elements) >= position else ''
+                if component:
+                    parts = value.split(component_separator)
+                    value = parts[int(component) - 1] if len(parts) >= int(component) else ''
+                return value
+        return ''
+
+    return key
+
+
+def member_sort_key(transaction_type):
+    """
+    Build a unit key function for sorting by member and date
+
+    Returns:
+        Function (unit) -> (member_id, date) from the subscriber NM1*IL
+        identification code (its last element) and the transaction's
+        SORT_DATES segment. D8 dates (CCYYMMDD) sort chronologically as
+        strings.
+    """
+    date_segment, qualifier, position = SORT_DATES[transaction_type]
+
+    def key(unit):
+        member_id = date = None
+        for segment in unit:
+            segment_id = segment['segment_id']
+            elements = segment['elements']
+            if member_id is None and segment_id == 'NM1' and elements and elements[0] == 'IL':
+                member_id = elements[-1]
+            elif date is None and segment_id == date_segment and elements and elements[0] == qualifier:
+                date = elements[position - 1] if len(elements) >= position else ''
+        return member_id or '', date or ''
+
+    return key
+
+
+def _render(parser, segment_id, elements):
+    return parser.element_delimiter.join([segment_id] + [str(element) for element in elements])
+
+
+def _paid_total(units):
+    """Sum of the CLP payments (CLP04) in units"""
+    return sum(
+        (Decimal(s['elements'][3]) for unit in units for s in unit if s['segment_id'] == 'CLP'),
+        Decimal('0.00')
+    )
+
+
+def write_interchange(output_file, source, units, part=1, trailer=(), compression=None, paid_total=None):
+    """
+    Write units as one complete interchange
+
+    Units are written as they are iterated, so `units` can be a stream
+    (such as a merge of sorted runs) when the 835 payment total is given.
+
+    Args:
+        output_file: Path to write to (compressed according to its extension or `compression`)
+        source: X12Source the units came from (supplies the envelope and set header)
+        units: Units to write, in order
+        part: Output number; ISA13 is the input's plus part - 1 and GS06 is part
+        trailer: Set trailer segments written before SE
+        compression: Codec name, or None to infer from the extension
+        paid_total: 835 BPR total (default: the sum of the units' CLP payments)
+
+    Returns:
+        Number of segments written
+    """
+    parser = source.parser
+    isa = list(source.isa['elements'])
+    if isa[12].isdigit():
+        isa[12] = '%09d' % ((int(isa[12]) + part - 1) % 1000000000)
+    gs = list(source.gs['elements'])
+    gs[5] = part
+    st = list(source.st['elements'])
+    st[1] = set_control_number(1)
+    if paid_total is None and any(segment['segment_id'] == 'BPR' for segment in source.set_header):
+        units = list(units)
+        paid_total = _paid_total(units)
+
+    delimiters = Delimiters(segment=parser.segment_delimiter, element=parser.element_delimiter)
+    terminator = parser.segment_delimiter
+    dir_path = os.path.dirname(output_file)
+    if dir_path:
+        os.makedirs(dir_path, exist_ok=True)
+    with open_output(output_file, compression) as f:
+        writer = X12Writer(f, delimiters)
+        writer.write(_render(parser, 'ISA', isa) + terminator)
+        writer.write(_render(parser, 'GS', gs) + terminator)
+        writer.write(_render(parser, 'ST', st) + terminator)
+        for segment in source.set_header:
+            if segment['segment_id'] == 'BPR':
+                # The payment total covers only the CLP payments in this file
+                bpr = list(segment['elements'])
+                bpr[1] = str(paid_total)
+                writer.write(_render(parser, 'BPR', bpr) + terminator)
+            else:
+                writer.write(segment['raw'] + terminator)
+        for number, unit in enumerate(units, 1):
+            first = unit[0]
+            if first['segment_id'] == 'HL':
+                hl = list(first['elements'])
+                hl[0], hl[1] = number, number - 1 if number > 1 else ''
+                segments = [_render(parser, 'HL', hl)]
+            elif first['segment_id'] == 'LX':
+                segments = [_render(parser, 'LX', [number] + first['elements'][1:])]
+            else:
+                segments = [first['raw']]
+            segments.extend(segment['raw'] for segment in unit[1:])
+            writer.write_many([segment + terminator for segment in segments])
+        writer.write_many([segment['raw'] + terminator for segment in trailer])
+        # SE counts ST through SE; ISA and GS come before ST
+        writer.write(_render(parser, 'SE', [writer.segment_count - 1, st[1]]) + terminator)
+        writer.write(_render(parser, 'GE', [1, gs[5]]) + terminator)
+        writer.write(_render(parser, 'IEA', [1, isa[12]]) + terminator)
+        writer.flush()
+    return writer.segment_count
+
+
+def split_x12(input_file, output_file, units_per_file, compression=None, parser=None):
+    """
+    Split an X12 file into interchanges of at most `units_per_file` units
+
+    Output files are numbered like split generator output
+    (edi_837-0001.txt, ...). Set trailer segments (835 PLB) are written to
+    the last file.
+
+    Args:
+        input_file: Path, glob or list of paths
+        output_file: Base output path
+        units_per_file: Members, claims or payments per file
+        compression: Codec name, or None to infer from the output extension
+        parser: EDIParser supplying the delimiters
+
+    Returns:
+        List of output paths
+    """
+    if units_per_file < 1:
+        raise ValueError("units_per_file must be at least 1")
+    source = X12Source(input_file, parser)
+    outputs = []
+    chunk = []
+
+    def flush(trailer=()):
+        path = part_path(output_file, len(outputs) + 1)
+        write_interchange(path, source, chunk, len(outputs) + 1, trailer, compression)
+        outputs.append(path)
+
+    for unit in source.units():
+        if len(chunk) >= units_per_file:
+            flush()
+            chunk = []
+        chunk.append(unit)
+    if chunk or not outputs:
+        if source.st is None:
+            raise ValueError(f"No X12 transaction set found in {input_file}")
+        flush(source.trailer)
+    return outputs
+
+
+def _allocate(counts, k):
+    """Split k across strata in proportion to their counts (largest remainder)"""
+    total = sum(counts.values())
+    if total <= k:
+        return dict(counts)
+    exact = {key: k * count / total for key, count in counts.items()}
+    quotas = {key: int(value) for key, value in exact.items()}
+    remaining = k - sum(quotas.values())
+    for key in sorted(exact, key=lambda key: exact[key] - quotas[key], reverse=True)[:remaining]:
+        quotas[key] += 1
+    return quotas
+
+
+def sample_x12(input_file, output_file, k, stratify_by=None, allocation='proportional',
+               seed=None, compression=None, parser=None):
+    """
+    Draw a random sample of units in one pass and write it as one interchange
+
+    Uses reservoir sampling (Algorithm R). With `stratify_by`, each stratum
+    keeps its own reservoir of up to k units; at the end k is shared among
+    the strata in proportion to their sizes, or every stratum contributes
+    up to k units with allocation="per_stratum". Memory is bounded by k
+    times the number of strata. Sampled units keep their input order; set
+    trailer segments (835 PLB) are not included.
+
+    Args:
+        input_file: Path, glob or list of paths
+        output_file: Output path
+        k: Sample size (per stratum with allocation="per_stratum")
+        stratify_by: Element reference such as "CLP02" or "CLM05-1", "default"
+                     for the transaction's DEFAULT_STRATA, a function (unit) -> key,
+                     or None for a simple random sample
+        allocation: "proportional" or "per_stratum"
+        seed: Random seed for a reproducible sample
+        compression: Codec name, or None to infer from the output extension
+        parser: EDIParser supplying the delimiters
+
+    Returns:
+        dict: output_file, total_units, sampled_units and strata
+              ({key: {"units": seen, "sampled": taken}})
+    """
+    if allocation not in ('proportional', 'per_stratum'):
+        raise ValueError(f"Unknown allocation: {allocation!r}")
+    rng = random.Random(seed)
+    source = X12Source(input_file, parser)
+    reservoirs = {}
+    counts = {}
+    key = None
+    seen = 0
+    for unit in source.units():
+        if key is None:
+            if stratify_by is None:
+                key = lambda unit: ''
+            elif callable(stratify_by):
+                key = stratify_by
+            else:
+                reference = DEFAULT_STRATA[source.transaction_type] if stratify_by == 'default' else stratify_by
+                key = element_key(reference, source.component_separator)
+        stratum = key(unit)
+        count = counts.get(stratum, 0)
+        reservoir = reservoirs.setdefault(stratum, [])
+        if count < k:
+            reservoir.append((seen, unit))
+        else:
+            j = rng.randrange(count + 1)
+            if j < k:
+                reservoir[j] = (seen, unit)
+        counts[stratum] = count + 1
+        seen += 1
+    if source.st is None:
+        raise ValueError(f"No X12 transaction set found in {input_file}")
+
+    quotas = counts if allocation == 'per_stratum' else _allocate(counts, k)
+    sampled = []
+    strata = {}
+    for stratum, reservoir in reservoirs.items():
+        taken = min(quotas[stratum], len(reservoir))
+        # A reservoir is a uniform sample, but slots are not in random order
+        sampled.extend(rng.sample(reservoir, taken))
+        strata[stratum] = {'units': counts[stratum], 'sampled': taken}
+    sampled.sort(key=lambda item: item[0])
+
+    write_interchange(output_file, source, [unit for _, unit in sampled], compression=compression)
+    return {
+        'output_file': output_file,
+        'total_units': seen,
+        'sampled_units': len(sampled),
+        'strata': strata,
+    }
+
+
+def sort_x12(input_file, output_file, compression=None, parser=None, run_size=None, temp_dir=None):
+    """
+    Sort units by (member_id, date) and write them as one interchange
+
+    Uses an external merge sort: units are sorted in runs of run_size and
+    spilled to temporary files, then merged while the output is written,
+    so inputs much larger than memory can be sorted. Claims and payments
+    are ordered by subscriber and service date, members by subscriber and
+    eligibility date; units with equal keys keep their input order.
+
+    Args:
+        input_file: Path, glob or list of paths
+        output_file: Output path
+        compression: Codec name, or None to infer from the output extension
+        parser: EDIParser supplying the delimiters
+        run_size: Units sorted in memory per run (default: EXTERNAL_SORT_RUN_RECORDS)
+        temp_dir: Directory for spilled runs (default: the system temp directory)
+
+    Returns:
+        dict: output_file, units and spilled_runs
+    """
+    source = X12Source(input_file, parser)
+    sorter = None
+    paid_total = Decimal('0.00')
+    try:
+        for unit in source.units():
+            if sorter is None:
+                sorter = ExternalSorter(member_sort_key(source.transaction_type), run_size, temp_dir=temp_dir)
+            sorter.add(unit)
+            if source.transaction_type == '835':
+                paid_total += _paid_total([unit])
+        if source.st is None:
+            raise ValueError(f"No X12 transaction set found in {input_file}")
+        write_interchange(output_file, source, sorter if sorter is not None else [], trailer=source.trailer,
+                          compression=compression, paid_total=paid_total)
+    finally:
+        if sorter is not None:
+            sorter.close()
+    return {
+        'output_file': output_file,
+        'units': sorter.count if sorter else 0,
+        'spilled_runs': sorter.spilled_runs if sorter else 0,
+    }
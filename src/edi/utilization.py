@@ -0,0 +1,95 @@
+"""
+Vectorized claims-per-member utilization model for EDI 837 generation
+
+Real claim volume is concentrated: most members file few or no claims in
+a period and a small share of members (chronic, high-cost) file many.
+claim_counts() draws the number of claims of every member at once with
+NumPy, so the claims can then be generated member by member.
+
+Each member gets a utilization weight, and the total number of claims is
+split among the members by one multinomial draw with probabilities
+proportional to the weights, so the counts always add up to exactly the
+requested number of claims:
+
+    negative_binomial  weights ~ Gamma(dispersion, 1 / dispersion). The
+                       counts are then negative-binomial (a Poisson-Gamma
+                       mixture) conditioned on their total: the lower the
+                       dispersion, the more members without claims and the
+                       heavier the tail of frequent claimants.
+    zipf               weights = rank ** -exponent over a random ranking of
+                       the members (a power law of utilization).
+    uniform            equal weights: every claim picks a member uniformly,
+                       as independent random.choice(members) draws would.
+
+Risk profiles set the distribution and its parameter in their
+'utilization' entry (see RISK_PROFILES in generator.py).
+"""
+
+import numpy as np
+
+UTILIZATION_DISTRIBUTIONS = ('negative_binomial', 'zipf', 'uniform')
+
+# Used when a risk profile has no 'utilization' entry
+DEFAULT_UTILIZATION = {'distribution': 'negative_binomial', 'dispersion': 1.0}
+
+
+def utilization_weights(num_members, utilization, rng):
+    """
+    Relative claim propensity of each member
+
+    Args:
+        num_members: Number of members
+        utilization: Dict with 'distribution' and its parameter
+                     ('dispersion' or 'exponent')
+        rng: numpy.random.Generator
+
+    Returns:
+        float64 array of num_members non-negative weights
+    """
+    distribution = utilization.get('distribution', 'negative_binomial')
+    if distribution == 'negative_binomial':
+        dispersion = float(utilization.get('dispersion', DEFAULT_UTILIZATION['dispersion']))
+        if dispersion <= 0:
+            raise ValueError(f"Utilization dispersion must be positive, got {dispersion}")
+        return rng.gamma(dispersion, 1.0 / dispersion, num_members)
+    if distribution == 'zipf':
+        exponent = float(utilization.get('exponent', 1.0))
+        if exponent < 0:
+            raise ValueError(f"Utilization exponent must be non-negative, got {exponent}")
+        return (rng.permutation(num_members) + 1.0) ** -exponent
+    if distribution == 'uniform':
+        return np.ones(num_members)
+    raise ValueError(
+        f"Unknown utilization distribution {distribution!r}; expected one of {', '.join(UTILIZATION_DISTRIBUTIONS)}"
+    )
+
+
+def claim_counts(num_members, num_claims, rng, utilization=None, claims_per_member=None):
+    """
+    Number of claims of each member, drawn in one pass
+
+    Args:
+        num_members: Number of members
+        num_claims: Total number of claims; the counts add up to exactly this
+        rng: numpy.random.Generator
+        utilization: Distribution dict (default: DEFAULT_UTILIZATION)
+        claims_per_member: Mean claims of the members who file any; the
+                           claims go to round(num_claims / claims_per_member)
+                           randomly chosen members (None = all members may file)
+
+    Returns:
+        int64 array of num_members counts
+    """
+    if num_members <= 0:
+        raise ValueError("Claims need at least one member")
+    weights = utilization_weights(num_members, utilization or DEFAULT_UTILIZATION, rng)
+    if claims_per_member:
+        claimants = min(num_members, max(1, round(num_claims / claims_per_member)))
+        if claimants < num_members:
+            eligible = np.zeros(num_members, dtype=bool)
+            eligible[rng.choice(num_members, claimants, replace=False)] = True
+            weights = np.where(eligible, weights, 0.0)
+    total = weights.sum()
+    if not total > 0:
+        weights, total = np.ones(num_members), float(num_members)
+    return rng.multinomial(num_claims, weights / total).astype(np.int64)
@@ -0,0 +1,444 @@
+"""
+Streaming data-quality validator for 834/837/835 files
+
+Checks X12 or CSV files (compressed, globbed or listed, like the parser's
+inputs) for the data problems described in INVALID_DATA.md:
+
+    834: missing_dob, invalid_effective_date, start_after_end,
+         invalid_gender, wrong_plan_id
+    837: charge_mismatch, invalid_diagnosis, future_service_date,
+         invalid_npi_length, negative_amount
+    835: negative_payment, mismatched_ids, invalid_adjustment_code,
+         payment_exceeds_billed
+
+Records (X12 members, claims and payments, or CSV rows) are read one at a
+time and only the fields the rules need are kept. Every
+VALIDATOR_BATCH_RECORDS records the rules are evaluated on the batch as
+NumPy arrays and the violations are appended to the report, so memory is
+bounded by one batch whatever the input size.
+
+Rules are named like the generator's issue types, and the report has the
+columns of the generator's invalid-record index (record, key, issue_type),
+so validating a generated file can be scored against its
+_<file>.invalid.csv in one join.
+"""
+
+import csv
+import os
+import re
+from datetime import date
+
+import numpy as np
+
+from config.config import PARSER_READ_CHUNK_SIZE, VALIDATOR_BATCH_RECORDS, VALIDATOR_CLAIM_ID_PATTERN
+from src.edi.compression import open_text_input, split_compression_suffix
+from src.edi.invalid_data import ISSUE_TYPES
+from src.edi.parser import expand_input_paths
+from src.edi.splitter import ENVELOPE_SEGMENTS, TRAILER_SEGMENTS, UNIT_START
+
+RULES = ISSUE_TYPES
+
+# Values the rules accept
+VALID_GENDERS = ['M', 'F']
+ADJUSTMENT_GROUP_CODES = ['CO', 'CR', 'OA', 'PI', 'PR']
+ICD10_PATTERN = re.compile(r'^[A-Z][0-9][0-9A-Z](\.?[0-9A-Z]{1,4})?$')
+NPI_PATTERN = re.compile(r'^[0-9]{10}$')
+
+# Fields kept per record, by transaction set (the first is the report key)
+FIELDS = {
+    '834': ['member_id', 'date_of_birth', 'gender', 'plan_id', 'effective_date', 'termination_date'],
+    '837': ['claim_id', 'billed_amount', 'line_amount', 'service_date', 'provider_npi', 'diagnosis_codes'],
+    '835': ['claim_id', 'billed_amount', 'paid_amount', 'adjustment_code'],
+}
+
+# X12 segments the rules read, by transaction set
+X12_SEGMENTS = {
+    '834': {'NM1', 'DMG', 'HD', 'DTP'},
+    '837': {'CLM', 'SV1', 'DTP', 'NM1', 'HI'},
+    '835': {'CLP', 'CAS'},
+}
+
+# Segments that end the current unit
+BOUNDARY_SEGMENTS = ENVELOPE_SEGMENTS | TRAILER_SEGMENTS
+
+# Report key column of CSV input (X12 835 files carry no payment ID, so their key is claim_id)
+CSV_KEYS = {'834': 'member_id', '837': 'claim_id', '835': 'payment_id'}
+
+# Rules that need a field the CSV layout does not have
+CSV_UNCHECKED = {'837': ['charge_mismatch']}
+
+
+def detect_format(path):
+    """'csv' for .csv files (compressed or not), otherwise 'x12'"""
+    base, _ = split_compression_suffix(path)
+    return 'csv' if os.path.splitext(base)[1].lower() == '.csv' else 'x12'
+
+
+def csv_transaction_type(columns):
+    """Transaction set of a generator CSV file, from its header"""
+    if 'payment_id' in columns:
+        return '835'
+    if 'claim_id' in columns:
+        return '837'
+    if 'subscriber_id' in columns:
+        return '834'
+    raise ValueError("Cannot tell the transaction set of a CSV file with columns: " + ', '.join(columns))
+
+
+def d8_date(value):
+    """CSV date (YYYY-MM-DD) as an X12 D8 date (CCYYMMDD), which compare as strings"""
+    return value.replace('-', '')
+
+
+def _x12_834(unit):
+    member_id = dob = gender = plan_id = effective = termination = ''
+    for segment_id, elements in unit:
+        if segment_id == 'NM1':
+            if elements[0] == 'IL':
+                member_id = elements[-1]
+        elif segment_id == 'DMG':
+            dob = elements[1] if len(elements) > 1 else ''
+            gender = elements[2] if len(elements) > 2 else ''
+        elif segment_id == 'HD':
+            plan_id = elements[3] if len(elements) > 3 else ''
+        elif len(elements) > 2:  # DTP
+            if elements[0] == '356':
+                effective = elements[2]
+            elif elements[0] == '357':
+                termination = elements[2]
+    return member_id, dob, gender, plan_id, effective, termination
+
+
+def _x12_837(unit, component_separator):
+    claim_id = billed = service_date = npi = ''
+    lines = 0
+    diagnoses = []
+    for segment_id, elements in unit:
+        if segment_id == 'CLM':
+            claim_id, billed = elements[0], elements[1]
+        elif segment_id == 'SV1':
+            lines += _cents(elements[1])
+        elif segment_id == 'DTP':
+            # The claim's date comes before its service lines' dates
+            if not service_date and elements[0] == '472':
+                service_date = elements[2]
+        elif segment_id == 'NM1':
+            if elements[0] == '85':
+                npi = elements[-1]
+        else:  # HI
+            diagnoses.extend(element.split(component_separator)[-1] for element in elements)
+    return claim_id, billed, lines, service_date, npi, diagnoses
+
+
+def _x12_835(unit):
+    claim_id = billed = paid = adjustment_code = ''
+    for segment_id, elements in unit:
+        if segment_id == 'CLP':
+            claim_id, billed, paid = elements[0], elements[2], elements[3]
+        elif not adjustment_code:  # CAS
+            adjustment_code = elements[0]
+    return claim_id, billed, paid, adjustment_code
+
+
+def _cents(amount):
+    """Integer cents of an amount string ("403.30", "-12", "")"""
+    return int(round(float(amount) * 100)) if amount else 0
+
+
+def amount_cents(values):
+    """Amount strings as float64 cents (NaN where empty)"""
+    amounts = np.asarray(values, dtype=str)
+    amounts = np.where(amounts == '', 'nan', amounts).astype(np.float64)
+    return np.rint(amounts * 100)
+
+
+def _matches(pattern, values):
+    return np.fromiter((pattern.match(value) is not None for value in values), dtype=bool, count=len(values))
+
+
+class DataQualityValidator:
+    """
+    Evaluates one transaction set's rules on batches of records
+
+    Args:
+        transaction_type: "834", "837" or "835"
+        as_of: Date that effective and service dates may not be after (default: today)
+        plan_ids: Known health plan IDs (default: the generator's HEALTH_PLANS)
+        claim_id_pattern: Regular expression an 835 claim ID must match
+                          (default: VALIDATOR_CLAIM_ID_PATTERN)
+        unchecked: Rules that cannot be evaluated on this input
+    """
+
+    def __init__(self, transaction_type, as_of=None, plan_ids=None, claim_id_pattern=None, unchecked=()):
+        if plan_ids is None:
+            from src.edi.generator import HEALTH_PLANS
+            plan_ids = [plan['id'] for plan in HEALTH_PLANS]
+        self.transaction_type = transaction_type
+        self.rules = [rule for rule in RULES[transaction_type] if rule not in unchecked]
+        self.as_of = (as_of or date.today()).strftime('%Y%m%d')
+        self.plan_ids = list(plan_ids)
+        self.claim_id_pattern = re.compile(claim_id_pattern or VALIDATOR_CLAIM_ID_PATTERN)
+        self._check = getattr(self, f'_check_{transaction_type}')
+
+    def check(self, columns):
+        """
+        Evaluate the rules on a batch
+
+        Args:
+            columns: Dict of equal-length lists, one per FIELDS entry
+
+        Returns:
+            Dict of boolean NumPy arrays (True = violation), one per rule
+        """
+        masks = self._check(columns)
+        return {rule: masks[rule] for rule in self.rules}
+
+    def _check_834(self, columns):
+        dob = np.asarray(columns['date_of_birth'], dtype=str)
+        effective = np.asarray(columns['effective_date'], dtype=str)
+        termination = np.asarray(columns['termination_date'], dtype=str)
+        return {
+            'missing_dob': dob == '',
+            'invalid_effective_date': effective > self.as_of,
+            'start_after_end': (termination != '') & (effective != '') & (termination < effective),
+            'invalid_gender': ~np.isin(np.asarray(columns['gender'], dtype=str), VALID_GENDERS),
+            'wrong_plan_id': ~np.isin(np.asarray(columns['plan_id'], dtype=str), self.plan_ids),
+        }
+
+    def _check_837(self, columns):
+        billed = amount_cents(columns['billed_amount'])
+        lines = np.asarray(columns['line_amount'], dtype=np.float64)
+        diagnoses = columns['diagnosis_codes']
+        invalid_diagnosis = np.fromiter(
+            (not all(ICD10_PATTERN.match(code) for code in codes) for codes in diagnoses),
+            dtype=bool, count=len(diagnoses)
+        )
+        return {
+            # A negative total is negative_amount's violation
+            'charge_mismatch': (billed >= 0) & (billed != lines),
+            'invalid_diagnosis': invalid_diagnosis,
+            'future_service_date': np.asarray(columns['service_date'], dtype=str) > self.as_of,
+            'invalid_npi_length': ~_matches(NPI_PATTERN, columns['provider_npi']),
+            'negative_amount': billed < 0,
+        }
+
+    def _check_835(self, columns):
+        billed = amount_cents(columns['billed_amount'])
+        paid = amount_cents(columns['paid_amount'])
+        adjustment_code = np.asarray(columns['adjustment_code'], dtype=str)
+        return {
+            'negative_payment': paid < 0,
+            'mismatched_ids': ~_matches(self.claim_id_pattern, columns['claim_id']),
+            'invalid_adjustment_code': (adjustment_code != '') & ~np.isin(adjustment_code, ADJUSTMENT_GROUP_CODES),
+            'payment_exceeds_billed': paid > billed,
+        }
+
+
+def _x12_segments(paths, segment_delimiter):
+    """Yield the raw segments of X12 files, read in chunks"""
+    for path in paths:
+        with open_text_input(path) as f:
+            remainder = ''
+            while True:
+                chunk = f.read(PARSER_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                pieces = (remainder + chunk).split(segment_delimiter)
+                remainder = pieces.pop()
+                yield from pieces
+            yield remainder
+
+
+def x12_units(input_file, segments, parser=None, set_headers=False):
+    """
+    Yield (transaction_type, unit, component_separator) for each X12 member, claim or payment
+
+    Units are delimited as by splitter.X12Source, but only the segments
+    named in segments (a set per transaction set) are split into
+    elements and kept, as (segment_id, elements) tuples.
+
+    With set_headers, the end of each transaction set is yielded too, as
+    (transaction_type, None, header) after its last unit; header holds
+    the ST segment and the wanted segments before the set's first unit
+    (such as the 835 BPR).
+    """
+    from src.edi.parser import EDIParser
+
+    parser = parser or EDIParser()
+    delimiter = parser.element_delimiter
+    transaction_type = unit_start = None
+    wanted = ()
+    component_separator = ':'
+    unit = header = None
+    for segment in _x12_segments(expand_input_paths(input_file), parser.segment_delimiter):
+        segment = segment.strip()
+        if not segment:
+            continue
+        segment_id, _, rest = segment.partition(delimiter)
+        if segment_id in wanted:
+            if unit is not None:
+                unit.append((segment_id, rest.split(delimiter)))
+            elif header is not None:
+                header.append((segment_id, rest.split(delimiter)))
+        elif segment_id in BOUNDARY_SEGMENTS:
+            if unit:
+                yield transaction_type, unit, component_separator
+            unit = None
+            if segment_id == 'ST':
+                elements = rest.split(delimiter)
+                transaction_type = elements[0]
+                if transaction_type not in UNIT_START:
+                    raise ValueError(f"Unsupported transaction set: {transaction_type}")
+                unit_start = UNIT_START[transaction_type]
+                wanted = segments[transaction_type]
+                if set_headers:
+                    header = [(segment_id, elements)]
+            elif segment_id == 'SE' and header is not None:
+                yield transaction_type, None, header
+                header = None
+            elif segment_id == 'ISA':
+                elements = rest.split(delimiter)
+                if len(elements) > 15:
+                    component_separator = elements[15]
+        elif segment_id == unit_start and not (transaction_type == '834' and rest.startswith(delimiter)):
+            # A terminated 834 member's second INS (INS***reason) continues the member
+            if unit:
+                yield transaction_type, unit, component_separator
+            unit = []
+    if unit:
+        yield transaction_type, unit, component_separator
+
+
+def _x12_records(input_file, parser=None):
+    """Yield (transaction_type, key, fields) for each X12 member, claim or payment"""
+    for transaction_type, unit, component_separator in x12_units(input_file, X12_SEGMENTS, parser):
+        yield transaction_type, *_unit_fields(transaction_type, unit, component_separator)
+
+
+def _unit_fields(transaction_type, unit, component_separator):
+    """(key, fields) of one X12 unit"""
+    if transaction_type == '834':
+        fields = _x12_834(unit)
+    elif transaction_type == '837':
+        fields = _x12_837(unit, component_separator)
+    else:
+        fields = _x12_835(unit)
+    return fields[0], fields
+
+
+def _csv_records(input_file):
+    """Yield (transaction_type, key, fields) for each CSV row"""
+    for path in expand_input_paths(input_file):
+        with open_text_input(path) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                continue
+            transaction_type = csv_transaction_type(header)
+            index = {column: position for position, column in enumerate(header)}
+            # CSV columns are named like the fields; line_amount has no column
+            positions = [index.get(field) for field in FIELDS[transaction_type]]
+            key_position = index[CSV_KEYS[transaction_type]]
+            for row in reader:
+                fields = [row[position] if position is not None else '' for position in positions]
+                if transaction_type == '834':
+                    fields[1], fields[4], fields[5] = d8_date(fields[1]), d8_date(fields[4]), d8_date(fields[5])
+                elif transaction_type == '837':
+                    fields[2] = float('nan')
+                    fields[3] = d8_date(fields[3])
+                    fields[5] = fields[5].split('|') if fields[5] else []
+                yield transaction_type, row[key_position], fields
+
+
+def validate_file(input_file, report_file=None, format=None, as_of=None, plan_ids=None, claim_id_pattern=None,
+                  batch_records=None, parser=None):
+    """
+    Check an 834, 837 or 835 file against the data-quality rules
+
+    Args:
+        input_file: Path, glob or list of paths (.gz/.bz2/.xz/... are decompressed while reading)
+        report_file: Violation report to write, one CSV row per violated rule
+                     (record, key, issue_type); None = counts only
+        format: "x12" or "csv" (default: from the extension of the first input)
+        as_of, plan_ids, claim_id_pattern: See DataQualityValidator
+        batch_records: Records evaluated per batch (default: VALIDATOR_BATCH_RECORDS)
+        parser: EDIParser supplying the X12 delimiters
+
+    Returns:
+        Dict with input_file, transaction_type, format, records,
+        invalid_records (records violating any rule), invalid_rate,
+        violations (count per rule), unchecked (rules the format cannot
+        express) and report_file
+    """
+    if format is None:
+        format = detect_format(expand_input_paths(input_file)[0])
+    records = _x12_records(input_file, parser) if format == 'x12' else _csv_records(input_file)
+    batch_records = batch_records or VALIDATOR_BATCH_RECORDS
+
+    validator = None
+    violations = {}
+    total = invalid = 0
+    report = writer = None
+    batch_keys = []
+    batch_columns = None
+    try:
+        for transaction_type, key, fields in records:
+            if validator is None:
+                unchecked = CSV_UNCHECKED.get(transaction_type, []) if format == 'csv' else []
+                validator = DataQualityValidator(transaction_type, as_of, plan_ids, claim_id_pattern, unchecked)
+                violations = dict.fromkeys(validator.rules, 0)
+                batch_columns = {field: [] for field in FIELDS[transaction_type]}
+                if report_file:
+                    report_dir = os.path.dirname(report_file)
+                    if report_dir:
+                        os.makedirs(report_dir, exist_ok=True)
+                    report = open(report_file, 'w', newline='')
+                    writer = csv.writer(report)
+                    key_name = CSV_KEYS[transaction_type] if format == 'csv' else FIELDS[transaction_type][0]
+                    writer.writerow(['record', key_name, 'issue_type'])
+            elif transaction_type != validator.transaction_type:
+                raise ValueError(f"Mixed transaction sets in {input_file}: "
+                                 f"{validator.transaction_type} and {transaction_type}")
+            batch_keys.append(key)
+            for column, value in zip(batch_columns.values(), fields):
+                column.append(value)
+            if len(batch_keys) >= batch_records:
+                invalid += _check_batch(validator, batch_columns, batch_keys, total, violations, writer)
+                total += len(batch_keys)
+                batch_keys = []
+                batch_columns = {field: [] for field in batch_columns}
+        if batch_keys:
+            invalid += _check_batch(validator, batch_columns, batch_keys, total, violations, writer)
+            total += len(batch_keys)
+    finally:
+        if report is not None:
+            report.close()
+
+    transaction_type = validator.transaction_type if validator else None
+    return {
+        'input_file': input_file,
+        'transaction_type': transaction_type,
+        'format': format,
+        'records': total,
+        'invalid_records': invalid,
+        'invalid_rate': invalid / total if total else 0.0,
+        'violations': violations,
+        'unchecked': CSV_UNCHECKED.get(transaction_type, []) if format == 'csv' else [],
+        'report_file': report_file if report is not None else None,
+    }
+
+
+def _check_batch(validator, columns, keys, offset, violations, writer):
+    """Evaluate a batch, count and report its violations; returns the number of invalid records"""
+    masks = validator.check(columns)
+    stacked = np.vstack([masks[rule] for rule in validator.rules])
+    for rule, count in zip(validator.rules, stacked.sum(axis=1).tolist()):
+        violations[rule] += count
+    if writer is not None:
+        # Record-major order: a record's violations are adjacent, in rule order
+        records, rules = np.nonzero(stacked.T)
+        writer.writerows(
+            (offset + record, keys[record], validator.rules[rule])
+            for record, rule in zip(records.tolist(), rules.tolist())
+        )
+    return int(stacked.any(axis=0).sum())
@@ -0,0 +1,283 @@
+"""
+Shared X12 serialization for the 834, 837 and 835 writers
+
+Segment layouts are written once in canonical notation ('*' between
+elements, ':' between components, '{}' for each value) and compiled into
+%-format strings using the delimiters from the interchange settings in
+config. X12Writer collects rendered segments into large buffers that are
+encoded and written in one call per chunk.
+"""
+
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    SENDER_ID, RECEIVER_ID, X12_SEGMENT_TERMINATOR, X12_ELEMENT_SEPARATOR, X12_COMPONENT_SEPARATOR, X12_LINE_SEPARATOR,
+    X12_BUFFER_SIZE
+)
+
+# Canonical segment layouts shared by all writers
+SEGMENT_LAYOUTS = {
+    # Envelope
+    'ISA': "ISA*00*          *00*          *ZZ*{}*ZZ*{}*{}*{}*U*00401*{}*0*P*{}",
+    'GS': "GS*{}*{}*{}*{}*{}*{}*X*{}",
+    'ST': "ST*{}*{}*{}",
+    'SE': "SE*{}*{}",
+    'GE': "GE*{}*{}",
+    'IEA': "IEA*{}*{}",
+    # Shared
+    'REF': "REF*{}*{}",
+    'N1': "N1*{}*{}*FI*{}",
+    'N3': "N3*{}",
+    'N4': "N4*{}*{}*{}",
+    'NM1_IL': "NM1*IL*1*{}*{}***MI*{}",
+    'DMG': "DMG*D8*{}*{}",
+    'DTP': "DTP*{}*D8*{}",
+    'LX': "LX*{}",
+    # 834
+    'BGN': "BGN*00*{}*{}*{}**{}",
+    'INS': "INS*Y*18*030*{}*{}***FT*Y",
+    'INS_TERM': "INS***{}",
+    'PER': "PER*IP**HP*{}*EM*{}",
+    'N4_COUNTRY': "N4*{}*{}*{}*{}",
+    'HD': "HD*030*HLT*{}*{}*{}",
+    # 837
+    'BHT': "BHT*0019*00*{}*{}*{}*CH",
+    'NM1_41': "NM1*41*2*PROVIDER BILLING*****46*{}",
+    'NM1_40': "NM1*40*2*INSURANCE COMPANY*****46*{}",
+    'HL': "HL*{}*{}*22*1",
+    'PRV': "PRV*BI*PXC*{}",
+    'NM1_85': "NM1*85*2*{}*{}***XX*{}",
+    'CLM': "CLM*{}*{}***{}:{}*Y*A*Y*Y",
+    'HI': "HI*ABK:{}",
+    'SV1': "SV1*{}*{}*UN*1***1",
+    # 835
+    'BPR': "BPR*I*{}*C*ACH*CC*01*{}**DA*{}*{}*{}",
+    'TRN': "TRN*1*{}*{}",
+    'CLP': "CLP*{}*{}*{}*{}*{}*{}",
+    'CAS': "CAS*{}*45*{}",
+    'NM1_82': "NM1*82*1*{}*{}***XX*{}",
+    'SVC': "SVC*HC:{}*{}*{}*{}",
+    'DTM': "DTM*{}*D8*{}",
+    'PLB': "PLB*{}*{}*CV:45*{}",
+}
+
+# Functional identifier code (GS01) and implementation version per transaction set
+TRANSACTION_VERSIONS = {
+    '834': ('BE', '004010X095A1'),
+    '837': ('HC', '004010X098A1'),
+    '835': ('HP', '004010X091A1'),
+}
+
+
+class Delimiters:
+    """
+    X12 interchange delimiters
+
+    Args:
+        segment: Segment terminator (default: X12_SEGMENT_TERMINATOR)
+        element: Element separator (default: X12_ELEMENT_SEPARATOR)
+        component: Component separator, also written as ISA16 (default: X12_COMPONENT_SEPARATOR)
+        line: Separator written between segments for readability (default: X12_LINE_SEPARATOR)
+    """
+
+    def __init__(self, segment=None, element=None, component=None, line=None):
+        self.segment = X12_SEGMENT_TERMINATOR if segment is None else segment
+        self.element = X12_ELEMENT_SEPARATOR if element is None else element
+        self.component = X12_COMPONENT_SEPARATOR if component is None else component
+        self.line = X12_LINE_SEPARATOR if line is None else line
+
+
+class SegmentTemplate:
+    """
+    A segment layout precompiled for one set of delimiters
+
+    Args:
+        layout: Canonical layout, e.g. "CLM*{}*{}***{}:{}*Y*A*Y*Y"
+        delimiters: Delimiters to compile for
+    """
+
+    def __init__(self, layout, delimiters):
+        self.layout = layout
+        self.field_count = layout.count('{}')
+        escape = lambda text: text.replace('%', '%%')
+        compiled = escape(layout).replace('{}', '\0')
+        compiled = compiled.replace('*', escape(delimiters.element)).replace(':', escape(delimiters.component))
+        self._format = compiled.replace('\0', '%s') + escape(delimiters.segment)
+
+    def render(self, *values):
+        """Render the segment, including its terminator"""
+        return self._format % values
+
+
+class X12Serializer:
+    """
+    Compiled segment templates plus value formatting for one delimiter set
+
+    Args:
+        delimiters: Delimiters instance (default: from config)
+    """
+
+    def __init__(self, delimiters=None):
+        self.delimiters = delimiters or Delimiters()
+        self.templates = {
+            name: SegmentTemplate(layout, self.delimiters)
+            for name, layout in SEGMENT_LAYOUTS.items()
+        }
+
+    def render(self, name, *values):
+        """Render a named segment"""
+        return self.templates[name].render(*values)
+
+    def renderer(self, name):
+        """Return the bound render function for a named segment (for hot loops)"""
+        return self.templates[name].render
+
+    def composite(self, *parts):
+        """Join a composite element, dropping empty trailing components"""
+        parts = list(parts)
+        while parts and not parts[-1]:
+            parts.pop()
+        return self.delimiters.component.join(parts)
+
+
+def interchange_header(x12, current_date, control_num):
+    """Render the ISA segment; ISA16 carries the component separator"""
+    return x12.render(
+        'ISA', SENDER_ID.ljust(15), RECEIVER_ID.ljust(15), current_date.strftime("%y%m%d"),
+        current_date.strftime("%H%M"), control_num, x12.delimiters.component
+    )
+
+
+def group_header(x12, transaction_type, current_date, group_control_num=1):
+    """Render the GS segment opening a functional group"""
+    gs_code, version = TRANSACTION_VERSIONS[transaction_type]
+    return x12.render(
+        'GS', gs_code, SENDER_ID, RECEIVER_ID, current_date.strftime("%Y%m%d"),
+        current_date.strftime("%H%M%S"), group_control_num, version
+    )
+
+
+def transaction_set_header(x12, transaction_type, set_control_num=1):
+    """Render the ST segment opening a transaction set"""
+    version = TRANSACTION_VERSIONS[transaction_type][1]
+    return x12.render('ST', transaction_type, set_control_number(set_control_num), version)
+
+
+def set_control_number(number):
+    """ST02/SE02 control number: at least four digits"""
+    return '%04d' % number
+
+
+def envelope_segments(x12, transaction_type, current_date, control_num):
+    """
+    Render the ISA, GS and ST segments opening a single-set interchange
+
+    Args:
+        x12: X12Serializer
+        transaction_type: "834", "837" or "835"
+        current_date: datetime of the interchange
+        control_num: ISA control number
+
+    Returns:
+        List of [ISA, GS, ST] segments
+    """
+    return [
+        interchange_header(x12, current_date, control_num),
+        group_header(x12, transaction_type, current_date),
+        transaction_set_header(x12, transaction_type),
+    ]
+
+
+def format_amount(value):
+    """Format a dollar amount with two decimals"""
+    return '%.2f' % value
+
+
+def format_date(value):
+    """Format a date as CCYYMMDD (empty string for None)"""
+    if value is None:
+        return ''
+    return value.isoformat()[:10].replace('-', '')
+
+
+class X12Writer:
+    """
+    Buffered X12 segment writer
+
+    Rendered segments are collected in memory and written to a binary file
+    object in chunks of roughly `buffer_size` bytes, separated by the line
+    separator. The writer counts segments so callers can compute SE counts.
+
+    Args:
+        fileobj: Binary file object to write to
+        delimiters: Delimiters (for the line separator)
+        buffer_size: Approximate bytes to buffer before each write
+        capture: Keep the full text so getvalue() can return it
+        encoding: Output encoding
+    """
+
+    def __init__(self, fileobj, delimiters=None, buffer_size=X12_BUFFER_SIZE, capture=False, encoding='utf8'):
+        self.fileobj = fileobj
+        self.delimiters = delimiters or Delimiters()
+        self.buffer_size = buffer_size
+        self.capture = capture
+        self.encoding = encoding
+        self.segment_count = 0
+        self.bytes_written = 0
+        self._pending = []
+        self._pending_size = 0
+        self._captured = []
+        self._started = False
+
+    def write(self, segment):
+        """Write one rendered segment"""
+        self._pending.append(segment)
+        self.segment_count += 1
+        self._pending_size += len(segment)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, segments):
+        """Write several rendered segments"""
+        self._pending.extend(segments)
+        self.segment_count += len(segments)
+        self._pending_size += sum(len(s) for s in segments)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write out buffered segments"""
+        if not self._pending:
+            return
+        sep = self.delimiters.line
+        chunk = sep.join(self._pending)
+        if self._started:
+            chunk = sep + chunk
+        self._started = True
+        if self.capture:
+            self._captured.append(chunk)
+        data = chunk.encode(self.encoding)
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
+        self._pending = []
+        self._pending_size = 0
+
+    @property
+    def size(self):
+        """Approximate bytes in the output so far, including buffered segments"""
+        pending = self._pending_size + len(self.delimiters.line) * len(self._pending)
+        return self.bytes_written + pending
+
+    def getvalue(self):
+        """Return everything written so far (requires capture=True)"""
+        self.flush()
+        return ''.join(self._captured)
+
+
+# Default serializer compiled from the configured interchange delimiters
+default_serializer = X12Serializer()
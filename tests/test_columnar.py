@@ -0,0 +1,104 @@
+"""
+Tests for Parquet and Arrow IPC output
+"""
+
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.sinks import make_sink
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+class TestColumnarOutput(unittest.TestCase):
+    """Test cases for typed columnar output"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_parquet_matches_csv(self):
+        """Parquet rows carry the CSV values, typed"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        generate_edi_834(20, os.path.join(self.test_dir, "834.txt"))
+        generate_edi_837(15, 1, os.path.join(self.test_dir, "837.txt"))
+        results = generate_edi_835(12, os.path.join(self.test_dir, "835.csv"), format=["csv", "parquet"])
+        self.assertIsNone(results["parquet"]["data"])
+        self.assertEqual(results["parquet"]["total_records"], 12)
+
+        table = pq.read_table(os.path.join(self.test_dir, "835.parquet"))
+        csv_rows = results["csv"]["data"]
+        self.assertEqual(table.column_names, list(csv_rows[0]))
+        self.assertEqual(table.schema.field("paid_amount").type, pa.decimal128(12, 2))
+        self.assertEqual(table.schema.field("service_date").type, pa.date32())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("claim_status").type))
+        for row, csv_row in zip(table.to_pylist(), csv_rows):
+            self.assertEqual(row["claim_id"], csv_row["claim_id"])
+            self.assertEqual(row["paid_amount"], Decimal(csv_row["paid_amount"]))
+            self.assertEqual(row["service_date"].isoformat(), csv_row["service_date"])
+            self.assertEqual(row["claim_status"], csv_row["claim_status"])
+
+    def test_row_groups(self):
+        """Rows are written in row groups whose dictionary codes stay stable across groups"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from src.edi.columnar import ArrowEnrollmentSink, ParquetEnrollmentSink
+        from src.edi.generator import _generate_edi_834
+
+        path = os.path.join(self.test_dir, "834.parquet")
+        arrow_path = os.path.join(self.test_dir, "834.arrow")
+        sinks = [
+            ParquetEnrollmentSink(path, row_group_size=100),
+            ArrowEnrollmentSink(arrow_path, compression="zstd", row_group_size=100),
+        ]
+        results = _generate_edi_834(250, sinks)
+        self.assertEqual([result["row_groups"] for result in results], [3, 3])
+
+        metadata = pq.ParquetFile(path).metadata
+        self.assertEqual(metadata.num_rows, 250)
+        self.assertEqual(metadata.num_row_groups, 3)
+        state_index = pq.ParquetFile(path).schema_arrow.get_field_index("state")
+        self.assertIn("RLE_DICTIONARY", metadata.row_group(2).column(state_index).encodings)
+
+        reader = pa.ipc.open_file(arrow_path)
+        self.assertEqual(reader.num_record_batches, 3)
+        table = reader.read_all()
+        self.assertEqual(table.column("state").to_pylist(), pq.read_table(path).column("state").to_pylist())
+
+        # Both files are hashed as the writers produce them
+        import hashlib
+        import json
+        with open(os.path.join(self.test_dir, "_manifest.json")) as f:
+            files = json.load(f)["files"]
+        for name in ("834.parquet", "834.arrow"):
+            with open(os.path.join(self.test_dir, name), 'rb') as f:
+                self.assertEqual(files[name]["sha256"], hashlib.sha256(f.read()).hexdigest())
+            self.assertEqual(files[name]["records"], 250)
+
+    def test_unsupported_compression(self):
+        """Codecs the columnar format cannot use are rejected"""
+        with self.assertRaises(ValueError):
+            make_sink("834", "arrow", os.path.join(self.test_dir, "834.arrow"), compression="bz2")
+        sink = make_sink("834", "parquet", os.path.join(self.test_dir, "834.parquet"), compression="gzip")
+        self.assertEqual(sink.output_file, os.path.join(self.test_dir, "834.parquet"))
+
+
+if __name__ == '__main__':
+    unittest.main()
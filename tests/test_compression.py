@@ -0,0 +1,91 @@
+"""
+Tests for streaming compressed output
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.compression import CODECS, codec_for_path, get_codec, open_output, split_compression_suffix
+from src.edi.generator import generate_edi_834, generate_edi_837, global_data
+
+OPENERS = {'gzip': gzip.open, 'bz2': bz2.open, 'lzma': lzma.open}
+
+
+class TestCompression(unittest.TestCase):
+    """Test cases for compressed output files"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_stdlib_codecs_round_trip(self):
+        """gzip, bz2 and lzma output decompresses to what was written"""
+        payload = b"CLM*CLM1*100.00***B:*Y*A*Y*Y~\n" * 5000
+        for name, opener in OPENERS.items():
+            path = os.path.join(self.test_dir, "out" + CODECS[name].extension)
+            with open_output(path, level=1, block_size=4096) as f:
+                f.write(payload)
+            with opener(path, 'rb') as f:
+                self.assertEqual(f.read(), payload, name)
+            self.assertLess(os.path.getsize(path), len(payload) // 10)
+
+    @unittest.skipUnless(CODECS['zstd'].available, "zstandard not installed")
+    def test_zstd(self):
+        """zstd output decompresses to what was written"""
+        import zstandard
+        path = os.path.join(self.test_dir, "out.zst")
+        with open_output(path) as f:
+            f.write(b"x" * 10000)
+        with open(path, 'rb') as f:
+            self.assertEqual(zstandard.ZstdDecompressor().stream_reader(f).read(), b"x" * 10000)
+
+    def test_codec_lookup(self):
+        """Codecs come from names or extensions; unknown names are rejected"""
+        self.assertEqual(codec_for_path("claims.txt.gz"), 'gzip')
+        self.assertEqual(codec_for_path("claims.csv.xz"), 'lzma')
+        self.assertIsNone(codec_for_path("claims.txt"))
+        self.assertEqual(split_compression_suffix("claims.txt.bz2"), ("claims.txt", ".bz2"))
+        self.assertIn(get_codec('fast').name, ['zstd', 'lz4', 'gzip'])
+        with self.assertRaises(ValueError):
+            get_codec('rar')
+
+    def test_generator_writes_compressed_x12(self):
+        """A .gz output path produces a gzip X12 file that is not kept in memory"""
+        path = os.path.join(self.test_dir, "834.txt.gz")
+        result = generate_edi_834(10, path)
+        self.assertEqual(result, path)
+        with gzip.open(path, 'rt', encoding='utf8') as f:
+            content = f.read()
+        self.assertTrue(content.startswith("ISA*"))
+        self.assertTrue(content.endswith("~"))
+        self.assertIn("ST*834", content)
+
+    def test_generator_multi_format_compression(self):
+        """An explicit codec applies to every format and appends its extension"""
+        generate_edi_834(10, os.path.join(self.test_dir, "834.txt"))
+        results = generate_edi_837(
+            8, 1, os.path.join(self.test_dir, "837.txt"), format=["x12", "csv"], compression="bz2"
+        )
+        self.assertEqual(results["x12"], os.path.join(self.test_dir, "837.txt.bz2"))
+        self.assertIsNone(results["csv"]["data"])
+        self.assertEqual(results["csv"]["total_records"], 8)
+        with bz2.open(os.path.join(self.test_dir, "837.csv.bz2"), 'rt', encoding='utf-8') as f:
+            self.assertEqual(len(f.read().strip().split('\n')), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
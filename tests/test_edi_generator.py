@@ -244,6 +244,21 @@ class TestEDIGenerator(unittest.TestCase):
         self.assertEqual(isa_control, iea_control,
                         "ISA and IEA control numbers should match")
 
+    def test_edi_835_bpr_total_matches_clp(self):
+        """Test BPR total equals the sum of CLP paid amounts"""
+        generate_edi_834(10, os.path.join(self.test_dir, "temp_834.txt"))
+        generate_edi_837(20, 1, os.path.join(self.test_dir, "temp_837.txt"))
+        generate_edi_835(15, self.test_output_835)
+
+        with open(self.test_output_835, 'r', encoding='utf8') as f:
+            lines = [line.strip().rstrip('~') for line in f if line.strip()]
+
+        bpr_total = next(line.split('*')[2] for line in lines if line.startswith("BPR"))
+        clp_paid = [line.split('*')[4] for line in lines if line.startswith("CLP")]
+        to_cents = lambda amount: int(amount.replace('.', ''))
+        self.assertEqual(len(clp_paid), 15)
+        self.assertEqual(to_cents(bpr_total), sum(to_cents(amount) for amount in clp_paid))
+
     def test_edi_834_segment_structure(self):
         """Test EDI 834 segment structure and required segments"""
         generate_edi_834(5, self.test_output_834)
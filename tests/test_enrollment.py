@@ -0,0 +1,72 @@
+"""
+Tests for the vectorized enrollment attribute engine
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.enrollment import (
+    COVERAGE_STATUS_CODES,
+    EFFECTIVE_DATE_WINDOW_DAYS,
+    TERMINATION_REASONS,
+    draw_enrollment_batch,
+    iter_enrollment_records
+)
+
+PLANS = [{"id": "PLAN-A"}, {"id": "PLAN-B"}, {"id": "PLAN-C"}]
+
+
+class TestEnrollmentEngine(unittest.TestCase):
+    """Test cases for draw_enrollment_batch"""
+
+    def setUp(self):
+        self.today = date(2025, 6, 30)
+        self.batch = draw_enrollment_batch(20000, PLANS, today=self.today, rng=np.random.default_rng(7))
+
+    def test_status_distribution(self):
+        """Status codes follow the 85/5/5/1... weights"""
+        status = self.batch['status']
+        self.assertTrue(set(status.tolist()) <= set(COVERAGE_STATUS_CODES))
+        self.assertAlmostEqual(float(np.mean(status == 'A')), 0.85, delta=0.02)
+        self.assertAlmostEqual(float(np.mean(status == 'T')), 0.05, delta=0.01)
+
+    def test_termination_only_for_terminated(self):
+        """Only terminated members get a reason and an end date"""
+        terminated = self.batch['status'] == 'T'
+        self.assertTrue(np.all(~np.isnat(self.batch['end_date'][terminated])))
+        self.assertTrue(np.all(np.isnat(self.batch['end_date'][~terminated])))
+        self.assertTrue(set(self.batch['termination_reason'][terminated].tolist()) <= set(TERMINATION_REASONS))
+        self.assertTrue(np.all(self.batch['termination_reason'][~terminated] == ''))
+
+    def test_effective_date_window(self):
+        """Effective dates fall within the last two years"""
+        start = self.batch['start_date']
+        self.assertEqual(start.max(), np.datetime64(self.today))
+        self.assertGreaterEqual(start.min(), np.datetime64(self.today - timedelta(days=EFFECTIVE_DATE_WINDOW_DAYS)))
+
+    def test_records(self):
+        """Records carry plain Python values"""
+        records = list(iter_enrollment_records(self.batch, PLANS))
+        self.assertEqual(len(records), 20000)
+        for record in records[:200]:
+            self.assertIn(record['plan'], PLANS)
+            self.assertIsInstance(record['start_date'], date)
+            status, reason, end_date = record['status_info']
+            if status == 'T':
+                self.assertIsInstance(end_date, date)
+            else:
+                self.assertIsNone(reason)
+                self.assertIsNone(end_date)
+            self.assertIn(record['medicare_plan'], [None, 'A', 'B', 'C', 'E'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Tests for the external merge sort and member-sorted output
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.external_sort import ExternalSorter
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.splitter import sort_x12
+
+
+def _read(path):
+    with open(path) as f:
+        return [line.rstrip('~').split('*') for line in f.read().split('\n')]
+
+
+class TestExternalSorter(unittest.TestCase):
+    """Test cases for sorted runs spilled to disk and merged"""
+
+    def test_spilled_sort_is_stable(self):
+        """Runs spilled to disk merge into a stable sort"""
+        rng = random.Random(5)
+        items = [(rng.randrange(40), i) for i in range(5000)]
+        for max_fan_in in (2, 3, 64):
+            with ExternalSorter(key=lambda item: item[0], run_size=50, max_fan_in=max_fan_in) as sorter:
+                sorter.add_many(items)
+                self.assertEqual(sorter.spilled_runs, 100)
+                self.assertEqual(list(sorter), sorted(items, key=lambda item: item[0]))
+
+    def test_open_runs_bounded(self):
+        """Runs are merged as they accumulate, so few spill files are open"""
+        sorter = ExternalSorter(key=lambda item: item, run_size=10, max_fan_in=4)
+        sorter.add_many(range(10000, 0, -1))
+        self.assertLess(len(sorter._runs), 4 * 4)
+        self.assertEqual(list(sorter), list(range(1, 10001)))
+
+    def test_small_input_stays_in_memory(self):
+        """Input that fits in one run is never spilled"""
+        sorter = ExternalSorter(key=lambda item: -item, run_size=100)
+        sorter.add_many([3, 1, 2])
+        self.assertEqual(list(sorter), [3, 2, 1])
+        self.assertEqual(sorter.spilled_runs, 0)
+
+
+class TestMemberSortedOutput(unittest.TestCase):
+    """Test cases for output ordered by (member_id, service_date)"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        generate_edi_834(30, os.path.join(self.test_dir, "834.txt"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_generated_in_order(self):
+        """Claims and payments are generated sorted by member and service date"""
+        claims = generate_edi_837(
+            120, 1, os.path.join(self.test_dir, "837.csv"), format="csv", invalid_rate=0.2, sort_by_member=True
+        )
+        keys = [(row['member_id'], row['service_date']) for row in claims['data']]
+        self.assertEqual(len(keys), 120)
+        self.assertEqual(keys, sorted(keys))
+
+        payments = generate_edi_835(80, os.path.join(self.test_dir, "835.csv"), format="csv", sort_by_member=True)
+        keys = [(row['member_id'], row['service_date']) for row in payments['data']]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_sort_x12(self):
+        """Existing files are sorted through spilled runs into one valid interchange"""
+        generate_edi_837(60, 1, os.path.join(self.test_dir, "837.txt"))
+        generate_edi_835(45, os.path.join(self.test_dir, "835.txt"))
+
+        path = os.path.join(self.test_dir, "sorted_837.txt")
+        result = sort_x12(os.path.join(self.test_dir, "837.txt"), path, run_size=7, temp_dir=self.test_dir)
+        self.assertEqual(result['units'], 60)
+        self.assertGreater(result['spilled_runs'], 1)
+        segments = _read(path)
+        self.assertEqual(segments[-3], ['SE', str(len(segments) - 4), '0001'])
+        keys, member_id = [], None
+        for segment in segments:
+            if segment[0] == 'NM1' and segment[1] == 'IL':
+                member_id = segment[-1]
+            elif segment[0] == 'CLM':
+                keys.append([member_id])
+            elif segment[0] == 'DTP' and segment[1] == '472' and len(keys[-1]) == 1:
+                keys[-1].append(segment[3])
+        self.assertEqual(len(keys), 60)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual([s[1] for s in segments if s[0] == 'HL'], [str(n) for n in range(1, 61)])
+
+        path = os.path.join(self.test_dir, "sorted_835.txt")
+        sort_x12(os.path.join(self.test_dir, "835.txt"), path, run_size=10)
+        segments = _read(path)
+        bpr = [s for s in segments if s[0] == 'BPR'][0]
+        self.assertEqual(Decimal(bpr[2]), sum(Decimal(s[4]) for s in segments if s[0] == 'CLP'))
+        members = [s[-1] for s in segments if s[0] == 'NM1' and s[1] == 'IL']
+        self.assertEqual(members, sorted(members))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the cross-file referential integrity checker
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.integrity import BloomFilter, HashKeySet, check_integrity, key_hashes
+from src.edi.manifest import invalid_index_path
+
+
+def _report(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class TestIntegrity(unittest.TestCase):
+    """Test cases for orphan detection across generated 834/837/835 files"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def generate(self):
+        formats = ["x12", "csv"]
+        paths = {tt: {"x12": self.path(f"{tt}.txt"), "csv": self.path(f"{tt}.csv")} for tt in ("834", "837", "835")}
+        generate_edi_834(200, paths["834"], format=formats)
+        generate_edi_837(300, 1, paths["837"], format=formats)
+        generate_edi_835(250, paths["835"], format=formats, invalid_rate=0.2,
+                         invalid_weights={"mismatched_ids": 1})
+        return paths
+
+    def test_finds_orphan_payments(self):
+        """Exactly the payments with mismatched claim IDs are orphans, with either key set"""
+        paths = self.generate()
+        for format in ("x12", "csv"):
+            truth = {row['record'] for row in _report(invalid_index_path(paths["835"][format]))}
+            self.assertEqual(len(truth), 50)
+            for bloom_min_keys in (None, 1):
+                report = self.path(f"orphans_{format}.csv")
+                result = check_integrity(paths["834"][format], paths["837"][format], paths["835"][format],
+                                         report, bloom_min_keys=bloom_min_keys, batch_records=64)
+                kind = 'hash' if bloom_min_keys is None else 'bloom'
+                self.assertEqual({key_set['kind'] for key_set in result['key_sets'].values()}, {kind})
+                self.assertEqual(result['records'], {'834': 200, '837': 300, '835': 250})
+                self.assertEqual(result['orphans']['unknown_member'], 0)
+                self.assertEqual(result['orphans']['unknown_claim'], 50)
+                rows = _report(report)
+                self.assertEqual({row['record'] for row in rows}, truth)
+                self.assertTrue(all(row['reference'].startswith('MISMATCHED-') for row in rows))
+        # Only the CSV layouts carry enrollment IDs
+        csv_result = check_integrity(paths["834"]["csv"], paths["837"]["csv"])
+        self.assertEqual(csv_result['orphans'], {'unknown_member': 0, 'unknown_enrollment': 0})
+        x12_result = check_integrity(paths["834"]["x12"], paths["837"]["x12"])
+        self.assertEqual(x12_result['unchecked'], ['unknown_enrollment'])
+
+    def test_finds_unknown_members_and_enrollments(self):
+        """Claims of members or enrollments missing from the 834 are orphans"""
+        paths = self.generate()
+        with open(paths["837"]["csv"], newline='') as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            header = reader.fieldnames
+        rows[3]['member_id'] = 'SUB-UNKNOWN'
+        rows[5]['enrollment_id'] = 'ENR-UNKNOWN'
+        claims = self.path("837_edited.csv")
+        with open(claims, 'w', newline='') as f:
+            writer = csv.DictWriter(f, header)
+            writer.writeheader()
+            writer.writerows(rows)
+        report = self.path("orphans.csv")
+        result = check_integrity(paths["834"]["csv"], claims, report_file=report)
+        self.assertEqual(result['orphans'], {'unknown_member': 1, 'unknown_enrollment': 1})
+        self.assertEqual(
+            [(row['record'], row['key'], row['issue_type']) for row in _report(report)],
+            [('3', rows[3]['claim_id'], 'unknown_member'), ('5', rows[5]['claim_id'], 'unknown_enrollment')]
+        )
+
+    def test_key_sets(self):
+        """Hash sets are exact; Bloom filters never miss an added key"""
+        keys = [f"CLM{i:010d}" for i in range(20000)]
+        absent = key_hashes([f"SUB{i:010d}" for i in range(20000)])
+        hash_set = HashKeySet()
+        bloom = BloomFilter(len(keys), 0.01)
+        for start in range(0, len(keys), 3000):
+            hashes = key_hashes(keys[start:start + 3000])
+            hash_set.add(hashes)
+            bloom.add(hashes)
+        self.assertTrue(hash_set.contains(key_hashes(keys)).all())
+        self.assertFalse(hash_set.contains(absent).any())
+        self.assertTrue(bloom.contains(key_hashes(keys)).all())
+        self.assertLess(np.mean(bloom.contains(absent)), 0.02)
+        self.assertLess(bloom.nbytes, hash_set.nbytes / 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests for exact-rate invalid data injection
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from datetime import date
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.invalid_data import ISSUE_TYPES, InvalidDataPlanner, corrupt_835
+
+
+class TestInvalidDataPlanner(unittest.TestCase):
+    """Test cases for planning invalid records"""
+
+    def test_running_count_is_exact(self):
+        """After every batch, exactly round(records * rate) records are invalid"""
+        planner = InvalidDataPlanner("837", 0.013, rng=np.random.default_rng(1))
+        planned = 0
+        for size in [100, 7, 100, 1, 0, 250, 33]:
+            issues = planner.plan(size)
+            self.assertEqual(len(issues), size)
+            planned += size - issues.count(None)
+            self.assertEqual(planned, round(planner.records * 0.013))
+        self.assertEqual(planner.invalid_records, planned)
+
+    def test_weights(self):
+        """Issue types follow their weights; types left out never appear"""
+        planner = InvalidDataPlanner(
+            "834", 0.5, weights={'missing_dob': 3, 'invalid_gender': 1}, rng=np.random.default_rng(2)
+        )
+        counts = Counter()
+        for _ in range(8):
+            counts.update(issue for issue in planner.plan(100) if issue)
+        self.assertEqual(counts, Counter({'missing_dob': 300, 'invalid_gender': 100}))
+        self.assertEqual(planner.issue_counts['wrong_plan_id'], 0)
+        quota = planner.quota(801)
+        self.assertEqual((quota['missing_dob'], quota['invalid_gender'], sum(quota.values())), (300, 100, 400))
+
+        with self.assertRaises(ValueError):
+            InvalidDataPlanner("834", 0.1, weights={'negative_payment': 1})
+        with self.assertRaises(ValueError):
+            InvalidDataPlanner("835", 0.1, weights={'negative_payment': 0})
+        with self.assertRaises(ValueError):
+            InvalidDataPlanner("835", 1.5)
+
+    def test_reproducible(self):
+        """The same generator seed plans the same records"""
+        plans = [InvalidDataPlanner("835", 0.2, rng=np.random.default_rng(7)).plan(50) for _ in range(2)]
+        self.assertEqual(plans[0], plans[1])
+
+    def test_corrupt_835_keeps_total(self):
+        """Corrupted payments are written as planned and still add up to the BPR total"""
+        remit = {
+            'billed_cents': np.array([10000, 20000, 30000, 40000], dtype=np.int64),
+            'paid_cents': np.array([8000, 15000, 21000, 30000], dtype=np.int64),
+            'adjustment_code': np.array(['CO', '', 'PR', 'OA']),
+        }
+        claim_ids = ['C1', 'C2', 'C3', 'C4']
+        issues = ISSUE_TYPES['835']
+        corrupt_835(remit, claim_ids, issues, np.random.default_rng(3))
+        self.assertEqual(remit['paid_cents'][0], -8000)
+        self.assertTrue(claim_ids[1].startswith('MISMATCHED-'))
+        self.assertEqual(remit['adjustment_code'][2], 'INVALID')
+        self.assertGreater(remit['paid_cents'][3], 40000)
+        self.assertEqual(remit['total_paid_cents'], int(remit['paid_cents'].sum()))
+
+
+class TestInjectedRates(unittest.TestCase):
+    """Test cases for exact invalid rates in generated output"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_exact_rates(self):
+        """Each transaction type has exactly round(n * invalid_rate) invalid records"""
+        result = generate_edi_834(230, os.path.join(self.test_dir, "834.csv"), format="csv", invalid_rate=0.03)
+        self.assertEqual(result['invalid_records'], 7)
+        result = generate_edi_837(
+            310, 1, os.path.join(self.test_dir, "837.csv"), format="csv", invalid_rate=0.05,
+            invalid_weights={'future_service_date': 1}
+        )
+        self.assertEqual(result['invalid_records'], 16)
+        future = [claim for claim in global_data['claims'].values() if claim['service_date'] > date.today()]
+        self.assertEqual(len(future), 16)
+        result = generate_edi_835(120, os.path.join(self.test_dir, "835.csv"), format="csv", invalid_rate=0.1)
+        self.assertEqual(result['invalid_records'], 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
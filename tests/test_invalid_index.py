@@ -0,0 +1,96 @@
+"""
+Tests for invalid-record index sidecars
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.manifest import invalid_index_path
+
+
+def _rows(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class TestInvalidRecordIndex(unittest.TestCase):
+    """Test cases for the ground truth of injected invalid records"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def test_index_matches_rows(self):
+        """Each indexed record names the row at its position, with its issue type"""
+        generate_edi_834(60, self.path("834.csv"), format="csv", invalid_rate=0.3)
+        generate_edi_837(80, 1, self.path("837.csv"), format="csv", invalid_rate=0.3)
+        generate_edi_835(70, self.path("835.csv"), format="csv", invalid_rate=0.3)
+
+        keys = {'834': 'member_id', '837': 'claim_id', '835': 'payment_id'}
+        with open(self.path("_manifest.json")) as f:
+            manifest = json.load(f)["files"]
+        for transaction_type, key in keys.items():
+            rows = _rows(self.path(f"{transaction_type}.csv"))
+            index = _rows(invalid_index_path(self.path(f"{transaction_type}.csv")))
+            self.assertEqual(index[0].keys(), {'record', key, 'issue_type'})
+            self.assertTrue(index)
+            positions = [int(entry['record']) for entry in index]
+            self.assertEqual(positions, sorted(set(positions)))
+            self.assertEqual([entry[key] for entry in index], [rows[position][key] for position in positions])
+            self.assertTrue(all(entry['issue_type'] for entry in index))
+            entry = manifest[f"{transaction_type}.csv"]
+            self.assertEqual(entry['invalid_index'], f"_{transaction_type}.csv.invalid.csv")
+            self.assertEqual(entry['invalid_records'], len(index))
+
+    def test_payment_issues_keep_bpr_balanced(self):
+        """Invalid 835 payments are injected, and the BPR still totals the CLPs as written"""
+        generate_edi_834(40, self.path("834.txt"))
+        generate_edi_837(80, 1, self.path("837.txt"))
+        content = generate_edi_835(60, self.path("835.txt"), invalid_rate=0.5)
+
+        index = _rows(invalid_index_path(self.path("835.txt")))
+        self.assertGreater(len(index), 10)
+        segments = [line.rstrip('~').split('*') for line in content.split('\n')]
+        bpr = [s for s in segments if s[0] == 'BPR'][0]
+        clps = [s for s in segments if s[0] == 'CLP']
+        self.assertEqual(Decimal(bpr[2]), sum(Decimal(s[4]) for s in clps))
+        for entry in index:
+            clp = clps[int(entry['record'])]
+            if entry['issue_type'] == 'mismatched_ids':
+                self.assertTrue(clp[1].startswith('MISMATCHED-'))
+            elif entry['issue_type'] == 'negative_payment':
+                self.assertLessEqual(Decimal(clp[4]), 0)
+            elif entry['issue_type'] == 'payment_exceeds_billed':
+                self.assertGreater(Decimal(clp[4]), Decimal(clp[3]))
+
+    def test_clean_output_has_no_index(self):
+        """Without invalid records no index is written, and a stale one is removed"""
+        stale = invalid_index_path(self.path("834.csv"))
+        with open(stale, 'w') as f:
+            f.write("record,member_id,issue_type\n")
+        generate_edi_834(20, self.path("834.csv"), format="csv")
+        self.assertFalse(os.path.exists(stale))
+        with open(self.path("_manifest.json")) as f:
+            self.assertNotIn('invalid_index', json.load(f)["files"]["834.csv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests for manifest sidecars
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.record_space import RecordSpace
+from src.edi.sinks import make_sink
+
+WORKERS = 8
+WORKER_MEMBERS = 10
+
+
+def _write_range(directory, worker):
+    """Write one worker's range of a shared record space, as a parallel job would"""
+    space = RecordSpace(seed=11, num_members=WORKERS * WORKER_MEMBERS, as_of=date(2026, 1, 15))
+    start = worker * WORKER_MEMBERS
+    generate_edi_834(output_file=os.path.join(directory, f"part{worker}.csv"), format="csv",
+                     record_space=space, record_range=(start, start + WORKER_MEMBERS))
+
+
+def _manifest(directory):
+    with open(os.path.join(directory, "_manifest.json")) as f:
+        return json.load(f)["files"]
+
+
+class TestManifest(unittest.TestCase):
+    """Test cases for per-file manifests computed while writing"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def assertDescribesFile(self, entry, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(entry["bytes"], len(data))
+        self.assertEqual(entry["sha256"], hashlib.sha256(data).hexdigest())
+
+    def test_entries_match_files(self):
+        """Checksums, sizes and counts describe each file as written"""
+        generate_edi_834(30, os.path.join(self.test_dir, "834.txt.gz"), format=["x12", "csv"])
+        claims = generate_edi_837(50, 1, os.path.join(self.test_dir, "837.txt"), format=["x12", "csv"])
+        payments = generate_edi_835(40, os.path.join(self.test_dir, "835.csv"), format="csv")
+        files = _manifest(self.test_dir)
+        self.assertEqual(
+            sorted(files), ["834.csv.gz", "834.txt.gz", "835.csv", "837.csv", "837.txt"]
+        )
+        for name, entry in files.items():
+            self.assertDescribesFile(entry, os.path.join(self.test_dir, name))
+
+        x12 = files["837.txt"]
+        self.assertEqual(x12["segments"], len(claims["x12"].split('\n')))
+        self.assertEqual(x12["records"], 50)
+        self.assertEqual(files["834.txt.gz"]["compression"], "gzip")
+        with gzip.open(os.path.join(self.test_dir, "834.txt.gz"), 'rt') as f:
+            self.assertEqual(files["834.txt.gz"]["segments"], len(f.read().split('\n')))
+
+        rows = claims["csv"]["data"]
+        service_dates = sorted(row["service_date"] for row in rows)
+        self.assertEqual(x12["dates"]["service_date"], {"min": service_dates[0], "max": service_dates[-1]})
+        self.assertEqual(
+            Decimal(x12["amount_totals"]["billed_amount"]), sum(Decimal(row["billed_amount"]) for row in rows)
+        )
+        self.assertEqual(sum(x12["status_counts"].values()), 50)
+        self.assertEqual(x12["distinct_statuses"], len({row["claim_status"] for row in rows}))
+        self.assertEqual(sum(x12["plan_counts"].values()), 50)
+
+        rows = payments["data"]
+        totals = files["835.csv"]["amount_totals"]
+        self.assertEqual(Decimal(totals["paid_amount"]), sum(Decimal(row["paid_amount"]) for row in rows))
+        self.assertEqual(files["835.csv"]["status_counts"].get("1", 0),
+                         sum(1 for row in rows if row["claim_status"] == "1"))
+
+    def test_partitions_and_split_files(self):
+        """Each partition directory and split file gets its own entry"""
+        generate_edi_834(20, os.path.join(self.test_dir, "834.txt"))
+        generate_edi_837(40, 1, os.path.join(self.test_dir, "837.txt"),
+                         x12_limits={"max_bytes_per_file": 6000})
+        files = _manifest(self.test_dir)
+        parts = sorted(name for name in files if name.startswith("837-"))
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(sum(files[name]["records"] for name in parts), 40)
+        for name in parts:
+            self.assertDescribesFile(files[name], os.path.join(self.test_dir, name))
+
+        result = generate_edi_837(40, 1, os.path.join(self.test_dir, "claims", "837.csv"), format="csv",
+                                  partition_by_date=True)
+        records = 0
+        for path in result["output_files"]:
+            entry = _manifest(os.path.dirname(path))[os.path.basename(path)]
+            partition = os.path.basename(os.path.dirname(path))[len("dt="):]
+            self.assertEqual(entry["dates"]["service_date"], {"min": partition, "max": partition})
+            records += entry["records"]
+        self.assertEqual(records, 40)
+
+    def test_manifest_disabled(self):
+        """Sinks can be told not to write a manifest"""
+        generate_edi_834(5, os.path.join(self.test_dir, "834.txt"))
+        path = os.path.join(self.test_dir, "out", "837.csv")
+        sink = make_sink("837", "csv", path, manifest=False)
+        from src.edi.generator import _generate_edi_837
+        _generate_edi_837(5, 1, [sink])
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["837.csv"])
+
+    def test_concurrent_writers(self):
+        """Processes writing into one directory at once all keep their manifest entries"""
+        with ProcessPoolExecutor(WORKERS) as pool:
+            list(pool.map(_write_range, [self.test_dir] * WORKERS, range(WORKERS)))
+        entries = _manifest(self.test_dir)
+        self.assertEqual(sorted(entries), sorted(f"part{worker}.csv" for worker in range(WORKERS)))
+        for name, entry in entries.items():
+            self.assertDescribesFile(entry, os.path.join(self.test_dir, name))
+        self.assertFalse([name for name in os.listdir(self.test_dir) if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
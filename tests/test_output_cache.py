@@ -0,0 +1,150 @@
+"""
+Tests for the content-addressed generator output cache
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.manifest import invalid_index_path, manifest_path
+from src.edi.output_cache import OutputCache
+from src.edi.record_space import RecordSpace
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestOutputCache(unittest.TestCase):
+    """Test cases for serving repeated generator calls from the cache"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = OutputCache(os.path.join(self.test_dir, "cache"))
+        self.reset()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def reset(self):
+        for key in global_data:
+            global_data[key] = {}
+
+    def paths(self, name, transaction_type):
+        directory = os.path.join(self.test_dir, name)
+        return {"x12": os.path.join(directory, f"edi_{transaction_type}.txt"),
+                "csv": os.path.join(directory, f"edi_{transaction_type}.csv")}
+
+    def run_pipeline(self, name, seed=7, **options):
+        self.reset()
+        results = {}
+        for transaction_type, generate, volume in (
+            ("834", generate_edi_834, {"num_members": 40}),
+            ("837", generate_edi_837, {"num_claims": 100}),
+            ("835", generate_edi_835, {"num_payments": 60}),
+        ):
+            results[transaction_type] = generate(
+                output_file=self.paths(name, transaction_type), format=["x12", "csv"], invalid_rate=0.1,
+                seed=seed, cache=self.cache, **volume, **options
+            )
+        return results
+
+    def test_repeated_run_is_restored(self):
+        """A repeated seeded run links the cached files and restores results and global_data"""
+        first = self.run_pipeline("first")
+        first_state = {name: list(table) for name, table in global_data.items()}
+        self.assertEqual(len(self.cache.entries()), 3)
+
+        second = self.run_pipeline("second")
+        self.assertEqual({name: list(table) for name, table in global_data.items()}, first_state)
+        self.assertEqual([entry['hits'] for entry in self.cache.entries()], [1, 1, 1])
+        for transaction_type in ("834", "837", "835"):
+            for format, path in self.paths("second", transaction_type).items():
+                original = self.paths("first", transaction_type)[format]
+                self.assertEqual(_read(path), _read(original), path)
+                self.assertEqual(_read(invalid_index_path(path)), _read(invalid_index_path(original)))
+                self.assertEqual(os.stat(path).st_nlink, 3)
+                result = second[transaction_type][format]
+                if format == "csv":
+                    self.assertEqual(result['output_file'], path)
+                    self.assertEqual(result['data'], first[transaction_type][format]['data'])
+                else:
+                    self.assertEqual(result, first[transaction_type][format])
+        with open(manifest_path(path)) as f:
+            self.assertEqual(len(json.load(f)['files']), 6)
+
+        # Another seed misses; an unseeded call is never cached
+        self.run_pipeline("other", seed=8)
+        self.assertEqual(len(self.cache.entries()), 6)
+        generate_edi_834(10, self.paths("unseeded", "834")["csv"], format="csv", cache=self.cache)
+        self.assertEqual(len(self.cache.entries()), 6)
+
+    def test_cached_files_are_not_overwritten(self):
+        """Writing over a hardlinked output replaces it, leaving the cache entry valid"""
+        paths = self.paths("out", "834")
+        generate_edi_834(30, paths, format=["x12", "csv"], seed=1, cache=self.cache)
+        cached = _read(paths["x12"])
+        self.reset()
+        generate_edi_834(30, paths, format=["x12", "csv"], seed=2)
+        self.assertNotEqual(_read(paths["x12"]), cached)
+
+        # The key covers the members already in global_data
+        self.reset()
+        generate_edi_834(30, paths, format=["x12", "csv"], seed=1, cache=self.cache)
+        self.assertEqual(self.cache.entries()[0]['hits'], 1)
+        self.assertEqual(_read(paths["x12"]), cached)
+
+        # An entry whose file changed is dropped and regenerated
+        entry = self.cache.entries()[0]
+        with open(os.path.join(self.cache.entries_dir, entry['key'], 'files', '0', 'edi_834.txt'), 'a') as f:
+            f.write("~")
+        self.reset()
+        generate_edi_834(30, paths, format=["x12", "csv"], seed=1, cache=self.cache)
+        self.assertEqual(self.cache.entries()[0]['hits'], 0)
+        self.assertEqual(_read(paths["x12"]), cached)
+
+    def test_record_space_ranges(self):
+        """Record-space calls are keyed by the space and range"""
+        space = dict(seed=3, num_members=20, num_claims=60, as_of=date(2026, 1, 15))
+        path = os.path.join(self.test_dir, "space", "edi_837.txt")
+        generate_edi_837(output_file=path, record_space=RecordSpace(**space), record_range=(0, 30), cache=self.cache)
+        first = _read(path)
+        generate_edi_837(output_file=path, record_space=RecordSpace(**space), record_range=(30, 60), cache=self.cache)
+        generate_edi_837(output_file=path, record_space=RecordSpace(**space), record_range=(0, 30), cache=self.cache)
+        self.assertEqual(_read(path), first)
+        self.assertEqual(sorted(entry['hits'] for entry in self.cache.entries()), [0, 1])
+        self.assertEqual(global_data['claims'], {})
+
+    def test_prune(self):
+        """Pruning evicts least recently used entries first"""
+        for seed in range(3):
+            generate_edi_834(20, self.paths(f"run{seed}", "834")["csv"], format="csv", seed=seed, cache=self.cache)
+        self.reset()
+        generate_edi_834(20, self.paths("again", "834")["csv"], format="csv", seed=0, cache=self.cache)
+        entries = self.cache.entries()
+        self.assertEqual(entries[-1]['hits'], 1)
+
+        evicted = self.cache.prune(max_bytes=self.cache.size() - 1)
+        self.assertEqual([entry['key'] for entry in evicted], [entries[0]['key']])
+        self.assertEqual(len(self.cache.prune(max_age=0)), 2)
+        self.assertEqual(self.cache.entries(), [])
+
+        # A bounded cache prunes itself as entries are added
+        small = OutputCache(self.cache.directory, max_bytes=1)
+        generate_edi_834(20, self.paths("small", "834")["csv"], format="csv", seed=5, cache=small)
+        self.assertEqual(small.entries(), [])
+        self.assertTrue(os.path.exists(self.paths("small", "834")["csv"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests for compressed and multi-file parser input
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.compression import CODECS, open_output
+from src.edi.generator import generate_edi_834, global_data
+from src.edi.parser import EDIParser
+
+
+class TestParserInput(unittest.TestCase):
+    """Test cases for streaming EDI input"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        self.plain = os.path.join(self.test_dir, "834.txt")
+        generate_edi_834(15, self.plain)
+        with open(self.plain, 'rb') as f:
+            self.content = f.read()
+        self.parser = EDIParser()
+        self.expected = self.parser.parse_edi_file(self.plain)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _write(self, name, opener=open):
+        path = os.path.join(self.test_dir, name)
+        with opener(path, 'wb') as f:
+            f.write(self.content)
+        return path
+
+    def test_compressed_inputs(self):
+        """.gz, .bz2 and .xz inputs parse to the same segments as the plain file"""
+        for name, opener in [("834.txt.gz", gzip.open), ("834.txt.bz2", bz2.open), ("834.txt.xz", lzma.open)]:
+            path = self._write(name, opener)
+            self.assertEqual(self.parser.parse_edi_file(path), self.expected, name)
+
+    @unittest.skipUnless(CODECS['zstd'].available, "zstandard not installed")
+    def test_zstd_input(self):
+        """.zst inputs are decompressed when zstandard is installed"""
+        path = self._write("834.txt.zst", lambda path, mode: open_output(path))
+        self.assertEqual(self.parser.parse_edi_file(path), self.expected)
+
+    def test_codec_detected_from_content(self):
+        """A compressed file without a codec extension is recognised by its magic bytes"""
+        path = self._write("834.edi", gzip.open)
+        self.assertEqual(self.parser.parse_edi_file(path), self.expected)
+
+    def test_segments_split_across_chunks(self):
+        """Segments spanning read boundaries are reassembled"""
+        segments = list(self.parser.iter_edi_segments(self.plain, chunk_size=7))
+        self.assertEqual(segments, self.expected)
+
+    def test_glob_and_list_inputs(self):
+        """Globs and lists of files are read in order as one stream"""
+        self._write("part-1.txt")
+        self._write("part-2.txt.gz", gzip.open)
+        pattern = os.path.join(self.test_dir, "part-*")
+        self.assertEqual(self.parser.parse_edi_file(pattern), self.expected * 2)
+        paths = [self.plain, os.path.join(self.test_dir, "part-2.txt.gz")]
+        self.assertEqual(self.parser.parse_edi_file(paths), self.expected * 2)
+
+    def test_unmatched_glob(self):
+        """A glob matching nothing fails before parsing starts"""
+        with self.assertRaises(FileNotFoundError):
+            self.parser.iter_edi_segments(os.path.join(self.test_dir, "missing-*.txt"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Tests for partitioned output
+"""
+
+import csv
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zlib
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.partitioning import DatePartitionedSink, partition_path, shard_for, shard_path
+
+
+def _csv_column(path, column):
+    with open(path, newline='') as f:
+        return [row[column] for row in csv.DictReader(f)]
+
+
+class TestShardedOutput(unittest.TestCase):
+    """Test cases for member-hash sharding"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_shard_for_is_stable(self):
+        """Shards come from CRC-32 of the member_id, reproducible outside Python"""
+        self.assertEqual(shard_for("SUB12345678", 8), zlib.crc32(b"SUB12345678") % 8)
+        self.assertEqual(shard_path("out/edi_837.txt.gz", 3, 8), "out/edi_837-00003-of-00008.txt.gz")
+
+    def test_co_partitioned(self):
+        """A member's enrollment, claims and payments share a shard number"""
+        shards = 3
+        formats = ["csv", "x12"]
+        generate_edi_834(40, os.path.join(self.test_dir, "834.csv"), format=formats, shards=shards)
+        generate_edi_837(60, 1, os.path.join(self.test_dir, "837.csv"), format=formats, shards=shards)
+        results = generate_edi_835(50, os.path.join(self.test_dir, "835.csv"), format=formats, shards=shards)
+        self.assertEqual(len(results["csv"]), shards)
+
+        totals = {'834': 0, '837': 0, '835': 0}
+        for shard in range(shards):
+            members = {}
+            for transaction_type in totals:
+                path = os.path.join(self.test_dir, f"{transaction_type}-{shard:05d}-of-{shards:05d}.csv")
+                members[transaction_type] = set(_csv_column(path, 'member_id'))
+                totals[transaction_type] += len(_csv_column(path, 'member_id'))
+                for member_id in members[transaction_type]:
+                    self.assertEqual(shard_for(member_id, shards), shard)
+            self.assertTrue(members['837'] <= members['834'])
+            self.assertTrue(members['835'] <= members['837'])
+        self.assertEqual(totals, {'834': 40, '837': 60, '835': 50})
+
+        # Each 835 shard's BPR totals cover only that shard's payments
+        for content in results["x12"]:
+            segments = [line.rstrip('~').split('*') for line in content.split('\n')]
+            bpr_total = sum(Decimal(s[2]) for s in segments if s[0] == 'BPR')
+            self.assertEqual(bpr_total, sum(Decimal(s[4]) for s in segments if s[0] == 'CLP'))
+        # The provider adjustment is not repeated in every shard
+        self.assertLessEqual(sum(content.count('\nPLB*') for content in results["x12"]), 1)
+        # Each shard is its own interchange, with its own ISA13/IEA02
+        control_numbers = [content.split('*', 14)[13] for content in results["x12"]]
+        self.assertEqual(len(set(control_numbers)), shards)
+        for content, control_number in zip(results["x12"], control_numbers):
+            self.assertTrue(content.rstrip('~\n').endswith(f"*{control_number}"))
+
+    def test_byte_capped_shards(self):
+        """Byte-capped parts of every shard carry distinct control numbers"""
+        generate_edi_834(40, os.path.join(self.test_dir, "834.txt"))
+        results = generate_edi_837(120, 1, os.path.join(self.test_dir, "837.txt"), shards=3,
+                                   x12_limits={'max_bytes_per_file': 8000})
+        contents = [content for shard in results for content in shard]
+        self.assertGreater(len(contents), 3)
+        control_numbers = {content.split('*', 14)[13] for content in contents}
+        self.assertEqual(len(control_numbers), len(contents))
+
+
+class TestDatePartitionedOutput(unittest.TestCase):
+    """Test cases for service-date partitions written through a bounded writer pool"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        generate_edi_834(40, os.path.join(self.test_dir, "834.txt"))
+        generate_edi_837(120, 1, os.path.join(self.test_dir, "837.txt"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_partition_path(self):
+        """Partitions are dt= directories; reopened partitions continue in numbered files"""
+        self.assertEqual(partition_path("out/edi_837.csv.gz", "2025-03-14"), "out/dt=2025-03-14/edi_837.csv.gz")
+        self.assertEqual(partition_path("out/edi_837.csv.gz", "2025-03-14", 2), "out/dt=2025-03-14/edi_837_0002.csv.gz")
+
+    def test_records_follow_service_date(self):
+        """Every row lands in its service date's partition, with few writers open at once"""
+        from src.edi.generator import _generate_edi_835
+
+        base = os.path.join(self.test_dir, "out", "835.csv")
+        sinks = [
+            DatePartitionedSink("835", "csv", base, max_open_files=3, buffer_records=2),
+            DatePartitionedSink("835", "x12", os.path.join(self.test_dir, "out", "835.txt"), max_open_files=3),
+        ]
+        csv_result, x12_result = _generate_edi_835(90, sinks)
+        self.assertEqual(csv_result["total_records"], 90)
+        self.assertIsNone(csv_result["data"])
+        self.assertGreater(csv_result["partitions"], 3)
+        self.assertGreaterEqual(len(csv_result["output_files"]), csv_result["partitions"])
+
+        rows = 0
+        for path in glob.glob(os.path.join(self.test_dir, "out", "dt=*", "*.csv")):
+            partition = os.path.basename(os.path.dirname(path))[len("dt="):]
+            service_dates = _csv_column(path, 'service_date')
+            self.assertEqual(set(service_dates), {partition})
+            rows += len(service_dates)
+        self.assertEqual(rows, 90)
+
+        plb = 0
+        control_numbers = set()
+        for path in x12_result["output_files"]:
+            with open(path) as f:
+                segments = [line.rstrip('~').split('*') for line in f.read().split('\n')]
+            self.assertEqual((segments[0][0], segments[-1][0]), ('ISA', 'IEA'))
+            self.assertEqual(segments[0][13], segments[-1][2])
+            control_numbers.add(segments[0][13])
+            bpr_total = sum(Decimal(s[2]) for s in segments if s[0] == 'BPR')
+            self.assertEqual(bpr_total, sum(Decimal(s[4]) for s in segments if s[0] == 'CLP'))
+            plb += sum(1 for s in segments if s[0] == 'PLB')
+        self.assertLessEqual(plb, 1)
+        # Partition files, including parts reopened after eviction, are distinct interchanges
+        self.assertEqual(len(control_numbers), len(x12_result["output_files"]))
+
+    def test_enrollment_by_effective_date(self):
+        """Enrollments are partitioned by coverage effective date"""
+        result = generate_edi_834(
+            25, os.path.join(self.test_dir, "enrollment", "834.csv"), format="csv", partition_by_date=True
+        )
+        self.assertEqual(result["total_records"], 25)
+        for path in result["output_files"]:
+            partition = os.path.basename(os.path.dirname(path))[len("dt="):]
+            self.assertEqual(set(_csv_column(path, 'effective_date')), {partition})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for claim-to-payment reconciliation
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.manifest import invalid_index_path
+from src.edi.reconciliation import reconcile
+
+
+def _rows(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def _write_rows(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class TestReconciliation(unittest.TestCase):
+    """Test cases for reconciling generated 837/835 pairs"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def generate(self, invalid_rate=0.0, weights=None):
+        formats = ["x12", "csv"]
+        paths = {tt: {"x12": self.path(f"{tt}.txt"), "csv": self.path(f"{tt}.csv")} for tt in ("834", "837", "835")}
+        generate_edi_834(100, paths["834"], format=formats)
+        generate_edi_837(400, None, paths["837"], format=formats)
+        generate_edi_835(300, paths["835"], format=formats, invalid_rate=invalid_rate, invalid_weights=weights)
+        return paths
+
+    def test_valid_pair_reconciles(self):
+        """Generated pairs reconcile, and the group totals add up to the pair's"""
+        paths = self.generate()
+        claim_ids = {row['claim_id'] for row in _rows(paths["837"]["csv"])}
+        self.assertEqual(len(claim_ids), 400)
+        for format in ("x12", "csv"):
+            result = reconcile(paths["837"][format], paths["835"][format], batch_records=64)
+            self.assertEqual(result['claims'], 400)
+            self.assertEqual(result['payments'], 300)
+            self.assertEqual(result['matched_payments'], 300)
+            self.assertEqual(result['unpaid_claims'], 100)
+            self.assertEqual(result['discrepancies']['duplicate_claim'], 0)
+            self.assertEqual(set(result['discrepancies'].values()), {0}, format)
+            self.assertEqual(result['unchecked'], [] if format == "x12" else ['bpr_mismatch'])
+            for rows in (result['by_provider'], result['by_day']):
+                self.assertEqual(sum(row['claims'] for row in rows), 400)
+                self.assertEqual(sum(row['payments'] for row in rows), 300)
+                for column in ('billed_amount', 'paid_amount', 'allowed_amount'):
+                    total = sum(Decimal(row[column]) for row in rows)
+                    self.assertEqual(total, Decimal(result['totals'][column]), column)
+
+    def test_reports_invalid_payments(self):
+        """Injected 835 issues surface as orphan and amount discrepancies"""
+        paths = self.generate(0.2, {"mismatched_ids": 1, "payment_exceeds_billed": 1})
+        for format in ("x12", "csv"):
+            report = self.path(f"report_{format}.csv")
+            result = reconcile(paths["837"][format], paths["835"][format], report)
+            truth = {}
+            for row in _rows(invalid_index_path(paths["835"][format])):
+                truth.setdefault(row['issue_type'], set()).add(row['record'])
+            found = {}
+            for row in _rows(report):
+                if row['transaction_type'] == '835':
+                    found.setdefault(row['issue_type'], set()).add(row['record'])
+            self.assertEqual(found['orphan_payment'], truth['mismatched_ids'])
+            self.assertEqual(found['paid_exceeds_billed'], truth['payment_exceeds_billed'])
+            self.assertEqual(found['allowed_mismatch'], truth['payment_exceeds_billed'])
+            self.assertEqual(result['matched_payments'], 270)
+
+    def test_edited_payments(self):
+        """Duplicate payments, payee changes and BPR totals are checked"""
+        paths = self.generate()
+        rows = _rows(paths["835"]["csv"])
+        rows[2]['provider_npi'] = '0000000000'
+        rows.append(dict(rows[5]))
+        edited = self.path("835_edited.csv")
+        _write_rows(edited, rows)
+        report = self.path("report.csv")
+        result = reconcile(paths["837"]["csv"], edited, report)
+        self.assertEqual(result['discrepancies']['provider_mismatch'], 1)
+        self.assertEqual(result['discrepancies']['duplicate_payment'], 1)
+        issues = {(row['record'], row['issue_type']): row for row in _rows(report)}
+        self.assertEqual(issues[('2', 'provider_mismatch')]['actual'], '0000000000')
+        self.assertIn(('300', 'duplicate_payment'), issues)
+
+        with open(paths["835"]["x12"]) as f:
+            content = f.read()
+        bpr_start = content.index('BPR*I*') + len('BPR*I*')
+        bpr_end = content.index('*', bpr_start)
+        with open(edited, 'w') as f:
+            f.write(content[:bpr_start] + '1.00' + content[bpr_end:])
+        os.replace(edited, self.path("835_edited.txt"))
+        result = reconcile(paths["837"]["x12"], self.path("835_edited.txt"), report)
+        self.assertEqual(result['discrepancies']['bpr_mismatch'], 1)
+        bpr_rows = [row for row in _rows(report) if row['issue_type'] == 'bpr_mismatch']
+        self.assertEqual(bpr_rows[0]['actual'], '1.00')
+        self.assertEqual(bpr_rows[0]['expected'], content[bpr_start:bpr_end])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests for counter-based random-access record generation
+"""
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.reconciliation import reconcile
+from src.edi.record_space import IndexPermutation, RecordSpace
+from src.edi.seeding import child_sequence
+
+GENERATORS = {'834': generate_edi_834, '837': generate_edi_837, '835': generate_edi_835}
+
+SPACE = dict(
+    seed=2024, num_members=40, num_claims=120, num_payments=80, as_of=date(2026, 1, 15),
+    invalid_rates={'834': 0.1, '837': 0.1, '835': 0.1}
+)
+
+
+def _rows(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class TestRecordSpace(unittest.TestCase):
+    """Test cases for deriving records from (seed, entity type, index)"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def write(self, space, transaction_type, name, record_range=None):
+        paths = {"x12": self.path(f"{name}.txt"), "csv": self.path(f"{name}.csv")}
+        GENERATORS[transaction_type](
+            output_file=paths, format=["x12", "csv"], record_space=space, record_range=record_range
+        )
+        return paths
+
+    def test_ranges_match_full_run(self):
+        """Ranges written by separate spaces hold exactly the records of a full run"""
+        space = RecordSpace(**SPACE)
+        for transaction_type in ('834', '837', '835'):
+            full = self.write(space, transaction_type, f"{transaction_type}_full")
+            count = space.count(transaction_type)
+            middle = count // 3
+            rows = []
+            for start, stop in ((0, middle), (middle, count)):
+                worker = RecordSpace(**SPACE)
+                part = self.write(worker, transaction_type, f"{transaction_type}_{start}", (start, stop))
+                rows.extend(_rows(part["csv"]))
+            self.assertEqual(rows, _rows(full["csv"]), transaction_type)
+
+            # A rerun is byte-identical
+            again = self.write(RecordSpace(**SPACE), transaction_type, f"{transaction_type}_again")
+            for format in ("x12", "csv"):
+                with open(full[format], 'rb') as a, open(again[format], 'rb') as b:
+                    self.assertEqual(a.read(), b.read(), (transaction_type, format))
+
+        # A single record is derived without the ones before it
+        claim = RecordSpace(**SPACE).claim_record(77)
+        self.assertEqual(claim['claim_data']['id'], _rows(self.path("837_full.csv"))[77]['claim_id'])
+        self.assertEqual(global_data['claims'], {})
+
+    def test_ids_payments_and_issues(self):
+        """IDs are unique, payments pay distinct payable claims and issues hit their quota"""
+        space = RecordSpace(**SPACE)
+        claims = list(space.records('837'))
+        claim_ids = [claim['claim_data']['id'] for claim in claims]
+        self.assertEqual(len(set(claim_ids)), 120)
+        self.assertTrue(all(len(claim_id) == 13 for claim_id in claim_ids))
+        self.assertEqual(len({space.member(i)[0].id for i in range(40)}), 40)
+
+        paid = [space.paid_claim(i) for i in range(80)]
+        self.assertEqual(len(set(paid)), 80)
+        self.assertTrue(all(claims[i]['claim_data']['billed_amount'] >= 0 for i in paid))
+
+        for transaction_type, plan in space.issue_plans.items():
+            issues = [space.issue(transaction_type, i) for i in range(space.count(transaction_type))]
+            counts = {issue_type: issues.count(issue_type) for issue_type in plan.quota}
+            self.assertEqual(counts, plan.quota)
+            self.assertEqual(sum(counts.values()), round(space.count(transaction_type) * 0.1))
+
+        with self.assertRaises(ValueError):
+            RecordSpace(1, 10, num_claims=10, num_payments=11)
+
+    def test_permutation(self):
+        """Index permutations are bijections with a matching inverse"""
+        for size in (1, 2, 1000, 4097):
+            permutation = IndexPermutation(size, child_sequence(5, size))
+            values = [permutation(i) for i in range(size)]
+            self.assertEqual(sorted(values), list(range(size)))
+            self.assertEqual([permutation.inverse(v) for v in values], list(range(size)))
+
+    def test_valid_space_reconciles(self):
+        """A space without invalid data has unique claim IDs and reconciles cleanly"""
+        space = RecordSpace(seed=9, num_members=30, num_claims=200, num_payments=150, as_of=date(2026, 1, 15))
+        claims = self.write(space, '837', "claims")
+        payments = self.write(space, '835', "payments")
+        result = reconcile(claims["x12"], payments["x12"])
+        self.assertEqual(result['matched_payments'], 150)
+        self.assertEqual(set(result['discrepancies'].values()), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Tests for the vectorized remittance engine
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.remittance import compute_remittance, format_cents, format_cents_array, to_cents
+
+
+class TestRemittanceEngine(unittest.TestCase):
+    """Test cases for compute_remittance"""
+
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.billed = np.round(rng.uniform(50, 15000, size=5000), 2)
+        self.remit = compute_remittance(self.billed, np.random.default_rng(3))
+
+    def test_amount_ranges(self):
+        """Paid and patient responsibility stay within their billed ratios"""
+        billed = self.remit['billed_cents']
+        self.assertTrue(np.all(self.remit['paid_cents'] >= np.floor(billed * 0.5)))
+        self.assertTrue(np.all(self.remit['paid_cents'] <= np.ceil(billed * 0.9)))
+        self.assertTrue(np.all(
+            self.remit['allowed_cents'] == self.remit['paid_cents'] + self.remit['patient_responsibility_cents']
+        ))
+
+    def test_total_is_exact_sum(self):
+        """BPR total equals the sum of the per-claim payments"""
+        self.assertEqual(self.remit['total_paid_cents'], int(self.remit['paid_cents'].sum()))
+
+    def test_adjustments(self):
+        """Adjustments appear on roughly half of the claims"""
+        has_adjustment = self.remit['has_adjustment']
+        self.assertAlmostEqual(float(has_adjustment.mean()), 0.5, delta=0.05)
+        self.assertTrue(np.all(self.remit['adjustment_code'][~has_adjustment] == ''))
+        self.assertTrue(np.all(self.remit['adjustment_cents'][~has_adjustment] == 0))
+
+    def test_format_cents(self):
+        """Cents format as exact two-decimal strings"""
+        self.assertEqual(format_cents(123456), "1234.56")
+        self.assertEqual(format_cents(5), "0.05")
+        self.assertEqual(format_cents(-1050), "-10.50")
+        self.assertEqual(to_cents([10.5, 0.1]).tolist(), [1050, 10])
+        self.assertEqual(format_cents_array(to_cents([10.5, 0.1])), ["10.50", "0.10"])
+
+
+if __name__ == '__main__':
+    unittest.main()
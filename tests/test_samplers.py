@@ -0,0 +1,78 @@
+"""
+Tests for the alias-table samplers compiled from risk profiles
+"""
+
+import os
+import random
+import sys
+import unittest
+from collections import Counter
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.samplers import AliasSampler, compile_risk_profile
+from src.edi.generator import RISK_PROFILES, PROCEDURE_POOLS, PLACE_OF_SERVICE
+
+
+class TestAliasSampler(unittest.TestCase):
+    """Test cases for AliasSampler"""
+
+    def test_probabilities_match_weights(self):
+        """The alias table reproduces the normalized weights"""
+        sampler = AliasSampler(['a', 'b', 'c', 'd'], [0.7, 0.2, 0.1, 0.0])
+        probs = sampler.probabilities()
+        for value, expected in zip(['a', 'b', 'c', 'd'], [0.7, 0.2, 0.1, 0.0]):
+            self.assertAlmostEqual(probs[value], expected, places=9)
+
+    def test_per_record_and_batch_draws(self):
+        """Per-record and batch draws follow the same distribution"""
+        sampler = AliasSampler(['x', 'y'], [3, 1])
+        random.seed(5)
+        single = Counter(sampler.sample() for _ in range(20000))
+        batch = Counter(sampler.sample_n(20000, np.random.default_rng(5)).tolist())
+        self.assertAlmostEqual(single['x'] / 20000, 0.75, delta=0.02)
+        self.assertAlmostEqual(batch['x'] / 20000, 0.75, delta=0.02)
+
+    def test_invalid_weights(self):
+        """Empty or all-zero inputs are rejected"""
+        with self.assertRaises(ValueError):
+            AliasSampler([])
+        with self.assertRaises(ValueError):
+            AliasSampler(['a'], [0])
+
+
+class TestCompiledRiskProfile(unittest.TestCase):
+    """Test cases for compile_risk_profile"""
+
+    def test_place_of_service_weights(self):
+        """Provider type weights fold into place of service codes"""
+        compiled = compile_risk_profile(RISK_PROFILES['balanced'], PROCEDURE_POOLS, PLACE_OF_SERVICE)
+        probs = compiled.place_of_service.probabilities()
+        self.assertAlmostEqual(probs['23'], 0.1)
+        self.assertAlmostEqual(probs['11'], 0.15 + 0.3)
+        self.assertAlmostEqual(probs['22'], 0.15)
+        self.assertAlmostEqual(probs['12'], 0.3)
+
+    def test_procedure_pool_by_complexity(self):
+        """High complexity profiles draw from high and medium pools"""
+        compiled = compile_risk_profile(RISK_PROFILES['high_risk'], PROCEDURE_POOLS, PLACE_OF_SERVICE)
+        expected = set(PROCEDURE_POOLS['high_complexity'] + PROCEDURE_POOLS['medium_complexity'])
+        self.assertEqual(set(compiled.procedure.values), expected)
+
+    def test_batch_er_overrides(self):
+        """ER rows get ER procedure codes and place of service 23"""
+        compiled = compile_risk_profile(RISK_PROFILES['low_risk'], PROCEDURE_POOLS, PLACE_OF_SERVICE)
+        rng = np.random.default_rng(1)
+        is_er = rng.random(1000) < 0.5
+        codes = compiled.sample_procedure_codes(1000, rng, is_er)
+        places = compiled.sample_places_of_service(1000, rng, is_er)
+        self.assertTrue(all(code.startswith('9928') for code in codes[is_er]))
+        self.assertTrue(all(place == '23' for place in places[is_er]))
+
+
+if __name__ == '__main__':
+    unittest.main()
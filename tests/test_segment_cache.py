@@ -0,0 +1,77 @@
+"""
+Tests for the pre-rendered provider/member segment block cache
+"""
+
+import os
+import sys
+import unittest
+from datetime import date
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.segment_cache import SegmentBlockCache
+
+
+def make_member(member_id, dob=date(1980, 1, 2)):
+    return SimpleNamespace(id=member_id, last_name="Doe", first_name="Jane", dob=dob, gender="F")
+
+
+def make_provider(provider_id):
+    return SimpleNamespace(
+        id=provider_id, last_name="Smith", first_name="Ann", npi="1234567890", tax_id="TAX123456789",
+        taxonomy="207Q00000X", specialty="Pediatrics", street="1 Main St", city="Austin", state="TX", zip="73301"
+    )
+
+
+class TestSegmentBlockCache(unittest.TestCase):
+    """Test cases for SegmentBlockCache"""
+
+    def test_member_block(self):
+        """Member blocks render NM1*IL and DMG in X12 and CSV form"""
+        cache = SegmentBlockCache()
+        block = cache.member_block(make_member("SUB1"))
+        self.assertEqual(block['x12'], ["NM1*IL*1*Doe*Jane***MI*SUB1~", "DMG*D8*19800102*F~"])
+        self.assertEqual(block['csv']['member_dob'], "1980-01-02")
+
+    def test_missing_dob(self):
+        """A member without DOB renders an empty date instead of failing"""
+        block = SegmentBlockCache().member_block(make_member("SUB1", dob=None))
+        self.assertEqual(block['x12'][1], "DMG*D8**F~")
+        self.assertEqual(block['csv']['member_dob'], "")
+
+    def test_provider_block_reused(self):
+        """Repeated lookups of the same provider hit the cache"""
+        cache = SegmentBlockCache()
+        provider = make_provider("PROV1")
+        first = cache.provider_block(provider)
+        second = cache.provider_block(provider)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first['x12'][1], "NM1*85*2*Smith*Ann***XX*1234567890~")
+        self.assertEqual(first['x12_payee'], "NM1*82*1*Smith*Ann***XX*1234567890~")
+
+    def test_new_entity_with_same_id(self):
+        """A different object with a reused ID is rendered afresh"""
+        cache = SegmentBlockCache()
+        cache.member_block(make_member("SUB1"))
+        other = make_member("SUB1")
+        other.last_name = "Roe"
+        self.assertEqual(cache.member_block(other)['x12'][0], "NM1*IL*1*Roe*Jane***MI*SUB1~")
+
+    def test_eviction(self):
+        """The cache never holds more than max_entries blocks"""
+        cache = SegmentBlockCache(max_entries=3)
+        members = [make_member(f"SUB{i}") for i in range(5)]
+        for member in members:
+            cache.member_block(member)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evictions, 2)
+        cache.member_block(members[0])
+        self.assertEqual(cache.misses, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Tests for single-pass multi-format output
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from decimal import Decimal
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+
+
+def _elements(content, segment_id, index):
+    """Return element `index` of every `segment_id` segment in X12 content"""
+    return [
+        line.rstrip('~').split('*')[index]
+        for line in content.split('\n')
+        if line.startswith(segment_id + '*')
+    ]
+
+
+class TestMultiFormatOutput(unittest.TestCase):
+    """Test cases for writing X12 and CSV from one record stream"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_same_records_in_every_format(self):
+        """X12 and CSV outputs describe the same members, claims and payments"""
+        formats = ["x12", "csv"]
+        enrollment = generate_edi_834(12, os.path.join(self.test_dir, "834.txt"), format=formats)
+        self.assertEqual(set(enrollment), {"x12", "csv"})
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "834.csv")))
+        self.assertEqual(
+            _elements(enrollment["x12"], "REF", 2)[::3],  # REF*0F is the first of three REFs per member
+            [row['member_id'] for row in enrollment["csv"]["data"]]
+        )
+        self.assertEqual(len(global_data['members']), 12)
+
+        claims = generate_edi_837(9, 1, os.path.join(self.test_dir, "837.txt"), format=formats)
+        claim_ids = [row['claim_id'] for row in claims["csv"]["data"]]
+        self.assertEqual(_elements(claims["x12"], "CLM", 1), claim_ids)
+        self.assertEqual(
+            _elements(claims["x12"], "CLM", 2),
+            [row['billed_amount'] for row in claims["csv"]["data"]]
+        )
+
+        payments = generate_edi_835(6, os.path.join(self.test_dir, "835.txt"), format=formats)
+        self.assertEqual(
+            _elements(payments["x12"], "CLP", 1),
+            [row['claim_id'] for row in payments["csv"]["data"]]
+        )
+        self.assertEqual(
+            _elements(payments["x12"], "CLP", 4),
+            [row['paid_amount'] for row in payments["csv"]["data"]]
+        )
+
+    def test_output_file_dict(self):
+        """A dict of output paths places each format explicitly"""
+        paths = {
+            "x12": os.path.join(self.test_dir, "x12", "members.edi"),
+            "csv": os.path.join(self.test_dir, "csv", "members.csv"),
+        }
+        generate_edi_834(5, paths, format=["x12", "csv"])
+        for path in paths.values():
+            self.assertTrue(os.path.exists(path))
+
+    def test_unknown_format(self):
+        """Unknown formats are rejected"""
+        with self.assertRaises(ValueError):
+            generate_edi_834(5, os.path.join(self.test_dir, "834.out"), format="json")
+
+
+def _check_envelopes(test, content):
+    """Assert that every SE, GE and IEA in an interchange counts and matches its own envelope"""
+    segments = [line.rstrip('~').split('*') for line in content.split('\n')]
+    test.assertEqual(segments[0][0], 'ISA')
+    test.assertEqual(segments[-1], ['IEA', str(sum(1 for s in segments if s[0] == 'GS')), segments[0][13]])
+    sets = []
+    for index, segment in enumerate(segments):
+        if segment[0] == 'GS':
+            group, group_sets = segment[6], 0
+        elif segment[0] == 'ST':
+            start, group_sets = index, group_sets + 1
+        elif segment[0] == 'SE':
+            test.assertEqual(segment[1:], [str(index - start + 1), segments[start][2]])
+            sets.append(segments[start:index + 1])
+        elif segment[0] == 'GE':
+            test.assertEqual(segment[1:], [str(group_sets), group])
+    return sets
+
+
+class TestEnvelopeLimits(unittest.TestCase):
+    """Test cases for splitting X12 output into sets, groups and files"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        generate_edi_834(30, os.path.join(self.test_dir, "834.txt"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_sets_and_groups(self):
+        """Claims are split into ST/SE sets and GS/GE groups with consistent counts"""
+        content = generate_edi_837(
+            25, 1, os.path.join(self.test_dir, "837.txt"),
+            x12_limits={'max_records_per_set': 10, 'max_sets_per_group': 2}
+        )
+        sets = _check_envelopes(self, content)
+        self.assertEqual([sum(1 for s in st if s[0] == 'CLM') for st in sets], [10, 10, 5])
+        self.assertEqual(content.count('\nGS*'), 2)
+        self.assertEqual([st[0][2] for st in sets], ['0001', '0002', '0003'])
+        # HL IDs restart in each set
+        self.assertEqual([[s[1] for s in st if s[0] == 'HL'][0] for st in sets], ['1', '1', '1'])
+
+    def test_files_capped_by_size(self):
+        """Payments are split into size-capped files, each a complete interchange"""
+        generate_edi_837(40, 1, os.path.join(self.test_dir, "837.txt"))
+        results = generate_edi_835(
+            30, os.path.join(self.test_dir, "835.txt"),
+            x12_limits={'max_records_per_set': 8, 'max_bytes_per_file': 5000}
+        )
+        self.assertGreater(len(results), 1)
+        paths = [os.path.join(self.test_dir, f"835-{part:04d}.txt") for part in range(1, len(results) + 1)]
+        control_numbers = []
+        payments = 0
+        for path, content in zip(paths, results):
+            with open(path) as f:
+                self.assertEqual(f.read(), content)
+            self.assertLessEqual(os.path.getsize(path), 5000)
+            control_numbers.append(int(content.split('*', 14)[13]))
+            for st in _check_envelopes(self, content):
+                paid = [Decimal(s[4]) for s in st if s[0] == 'CLP']
+                bpr = [s for s in st if s[0] == 'BPR'][0]
+                self.assertEqual(Decimal(bpr[2]), sum(paid))
+                self.assertLessEqual(len(paid), 8)
+                payments += len(paid)
+        self.assertEqual(payments, 30)
+        self.assertEqual(control_numbers, list(range(control_numbers[0], control_numbers[0] + len(results))))
+
+    def test_default_single_envelope(self):
+        """Without limits the output is one interchange, group and set"""
+        content = generate_edi_837(12, 1, os.path.join(self.test_dir, "837.txt"))
+        self.assertEqual(len(_check_envelopes(self, content)), 1)
+        self.assertIn("\nGE*1*1~\n", content)
+
+
+if __name__ == '__main__':
+    unittest.main()
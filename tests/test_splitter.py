@@ -0,0 +1,124 @@
+"""
+Tests for the streaming X12 splitter and sampler
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.splitter import element_key, sample_x12, split_x12
+
+
+def _read(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        return [line.rstrip('~').split('*') for line in f.read().split('\n')]
+
+
+class TestSplitter(unittest.TestCase):
+    """Test cases for splitting and sampling existing X12 files"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        self.path_834 = os.path.join(self.test_dir, "834.txt")
+        self.path_837 = os.path.join(self.test_dir, "837.txt")
+        self.path_835 = os.path.join(self.test_dir, "835.txt.gz")
+        generate_edi_834(30, self.path_834)
+        generate_edi_837(45, 1, self.path_837)
+        generate_edi_835(35, self.path_835)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def assertValidInterchange(self, segments):
+        """One ISA/GS/ST envelope whose counts and control numbers match"""
+        ids = [s[0] for s in segments]
+        self.assertEqual(ids[:3], ['ISA', 'GS', 'ST'])
+        self.assertEqual(ids[-3:], ['SE', 'GE', 'IEA'])
+        self.assertEqual(segments[-3], ['SE', str(len(segments) - 4), segments[2][2]])
+        self.assertEqual(segments[-2], ['GE', '1', segments[1][6]])
+        self.assertEqual(segments[-1], ['IEA', '1', segments[0][13]])
+
+    def test_split_claims(self):
+        """Claims are split into valid interchanges with every claim kept in order"""
+        outputs = split_x12(self.path_837, os.path.join(self.test_dir, "out", "837.txt"), 20)
+        self.assertEqual([os.path.basename(p) for p in outputs], ["837-0001.txt", "837-0002.txt", "837-0003.txt"])
+        claims = []
+        for part, path in enumerate(outputs, 1):
+            segments = _read(path)
+            self.assertValidInterchange(segments)
+            self.assertEqual(segments[1][6], str(part))
+            self.assertEqual([s[1] for s in segments if s[0] == 'HL'][:2], ['1', '2'])
+            claims.extend(s[1] for s in segments if s[0] == 'CLM')
+        original = [s[1] for s in _read(self.path_837) if s[0] == 'CLM']
+        self.assertEqual(claims, original)
+
+    def test_split_payments_recomputes_bpr(self):
+        """Each 835 part's BPR total is the sum of its own payments"""
+        outputs = split_x12(self.path_835, os.path.join(self.test_dir, "835.txt.gz"), 10)
+        self.assertEqual(len(outputs), 4)
+        for path in outputs:
+            segments = _read(path)
+            self.assertValidInterchange(segments)
+            bpr = [s for s in segments if s[0] == 'BPR'][0]
+            paid = sum(Decimal(s[4]) for s in segments if s[0] == 'CLP')
+            self.assertEqual(Decimal(bpr[2]), paid)
+
+    def test_split_members_keeps_terminations(self):
+        """A terminated member's second INS stays with the member"""
+        outputs = split_x12(self.path_834, os.path.join(self.test_dir, "834.txt"), 7)
+        members = sum(sum(1 for s in _read(path) if s[0] == 'INS' and s[1]) for path in outputs)
+        self.assertEqual(members, 30)
+        self.assertEqual(len(outputs), 5)
+
+    def test_sample_is_reproducible(self):
+        """A seeded sample draws the same claims, in input order"""
+        first = os.path.join(self.test_dir, "sample1.txt")
+        second = os.path.join(self.test_dir, "sample2.txt")
+        result = sample_x12(self.path_837, first, 8, seed=7)
+        sample_x12(self.path_837, second, 8, seed=7)
+        self.assertEqual(result['total_units'], 45)
+        self.assertEqual(result['sampled_units'], 8)
+        self.assertEqual(_read(first), _read(second))
+        segments = _read(first)
+        self.assertValidInterchange(segments)
+        original = [s[1] for s in _read(self.path_837) if s[0] == 'CLM']
+        sampled = [s[1] for s in segments if s[0] == 'CLM']
+        self.assertEqual(sampled, [claim for claim in original if claim in sampled])
+
+    def test_stratified_sample(self):
+        """Stratified samples follow the strata sizes or take k from each"""
+        path = os.path.join(self.test_dir, "sample.txt")
+        result = sample_x12(self.path_835, path, 10, stratify_by='CLP02', seed=3)
+        self.assertEqual(result['sampled_units'], 10)
+        self.assertEqual(sum(s['units'] for s in result['strata'].values()), 35)
+        for stratum in result['strata'].values():
+            self.assertLessEqual(abs(stratum['sampled'] - 10 * stratum['units'] / 35), 1)
+
+        result = sample_x12(self.path_835, path, 2, stratify_by='default', allocation='per_stratum', seed=3)
+        for stratum in result['strata'].values():
+            self.assertEqual(stratum['sampled'], min(2, stratum['units']))
+        key = element_key('CLP02')
+        statuses = [s[2] for s in _read(path) if s[0] == 'CLP']
+        self.assertEqual(sorted(set(statuses)), sorted(result['strata']))
+        self.assertEqual(key([{'segment_id': 'CLP', 'elements': ['C1', '4']}]), '4')
+
+    def test_invalid_reference(self):
+        """Malformed element references are rejected"""
+        with self.assertRaises(ValueError):
+            element_key('CLP')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests for startup cost: deferred library imports and the import-time budget
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Seconds allowed for the import itself, measured in a fresh interpreter. Wall-clock
+# time depends on the machine, so the budget is only checked with EDI_CHECK_IMPORT_TIME=1
+IMPORT_TIME_BUDGET = 0.25
+CHECK_IMPORT_TIME = os.environ.get('EDI_CHECK_IMPORT_TIME') == '1'
+
+# Libraries that must only load on first use
+DEFERRED_MODULES = ['numpy', 'faker', 'mimesis', 'mysql', 'pyarrow']
+
+MEASURE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({deferred!r}))
+print(json.dumps({{'elapsed': elapsed, 'loaded': loaded}}))
+"""
+
+MAIN_SCRIPT_IMPORT = "import runpy; runpy.run_path({!r}, run_name='startup_check')".format(
+    os.path.join(project_root, 'scripts', 'main.py')
+)
+
+
+def measure_import(statement):
+    """Run an import statement in a fresh interpreter and return its timing and loaded libraries"""
+    code = MEASURE.format(root=project_root, statement=statement, deferred=DEFERRED_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=project_root, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartup(unittest.TestCase):
+    """Test cases for import-time cost"""
+
+    def test_generator_import(self):
+        """`from src.edi import generate_edi_834` loads no data-generation libraries or DB driver"""
+        result = measure_import("from src.edi import generate_edi_834")
+        self.assertEqual(result['loaded'], [])
+
+    def test_main_script_import(self):
+        """Loading scripts/main.py loads no data-generation libraries or DB driver"""
+        result = measure_import(MAIN_SCRIPT_IMPORT)
+        self.assertEqual(result['loaded'], [])
+
+    @unittest.skipUnless(CHECK_IMPORT_TIME, "set EDI_CHECK_IMPORT_TIME=1 to check the import-time budget")
+    def test_import_time_budget(self):
+        """The generator import and scripts/main.py each load within the budget"""
+        for statement in ("from src.edi import generate_edi_834", MAIN_SCRIPT_IMPORT):
+            self.assertLess(measure_import(statement)['elapsed'], IMPORT_TIME_BUDGET, statement)
+
+    def test_parser_import(self):
+        """The parser is importable without loading the MySQL driver"""
+        result = measure_import("from src.edi import EDIParser")
+        self.assertEqual(result['loaded'], [])
+
+    def test_health_plan_details_drawn_on_access(self):
+        """Plan features and description are drawn once, on first access"""
+        from src.edi.generator import HEALTH_PLANS, PLAN_DESCRIPTIONS, PLAN_FEATURES
+
+        plan = HEALTH_PLANS[0]
+        features = plan['features']
+        self.assertEqual(len(features), plan['feature_count'])
+        self.assertTrue(set(features) <= set(PLAN_FEATURES))
+        self.assertIs(plan['features'], features)
+        self.assertIn(plan['description'], PLAN_DESCRIPTIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
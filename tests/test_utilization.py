@@ -0,0 +1,93 @@
+"""
+Tests for the claims-per-member utilization model
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, global_data
+from src.edi.utilization import claim_counts
+
+
+class TestUtilization(unittest.TestCase):
+    """Test cases for drawing per-member claim counts"""
+
+    def test_counts(self):
+        """Counts add up exactly, and lower dispersion concentrates claims on fewer members"""
+        zero_shares = []
+        for dispersion in (4.0, 1.0, 0.25):
+            counts = claim_counts(10000, 30000, np.random.default_rng(1),
+                                  {'distribution': 'negative_binomial', 'dispersion': dispersion})
+            self.assertEqual(counts.sum(), 30000)
+            self.assertEqual(len(counts), 10000)
+            zero_shares.append(np.mean(counts == 0))
+        self.assertEqual(zero_shares, sorted(zero_shares))
+        # Poisson(3) leaves about 5% of members without claims; the skewed draws leave more
+        uniform = claim_counts(10000, 30000, np.random.default_rng(1), {'distribution': 'uniform'})
+        self.assertLess(np.mean(uniform == 0), zero_shares[0])
+
+        zipf = np.sort(claim_counts(1000, 50000, np.random.default_rng(2), {'distribution': 'zipf', 'exponent': 1.0}))
+        self.assertGreater(zipf[-50:].sum(), 0.5 * 50000)
+
+        # The same generator state gives the same counts
+        self.assertEqual(claim_counts(100, 500, np.random.default_rng(3)).tolist(),
+                         claim_counts(100, 500, np.random.default_rng(3)).tolist())
+
+        with self.assertRaises(ValueError):
+            claim_counts(10, 10, np.random.default_rng(), {'distribution': 'poisson'})
+        with self.assertRaises(ValueError):
+            claim_counts(10, 10, np.random.default_rng(), {'distribution': 'negative_binomial', 'dispersion': 0})
+
+    def test_claims_per_member(self):
+        """claims_per_member limits the claims to num_claims / claims_per_member members"""
+        counts = claim_counts(1000, 2000, np.random.default_rng(4), claims_per_member=10)
+        self.assertEqual(counts.sum(), 2000)
+        self.assertLessEqual(np.count_nonzero(counts), 200)
+        counts = claim_counts(10, 2000, np.random.default_rng(4), claims_per_member=1)
+        self.assertEqual(counts.sum(), 2000)
+
+
+class TestMemberMajorClaims(unittest.TestCase):
+    """Test cases for generating 837 claims member by member"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+        generate_edi_834(200, os.path.join(self.test_dir, "edi_834.csv"), format="csv", seed=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def generate(self, **options):
+        result = generate_edi_837(output_file=os.path.join(self.test_dir, "edi_837.csv"), format="csv", seed=2,
+                                  **options)
+        return [row['member_id'] for row in result['data']]
+
+    def test_claims_are_member_major(self):
+        """Each member's claims are contiguous, in population order or member_id order"""
+        population = list(global_data['members'])
+        for sort_by_member in (False, True):
+            members = self.generate(num_claims=600, sort_by_member=sort_by_member)
+            self.assertEqual(len(members), 600)
+            runs = [member for i, member in enumerate(members) if i == 0 or members[i - 1] != member]
+            self.assertEqual(len(runs), len(set(runs)))
+            order = sorted(runs) if sort_by_member else sorted(runs, key=population.index)
+            self.assertEqual(runs, order)
+
+        # Without claims_per_member any member may file; with it, about num_claims / claims_per_member do
+        self.assertGreater(len(set(self.generate(num_claims=600))), 100)
+        self.assertLessEqual(len(set(self.generate(num_claims=600, claims_per_member=20))), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
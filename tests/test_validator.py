@@ -0,0 +1,89 @@
+"""
+Tests for the streaming data-quality validator
+"""
+
+import csv
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.generator import generate_edi_834, generate_edi_837, generate_edi_835, global_data
+from src.edi.manifest import invalid_index_path
+from src.edi.validator import validate_file
+
+
+def _pairs(path):
+    with open(path, newline='') as f:
+        return {(row['record'], row['issue_type']) for row in csv.DictReader(f)}
+
+
+class TestValidator(unittest.TestCase):
+    """Test cases for rule checks on generated X12 and CSV files"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for key in global_data:
+            global_data[key] = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def generate(self, invalid_rate):
+        formats = ["x12", "csv"]
+        paths = {tt: {"x12": self.path(f"{tt}.txt"), "csv": self.path(f"{tt}.csv")} for tt in ("834", "837", "835")}
+        generate_edi_834(300, paths["834"], format=formats, invalid_rate=invalid_rate)
+        generate_edi_837(400, 1, paths["837"], format=formats, invalid_rate=invalid_rate)
+        generate_edi_835(300, paths["835"], format=formats, invalid_rate=invalid_rate)
+        return paths
+
+    def test_finds_injected_issues(self):
+        """Every injected record is reported, and only injected records are"""
+        paths = self.generate(0.2)
+        for transaction_type, by_format in paths.items():
+            for format, path in by_format.items():
+                report = self.path(f"report_{transaction_type}_{format}.csv")
+                result = validate_file(path, report)
+                self.assertEqual(result['transaction_type'], transaction_type)
+                self.assertEqual(result['format'], format)
+                truth = _pairs(invalid_index_path(path))
+                found = _pairs(report)
+                checked = {(record, rule) for record, rule in truth if rule not in result['unchecked']}
+                # Every checkable injected issue is found under its own rule
+                self.assertLessEqual(checked, found, (transaction_type, format))
+                # Nothing is reported for records that were generated valid
+                self.assertEqual({record for record, _ in found} - {record for record, _ in truth}, set())
+                self.assertEqual(result['invalid_records'], len({record for record, _ in found}))
+
+    def test_valid_output_passes(self):
+        """Generated output without invalid_rate has no violations"""
+        paths = self.generate(0.0)
+        for by_format in paths.values():
+            for path in by_format.values():
+                result = validate_file(path, batch_records=64)
+                self.assertEqual(result['invalid_records'], 0, path)
+                self.assertEqual(set(result['violations'].values()), {0})
+
+    def test_compressed_input_in_batches(self):
+        """Compressed files are streamed; batch boundaries do not change the result"""
+        paths = self.generate(0.1)
+        with open(paths["837"]["x12"], 'rb') as f, gzip.open(self.path("837.txt.gz"), 'wb') as out:
+            out.write(f.read())
+        whole = validate_file(paths["837"]["x12"], self.path("whole.csv"))
+        batched = validate_file(self.path("837.txt.gz"), self.path("batched.csv"), batch_records=7)
+        self.assertEqual(whole['violations'], batched['violations'])
+        self.assertEqual(_pairs(self.path("whole.csv")), _pairs(self.path("batched.csv")))
+        self.assertEqual(whole['records'], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Tests for the shared X12 serializer
+"""
+
+import io
+import os
+import sys
+import unittest
+from datetime import date
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.edi.x12 import (
+    Delimiters,
+    X12Serializer,
+    X12Writer,
+    default_serializer,
+    format_amount,
+    format_date
+)
+
+
+class TestX12Serializer(unittest.TestCase):
+    """Test cases for compiled segment templates"""
+
+    def test_default_delimiters(self):
+        """Default templates match the hand-written segments"""
+        x12 = default_serializer
+        self.assertEqual(x12.render('REF', '0F', 'SUB1'), "REF*0F*SUB1~")
+        self.assertEqual(x12.render('CLM', 'CLM1', '10.00', 'B', ''), "CLM*CLM1*10.00***B:*Y*A*Y*Y~")
+        self.assertEqual(x12.render('SV1', x12.composite('HC', '99213', ''), '5.00'), "SV1*HC:99213*5.00*UN*1***1~")
+        self.assertEqual(x12.composite('HC', '99213', '25'), "HC:99213:25")
+
+    def test_custom_delimiters(self):
+        """Templates are compiled for the interchange's delimiters"""
+        x12 = X12Serializer(Delimiters(segment="'", element="|", component="^"))
+        self.assertEqual(x12.render('CLM', 'C1', '1.00', 'A', '25'), "CLM|C1|1.00|||A^25|Y|A|Y|Y'")
+        isa = x12.render('ISA', 'S'.ljust(15), 'R'.ljust(15), '250101', '1200', '000000001', '^')
+        self.assertTrue(isa.endswith("|P|^'"))
+
+    def test_percent_in_values(self):
+        """Values containing '%' are not treated as format directives"""
+        self.assertEqual(default_serializer.render('N3', '100% Main St'), "N3*100% Main St~")
+
+    def test_value_formatting(self):
+        """Amounts have two decimals and dates are CCYYMMDD"""
+        self.assertEqual([format_amount(v) for v in (10.5, 0.1, 3)], ['10.50', '0.10', '3.00'])
+        self.assertEqual(format_date(date(2024, 2, 9)), '20240209')
+        self.assertEqual(format_date(None), '')
+
+
+class TestX12Writer(unittest.TestCase):
+    """Test cases for the buffered writer"""
+
+    def test_line_separated_without_trailing_newline(self):
+        """Chunks are joined with the line separator across flushes"""
+        buf = io.BytesIO()
+        writer = X12Writer(buf, buffer_size=8, capture=True)
+        writer.write("ST*834*0001~")
+        writer.write_many(["REF*0F*A~", "REF*38*B~"])
+        writer.write("SE*4*0001~")
+        content = writer.getvalue()
+        self.assertEqual(content, "ST*834*0001~\nREF*0F*A~\nREF*38*B~\nSE*4*0001~")
+        self.assertEqual(buf.getvalue().decode('utf8'), content)
+        self.assertEqual(writer.segment_count, 4)
+        self.assertEqual(writer.bytes_written, len(content))
+
+
+if __name__ == '__main__':
+    unittest.main()